@@ -1,24 +1,184 @@
-from fastapi import APIRouter, UploadFile, File
-from fastapi.responses import JSONResponse
-import os
+from fastapi import APIRouter, UploadFile, File, WebSocket, WebSocketDisconnect, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+import json
+import wave
+
+from ..core import config
+from ..core.logger import get_logger
+from ..langchain import aretrieve, astream_resolve_issue_with_guidelines
+from ..services.stt_service import StreamingTranscriber, get_engine
+from ..services.tts_service import get_tts_service
+from ..services.voice_service import VoiceSession
+from ..utils.audio_utils import read_wav_chunks, wav_header
+
+logger = get_logger("voice")
 
 router = APIRouter()
 
-UPLOAD_DIR = "uploads"
-os.makedirs(UPLOAD_DIR, exist_ok=True)
+# Speech decoding is CPU-bound, so it runs on its own small pool rather than
+# the event loop or the RAG pool
+_stt_executor = ThreadPoolExecutor(max_workers=config.STT_WORKERS, thread_name_prefix="stt")
+
+# Client-declared audio formats are checked before a transcriber is sized for them
+MAX_SAMPLE_RATE = 192000
+MAX_CHANNELS = 8
+
+def _new_transcriber(sample_rate: int, channels: int) -> StreamingTranscriber:
+    return StreamingTranscriber(
+        get_engine(config.STT_ENGINE), sample_rate, channels,
+        silence_ms=config.STT_VAD_SILENCE_MS,
+        partial_interval_ms=config.STT_PARTIAL_INTERVAL_MS,
+    )
 
 @router.post("/stt")
 async def speech_to_text(file: UploadFile = File(...)):
-    # Save uploaded audio
-    file_path = os.path.join(UPLOAD_DIR, file.filename)
-    with open(file_path, "wb") as f:
-        f.write(await file.read())
+    """
+    Transcribe an uploaded 16-bit PCM WAV file.
+
+    The upload is decoded in small chunks straight from the request's spooled
+    file, never read into memory whole.
+    """
+    def transcribe():
+        transcriber = None
+        finals = []
+        for rate, channels, data in read_wav_chunks(file.file):
+            if transcriber is None:
+                if not 0 < rate <= MAX_SAMPLE_RATE or not 0 < channels <= MAX_CHANNELS:
+                    raise ValueError(f"{rate} Hz, {channels} channels is out of range")
+                transcriber = _new_transcriber(rate, channels)
+            finals.extend(e["text"] for e in transcriber.feed(data) if e["type"] == "final")
+        if transcriber is not None:
+            finals.extend(e["text"] for e in transcriber.close())
+        return " ".join(t for t in finals if t)
+
+    loop = asyncio.get_running_loop()
+    try:
+        text = await loop.run_in_executor(_stt_executor, transcribe)
+    except (wave.Error, EOFError, ValueError) as e:
+        raise HTTPException(status_code=400, detail=f"Unsupported audio: {e}")
+    finally:
+        file.file.close()
+    return {"text": text}
+
+def _is_end(text: str) -> bool:
+    try:
+        return json.loads(text).get("type") == "end"
+    except (ValueError, AttributeError):
+        return False
+
+@router.websocket("/ws/stt")
+async def speech_to_text_stream(websocket: WebSocket, sample_rate: int = Query(16000, gt=0, le=MAX_SAMPLE_RATE),
+                                channels: int = Query(1, ge=1, le=MAX_CHANNELS)):
+    """
+    Streaming speech-to-text.
+
+    Send binary frames of little-endian 16-bit PCM at `sample_rate` (any
+    frame size), then a text frame {"type": "end"} to flush the last
+    utterance. The server replies with JSON events: "speech_start",
+    "partial" (transcript so far) and "final" (once the speaker pauses).
+    """
+    await websocket.accept()
+    loop = asyncio.get_running_loop()
+    try:
+        transcriber = await loop.run_in_executor(_stt_executor, _new_transcriber, sample_rate, channels)
+    except Exception as e:
+        await websocket.send_json({"type": "error", "detail": str(e)})
+        await websocket.close(code=1011)
+        return
 
-    # Mock transcription (later integrate Whisper / HuggingFace)
-    return {"text": f"Transcribed mock text from {file.filename}"}
+    try:
+        while True:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                break
+
+            if message.get("bytes"):
+                events = await loop.run_in_executor(_stt_executor, transcriber.feed, message["bytes"])
+            elif message.get("text") and _is_end(message["text"]):
+                for event in await loop.run_in_executor(_stt_executor, transcriber.close):
+                    await websocket.send_json(event)
+                await websocket.close()
+                break
+            else:
+                continue
+
+            for event in events:
+                await websocket.send_json(event)
+    except WebSocketDisconnect:
+        pass
+
+@router.websocket("/ws/session")
+async def voice_session(websocket: WebSocket, sample_rate: int = Query(16000, gt=0, le=MAX_SAMPLE_RATE),
+                        channels: int = Query(1, ge=1, le=MAX_CHANNELS), voice: str = None):
+    """
+    Full voice conversation over one socket: speech in, spoken answers out.
+
+    Send audio as for /ws/stt. Besides the transcript events the server
+    sends, per turn: "token" (answer text as generated), "sentence", and for
+    each sentence an "audio" event (sample rate and length) followed by one
+    binary frame of 16-bit mono PCM. A turn ends with "turn_end" carrying
+    per-stage timings, or is cut short by "barge_in" when the caller speaks
+    over it; clients should stop playback then. Clients should capture with
+    echo cancellation so the assistant's own voice is not taken for barge-in.
+    """
+    await websocket.accept()
+    loop = asyncio.get_running_loop()
+    try:
+        transcriber = await loop.run_in_executor(_stt_executor, _new_transcriber, sample_rate, channels)
+    except Exception as e:
+        await websocket.send_json({"type": "error", "detail": str(e)})
+        await websocket.close(code=1011)
+        return
+
+    try:
+        tts = get_tts_service()
+    except Exception:
+        logger.exception("Text-to-speech unavailable, voice session is text only")
+        tts = None
+    await websocket.send_json({"type": "ready", "tts": tts is not None,
+                               "sample_rate": tts.sample_rate if tts else None})
+
+    session = VoiceSession(
+        transcriber, tts, voice or config.TTS_VOICE,
+        retrieve=aretrieve, answer=astream_resolve_issue_with_guidelines,
+        send_json=websocket.send_json, send_bytes=websocket.send_bytes,
+        stt_executor=_stt_executor,
+    )
+    try:
+        while True:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                break
+            if message.get("bytes"):
+                await session.feed(message["bytes"])
+            elif message.get("text") and _is_end(message["text"]):
+                await session.close()
+                await websocket.close()
+                break
+    except WebSocketDisconnect:
+        pass
+    finally:
+        session.cancel()
 
 @router.post("/tts")
-async def text_to_speech(text: str):
-    # Mock audio generation (later integrate TTS)
-    fake_url = f"s3://bucket/audio/{text[:10]}.mp3"
-    return {"audio_url": fake_url}
+async def text_to_speech(text: str, voice: str = None):
+    """
+    Speak `text` as a streamed WAV (audio/wav).
+
+    Sentences are synthesized in parallel and served from the phrase cache
+    when possible; audio starts flowing as soon as the first sentence is
+    ready.
+    """
+    try:
+        tts = get_tts_service()
+    except Exception as e:
+        raise HTTPException(status_code=503, detail=f"Text-to-speech unavailable: {e}")
+
+    async def audio():
+        yield wav_header(tts.sample_rate)
+        async for chunk in tts.astream(text, voice or config.TTS_VOICE):
+            yield chunk
+
+    return StreamingResponse(audio(), media_type="audio/wav")
@@ -1,22 +1,48 @@
+import asyncio
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
 from passlib.context import CryptContext
 from jose import JWTError, jwt
 from datetime import datetime, timedelta
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
-from sqlalchemy.orm import Session
+from sqlalchemy import event
+from .core import config
 from .database import SessionLocal
 from .models.user import User
+from .services import db_service
 
 # JWT configuration
-SECRET_KEY = "your-super-secret-key-here-make-it-very-long-and-random"
+SECRET_KEY = config.JWT_SECRET_KEY
 ALGORITHM = "HS256"
-ACCESS_TOKEN_EXPIRE_MINUTES = 30
+ACCESS_TOKEN_EXPIRE_MINUTES = config.ACCESS_TOKEN_EXPIRE_MINUTES
 
 # Password hashing
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
 # OAuth2 scheme
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
+# For endpoints that also serve anonymous callers
+optional_oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token", auto_error=False)
+
+def _credentials_exception():
+    return HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Could not validate credentials",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+
+# -----------------------------
+# Password Hashing
+# -----------------------------
+# bcrypt is deliberately slow (tens of ms of CPU per call). It runs on its own
+# small pool so a burst of logins cannot take over the threads that serve
+# other requests; beyond AUTH_HASH_MAX_PENDING waiting calls, logins are
+# turned away with a 503 instead of queueing without bound.
+_hash_executor = ThreadPoolExecutor(max_workers=config.AUTH_HASH_WORKERS, thread_name_prefix="bcrypt")
+_hash_slots = threading.BoundedSemaphore(config.AUTH_HASH_MAX_PENDING)
 
 def get_password_hash(password):
     return pwd_context.hash(password)
@@ -24,12 +50,167 @@ def get_password_hash(password):
 def verify_password(plain_password, hashed_password):
     return pwd_context.verify(plain_password, hashed_password)
 
+async def _run_hashing(fn, *args):
+    if not _hash_slots.acquire(blocking=False):
+        raise HTTPException(status_code=503, detail="Too many logins in progress, try again shortly",
+                            headers={"Retry-After": "1"})
+    try:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(_hash_executor, fn, *args)
+    finally:
+        _hash_slots.release()
+
+async def aget_password_hash(password):
+    return await _run_hashing(get_password_hash, password)
+
+async def averify_password(plain_password, hashed_password):
+    return await _run_hashing(verify_password, plain_password, hashed_password)
+
+# -----------------------------
+# Login Rate Limiting
+# -----------------------------
+class LoginRateLimiter:
+    """
+    At most `attempts` logins per username in a sliding `window_seconds`.
+
+    Checked before any password hashing, so guessing against one account
+    costs no bcrypt time once the limit is hit. A successful login clears
+    the username's history. Counts are per process.
+    """
+
+    def __init__(self, attempts: int, window_seconds: float, max_usernames: int = 100000):
+        self.attempts = attempts
+        self.window_seconds = window_seconds
+        self.max_usernames = max_usernames
+        self._history = OrderedDict()  # username -> deque of attempt times
+        self._lock = threading.Lock()
+        self.rejected = 0
+
+    def check(self, username: str):
+        """Record an attempt, or raise 429 if the username is over its limit"""
+        now = time.monotonic()
+        key = username.lower()
+        with self._lock:
+            history = self._history.pop(key, None) or deque()
+            while history and history[0] <= now - self.window_seconds:
+                history.popleft()
+            self._history[key] = history
+            while len(self._history) > self.max_usernames:
+                self._history.popitem(last=False)
+            if len(history) >= self.attempts:
+                self.rejected += 1
+                retry_after = int(history[0] + self.window_seconds - now) + 1
+                raise HTTPException(status_code=429, detail="Too many login attempts, try again later",
+                                    headers={"Retry-After": str(retry_after)})
+            history.append(now)
+
+    def reset(self, username: str):
+        with self._lock:
+            self._history.pop(username.lower(), None)
+
+login_limiter = LoginRateLimiter(config.AUTH_LOGIN_ATTEMPTS, config.AUTH_LOGIN_WINDOW_SECONDS)
+
+# -----------------------------
+# Tokens
+# -----------------------------
 def create_access_token(data: dict):
     to_encode = data.copy()
     expire = datetime.utcnow() + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     to_encode.update({"exp": expire})
     return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
 
+def decode_token(token: str) -> dict:
+    """Claims of a valid token; raises 401 otherwise"""
+    if not token:
+        raise _credentials_exception()
+    try:
+        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+    except JWTError:
+        raise _credentials_exception()
+    if payload.get("sub") is None:
+        raise _credentials_exception()
+    return payload
+
+class PrincipalCache:
+    """
+    Token -> authenticated user, so repeat requests skip the JWT decode and
+    the user query.
+
+    Entries live for `ttl_seconds` at most, and never past the token's own
+    expiry. Updating or deleting a user drops its entries at once in this
+    process; other workers pick the change up within the TTL.
+    """
+
+    def __init__(self, ttl_seconds: float, max_entries: int):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # token -> (user, expires_at)
+        self._tokens_by_user = {}      # user id -> set of tokens
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def get(self, token: str):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(token)
+            if entry is not None:
+                user, expires_at = entry
+                if expires_at > now:
+                    self._entries.move_to_end(token)
+                    self.hits += 1
+                    return user
+                self._remove(token)
+            self.misses += 1
+            return None
+
+    def put(self, token: str, user, token_expires_at: float = None):
+        if self.ttl_seconds <= 0:
+            return
+        now = time.monotonic()
+        expires_at = now + self.ttl_seconds
+        if token_expires_at is not None:
+            expires_at = min(expires_at, now + token_expires_at - time.time())
+        with self._lock:
+            self._remove(token)
+            self._entries[token] = (user, expires_at)
+            self._tokens_by_user.setdefault(user.id, set()).add(token)
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+
+    def invalidate_user(self, user_id: int):
+        with self._lock:
+            for token in self._tokens_by_user.pop(user_id, ()):
+                self._entries.pop(token, None)
+            self.invalidations += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._tokens_by_user.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses,
+                    "invalidations": self.invalidations, "entries": len(self._entries)}
+
+    def _remove(self, token: str):
+        entry = self._entries.pop(token, None)
+        if entry is not None:
+            tokens = self._tokens_by_user.get(entry[0].id)
+            if tokens is not None:
+                tokens.discard(token)
+                if not tokens:
+                    del self._tokens_by_user[entry[0].id]
+
+principal_cache = PrincipalCache(config.AUTH_CACHE_TTL_SECONDS, config.AUTH_CACHE_MAX_ENTRIES)
+
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _user_changed(mapper, connection, target):
+    principal_cache.invalidate_user(target.id)
+
 def get_db():
     db = SessionLocal()
     try:
@@ -37,21 +218,38 @@ def get_db():
     finally:
         db.close()
 
-def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
-    credentials_exception = HTTPException(
-        status_code=status.HTTP_401_UNAUTHORIZED,
-        detail="Could not validate credentials",
-        headers={"WWW-Authenticate": "Bearer"},
-    )
+def get_user(username: str):
+    """A detached User, safe to share between requests, or None"""
+    db = SessionLocal()
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        username: str = payload.get("sub")
-        if username is None:
-            raise credentials_exception
-    except JWTError:
-        raise credentials_exception
-    
-    user = db.query(User).filter(User.username == username).first()
+        user = db.query(User).filter(User.username == username).first()
+        if user is not None:
+            db.expunge(user)
+        return user
+    finally:
+        db.close()
+
+async def authenticate(token: str) -> User:
+    """
+    The user a bearer token belongs to; raises 401 if it is invalid.
+
+    Cached tokens are answered from memory without touching the database or
+    a worker thread. Also usable where the token cannot come from a header,
+    e.g. EventSource connections that pass it as a query parameter.
+    """
+    if token:
+        user = principal_cache.get(token)
+        if user is not None:
+            return user
+    payload = decode_token(token)
+    user = await db_service.run(get_user, payload["sub"])
     if user is None:
-        raise credentials_exception
-    return user
\ No newline at end of file
+        raise _credentials_exception()
+    principal_cache.put(token, user, payload.get("exp"))
+    return user
+
+async def get_current_user(token: str = Depends(oauth2_scheme)):
+    return await authenticate(token)
+
+def auth_stats() -> dict:
+    return {"principal_cache": principal_cache.stats(), "login_rate_limited": login_limiter.rejected}
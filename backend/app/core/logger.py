@@ -0,0 +1,59 @@
+import json
+import logging
+import sys
+import time
+from contextvars import ContextVar
+
+from . import config
+
+# Set by the request middleware; follows the request into spans, executor
+# calls that copy the context, and background ingestion jobs
+request_id = ContextVar("request_id", default=None)
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line: time, level, logger, message, request ID and any `fields`"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(record.created)) + f".{int(record.msecs):03d}Z",
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        rid = getattr(record, "request_id", None) or request_id.get()
+        if rid:
+            entry["request_id"] = rid
+        entry.update(getattr(record, "fields", None) or {})
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class TextFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        line = f"{self.formatTime(record)} {record.levelname} {record.name} [{request_id.get() or '-'}] {record.getMessage()}"
+        fields = getattr(record, "fields", None)
+        if fields:
+            line += " " + " ".join(f"{k}={v}" for k, v in fields.items())
+        if record.exc_info:
+            line += "\n" + self.formatException(record.exc_info)
+        return line
+
+
+_root = logging.getLogger("app")
+if not _root.handlers:
+    _handler = logging.StreamHandler(sys.stderr)
+    _handler.setFormatter(JsonFormatter() if config.LOG_FORMAT == "json" else TextFormatter())
+    _root.addHandler(_handler)
+    _root.setLevel(config.LOG_LEVEL.upper())
+    _root.propagate = False
+
+
+def get_logger(name: str) -> logging.Logger:
+    """A logger under "app"; pass structured data as log(..., extra={"fields": {...}})"""
+    return logging.getLogger(f"app.{name}")
+
+
+def log_event(logger: logging.Logger, message: str, level: int = logging.INFO, **fields):
+    logger.log(level, message, extra={"fields": fields})
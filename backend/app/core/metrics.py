@@ -0,0 +1,159 @@
+import bisect
+import threading
+
+# Seconds; fine steps below a second for per-stage timings, coarse above for LLM calls and uploads
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+_registry = []
+_registry_lock = threading.Lock()
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names, values, extra: str = "") -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value) -> str:
+    return repr(float(value)) if value != float("inf") else "+Inf"
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help: str, labelnames=()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+        with _registry_lock:
+            _registry.append(self)
+
+    def _key(self, labels: dict) -> tuple:
+        return tuple(str(labels.get(n, "")) for n in self.labelnames)
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            items = sorted(self._values.items())
+            lines += self._samples(items)
+        return lines
+
+
+class Counter(_Metric):
+    """Monotonic count, e.g. errors per stage"""
+
+    kind = "counter"
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def _samples(self, items) -> list:
+        return [f"{self.name}{_labels(self.labelnames, k)} {_number(v)}" for k, v in items]
+
+
+class Gauge(_Metric):
+    """Value that goes up and down, e.g. requests in flight"""
+
+    kind = "gauge"
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels):
+        self.inc(-amount, **labels)
+
+    def set(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def _samples(self, items) -> list:
+        return [f"{self.name}{_labels(self.labelnames, k)} {_number(v)}" for k, v in items]
+
+
+class Histogram(_Metric):
+    """
+    Cumulative-bucket histogram of durations in seconds, as Prometheus expects.
+
+    Quantiles are computed at query time, e.g.
+    histogram_quantile(0.99, rate(stage_duration_seconds_bucket[5m])).
+    """
+
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        slot = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            entry[0][slot] += 1
+            entry[1] += value
+
+    def _samples(self, items) -> list:
+        lines = []
+        for key, (counts, total) in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = f'le="{_number(bound)}"'
+                lines.append(f"{self.name}_bucket{_labels(self.labelnames, key, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, key)} {_number(total)}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, key)} {cumulative}")
+        return lines
+
+
+def render() -> str:
+    """Every registered metric in the Prometheus text exposition format"""
+    with _registry_lock:
+        metrics = list(_registry)
+    lines = []
+    for metric in metrics:
+        lines += metric.render()
+    return "\n".join(lines) + "\n"
+
+
+# -----------------------------
+# Application Metrics
+# -----------------------------
+http_request_duration = Histogram(
+    "http_request_duration_seconds", "HTTP request latency, until the response body is complete",
+    ["method", "route", "status"],
+)
+http_requests_in_flight = Gauge("http_requests_in_flight", "HTTP requests being served")
+stage_duration = Histogram(
+    "stage_duration_seconds", "Time spent in each processing stage (embedding, search, LLM, commits, ...)",
+    ["stage"],
+)
+stage_errors = Counter("stage_errors_total", "Stages that ended with an exception", ["stage"])
+voice_turn_stage = Histogram(
+    "voice_turn_stage_seconds", "Voice turn milestones, measured from the final transcript",
+    ["stage"],
+)
+llm_attempts = Counter(
+    "llm_attempts_total",
+    "LLM backend requests by outcome (ok, timeout, error, cancelled hedge, queue_timeout, rejected by the breaker)",
+    ["backend", "outcome"],
+)
+llm_hedges = Counter("llm_hedged_requests_total", "Second requests sent for slow LLM calls", ["backend"])
+llm_circuit_open = Gauge("llm_circuit_open", "1 while the LLM circuit breaker is open", ["backend"])
+llm_fallbacks = Counter("llm_fallback_answers_total", "Answers built from retrieved text without the LLM", ["reason"])
+reservations = Counter(
+    "reservation_requests_total", "Reservation attempts by outcome (booked, full, invalid)", ["outcome"],
+)
@@ -0,0 +1,15 @@
+import time
+from contextlib import contextmanager
+
+# Seconds spent initializing each subsystem, in load order
+timings = {}
+
+
+@contextmanager
+def timed(name: str):
+    """Record how long a subsystem takes to initialize"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings[name] = round(time.perf_counter() - start, 4)
@@ -0,0 +1,217 @@
+import asyncio
+import contextvars
+import logging
+import os
+import sys
+import threading
+import time
+import uuid
+from collections import Counter, deque
+from contextlib import contextmanager
+
+from . import config, metrics
+from .logger import get_logger, log_event, request_id
+
+logger = get_logger("http")
+
+# (stage, seconds) spans recorded during the current request
+_trace = contextvars.ContextVar("trace", default=None)
+
+
+# -----------------------------
+# Spans
+# -----------------------------
+@contextmanager
+def span(stage: str):
+    """
+    Time a block as one stage of the current request.
+
+    The duration goes to the stage_duration_seconds histogram and to the
+    request's stage breakdown in its log line; an exception also counts in
+    stage_errors_total. Works in sync and async code and in worker threads
+    started with run_in_executor() below.
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    except (asyncio.CancelledError, GeneratorExit):
+        raise
+    except BaseException:
+        metrics.stage_errors.inc(stage=stage)
+        raise
+    finally:
+        record_stage(stage, time.perf_counter() - start)
+
+
+def record_stage(stage: str, seconds: float):
+    """Record a duration measured some other way, e.g. time to an LLM's first token"""
+    metrics.stage_duration.observe(seconds, stage=stage)
+    trace = _trace.get()
+    if trace is not None:
+        trace.append((stage, seconds))
+
+
+def run_in_executor(executor, fn, *args):
+    """loop.run_in_executor, carrying the request ID and trace into the worker thread"""
+    loop = asyncio.get_running_loop()
+    return loop.run_in_executor(executor, contextvars.copy_context().run, fn, *args)
+
+
+# -----------------------------
+# Sampling Profiler
+# -----------------------------
+# Leaf frames of threads that are idle rather than working
+_IDLE_LEAVES = {("threading.py", "wait"), ("selectors.py", "select"), ("thread.py", "_worker"),
+                ("queue.py", "get"), ("base_events.py", "_run_once")}
+
+
+class SamplingProfiler:
+    """
+    Samples every thread's Python stack each `interval_ms` into a ring buffer.
+
+    One background thread serves all requests, so the cost does not grow with
+    traffic. After a slow request, dump() writes the samples taken while it
+    ran as folded stacks ("thread;outer;...;inner count" per line), ready for
+    flamegraph.pl or speedscope. Requests share the event loop thread, so a
+    dump shows everything the process did during that window, not only that
+    request's own code. Idle threads are left out.
+    """
+
+    def __init__(self, interval_ms: float, window_seconds: float = 120):
+        self.interval = interval_ms / 1000
+        self._samples = deque(maxlen=max(1, int(window_seconds / self.interval)))  # (time, [stacks])
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def start(self):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="profiler", daemon=True)
+                self._thread.start()
+
+    def folded(self, since: float, until: float) -> Counter:
+        stacks = Counter()
+        for moment, sampled in list(self._samples):
+            if since <= moment <= until:
+                stacks.update(sampled)
+        return stacks
+
+    def dump(self, path: str, since: float, until: float) -> int:
+        """Write the window's folded stacks to `path`; empty means every thread was waiting on I/O"""
+        stacks = self.folded(since, until)
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            for stack, count in stacks.most_common():
+                f.write(f"{stack} {count}\n")
+        return sum(stacks.values())
+
+    def _run(self):
+        own = threading.get_ident()
+        while True:
+            time.sleep(self.interval)
+            names = {t.ident: t.name for t in threading.enumerate()}
+            sampled = []
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                code = frame.f_code
+                if (os.path.basename(code.co_filename), code.co_name) in _IDLE_LEAVES:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                    frame = frame.f_back
+                stack.append(names.get(ident, str(ident)))
+                sampled.append(";".join(reversed(stack)))
+            self._samples.append((time.perf_counter(), sampled))
+
+
+# -----------------------------
+# Request Middleware
+# -----------------------------
+# Polled by probes and scrapers; logged at DEBUG so they do not drown real traffic
+_QUIET_ROUTES = {"/metrics", "/healthz", "/readyz"}
+
+
+class ObservabilityMiddleware:
+    """
+    Gives every request an ID, times it and records where the time went.
+
+    The ID comes from an incoming X-Request-ID header or is generated, and
+    is echoed on the response. Each request is observed in the
+    http_request_duration_seconds histogram, labelled by route template, and
+    logged once with its status, duration and per-stage totals from span().
+    Requests slower than `slow_ms` are logged as warnings and, with a
+    profiler, get a folded-stack dump in `profile_dir`. Websockets get an ID
+    for their logs but are not timed.
+    """
+
+    def __init__(self, app, slow_ms: float = None, profiler: SamplingProfiler = None, profile_dir: str = None):
+        self.app = app
+        self.slow_ms = config.SLOW_REQUEST_MS if slow_ms is None else slow_ms
+        self.profiler = profiler
+        self.profile_dir = profile_dir or config.PROFILE_DIR
+        if profiler is not None:
+            profiler.start()
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] not in ("http", "websocket"):
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict(scope.get("headers") or [])
+        rid = headers.get(b"x-request-id", b"").decode("latin-1")[:64] or uuid.uuid4().hex[:16]
+        rid_token = request_id.set(rid)
+        if scope["type"] == "websocket":
+            try:
+                await self.app(scope, receive, send)
+            finally:
+                request_id.reset(rid_token)
+            return
+
+        trace = []
+        trace_token = _trace.set(trace)
+        status = [500]
+
+        async def send_with_id(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+                message = {**message, "headers": list(message.get("headers", [])) + [(b"x-request-id", rid.encode("latin-1"))]}
+            await send(message)
+
+        metrics.http_requests_in_flight.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_id)
+        except Exception:
+            logger.exception("Unhandled error", extra={"fields": {"path": scope.get("path")}})
+            raise
+        finally:
+            elapsed = time.perf_counter() - start
+            metrics.http_requests_in_flight.dec()
+            route = scope.get("route")
+            route = getattr(route, "path", None) or "unmatched"
+            metrics.http_request_duration.observe(elapsed, method=scope["method"], route=route, status=status[0])
+            self._log(scope, route, status[0], elapsed, trace, start)
+            _trace.reset(trace_token)
+            request_id.reset(rid_token)
+
+    def _log(self, scope, route: str, status: int, elapsed: float, trace: list, start: float):
+        stages = {}
+        for stage, seconds in trace:
+            stages[stage] = stages.get(stage, 0.0) + seconds
+        duration_ms = elapsed * 1000
+        slow = self.slow_ms > 0 and duration_ms >= self.slow_ms
+        fields = {
+            "method": scope["method"], "route": route, "path": scope.get("path"), "status": status,
+            "duration_ms": round(duration_ms, 1),
+            "stages_ms": {stage: round(seconds * 1000, 1) for stage, seconds in stages.items()},
+        }
+        if slow and self.profiler is not None:
+            path = os.path.join(self.profile_dir, f"{time.strftime('%Y%m%d-%H%M%S')}-{request_id.get()}.folded")
+            # Written off the event loop; the samples up to now are already buffered
+            asyncio.get_running_loop().run_in_executor(None, self.profiler.dump, path, start, time.perf_counter())
+            fields["profile"] = path
+        level = logging.WARNING if slow else logging.DEBUG if route in _QUIET_ROUTES else logging.INFO
+        log_event(logger, "slow request" if slow else "request", level, **fields)
@@ -1,14 +1,131 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+import threading
+from .core import config
+from .core.logger import get_logger, log_event
 
-SQLALCHEMY_DATABASE_URL = "sqlite:///./restaurant.db"
-engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False})
+logger = get_logger("database")
 
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+SQLALCHEMY_DATABASE_URL = config.DATABASE_URL
+
+# -----------------------------
+# Engine
+# -----------------------------
+def _is_sqlite(url: str) -> bool:
+    return url.startswith("sqlite")
+
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    # WAL lets readers run alongside the single writer, and with
+    # synchronous=NORMAL a commit is an append to the WAL rather than an
+    # fsync of the main database
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute(f"PRAGMA busy_timeout={config.DB_BUSY_TIMEOUT_MS}")
+    cursor.execute("PRAGMA foreign_keys=ON")
+    cursor.execute("PRAGMA temp_store=MEMORY")
+    cursor.execute("PRAGMA cache_size=-16000")  # 16 MB page cache per connection
+    cursor.close()
+
+def create_db_engine(url: str, **kwargs):
+    """
+    Engine with pooling and per-backend tuning.
+
+    SQLite connections get WAL mode and a busy timeout so concurrent writers
+    queue for the lock instead of failing; other backends (Postgres) get
+    pre-ping so dropped connections are replaced transparently.
+    """
+    options = {
+        "pool_size": config.DB_POOL_SIZE,
+        "max_overflow": config.DB_MAX_OVERFLOW,
+        "pool_timeout": config.DB_POOL_TIMEOUT_SECONDS,
+    }
+    if _is_sqlite(url):
+        options["connect_args"] = {"check_same_thread": False, "timeout": config.DB_BUSY_TIMEOUT_MS / 1000}
+    else:
+        options["pool_pre_ping"] = True
+    options.update(kwargs)
+
+    engine = create_engine(url, **options)
+    if _is_sqlite(url):
+        event.listen(engine, "connect", _set_sqlite_pragmas)
+    return engine
+
+engine = create_db_engine(SQLALCHEMY_DATABASE_URL)
+
+# Objects stay usable after commit, so handlers need no refresh() round trip
+SessionLocal = sessionmaker(autocommit=False, autoflush=False, expire_on_commit=False, bind=engine)
 Base = declarative_base()
 
+# -----------------------------
+# Async Engine (optional)
+# -----------------------------
+_ASYNC_DRIVERS = {"sqlite": "sqlite+aiosqlite", "postgresql": "postgresql+asyncpg", "postgres": "postgresql+asyncpg"}
+_async_sessionmaker = None
+_async_lock = threading.Lock()
+
+def async_database_url(url: str) -> str:
+    """The async-driver equivalent of a sync database URL"""
+    scheme, rest = url.split("://", 1)
+    return f"{_ASYNC_DRIVERS.get(scheme.split('+')[0], scheme)}://{rest}"
+
+def get_async_sessionmaker():
+    """AsyncSession factory, created on first use (needs aiosqlite or asyncpg)"""
+    global _async_sessionmaker
+    if _async_sessionmaker is None:
+        with _async_lock:
+            if _async_sessionmaker is None:
+                from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+                url = async_database_url(SQLALCHEMY_DATABASE_URL)
+                options = {"pool_size": config.DB_POOL_SIZE, "max_overflow": config.DB_MAX_OVERFLOW}
+                if _is_sqlite(url):
+                    options["connect_args"] = {"timeout": config.DB_BUSY_TIMEOUT_MS / 1000}
+                else:
+                    options["pool_pre_ping"] = True
+                async_engine = create_async_engine(url, **options)
+                if _is_sqlite(url):
+                    event.listen(async_engine.sync_engine, "connect", _set_sqlite_pragmas)
+                _async_sessionmaker = async_sessionmaker(async_engine, expire_on_commit=False)
+    return _async_sessionmaker
+
+def _migrate(bind):
+    """Bring tables created by older versions up to date (columns, then indexes)"""
+    from sqlalchemy import inspect, text
+
+    inspector = inspect(bind)
+    for table in Base.metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+        existing = {c["name"] for c in inspector.get_columns(table.name)}
+        with bind.begin() as conn:
+            for column in table.columns:
+                if column.name not in existing:
+                    column_type = column.type.compile(dialect=bind.dialect)
+                    conn.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}"))
+                    log_event(logger, "Added column", table=table.name, column=column.name)
+            if "updated_at" in table.columns and "updated_at" not in existing and "created_at" in table.columns:
+                conn.execute(text(f"UPDATE {table.name} SET updated_at = created_at WHERE updated_at IS NULL"))
+        for index in table.indexes:
+            index.create(bind=bind, checkfirst=True)
+    if inspector.has_table("orders"):
+        from .models.order import number_changes
+        with bind.begin() as conn:
+            number_changes(conn)
+
 def init_db():
     # Import all models here to ensure they are registered
-    from .models import order, reservation, user
-    Base.metadata.create_all(bind=engine)
\ No newline at end of file
+    from .models import order, reservation, slot_capacity, user
+    Base.metadata.create_all(bind=engine)
+    _migrate(engine)
+
+def open_tenant_database(path: str):
+    """(engine, sessionmaker) for one restaurant's own SQLite file, created if missing"""
+    from .models import order, reservation, slot_capacity, user
+    tenant_engine = create_db_engine(f"sqlite:///{path}", pool_size=config.TENANT_DB_POOL_SIZE,
+                                     max_overflow=config.TENANT_DB_POOL_SIZE)
+    Base.metadata.create_all(bind=tenant_engine, tables=[order.Order.__table__, reservation.Reservation.__table__,
+                                                          slot_capacity.SlotCapacity.__table__])
+    _migrate(tenant_engine)
+    return tenant_engine, sessionmaker(autocommit=False, autoflush=False, expire_on_commit=False, bind=tenant_engine)
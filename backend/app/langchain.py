@@ -1,92 +1,351 @@
 # backend/langchain.py
 from langchain_community.document_loaders import PyPDFLoader, TextLoader, Docx2txtLoader
 from langchain_text_splitters import RecursiveCharacterTextSplitter
-from langchain_community.embeddings import HuggingFaceEmbeddings
 from langchain_community.vectorstores import FAISS
-import google.generativeai as genai
 import os
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from langchain.prompts import PromptTemplate
 from langchain_core.documents import Document
+from .core import config, metrics
+from .core.startup import timed
+from .core.logger import get_logger
+from .core.tracing import record_stage, run_in_executor, span
+from .services.cache_service import AnswerCache
+from .services.context_service import ContextBudgeter
+from .services.vectorstore_service import IncrementalIndex, snapshot_dir, source_name
+from .services.ingest_service import IngestionQueue
+from .services.parsing_service import DocumentParser
+from .services.shared_index import SharedIndex
+from .services.embedding_service import BatchingEmbeddings
+from .services.retrieval_service import hybrid_search
+from .services.nlp_service import IntentRouter
+from .services.tenant_service import Tenant, TenantRouter
+from .services.llm_service import (
+    CircuitOpenError, GeminiBackend, OpenAICompatibleBackend, ResilientLLM,
+)
+from . import database
 
 # -----------------------------
 # Configuration
 # -----------------------------
-DB_PATH = "faiss_index"
+logger = get_logger("rag")
+
+DB_PATH = config.FAISS_INDEX_DIR
+SEED_PATH = "faiss_index"
 DOC_PATH = "backend/guidelines.txt"
 
-# Initialize components
-embedding_model = HuggingFaceEmbeddings(model_name="sentence-transformers/all-MiniLM-L6-v2")
 text_splitter = RecursiveCharacterTextSplitter(
     chunk_size=1000,  # Increased for better context
     chunk_overlap=200,  # Increased overlap for better continuity
     separators=["\n\n", "\n", " ", ""]  # Better splitting logic
 )
 
+# -----------------------------
+# Lazy Components
+# -----------------------------
+# The embedding model, FAISS index and Gemini client are loaded on first use
+# (or by warm_up() at app startup) rather than at import, so importing this
+# module stays cheap. Tests and benchmarks may assign these globals directly.
+embedding_model = None
+knowledge_index = None
+gemini_model = None
+llm_client = None
+_init_lock = threading.RLock()
+
+def get_embedding_model():
+    global embedding_model
+    if embedding_model is None:
+        with _init_lock:
+            if embedding_model is None:
+                with timed("embedding_model"):
+                    from langchain_community.embeddings import HuggingFaceEmbeddings
+                    # All embedding calls, query and ingestion, share one micro-batching front
+                    embedding_model = BatchingEmbeddings(
+                        HuggingFaceEmbeddings(model_name="sentence-transformers/all-MiniLM-L6-v2"),
+                        max_batch_size=config.EMBED_MAX_BATCH_SIZE,
+                        max_wait_ms=config.EMBED_MAX_WAIT_MS,
+                        cache_size=config.EMBED_CACHE_SIZE,
+                    )
+    return embedding_model
+
+def get_knowledge_index():
+    global knowledge_index
+    if knowledge_index is None:
+        with _init_lock:
+            if knowledge_index is None:
+                with timed("faiss_index"):
+                    knowledge_index = open_knowledge_index(DB_PATH, DOC_PATH, seed_path=SEED_PATH)
+    return knowledge_index
+
+def open_knowledge_index(path: str, doc_path: str = None, tenant_id=None, seed_path: str = None):
+    """Load (or create) the knowledge index stored at `path`, for restaurant `tenant_id`"""
+    embeddings = get_embedding_model()
+    if config.FAISS_MMAP:
+        return SharedIndex(
+            path, embeddings, load_writer=lambda: _load_writable_index(path, doc_path, seed_path),
+            check_interval=config.FAISS_GENERATION_CHECK_SECONDS,
+            grace_seconds=config.FAISS_GENERATION_GRACE_SECONDS,
+            on_change=lambda: answer_cache.invalidate(tenant_id),
+        )
+    return IncrementalIndex(path, embeddings, initialize_vectorstore(path, doc_path, seed_path),
+                            config.FAISS_COMPACT_AFTER_BYTES)
+
+def _load_writable_index(path: str, doc_path: str = None, seed_path: str = None):
+    # Used by SharedIndex under its cross-process lock, so compaction runs inline
+    return IncrementalIndex(path, get_embedding_model(), initialize_vectorstore(path, doc_path, seed_path),
+                            config.FAISS_COMPACT_AFTER_BYTES, background_compaction=False)
+
+def get_gemini_model():
+    global gemini_model
+    if gemini_model is None:
+        with _init_lock:
+            if gemini_model is None:
+                with timed("gemini_client"):
+                    import google.generativeai as genai
+                    gemini_model = genai.GenerativeModel("gemini-1.5-flash")
+    return gemini_model
+
+def get_llm_client() -> ResilientLLM:
+    """The LLM behind deadlines, retries, hedging and a circuit breaker"""
+    global llm_client
+    if llm_client is None:
+        with _init_lock:
+            if llm_client is None:
+                if config.LLM_BACKEND == "openai":
+                    backend = OpenAICompatibleBackend(config.LLM_BASE_URL, config.LLM_MODEL, config.LLM_API_KEY,
+                                                      max_connections=config.LLM_MAX_CONCURRENCY)
+                else:
+                    # Looks the model up on every call, so assigning gemini_model swaps it
+                    backend = GeminiBackend(get_gemini_model)
+                llm_client = ResilientLLM(
+                    backend,
+                    max_concurrency=config.LLM_MAX_CONCURRENCY,
+                    timeout=config.LLM_TIMEOUT_SECONDS,
+                    attempt_timeout=config.LLM_ATTEMPT_TIMEOUT_SECONDS,
+                    max_retries=config.LLM_MAX_RETRIES,
+                    retry_base_ms=config.LLM_RETRY_BASE_MS,
+                    retry_max_ms=config.LLM_RETRY_MAX_MS,
+                    hedge_percentile=config.LLM_HEDGE_PERCENTILE,
+                    hedge_min_samples=config.LLM_HEDGE_MIN_SAMPLES,
+                    breaker_failures=config.LLM_BREAKER_FAILURES,
+                    breaker_reset_seconds=config.LLM_BREAKER_RESET_SECONDS,
+                )
+    return llm_client
+
+def warm_up():
+    """Load every lazy component; called in the background at app startup"""
+    get_embedding_model()
+    get_knowledge_index()
+    if config.LLM_BACKEND != "openai":
+        get_gemini_model()
+    get_llm_client()
+
+def embedding_stats() -> dict:
+    """Batching and cache counters of the embedding service, once loaded"""
+    if embedding_model is None or not hasattr(embedding_model, "stats"):
+        return {}
+    return embedding_model.stats()
+
+def context_stats() -> dict:
+    """Context tokens retrieved versus sent to the LLM"""
+    return context_budgeter.stats()
+
+def llm_stats() -> dict:
+    """Retries, hedges, breaker state and latency of the LLM client, once created"""
+    return llm_client.stats() if llm_client is not None else {}
+
+def component_status() -> dict:
+    """Which lazy components are loaded"""
+    status = {
+        "embedding_model": embedding_model is not None,
+        "faiss_index": knowledge_index is not None,
+    }
+    if config.LLM_BACKEND != "openai":
+        status["gemini_client"] = gemini_model is not None
+    status["llm_client"] = llm_client is not None
+    return status
+
 # -----------------------------
 # Vector Store Management
 # -----------------------------
-def initialize_vectorstore():
-    """Initialize or load the vector store"""
-    if not os.path.exists(DB_PATH):
+def initialize_vectorstore(path: str = DB_PATH, doc_path: str = DOC_PATH, seed_path: str = None):
+    """
+    Initialize or load the vector store at `path`.
+
+    A new one is copied from the index at `seed_path` if there is one, else
+    built from `doc_path`. The seed itself is never written, since
+    compaction replaces and deletes the files of the index it runs on.
+    """
+    embeddings = get_embedding_model()
+    # SharedIndex creates `path` for its lock file before the index exists
+    if not os.path.exists(os.path.join(snapshot_dir(path), "index.faiss")):
         print("⚡ Building new FAISS index...")
+        if seed_path and os.path.exists(os.path.join(seed_path, "index.faiss")):
+            vectorstore = FAISS.load_local(seed_path, embeddings, allow_dangerous_deserialization=True)
+            vectorstore.save_local(path)
+            print(f"✅ Copied index from the seed in {seed_path}")
         # Create from guidelines.txt
-        if os.path.exists(DOC_PATH):
-            with open(DOC_PATH, "r", encoding="utf-8") as f:
+        elif doc_path and os.path.exists(doc_path):
+            with open(doc_path, "r", encoding="utf-8") as f:
                 guidelines_text = f.read()
             
             documents = [Document(page_content=guidelines_text)]
             chunks = text_splitter.split_documents(documents)
             
-            vectorstore = FAISS.from_documents(chunks, embedding_model)
-            vectorstore.save_local(DB_PATH)
+            vectorstore = FAISS.from_documents(chunks, embeddings)
+            vectorstore.save_local(path)
             print(f"✅ Created index with {len(chunks)} chunks from guidelines.txt")
         else:
             # Create empty vectorstore if no guidelines file
-            vectorstore = FAISS.from_texts(["Welcome to the restaurant assistant."], embedding_model)
-            vectorstore.save_local(DB_PATH)
+            vectorstore = FAISS.from_texts(["Welcome to the restaurant assistant."], embeddings)
+            vectorstore.save_local(path)
             print("✅ Created empty index (no guidelines.txt found)")
     else:
         print("✅ Loading FAISS index from disk...")
-        vectorstore = FAISS.load_local(DB_PATH, embedding_model, allow_dangerous_deserialization=True)
+        vectorstore = FAISS.load_local(snapshot_dir(path), embeddings, allow_dangerous_deserialization=True)
     
     return vectorstore
 
-# Initialize the vector store
-vectorstore = initialize_vectorstore()
-retriever = vectorstore.as_retriever(search_type="similarity", search_kwargs={"k": 3})  # Increased to 3 results
+# -----------------------------
+# Tenants
+# -----------------------------
+# With MULTI_TENANT each restaurant gets its own database and index, opened
+# lazily and kept in LRU pools. Tenant None is the shared default store.
+# New restaurants start with an empty knowledge base rather than the
+# default guidelines.
+default_tenant = Tenant(
+    None,
+    session_factory=lambda: database.SessionLocal(),
+    knowledge_index=lambda: get_knowledge_index(),
+)
+tenant_router = TenantRouter(
+    config.TENANT_DATA_DIR,
+    open_database=database.open_tenant_database,
+    open_index=open_knowledge_index,
+    default=default_tenant,
+    max_databases=config.TENANT_MAX_OPEN_DATABASES,
+    max_indexes=config.TENANT_MAX_OPEN_INDEXES,
+)
+
+# Answers keyed on restaurant, question and retrieved chunks; a restaurant's
+# answers are invalidated whenever its index changes
+answer_cache = AnswerCache(
+    max_entries=config.ANSWER_CACHE_MAX_ENTRIES,
+    ttl_seconds=config.ANSWER_CACHE_TTL_SECONDS,
+    similarity_threshold=config.ANSWER_CACHE_SIMILARITY_THRESHOLD,
+)
 
 # -----------------------------
 # Document Processing
 # -----------------------------
-def add_document_to_vectorstore(file_path: str):
-    """Process uploaded document and add to existing vector store"""
-    
-    # Determine loader based on file type
+def get_loader(file_path: str):
+    """Pick a document loader based on file type"""
     if file_path.endswith('.pdf'):
-        loader = PyPDFLoader(file_path)
+        return PyPDFLoader(file_path)
     elif file_path.endswith('.txt'):
-        loader = TextLoader(file_path)
+        return TextLoader(file_path)
     elif file_path.endswith('.docx'):
-        loader = Docx2txtLoader(file_path)
-    else:
-        raise ValueError("Unsupported file format. Please upload PDF, TXT, or DOCX files.")
-    
-    # Load and split document
-    documents = loader.load()
-    chunks = text_splitter.split_documents(documents)
-    
-    # Add to existing vector store
-    global vectorstore
-    vectorstore.add_documents(chunks)
-    vectorstore.save_local(DB_PATH)
+        return Docx2txtLoader(file_path)
+    raise ValueError("Unsupported file format. Please upload PDF, TXT, or DOCX files.")
+
+def load_document(file_path: str, job=None):
+    """Load a PDF, TXT or DOCX file and split it into chunks"""
+    loader = get_loader(file_path)
+
+    # Load page by page so progress can be reported, then split
+    documents = []
+    for page in loader.lazy_load():
+        documents.append(page)
+        if job:
+            job.pages_parsed += 1
+    return text_splitter.split_documents(documents)
+
+# Uploads are parsed a page range at a time, PDF pages in worker processes;
+# chunking settings match text_splitter above
+document_parser = DocumentParser(
+    processes=config.INGEST_PARSE_PROCESSES,
+    pages_per_task=config.INGEST_PAGES_PER_TASK,
+    chunk_size=1000,
+    chunk_overlap=200,
+)
+
+def add_document_to_vectorstore(file_path: str, job=None, tenant: Tenant = None):
+    """
+    Process uploaded document and add it to the vector store.
+
+    The document is parsed, embedded and indexed as a stream of page
+    ranges, so memory stays flat however long it is. Re-uploading a file
+    replaces its previous version: unchanged chunks are kept as-is and only
+    new or removed chunks touch the index. When run from the ingestion
+    queue, progress is reported on `job`.
+    """
+    tenant = tenant or default_tenant
+    source = source_name(file_path)
+    if job:
+        job.status = "parsing"
+        job.pages_total = document_parser.count_pages(file_path)
+    parse_seconds = [0.0]
+
+    def on_pages(parsed, total):
+        if job:
+            job.pages_parsed = parsed
+
+    def chunks():
+        stream = document_parser.stream(file_path, on_pages)
+        try:
+            while True:
+                # Only the time spent waiting on the parser counts as parsing
+                start = time.perf_counter()
+                batch = next(stream, None)
+                parse_seconds[0] += time.perf_counter() - start
+                if batch is None:
+                    return
+                if job:
+                    job.status = "embedding"
+                    job.chunks_total += len(batch)
+                yield batch
+        finally:
+            stream.close()
+
+    def on_batch(embedded, total):
+        # Only chunks not already in the index are embedded
+        if job:
+            job.chunks_embedded = embedded
+
+    start = time.perf_counter()
+    try:
+        result = tenant.knowledge_index().ingest_stream(source, chunks(), batch_size=config.INGEST_EMBED_BATCH_SIZE,
+                                                        commit_every=config.INGEST_COMMIT_CHUNKS, on_batch=on_batch)
+    finally:
+        record_stage("ingest_parse", parse_seconds[0])
+        record_stage("ingest_index", time.perf_counter() - start - parse_seconds[0])
+
+    if result["added"] or result["removed"]:
+        answer_cache.invalidate(tenant.tenant_id)
     
-    return f"Added {len(chunks)} chunks from {os.path.basename(file_path)} to knowledge base"
+    return (f"Added {result['added']} chunks from {source} to knowledge base "
+            f"({result['unchanged']} unchanged, {result['removed']} removed)")
+
+# Uploads are accepted immediately and processed here in the background
+ingestion_queue = IngestionQueue(
+    lambda job: add_document_to_vectorstore(job.file_path, job, tenant_router.tenant(job.tenant_id)),
+    workers=config.INGEST_WORKERS,
+)
+
+def remove_document_from_vectorstore(filename: str, tenant: Tenant = None) -> str:
+    """Remove every chunk contributed by a previously uploaded document"""
+    tenant = tenant or default_tenant
+    removed = tenant.knowledge_index().remove_source(source_name(filename))
+    if removed:
+        answer_cache.invalidate(tenant.tenant_id)
+    return f"Removed {removed} chunks from {filename} from knowledge base"
 
 # -----------------------------
-# Gemini Setup
+# Prompt
 # -----------------------------
-gemini_model = genai.GenerativeModel("gemini-1.5-flash")
-
 QA_PROMPT = PromptTemplate(
     template="""You are a helpful restaurant assistant. Use the following context from our guidelines to answer the question. 
 If the answer is not in the context, politely say you don't have that information but offer to help with other questions.
@@ -103,23 +362,228 @@ Please provide a helpful and professional response:""",
 # -----------------------------
 # QA Functions
 # -----------------------------
-def qa_chain(query: str):
+def _search(query: str, query_vector, tenant: Tenant = None):
+    """Hybrid vector + keyword search for the best chunks (blocking)"""
+    with span("retrieval"):
+        hits = hybrid_search(
+            (tenant or default_tenant).knowledge_index(), query, query_vector,
+            candidates=config.RETRIEVAL_CANDIDATES, top_k=config.RETRIEVAL_TOP_K,
+        )
+    docs = [doc for _, doc in hits]
+    chunk_ids = tuple(doc_id for doc_id, _ in hits)
+    return docs, chunk_ids
+
+def _scope(tenant: Tenant = None):
+    """The answer cache partition of `tenant`"""
+    return (tenant or default_tenant).tenant_id
+
+def _retrieve(query: str, tenant: Tenant = None):
+    """Embed the query and fetch the top chunks (blocking)"""
+    # Embed once and reuse the vector for both retrieval and the semantic cache
+    with span("embedding"):
+        query_vector = get_embedding_model().embed_query(query)
+    docs, chunk_ids = _search(query, query_vector, tenant)
+    return query_vector, docs, chunk_ids
+
+async def _aretrieve(query: str, tenant: Tenant = None):
+    """Async _retrieve: the embedding waits on the batcher, search runs on the pool"""
+    with span("embedding"):
+        query_vector = await get_embedding_model().aembed_query(query)
+    docs, chunk_ids = await run_in_executor(_rag_executor, _search, query, query_vector, tenant)
+    return query_vector, docs, chunk_ids
+
+# Retrieved chunks are deduplicated and trimmed to the token budget before prompting
+context_budgeter = ContextBudgeter(config.CONTEXT_BUDGET_TOKENS, config.CONTEXT_TOKENIZER)
+
+def _build_prompt(query: str, docs) -> str:
+    with span("prompt_build"):
+        context = context_budgeter.build(query, docs)
+        return QA_PROMPT.format(context=context, question=query)
+
+ERROR_RESPONSE = "I apologize, but I'm having trouble accessing the information right now. Please try again later."
+TIMEOUT_RESPONSE = "I'm sorry, that is taking longer than expected. Please try asking again in a moment."
+FALLBACK_PREFIX = "I can't reach our assistant right now, but here is what our guidelines say: "
+
+# The sentences of the best chunk closest to the question, for when the LLM is unavailable
+fallback_budgeter = ContextBudgeter(config.LLM_FALLBACK_TOKENS, config.CONTEXT_TOKENIZER)
+
+def _fallback_answer(query: str, docs, error: Exception) -> str:
+    """Answer without the LLM: an extract of the top retrieved chunk"""
+    timeout = isinstance(error, TimeoutError)
+    reason = "circuit_open" if isinstance(error, CircuitOpenError) else "timeout" if timeout else "error"
+    if reason == "error":
+        logger.exception("LLM failed", exc_info=error)
+    else:
+        logger.warning("LLM unavailable, answering from retrieved text", extra={"fields": {"reason": reason}})
+    metrics.llm_fallbacks.inc(reason=reason)
+
+    extract = " ".join(fallback_budgeter.build(query, docs[:1]).split()) if docs else ""
+    if not extract:
+        return TIMEOUT_RESPONSE if timeout else ERROR_RESPONSE
+    return FALLBACK_PREFIX + extract
+
+def qa_chain(query: str, tenant: Tenant = None):
     """Enhanced QA chain with better context handling"""
     try:
-        # Retrieve relevant documents
-        docs = retriever.invoke(query)
-        context = "\n\n".join([d.page_content for d in docs])
-        
+        query_vector, docs, chunk_ids = _retrieve(query, tenant)
+
+        cached = answer_cache.get(query, chunk_ids, query_vector, _scope(tenant))
+        if cached is not None:
+            return cached
+
         # Generate response
-        prompt = QA_PROMPT.format(context=context, question=query)
-        response = gemini_model.generate_content(prompt)
-        
-        return response.text.strip()
-    except Exception as e:
-        return f"I apologize, but I'm having trouble accessing the information right now. Please try again later. Error: {str(e)}"
-
-def resolve_issue_with_guidelines(issue_text: str) -> str:
+        prompt = _build_prompt(query, docs)
+        try:
+            with span("llm"):
+                answer = get_llm_client().generate(prompt)
+        except Exception as e:
+            return _fallback_answer(query, docs, e)
+
+        answer_cache.put(query, chunk_ids, query_vector, answer, _scope(tenant))
+        return answer
+    except Exception:
+        logger.exception("QA failed")
+        return ERROR_RESPONSE
+
+# -----------------------------
+# Async QA
+# -----------------------------
+# FAISS search is CPU-bound and synchronous, so it runs on a bounded pool
+# instead of the event loop. Query embeddings wait on the batching service and
+# LLM calls are natively async, so neither ties up a thread; the LLM client
+# bounds how many are in flight.
+_rag_executor = ThreadPoolExecutor(max_workers=config.RAG_THREAD_POOL_SIZE, thread_name_prefix="rag")
+
+async def aqa_chain(query: str, tenant: Tenant = None):
+    """Non-blocking variant of qa_chain for async endpoints"""
+    try:
+        query_vector, docs, chunk_ids = await _aretrieve(query, tenant)
+
+        cached = answer_cache.get(query, chunk_ids, query_vector, _scope(tenant))
+        if cached is not None:
+            return cached
+
+        prompt = _build_prompt(query, docs)
+        try:
+            with span("llm"):
+                answer = await get_llm_client().agenerate(prompt)
+        except Exception as e:
+            return _fallback_answer(query, docs, e)
+
+        answer_cache.put(query, chunk_ids, query_vector, answer, _scope(tenant))
+        return answer
+    except Exception:
+        logger.exception("QA failed")
+        return ERROR_RESPONSE
+
+async def aretrieve(query: str, tenant: Tenant = None):
+    """Retrieval for `query` ahead of time, to pass to astream_qa_chain"""
+    return await _aretrieve(query, tenant)
+
+async def astream_qa_chain(query: str, retrieval=None, tenant: Tenant = None):
+    """
+    Streaming variant of aqa_chain.
+
+    Yields text fragments as the LLM produces them. Cached answers are yielded
+    in a single piece; the full streamed answer is cached once complete.
+    `retrieval` may be a result of aretrieve(query) fetched earlier. If the
+    LLM fails before its first token the fallback answer is yielded instead.
+    """
+    try:
+        query_vector, docs, chunk_ids = retrieval or await _aretrieve(query, tenant)
+
+        cached = answer_cache.get(query, chunk_ids, query_vector, _scope(tenant))
+        if cached is not None:
+            yield cached
+            return
+
+        prompt = _build_prompt(query, docs)
+        parts = []
+        try:
+            with span("llm"):
+                started = time.perf_counter()
+                async for text in get_llm_client().astream(prompt):
+                    if not parts:
+                        record_stage("llm_first_token", time.perf_counter() - started)
+                    parts.append(text)
+                    yield text
+        except Exception as e:
+            if parts:
+                # Part of the answer is out already; close it politely
+                logger.warning("LLM stream interrupted", extra={"fields": {"error": type(e).__name__}})
+                yield " " + ERROR_RESPONSE
+            else:
+                yield _fallback_answer(query, docs, e)
+            return
+
+        answer = "".join(parts).strip()
+        if answer:
+            answer_cache.put(query, chunk_ids, query_vector, answer, _scope(tenant))
+    except Exception:
+        logger.exception("QA failed")
+        yield ERROR_RESPONSE
+
+# -----------------------------
+# Intent Routing
+# -----------------------------
+# Structured requests (location, hours, order status, ...) are answered
+# directly; only open-ended questions go through RAG and the LLM
+intent_router = IntentRouter(
+    get_embedding_model,
+    database.SessionLocal,
+    info={
+        "location": config.RESTAURANT_LOCATION,
+        "map_link": config.RESTAURANT_MAP_LINK,
+        "hours": config.RESTAURANT_HOURS,
+        "phone": config.RESTAURANT_PHONE,
+        "email": config.RESTAURANT_EMAIL,
+    },
+    similarity_threshold=config.INTENT_SIMILARITY_THRESHOLD,
+    margin=config.INTENT_MARGIN,
+)
+
+def _route(issue_text: str, tenant: Tenant = None):
+    try:
+        with span("intent_routing"):
+            return intent_router.route(issue_text, (tenant or default_tenant).session_factory)
+    except Exception:
+        logger.exception("Intent routing failed, falling back to RAG")
+        return None
+
+async def _aroute(issue_text: str, tenant: Tenant = None):
+    try:
+        with span("intent_routing"):
+            return await intent_router.aroute(issue_text, _rag_executor, (tenant or default_tenant).session_factory)
+    except Exception:
+        logger.exception("Intent routing failed, falling back to RAG")
+        return None
+
+def resolve_issue_with_guidelines(issue_text: str, tenant: Tenant = None) -> str:
     """
     Returns the AI-guided solution based on restaurant guidelines.
     """
-    return qa_chain(issue_text)
\ No newline at end of file
+    answer = _route(issue_text, tenant)
+    if answer is not None:
+        return answer
+    return qa_chain(issue_text, tenant)
+
+async def aresolve_issue_with_guidelines(issue_text: str, tenant: Tenant = None) -> str:
+    """
+    Async version of resolve_issue_with_guidelines.
+    """
+    answer = await _aroute(issue_text, tenant)
+    if answer is not None:
+        return answer
+    return await aqa_chain(issue_text, tenant)
+
+async def astream_resolve_issue_with_guidelines(issue_text: str, retrieval=None, tenant: Tenant = None):
+    """
+    Streaming version of resolve_issue_with_guidelines; routed answers are
+    yielded in a single piece.
+    """
+    answer = await _aroute(issue_text, tenant)
+    if answer is not None:
+        yield answer
+        return
+    async for token in astream_qa_chain(issue_text, retrieval, tenant):
+        yield token
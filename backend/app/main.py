@@ -1,37 +1,103 @@
-from fastapi import FastAPI, Depends
+from fastapi import FastAPI, Depends, Header, Query, Request
 from sqlalchemy.orm import Session
+from typing import Any, List, Optional
+import asyncio
 from . import database
 from .models.order import Order
 from .models.reservation import Reservation
 from fastapi import FastAPI
-from pydantic import BaseModel
+from pydantic import BaseModel, Field, ValidationError
 from fastapi.middleware.cors import CORSMiddleware
-from .langchain import resolve_issue_with_guidelines, add_document_to_vectorstore
+from .langchain import (
+    aresolve_issue_with_guidelines, astream_resolve_issue_with_guidelines, intent_router,
+    remove_document_from_vectorstore, answer_cache, get_knowledge_index, ingestion_queue,
+    warm_up, component_status, embedding_stats, context_stats, llm_stats, tenant_router,
+)
+from .services.tenant_service import LRUPool, Tenant
+from .services.reservation_service import ReservationBook, ReservationError, SlotFull
+from .core import startup, config, metrics
+from .core.tracing import ObservabilityMiddleware, SamplingProfiler
+from .api import routes_voice
+from .services.tts_service import tts_stats
+from .services.parsing_service import SUPPORTED_EXTENSIONS
+from .services import db_service
+import threading
+from .utils.response_utils import SentenceSplitter, sse_event
+from fastapi.responses import StreamingResponse, JSONResponse, PlainTextResponse
 from fastapi import HTTPException
 from pydantic import BaseModel
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
 import os
 import shutil
 from fastapi import UploadFile, File, Form
 from .models.user import User
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 from fastapi import Depends, HTTPException, status
-from .auth import get_current_user
-from jose import JWTError, jwt
+from .auth import get_current_user, authenticate, optional_oauth2_scheme
 from fastapi import FastAPI, Depends, HTTPException, status, File, UploadFile
 from sqlalchemy.orm import Session
 from . import database
 from .models.user import User  # Add this import
-from .auth import get_password_hash, verify_password, create_access_token, get_current_user, oauth2_scheme
-# Add this import for JWTError and jwt
+from .auth import (
+    aget_password_hash, averify_password, create_access_token, get_current_user, get_user, login_limiter,
+    auth_stats,
+)
 app = FastAPI()
 
-# JWT settings
-SECRET_KEY = "your_super_secret_key"  # Replace with a secure, random key in production
-ALGORITHM = "HS256"  # Add this line to define the algorithm
-
 UPLOAD_DIR = "uploaded_documents"
 os.makedirs(UPLOAD_DIR, exist_ok=True)
+
+# ---------------- Tenancy ----------------
+async def get_tenant(
+    token: Optional[str] = Depends(optional_oauth2_scheme),
+    restaurant_id: Optional[int] = Header(None, alias="X-Restaurant-ID"),
+) -> Tenant:
+    """
+    The restaurant a request is for, when MULTI_TENANT is on.
+
+    Signed-in staff get their own restaurant, taken from the token. Anonymous
+    callers (customers) pick a registered restaurant with X-Restaurant-ID;
+    with neither, or with tenancy off, it is the shared default store.
+    """
+    if not config.MULTI_TENANT:
+        return tenant_router.default
+    if token:
+        user = await authenticate(token)
+        return tenant_router.tenant(user.id)
+    if restaurant_id is not None:
+        if not tenant_router.exists(restaurant_id):
+            raise HTTPException(status_code=404, detail="Unknown restaurant")
+        return tenant_router.tenant(restaurant_id)
+    return tenant_router.default
+
+async def get_staff_tenant(current_user: User = Depends(get_current_user)) -> Tenant:
+    """
+    The signed-in staff member's own restaurant, for admin endpoints.
+
+    Requires a valid token (401 otherwise); X-Restaurant-ID is ignored, so
+    nobody can act on a restaurant by naming it.
+    """
+    if not config.MULTI_TENANT:
+        return tenant_router.default
+    return tenant_router.tenant(current_user.id)
+
+def _tenant_sessions(tenant: Tenant):
+    # None keeps the default store on its own (possibly async) write path
+    return tenant.session_factory if tenant.tenant_id is not None else None
+
+# One in-memory slot map per restaurant database, built on first use
+reservation_books = LRUPool(lambda tenant_id: ReservationBook(_tenant_sessions(tenant_router.tenant(tenant_id))),
+                            config.TENANT_MAX_OPEN_DATABASES)
+
+def _reservation_book(tenant: Tenant) -> ReservationBook:
+    return reservation_books.get(tenant.tenant_id)
+
+def _upload_dir(tenant: Tenant) -> str:
+    if tenant.tenant_id is None:
+        return UPLOAD_DIR
+    path = os.path.join(UPLOAD_DIR, str(tenant.tenant_id))
+    os.makedirs(path, exist_ok=True)
+    return path
 # Make sure your CORS middleware allows file uploads
 app.add_middleware(
     CORSMiddleware,
@@ -41,37 +107,136 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-@app.post("/admin/upload-document")
-async def upload_document(file: UploadFile = File(...)):
+app.include_router(routes_voice.router, prefix="/api/v1/voice")
+
+@app.post("/admin/upload-document", status_code=202)
+async def upload_document(file: UploadFile = File(...), tenant: Tenant = Depends(get_staff_tenant)):
+    """
+    Save an uploaded document and queue it for ingestion.
+
+    Returns immediately with a job ID; poll /admin/ingest-jobs/{job_id} for
+    progress.
+    """
+    filename = os.path.basename(file.filename)
+    if not filename.endswith(SUPPORTED_EXTENSIONS):
+        file.file.close()
+        raise HTTPException(status_code=400, detail="Unsupported file format. Please upload PDF, TXT, or DOCX files.")
     try:
         # Save the file
-        file_path = os.path.join(UPLOAD_DIR, file.filename)
+        file_path = os.path.join(_upload_dir(tenant), filename)
         with open(file_path, "wb") as buffer:
             shutil.copyfileobj(file.file, buffer)
         
-        # Process the document for RAG
-        result = add_document_to_vectorstore(file_path)
+        # Process the document for RAG in the background
+        job = ingestion_queue.submit(file_path, filename, tenant.tenant_id)
         
         return {
-            "message": "File uploaded and processed successfully",
-            "filename": file.filename,
-            "result": result
+            "message": "File uploaded successfully",
+            "filename": filename,
+            "result": "Processing started in the background",
+            "job_id": job.job_id,
+            "status_url": f"/admin/ingest-jobs/{job.job_id}",
         }
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error processing file: {str(e)}")
     finally:
         file.file.close()
 
+@app.get("/admin/ingest-jobs")
+def list_ingest_jobs(tenant: Tenant = Depends(get_staff_tenant)):
+    """
+    Recent document ingestion jobs, oldest first.
+    """
+    return {"jobs": [job.to_dict() for job in ingestion_queue.list() if job.tenant_id == tenant.tenant_id]}
+
+@app.get("/admin/ingest-jobs/{job_id}")
+def get_ingest_job(job_id: str, tenant: Tenant = Depends(get_staff_tenant)):
+    """
+    Progress of a document ingestion job.
+    """
+    job = ingestion_queue.get(job_id)
+    if not job or job.tenant_id != tenant.tenant_id:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job.to_dict()
+
+@app.get("/admin/documents")
+def list_documents(tenant: Tenant = Depends(get_staff_tenant)):
+    """
+    Documents in the knowledge base with their chunk counts.
+    """
+    return {"documents": tenant.knowledge_index().sources()}
+
+@app.delete("/admin/documents/{filename}")
+def delete_document(filename: str, tenant: Tenant = Depends(get_staff_tenant)):
+    """
+    Remove an uploaded document and all of its chunks from the knowledge base.
+    """
+    filename = os.path.basename(filename)
+    if filename not in tenant.knowledge_index().sources():
+        raise HTTPException(status_code=404, detail="Document not found")
+
+    result = remove_document_from_vectorstore(filename, tenant)
+    file_path = os.path.join(_upload_dir(tenant), filename)
+    if os.path.exists(file_path):
+        os.remove(file_path)
+    return {"message": "Document removed successfully", "filename": filename, "result": result}
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
     allow_methods=["*"],
     allow_headers=["*"],
 )
-database.init_db()
+# Outermost, so timings include the other middleware
+app.add_middleware(
+    ObservabilityMiddleware,
+    profiler=SamplingProfiler(config.PROFILE_INTERVAL_MS) if config.PROFILE_SLOW_REQUESTS else None,
+)
+@app.on_event("startup")
+def on_startup():
+    with startup.timed("database"):
+        database.init_db()
+    with startup.timed("reservations"):
+        reservation_books.get(None).load()
+    # Load the embedder, FAISS index and LLM client without holding up the
+    # server; /readyz reports when they are in place
+    threading.Thread(target=warm_up, name="warm-up", daemon=True).start()
 
-def get_db():
-    db = database.SessionLocal()
+@app.get("/healthz")
+def liveness():
+    """
+    Liveness probe: the process is up and serving requests.
+    """
+    return {"status": "ok"}
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def get_metrics():
+    """
+    Prometheus metrics: request latency by route and status, per-stage
+    latency (embedding, retrieval, prompt build, LLM, DB commits, ingestion)
+    and voice turn milestones.
+    """
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+@app.get("/readyz")
+def readiness():
+    """
+    Readiness probe: 200 once the embedder, index and LLM client are loaded.
+    """
+    components = component_status()
+    ready = all(components.values())
+    body = {"status": "ready" if ready else "loading", "components": components, "startup_seconds": startup.timings}
+    return JSONResponse(status_code=200 if ready else 503, content=body)
+
+def get_db(tenant: Tenant = Depends(get_tenant)):
+    db = tenant.session_factory()
+    try:
+        yield db
+    finally:
+        db.close()
+
+def get_staff_db(tenant: Tenant = Depends(get_staff_tenant)):
+    db = tenant.session_factory()
     try:
         yield db
     finally:
@@ -85,64 +250,184 @@ class OrderRequest(BaseModel):
 
 
 @app.post("/order")
-def create_order(order: OrderRequest, db: Session = Depends(get_db)):
-    new_order = Order(
+async def create_order(order: OrderRequest, tenant: Tenant = Depends(get_tenant)):
+    new_order = await db_service.create_order(
         customer_name=order.customer_name,
         phone_number=order.phone_number,
         item=order.item,
-        quantity=order.quantity
+        quantity=order.quantity,
+        session_factory=_tenant_sessions(tenant),
     )
-    db.add(new_order)
-    db.commit()
-    db.refresh(new_order)
+    db_service.publish_order_change("created", new_order, tenant.tenant_id)
     return {"message": "Order placed successfully", "order_id": new_order.id}
 
 @app.post("/reservation")
-def create_reservation(customer_name: str, time_slot: str, people: int, db: Session = Depends(get_db)):
-    # Generate a unique reservation ID
-    reservation_id = f"RES{datetime.now().strftime('%Y%m%d%H%M%S')}"
-    
-    
-    
-    reservation = Reservation(
-        reservation_id=reservation_id,
-        customer_name=customer_name, 
-        time_slot=time_slot,
-        people=people
-    )
-    db.add(reservation)
-    db.commit()
-    db.refresh(reservation)
-    return {"message": "Reservation created successfully", "reservation_id": reservation.id}
+async def create_reservation(customer_name: str, time_slot: str, people: int, tenant: Tenant = Depends(get_tenant)):
+    """
+    Book a table. `time_slot` is local time, ISO 8601 or e.g.
+    "2025-01-01 8:00 PM", and books the slot it falls in. Seats are taken
+    atomically, so concurrent bookings cannot overbook; a full slot answers
+    409 with the next slots that fit the party.
+    """
+    try:
+        reservation = await _reservation_book(tenant).book(customer_name, time_slot, people)
+    except ReservationError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    except SlotFull as e:
+        raise HTTPException(status_code=409, detail={"message": str(e), "alternatives": _slot_list(e.alternatives)})
+    return {"message": "Reservation created successfully", "reservation_id": reservation.reservation_id,
+            "slot": reservation.slot_start}
+
+def _slot_list(slots: list) -> list:
+    return [{"time": slot.isoformat(), "free": free} for slot, free in slots]
+
+@app.get("/reservations/availability")
+async def reservation_availability(people: int = Query(1, ge=1), after: Optional[datetime] = None,
+                                   count: int = Query(3, ge=1, le=50), tenant: Tenant = Depends(get_tenant)):
+    """
+    The next `count` slots from `after` (default now) with room for
+    `people`, answered from memory without querying the database.
+    """
+    book = _reservation_book(tenant)
+    if people > book.max_party:
+        raise HTTPException(status_code=422, detail=f"Party size must be between 1 and {book.max_party}")
+    return {"people": people, "slots": _slot_list(await book.next_free(people, after, count))}
+
+@app.get("/reservations/slots")
+async def reservation_slots(day: date, tenant: Tenant = Depends(get_tenant)):
+    """Free seats in every slot of `day`"""
+    return {"day": day, "slots": _slot_list(await _reservation_book(tenant).day(day))}
+
+# ---------------- Bulk Import ----------------
+class BulkOrderRow(OrderRequest):
+    quantity: int = Field(1, ge=1)
+
+class BulkReservationRow(BaseModel):
+    customer_name: str
+    time_slot: str
+    people: int = Field(ge=1)
+
+class BulkImportRequest(BaseModel):
+    rows: List[Any]
+
+def _validate_rows(rows: list, model):
+    """Split a batch into valid rows and per-row errors, keyed by position"""
+    if len(rows) > config.BULK_IMPORT_MAX_ROWS:
+        raise HTTPException(status_code=413, detail=f"At most {config.BULK_IMPORT_MAX_ROWS} rows per batch")
+    valid, results = [], [None] * len(rows)
+    for index, row in enumerate(rows):
+        try:
+            valid.append((index, model.model_validate(row).model_dump()))
+        except ValidationError as e:
+            error = e.errors()[0]
+            field = ".".join(str(part) for part in error["loc"])
+            results[index] = {"index": index, "ok": False, "error": f"{field}: {error['msg']}" if field else error["msg"]}
+    return valid, results
+
+async def _bulk_import(rows: list, model, insert, id_field: str, tenant: Tenant) -> dict:
+    valid, results = _validate_rows(rows, model)
+    if valid:
+        try:
+            inserted = await insert([row for _, row in valid], _tenant_sessions(tenant))
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Import failed, nothing was saved: {e}")
+        for (index, _), (row_id, public_id) in zip(valid, inserted):
+            results[index] = {"index": index, "ok": True, "id": row_id, id_field: public_id}
+    return {"inserted": len(valid), "failed": len(rows) - len(valid), "results": results}
+
+@app.post("/orders/bulk")
+async def bulk_create_orders(batch: BulkImportRequest, tenant: Tenant = Depends(get_staff_tenant)):
+    """
+    Import many orders at once, e.g. a backlog replayed from the phone system.
+
+    Every row is validated on its own; valid rows are inserted together in a
+    single transaction and invalid ones are reported by position, so one bad
+    row does not reject the batch.
+    """
+    result = await _bulk_import(batch.rows, BulkOrderRow, db_service.bulk_create_orders, "order_id", tenant)
+    if result["inserted"]:
+        # Cheaper than one event per row; dashboards reload their list
+        db_service.order_events.publish({"type": "resync"}, channel=tenant.tenant_id)
+    return result
+
+@app.post("/reservations/bulk")
+async def bulk_create_reservations(batch: BulkImportRequest, tenant: Tenant = Depends(get_staff_tenant)):
+    """
+    Import many reservations at once; same semantics as /orders/bulk.
+    Imported bookings count against their slots but are not refused when
+    a slot is full, since they were already promised.
+    """
+    book = _reservation_book(tenant)
+    return await _bulk_import(batch.rows, BulkReservationRow, lambda rows, _: book.import_rows(rows),
+                              "reservation_id", tenant)
 
 @app.get("/location")
 def get_location():
     return {
-        "message": "Our restaurant is located at Main Boulevard, Multan City.",
-        "map_link": "https://maps.google.com/?q=Main+Boulevard+Multan"
+        "message": config.RESTAURANT_LOCATION,
+        "map_link": config.RESTAURANT_MAP_LINK
     }
 class IssueRequest(BaseModel):
     text: str
 
 @app.post("/resolve-issue")
-async def resolve_issue_endpoint(req: IssueRequest):
+async def resolve_issue_endpoint(req: IssueRequest, tenant: Tenant = Depends(get_tenant)):
     """
     Resolve client issue using restaurant guidelines stored in vector store.
     """
-    response = resolve_issue_with_guidelines(req.text)
+    response = await aresolve_issue_with_guidelines(req.text, tenant)
     return {"response": response}
 # ... existing imports and endpoints ...
 class MenuInquiryRequest(BaseModel):
     question: str
 
+async def stream_answer_events(question: str, tenant: Tenant = None):
+    """
+    Server-Sent Events for a streamed RAG answer.
+
+    Emits a `token` event per LLM fragment, a `sentence` event as soon as each
+    sentence is complete (so TTS can start early) and a final `done` event
+    carrying the full response.
+    """
+    splitter = SentenceSplitter()
+    sentence_index = 0
+    parts = []
+    async for token in astream_resolve_issue_with_guidelines(question, tenant=tenant):
+        parts.append(token)
+        yield sse_event("token", {"text": token})
+        for sentence in splitter.feed(token):
+            yield sse_event("sentence", {"index": sentence_index, "text": sentence})
+            sentence_index += 1
+
+    tail = splitter.flush()
+    if tail:
+        yield sse_event("sentence", {"index": sentence_index, "text": tail})
+    yield sse_event("done", {"response": "".join(parts).strip()})
+
+SSE_HEADERS = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+
+@app.post("/resolve-issue/stream")
+async def resolve_issue_stream(req: IssueRequest, tenant: Tenant = Depends(get_tenant)):
+    """
+    Streaming version of /resolve-issue (text/event-stream).
+    """
+    return StreamingResponse(stream_answer_events(req.text, tenant), media_type="text/event-stream", headers=SSE_HEADERS)
+
+@app.post("/menu-inquiry/stream")
+async def menu_inquiry_stream(request: MenuInquiryRequest, tenant: Tenant = Depends(get_tenant)):
+    """
+    Streaming version of /menu-inquiry (text/event-stream).
+    """
+    return StreamingResponse(stream_answer_events(request.question, tenant), media_type="text/event-stream", headers=SSE_HEADERS)
+
 @app.post("/menu-inquiry")
-def menu_inquiry(request: MenuInquiryRequest, db: Session = Depends(get_db)):
+async def menu_inquiry(request: MenuInquiryRequest, tenant: Tenant = Depends(get_tenant)):
     """
     Handle menu-related questions using RAG
     """
     try:
         # Use your existing RAG system
-        response = resolve_issue_with_guidelines(request.question)
+        response = await aresolve_issue_with_guidelines(request.question, tenant)
         
         return {"response": response}
     except Exception as e:
@@ -155,22 +440,150 @@ class UpdateOrderStatus(BaseModel):
 
 # ================= Admin Endpoints =================
 @app.get("/admin/orders")
-def get_all_orders(db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
-    # Now only authenticated users can access this
-    orders = db.query(Order).all()
-    return {"orders": [ 
-        {
-            "id": o.id,
-            "customer_name": o.customer_name,
-            "item": o.item,
-            "quantity": o.quantity,
-            "status": o.status,
-            "created_at": o.created_at
-        } for o in orders
-    ]}
+def get_all_orders(
+    status: Optional[List[str]] = Query(None),
+    created_after: Optional[datetime] = None,
+    created_before: Optional[datetime] = None,
+    cursor: Optional[str] = None,
+    updated_since: Optional[str] = None,
+    limit: int = Query(config.ADMIN_ORDERS_PAGE_SIZE, ge=1, le=config.ADMIN_ORDERS_MAX_PAGE_SIZE),
+    db: Session = Depends(get_staff_db),
+):
+    """
+    Orders for the admin dashboard.
+
+    Without `updated_since`: one page, newest first, optionally filtered by
+    `status` (repeatable) and creation time. Pass `next_cursor` back as
+    `cursor` for the next page. `sync_token` marks the current state.
+
+    With `updated_since` (a sync token, or an ISO timestamp): only orders
+    created or changed since then, oldest change first, and the token to use
+    on the next poll. Keep polling straight away while `has_more` is set.
+    """
+    try:
+        if updated_since:
+            orders, token, has_more = db_service.orders_changed_since(db, updated_since, limit)
+            return {"orders": [db_service.order_to_dict(o) for o in orders],
+                    "sync_token": token, "has_more": has_more}
+
+        # Taken before the page is read, so no change can fall between the two
+        token = db_service.latest_sync_token(db)
+        orders, next_cursor = db_service.list_orders(
+            db, statuses=status, created_after=created_after, created_before=created_before,
+            cursor=cursor, limit=limit,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"orders": [db_service.order_to_dict(o) for o in orders],
+            "next_cursor": next_cursor, "sync_token": token}
+
+def _replay_order_changes(token: str, tenant: Tenant):
+    db = tenant.session_factory()
+    try:
+        changes = []
+        has_more = True
+        while has_more:
+            orders, token, has_more = db_service.orders_changed_since(db, token)
+            changes.extend(orders)
+        return changes
+    finally:
+        db.close()
+
+@app.get("/admin/orders/stream")
+async def stream_order_changes(request: Request, token: Optional[str] = None, updated_since: Optional[str] = None):
+    """
+    Order changes pushed as Server-Sent Events, instead of polling.
+
+    Each change is an "order" event (type "created" or "status") whose id is
+    a sync token. EventSource cannot set headers, so the access token may be
+    passed as `?token=`. On reconnect the browser sends Last-Event-ID and
+    every change missed in between is replayed first; a new client can pass
+    the `sync_token` from GET /admin/orders as `updated_since` instead. A
+    "resync" event means changes were dropped and the list should be reloaded.
+    """
+    header = request.headers.get("authorization", "")
+    token = token or (header[7:] if header.lower().startswith("bearer ") else None)
+    user = await authenticate(token)
+    tenant = tenant_router.tenant(user.id) if config.MULTI_TENANT else tenant_router.default
+
+    resume = request.headers.get("last-event-id") or updated_since
+    if resume:
+        try:
+            db_service.decode_sync_token(resume)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+    # Subscribe before replaying, so nothing committed in between is missed
+    queue = db_service.order_events.subscribe(tenant.tenant_id)
+
+    async def events():
+        replayed = {}
+        try:
+            if resume:
+                changes = await db_service.run(_replay_order_changes, resume, tenant)
+                for order in changes:
+                    replayed[order.id] = order.change_seq
+                    yield sse_event("order", {"type": "replay", "order": db_service.order_to_dict(order)},
+                                    event_id=db_service.sync_token(order))
+            yield sse_event("ready", {"subscribers": db_service.order_events.subscriber_count(tenant.tenant_id)})
+
+            while not await request.is_disconnected():
+                try:
+                    event = await asyncio.wait_for(queue.get(), timeout=config.ORDER_STREAM_HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+                if event["type"] == "resync":
+                    yield sse_event("resync", {})
+                    continue
+                order = event["order"]
+                change_seq, _ = db_service.decode_sync_token(event["sync_token"])
+                if order["id"] in replayed and change_seq <= replayed[order["id"]]:
+                    continue  # queued before the replay read a newer version
+                yield sse_event("order", event, event_id=event["sync_token"])
+        finally:
+            db_service.order_events.unsubscribe(queue, tenant.tenant_id)
+
+    return StreamingResponse(events(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+@app.get("/admin/cache-stats")
+def get_cache_stats(current_user: User = Depends(get_current_user)):
+    """
+    Hit/miss counters for the RAG answer cache, the embedding service, the
+    TTS phrase cache and the auth principal cache, context tokens
+    retrieved versus sent to the LLM, and the LLM client's retries, hedges
+    and circuit breaker state.
+    """
+    return {"answer_cache": answer_cache.stats(), "embeddings": embedding_stats(), "tts": tts_stats(),
+            "auth": auth_stats(), "context": context_stats(), "llm": llm_stats()}
+
+@app.get("/admin/tenant-stats")
+def get_tenant_stats(tenant: Tenant = Depends(get_staff_tenant)):
+    """
+    Open, loaded and evicted per-restaurant databases and indexes, with
+    this restaurant's counters and estimated memory in bytes.
+    """
+    return {"enabled": config.MULTI_TENANT, **tenant_router.stats([tenant.tenant_id])}
+
+@app.get("/admin/reservation-stats")
+def get_reservation_stats(tenant: Tenant = Depends(get_staff_tenant)):
+    """
+    Bookings taken, refused as full or invalid, availability queries and
+    slot map reloads for this restaurant.
+    """
+    return _reservation_book(tenant).stats()
+
+@app.get("/admin/routing-stats")
+def get_routing_stats(current_user: User = Depends(get_current_user)):
+    """
+    How many questions were answered by the intent router versus the LLM.
+    """
+    return intent_router.stats()
 
 @app.patch("/admin/orders/{order_id}")
-def update_order_status(order_id: int, update: UpdateOrderStatus, db: Session = Depends(get_db)):
+def update_order_status(order_id: int, update: UpdateOrderStatus, db: Session = Depends(get_staff_db),
+                        tenant: Tenant = Depends(get_staff_tenant)):
     """
     Update status of a specific order. Only allow cancel within 5 minutes.
     """
@@ -185,9 +598,8 @@ def update_order_status(order_id: int, update: UpdateOrderStatus, db: Session =
         if (now - order.created_at) > timedelta(minutes=5):
             raise HTTPException(status_code=400, detail="Order cannot be canceled after 5 minutes")
     
-    order.status = update.status.lower()
-    db.commit()
-    db.refresh(order)
+    db_service.set_order_status(db, order, update.status.lower())
+    db_service.publish_order_change("status", order, tenant.tenant_id)
     return {"message": f"Order #{order.id} status updated to {order.status}", "order": {
         "id": order.id,
         "customer_name": order.customer_name,
@@ -198,7 +610,6 @@ def update_order_status(order_id: int, update: UpdateOrderStatus, db: Session =
         "created_at": order.created_at
     }}
 
-oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
 class CustomerCancelRequest(BaseModel):
     customer_name: str
 # Add this to your main.py
@@ -211,7 +622,8 @@ class CustomerCancelRequest(BaseModel):
 def customer_cancel_order(
     order_id: int, 
     cancel_request: CustomerCancelRequest, 
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db),
+    tenant: Tenant = Depends(get_tenant),
 ):
     """
     Customer-facing endpoint to cancel their own order with name verification
@@ -244,9 +656,8 @@ def customer_cancel_order(
         )
     
     # Update order status
-    order.status = "canceled"
-    db.commit()
-    db.refresh(order)
+    db_service.set_order_status(db, order, "canceled")
+    db_service.publish_order_change("status", order, tenant.tenant_id)
     
     return {
         "message": f"Order #{order.id} has been canceled successfully",
@@ -266,55 +677,44 @@ class UserCreate(BaseModel):
     password: str
     restaurant_name: str
 
+def _create_user(user: "UserCreate", hashed_password: str):
+    db = database.SessionLocal()
+    try:
+        if db.query(User).filter(User.username == user.username).first():
+            raise HTTPException(status_code=400, detail="Username already exists")
+        if db.query(User).filter(User.email == user.email).first():
+            raise HTTPException(status_code=400, detail="Email already exists")
+        db_user = User(
+            username=user.username,
+            email=user.email,
+            hashed_password=hashed_password,
+            restaurant_name=user.restaurant_name
+        )
+        db.add(db_user)
+        db.commit()
+        return db_user
+    finally:
+        db.close()
+
 @app.post("/register")
-def register(user: UserCreate, db: Session = Depends(get_db)):
-    # Check if user exists
-    if db.query(User).filter(User.username == user.username).first():
-        raise HTTPException(status_code=400, detail="Username already exists")
-    if db.query(User).filter(User.email == user.email).first():
-        raise HTTPException(status_code=400, detail="Email already exists")
-    
-    # Create user
-    hashed_password = get_password_hash(user.password)
-    db_user = User(
-        username=user.username,
-        email=user.email,
-        hashed_password=hashed_password,
-        restaurant_name=user.restaurant_name
-    )
-    db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
-    
-    # Create restaurant-specific database
-    restaurant_db_path = f"restaurant_{db_user.id}.db"
-    # Code to create separate database would go here
+async def register(user: UserCreate):
+    # Hashed first, off the request threads; the uniqueness checks run after
+    hashed_password = await aget_password_hash(user.password)
+    db_user = await db_service.run(_create_user, user, hashed_password)
+
+    # Create the restaurant's own database; its knowledge index is made on first use
+    if config.MULTI_TENANT:
+        await db_service.run(tenant_router.provision, db_user.id)
     
     return {"message": "User created successfully", "user_id": db_user.id}
 
 @app.post("/token")
-def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
-    user = db.query(User).filter(User.username == form_data.username).first()
-    if not user or not verify_password(form_data.password, user.hashed_password):
+async def login(form_data: OAuth2PasswordRequestForm = Depends()):
+    login_limiter.check(form_data.username)
+    user = await db_service.run(get_user, form_data.username)
+    if not user or not await averify_password(form_data.password, user.hashed_password):
         raise HTTPException(status_code=400, detail="Invalid credentials")
+    login_limiter.reset(form_data.username)
     
     access_token = create_access_token(data={"sub": user.username})
     return {"access_token": access_token, "token_type": "bearer"}
-async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
-    credentials_exception = HTTPException(
-        status_code=status.HTTP_401_UNAUTHORIZED,
-        detail="Could not validate credentials",
-        headers={"WWW-Authenticate": "Bearer"},
-    )
-    try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        username: str = payload.get("sub")
-        if username is None:
-            raise credentials_exception
-    except JWTError:
-        raise credentials_exception
-    
-    user = db.query(User).filter(User.username == username).first()
-    if user is None:
-        raise credentials_exception
-    return user
\ No newline at end of file
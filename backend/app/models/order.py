@@ -1,15 +1,63 @@
-from sqlalchemy import Column, Integer, String, DateTime
+from sqlalchemy import Column, Integer, String, DateTime, Index, event, text
 import datetime
 from ..database import Base
 
+# Changes are numbered by the database as they are written, not stamped by
+# the app: SQLite works the next number out inside the INSERT or UPDATE,
+# under its single-writer lock, and on Postgres a trigger takes it from a
+# sequence while holding a lock until commit. Either way a change can never
+# commit with a lower number than one a dashboard has already read, whichever
+# process or engine wrote it.
+NEXT_CHANGE_SEQ = text("(SELECT COALESCE(MAX(change_seq), 0) + 1 FROM orders)")
+
+_POSTGRES_CHANGE_SEQ = [
+    "CREATE SEQUENCE IF NOT EXISTS orders_change_seq",
+    """CREATE OR REPLACE FUNCTION orders_next_change() RETURNS trigger AS $$
+    BEGIN
+        PERFORM pg_advisory_xact_lock(hashtext('orders_change_seq'));
+        NEW.change_seq := nextval('orders_change_seq');
+        RETURN NEW;
+    END
+    $$ LANGUAGE plpgsql""",
+    "DROP TRIGGER IF EXISTS orders_change_seq ON orders",
+    "CREATE TRIGGER orders_change_seq BEFORE INSERT OR UPDATE ON orders "
+    "FOR EACH ROW EXECUTE FUNCTION orders_next_change()",
+]
+
 class Order(Base):
     __tablename__ = "orders"
-    __table_args__ = {'extend_existing': True}
+    __table_args__ = (
+        # Admin feed: filter by status, newest first
+        Index("ix_orders_status_created_at", "status", "created_at"),
+        {'extend_existing': True},
+    )
+    # Reads change_seq back with RETURNING, so the sync token is known after commit
+    __mapper_args__ = {"eager_defaults": True}
 
     id = Column(Integer, primary_key=True, index=True)
+    order_id = Column(String, unique=True, index=True)  # Human-readable ID
     customer_name = Column(String, nullable=False)
     phone_number = Column(String, nullable=False)
     item = Column(String, nullable=False)
     quantity = Column(Integer, default=1)
     status = Column(String, default="pending") # pending, preparing, ready, delivered
-    created_at = Column(DateTime, default=datetime.datetime.utcnow) 
\ No newline at end of file
+    created_at = Column(DateTime, default=datetime.datetime.utcnow, index=True)
+    # Bumped on every change so the dashboard can fetch only what changed
+    updated_at = Column(DateTime, default=datetime.datetime.utcnow, onupdate=datetime.datetime.utcnow, index=True)
+    # Position of the latest change in the order of commits; the dashboard's sync cursor
+    change_seq = Column(Integer, default=NEXT_CHANGE_SEQ, onupdate=NEXT_CHANGE_SEQ, index=True)
+
+
+def number_changes(conn):
+    """Install change numbering on Postgres and number orders written before it existed"""
+    if conn.dialect.name == "postgresql":
+        for statement in _POSTGRES_CHANGE_SEQ:
+            conn.execute(text(statement))
+    unnumbered = conn.execute(text("SELECT id FROM orders WHERE change_seq IS NULL ORDER BY updated_at, id")).all()
+    if unnumbered:
+        start = conn.execute(text("SELECT COALESCE(MAX(change_seq), 0) FROM orders")).scalar()
+        conn.execute(text("UPDATE orders SET change_seq = :seq WHERE id = :id"),
+                     [{"seq": start + n, "id": row_id} for n, (row_id,) in enumerate(unnumbered, 1)])
+
+
+event.listen(Order.__table__, "after_create", lambda table, conn, **kw: number_changes(conn))
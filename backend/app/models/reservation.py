@@ -10,6 +10,7 @@ class Reservation(Base):
     reservation_id = Column(String, unique=True, index=True)  # Human-readable ID
     customer_name = Column(String, nullable=False)
     time_slot = Column(String, nullable=False)  # renamed from datetime to avoid clash
+    slot_start = Column(DateTime, index=True)  # Start of the booked slot, parsed from time_slot
     people = Column(Integer, default=1)
     status = Column(String, default="confirmed")  # confirmed, cancelled, completed
     created_at = Column(DateTime, default=datetime.datetime.utcnow)
\ No newline at end of file
@@ -0,0 +1,10 @@
+from sqlalchemy import Column, Integer, DateTime
+from ..database import Base
+
+class SlotCapacity(Base):
+    """Seats booked per reservation slot; bookings take seats with a conditional UPDATE of this row"""
+    __tablename__ = "slot_capacity"
+    __table_args__ = {'extend_existing': True}
+
+    slot_start = Column(DateTime, primary_key=True)
+    booked = Column(Integer, nullable=False, default=0)
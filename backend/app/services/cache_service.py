@@ -0,0 +1,139 @@
+# backend/app/services/cache_service.py
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+import numpy as np
+
+
+def normalize_question(question: str) -> str:
+    """Lowercase, drop punctuation and collapse whitespace"""
+    question = re.sub(r"[^\w\s]", " ", question.lower())
+    return " ".join(question.split())
+
+
+class AnswerCache:
+    """
+    Two-layer LRU/TTL cache for RAG answers.
+
+    The exact layer is keyed on the normalized question plus the IDs of the
+    retrieved chunks, so an answer is only reused when the LLM would have seen
+    the same context. The semantic layer catches near-duplicate phrasings by
+    comparing question embeddings, and only matches when the top retrieved
+    chunk is the same.
+
+    Entries belong to a `scope` (a restaurant's tenant ID; None is the
+    default store). Lookups only see their own scope, and invalidate()
+    drops one scope's answers, leaving other restaurants' cached.
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: float, similarity_threshold: float):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.similarity_threshold = similarity_threshold
+
+        self._exact = OrderedDict()     # (scope, question, chunk_ids) -> (answer, expires_at)
+        self._semantic = OrderedDict()  # (scope, question) -> (unit vector, top_chunk_id, answer, expires_at)
+        self._lock = threading.Lock()
+
+        self.exact_hits = 0
+        self.semantic_hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def get(self, question: str, chunk_ids: tuple, query_vector, scope=None) -> Optional[str]:
+        key = (scope, normalize_question(question), tuple(chunk_ids))
+        now = time.monotonic()
+
+        with self._lock:
+            entry = self._exact.get(key)
+            if entry is not None:
+                answer, expires_at = entry
+                if expires_at > now:
+                    self._exact.move_to_end(key)
+                    self.exact_hits += 1
+                    return answer
+                del self._exact[key]
+
+            answer = self._semantic_lookup(scope, query_vector, chunk_ids[0] if chunk_ids else None, now)
+            if answer is not None:
+                self.semantic_hits += 1
+                return answer
+
+            self.misses += 1
+            return None
+
+    def put(self, question: str, chunk_ids: tuple, query_vector, answer: str, scope=None):
+        normalized = normalize_question(question)
+        expires_at = time.monotonic() + self.ttl_seconds
+
+        with self._lock:
+            key = (scope, normalized, tuple(chunk_ids))
+            self._exact[key] = (answer, expires_at)
+            self._exact.move_to_end(key)
+
+            if query_vector is not None:
+                vector = np.asarray(query_vector, dtype=np.float32)
+                norm = np.linalg.norm(vector)
+                if norm > 0:
+                    top_chunk_id = chunk_ids[0] if chunk_ids else None
+                    self._semantic[(scope, normalized)] = (vector / norm, top_chunk_id, answer, expires_at)
+                    self._semantic.move_to_end((scope, normalized))
+
+            while len(self._exact) > self.max_entries:
+                self._exact.popitem(last=False)
+            while len(self._semantic) > self.max_entries:
+                self._semantic.popitem(last=False)
+
+    def invalidate(self, scope=None):
+        """Drop the cached answers of `scope` (called whenever its vector store changes)"""
+        with self._lock:
+            for key in [k for k in self._exact if k[0] == scope]:
+                del self._exact[key]
+            for key in [k for k in self._semantic if k[0] == scope]:
+                del self._semantic[key]
+            self.invalidations += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.exact_hits + self.semantic_hits + self.misses
+            return {
+                "exact_hits": self.exact_hits,
+                "semantic_hits": self.semantic_hits,
+                "misses": self.misses,
+                "hit_rate": (self.exact_hits + self.semantic_hits) / lookups if lookups else 0.0,
+                "invalidations": self.invalidations,
+                "entries": len(self._exact),
+                "semantic_entries": len(self._semantic),
+            }
+
+    def _semantic_lookup(self, scope, query_vector, top_chunk_id, now):
+        # Caller holds the lock
+        if query_vector is None or not self._semantic:
+            return None
+
+        vector = np.asarray(query_vector, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        if norm == 0:
+            return None
+        vector = vector / norm
+
+        keys = []
+        for key, (_, cached_top, _, expires_at) in list(self._semantic.items()):
+            if expires_at <= now:
+                del self._semantic[key]
+            elif key[0] == scope and cached_top == top_chunk_id:
+                keys.append(key)
+        if not keys:
+            return None
+
+        matrix = np.stack([self._semantic[k][0] for k in keys])
+        scores = matrix @ vector
+        best = int(np.argmax(scores))
+        if scores[best] < self.similarity_threshold:
+            return None
+
+        self._semantic.move_to_end(keys[best])
+        return self._semantic[keys[best]][2]
@@ -0,0 +1,191 @@
+# backend/app/services/context_service.py
+import math
+import re
+import threading
+from collections import Counter
+
+from ..utils.response_utils import split_sentences
+from .retrieval_service import tokenize
+
+# -----------------------------
+# Token Counting
+# -----------------------------
+# Words, digits and punctuation (a run of one mark, like "=====", counts as a word)
+_PIECE = re.compile(r"[^\W\d_]+|\d|([^\w\s]|_)\1*")
+
+
+class HeuristicTokenizer:
+    """
+    Dependency-free token estimate for Gemini-style (SentencePiece) vocabularies.
+
+    Each digit and punctuation mark is a token and a word is one token per
+    started five letters, which errs slightly on the high side for English
+    prose, so a prompt measured under budget is under it for the model too.
+    """
+
+    name = "heuristic"
+
+    def count(self, text: str) -> int:
+        return sum((len(m.group()) + 4) // 5 for m in _PIECE.finditer(text))
+
+
+class HuggingFaceTokenizer:
+    """Exact counts from a local Hugging Face tokenizer (needs `transformers`)"""
+
+    def __init__(self, model_name: str):
+        from transformers import AutoTokenizer
+        self.name = model_name
+        self._tokenizer = AutoTokenizer.from_pretrained(model_name)
+
+    def count(self, text: str) -> int:
+        return len(self._tokenizer.encode(text, add_special_tokens=False))
+
+
+_tokenizers = {}
+_tokenizer_lock = threading.Lock()
+
+
+def get_tokenizer(name: str = ""):
+    """The heuristic counter for an empty name, else a cached Hugging Face tokenizer"""
+    with _tokenizer_lock:
+        tokenizer = _tokenizers.get(name)
+        if tokenizer is None:
+            tokenizer = _tokenizers[name] = HuggingFaceTokenizer(name) if name else HeuristicTokenizer()
+        return tokenizer
+
+
+# -----------------------------
+# Context Assembly
+# -----------------------------
+def _units(text: str) -> list:
+    """Lines of a chunk, split further into sentences; each as (text, separator after it)"""
+    units = []
+    for line in text.split("\n"):
+        sentences = split_sentences(line.strip()) if line.strip() else []
+        for i, sentence in enumerate(sentences):
+            units.append((sentence.strip(), "\n" if i == len(sentences) - 1 else " "))
+    return [(t, sep) for t, sep in units if t]
+
+
+def _terms(text: str) -> set:
+    # Plurals folded so "crusts" answers a question about "crust"
+    return {t[:-1] if len(t) > 3 and t.endswith("s") else t for t in tokenize(text)}
+
+
+def _normalized(text: str) -> str:
+    return " ".join(text.lower().split())
+
+
+class ContextBudgeter:
+    """
+    Assembles retrieved chunks into prompt context that fits a token budget.
+
+    - Overlap between chunks is removed: the text splitter repeats up to
+      200 characters at each chunk boundary, so a line or sentence already
+      present (or contained in one already present) is dropped, and a
+      truncated copy is replaced by its complete version.
+    - The remaining sentences are scored against the query: IDF-weighted
+      share of query terms they contain, plus part of their neighbours'
+      score so a price line keeps the description under it and a section
+      heading the items that follow.
+    - The best sentences are taken until `budget_tokens` is spent, then put
+      back in their original order.
+
+    A budget of 0 only removes duplicates. Tokens are counted with
+    get_tokenizer(`tokenizer_name`), loaded on first use.
+    """
+
+    def __init__(self, budget_tokens: int, tokenizer_name: str = "", neighbour_weight: float = 0.5):
+        self.budget_tokens = budget_tokens
+        self.tokenizer_name = tokenizer_name
+        self.neighbour_weight = neighbour_weight
+
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.tokens_in = 0
+        self.tokens_out = 0
+
+    @property
+    def tokenizer(self):
+        return get_tokenizer(self.tokenizer_name)
+
+    def build(self, query: str, docs) -> str:
+        tokenizer = self.tokenizer
+        units = self._deduplicated(docs)
+        counts = [tokenizer.count(text) for _, text, _ in units]
+        tokens_in = sum(tokenizer.count(d.page_content) for d in docs)
+
+        if self.budget_tokens > 0 and sum(counts) > self.budget_tokens:
+            scores = self._scores(query, [text for _, text, _ in units])
+            order = sorted(range(len(units)), key=lambda i: (-scores[i], i))
+            chosen, spent = set(), 0
+            for i in order:
+                if spent + counts[i] <= self.budget_tokens:
+                    chosen.add(i)
+                    spent += counts[i]
+            units = [u for i, u in enumerate(units) if i in chosen]
+
+        context = self._join(units)
+        with self._lock:
+            self.calls += 1
+            self.tokens_in += tokens_in
+            self.tokens_out += tokenizer.count(context)
+        return context
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "tokenizer": self.tokenizer_name or HeuristicTokenizer.name,
+                "budget_tokens": self.budget_tokens,
+                "calls": self.calls,
+                "context_tokens_in": self.tokens_in,
+                "context_tokens_out": self.tokens_out,
+            }
+
+    @staticmethod
+    def _deduplicated(docs) -> list:
+        """(chunk number, text, separator) for every distinct unit, in order"""
+        kept = []  # [chunk number, text, separator, normalized]
+        for chunk, doc in enumerate(docs):
+            for text, sep in _units(doc.page_content):
+                norm = _normalized(text)
+                if any(norm in other[3] for other in kept):
+                    continue
+                # A chunk boundary may have cut an earlier copy short
+                for other in kept:
+                    if other[3] in norm:
+                        other[1:] = [text, sep, norm]
+                        break
+                else:
+                    kept.append([chunk, text, sep, norm])
+        seen, units = set(), []
+        for chunk, text, sep, norm in kept:
+            if norm not in seen:
+                seen.add(norm)
+                units.append((chunk, text, sep))
+        return units
+
+    def _scores(self, query: str, texts: list) -> list:
+        terms = _terms(query)
+        unit_terms = [_terms(text) for text in texts]
+        df = Counter(t for ts in unit_terms for t in ts if t in terms)
+        # Terms found in every unit tell units apart least
+        weights = {t: math.log(1 + (len(texts) + 1) / (df[t] + 0.5)) for t in terms}
+        total = sum(weights.values()) or 1.0
+        own = [sum(weights[t] for t in ts & terms) / total for ts in unit_terms]
+
+        scores = []
+        for i, score in enumerate(own):
+            neighbours = own[max(0, i - 1):i] + own[i + 1:i + 2]
+            scores.append(score + self.neighbour_weight * max(neighbours, default=0.0))
+        return scores
+
+    @staticmethod
+    def _join(units: list) -> str:
+        parts, last_chunk = [], None
+        for chunk, text, sep in units:
+            if parts and chunk != last_chunk:
+                parts[-1] = "\n\n"
+            parts += [text, sep]
+            last_chunk = chunk
+        return "".join(parts[:-1])
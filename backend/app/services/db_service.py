@@ -0,0 +1,403 @@
+# backend/app/services/db_service.py
+import asyncio
+import base64
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+from datetime import datetime
+
+from sqlalchemy import delete, func, insert, or_, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+
+from .. import database
+from ..core import config
+from ..core.tracing import run_in_executor, span
+from ..models.order import Order
+from ..models.reservation import Reservation
+from ..models.slot_capacity import SlotCapacity
+from ..utils.id_generator import new_order_id, new_reservation_id
+from .event_service import EventBroadcaster
+
+# Sync sessions run on this pool instead of the event loop. It is no bigger
+# than the connection pool, so bursts queue for a thread here rather than
+# holding a thread while waiting for a connection.
+_db_executor = ThreadPoolExecutor(max_workers=config.DB_POOL_SIZE, thread_name_prefix="db")
+
+
+async def run(fn, *args):
+    """Run a blocking database function on the database thread pool"""
+    return await run_in_executor(_db_executor, fn, *args)
+
+
+# SQLite has a single writer. Queueing writes in-process is first come, first
+# served, whereas writers left to contend for the file lock poll it with
+# growing sleeps and produce long tail latencies. Each database file (one
+# per tenant) has its own queue.
+_sqlite_write_locks = {}
+_sqlite_write_locks_guard = threading.Lock()
+_async_write_lock = None
+
+
+def _serialize_writes() -> bool:
+    return database.SQLALCHEMY_DATABASE_URL.startswith("sqlite")
+
+
+def _write_lock(db):
+    """Lock to hold while writing through session `db`; a no-op for servers like Postgres"""
+    bind = db.get_bind()
+    if bind.dialect.name != "sqlite":
+        return nullcontext()
+    with _sqlite_write_locks_guard:
+        return _sqlite_write_locks.setdefault(str(bind.url), threading.Lock())
+
+
+def _save(obj, session_factory=None):
+    db = (session_factory or database.SessionLocal)()
+    try:
+        db.add(obj)
+        with span("db_commit"), _write_lock(db):
+            db.commit()
+        return obj
+    finally:
+        db.close()
+
+
+def _get_async_write_lock() -> asyncio.Lock:
+    # Created lazily so it binds to the running event loop
+    global _async_write_lock
+    if _async_write_lock is None:
+        _async_write_lock = asyncio.Lock()
+    return _async_write_lock
+
+
+async def save(obj, session_factory=None):
+    """
+    Insert one row in its own transaction and return it with its id set.
+
+    Uses the async engine when DATABASE_ASYNC is on, otherwise a sync session
+    on the database thread pool. No refresh() is needed afterwards since
+    sessions do not expire objects on commit. `session_factory` picks another
+    database (a tenant's), always through a sync session.
+    """
+    if config.DATABASE_ASYNC and session_factory is None:
+        async with database.get_async_sessionmaker()() as db:
+            db.add(obj)
+            with span("db_commit"):
+                if _serialize_writes():
+                    async with _get_async_write_lock():
+                        await db.commit()
+                else:
+                    await db.commit()
+        return obj
+    return await run(_save, obj, session_factory)
+
+
+async def create_order(customer_name: str, phone_number: str, item: str, quantity: int = 1,
+                       session_factory=None) -> Order:
+    return await save(Order(
+        order_id=new_order_id(),
+        customer_name=customer_name,
+        phone_number=phone_number,
+        item=item,
+        quantity=quantity,
+    ), session_factory)
+
+
+async def create_reservation(customer_name: str, time_slot: str, people: int, session_factory=None) -> Reservation:
+    return await save(Reservation(
+        reservation_id=new_reservation_id(),
+        customer_name=customer_name,
+        time_slot=time_slot,
+        people=people,
+    ), session_factory)
+
+
+# -----------------------------
+# Bulk Import
+# -----------------------------
+def _bulk_insert(model, id_column: str, rows: list, session_factory=None, before_commit=None) -> list:
+    """
+    Insert `rows` (column dicts) in one transaction with a multi-row INSERT.
+
+    Returns (id, human-readable id) per row, in input order. Either every
+    row is inserted or none is. `before_commit(db, rows)` may write more in
+    the same transaction.
+    """
+    db = (session_factory or database.SessionLocal)()
+    try:
+        statement = insert(model).returning(model.id, getattr(model, id_column), sort_by_parameter_order=True)
+        with span("db_commit"), _write_lock(db):
+            inserted = db.execute(statement, rows).all()
+            if before_commit is not None:
+                before_commit(db, rows)
+            db.commit()
+        return [tuple(row) for row in inserted]
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+async def bulk_create_orders(rows: list, session_factory=None) -> list:
+    """rows: dicts with customer_name, phone_number, item and quantity"""
+    rows = [{**row, "order_id": new_order_id()} for row in rows]
+    return await run(_bulk_insert, Order, "order_id", rows, session_factory)
+
+
+async def bulk_create_reservations(rows: list, session_factory=None) -> list:
+    """
+    rows: dicts with customer_name, time_slot, people and slot_start (or None).
+
+    Imported bookings were already promised, so they are not checked against
+    capacity, but their seats are counted in their slots.
+    """
+    rows = [{**row, "reservation_id": new_reservation_id()} for row in rows]
+    return await run(_bulk_insert, Reservation, "reservation_id", rows, session_factory, _count_imported_seats)
+
+
+# -----------------------------
+# Reservation Slots
+# -----------------------------
+def _insert_slots(db, slots):
+    """Add slot_capacity rows for `slots` that have none yet"""
+    dialect = postgresql if db.get_bind().dialect.name == "postgresql" else sqlite
+    statement = dialect.insert(SlotCapacity).values([{"slot_start": slot, "booked": 0} for slot in slots])
+    db.execute(statement.on_conflict_do_nothing())
+
+
+def _count_imported_seats(db, rows: list):
+    seats = {}
+    for row in rows:
+        if row.get("slot_start") is not None:
+            seats[row["slot_start"]] = seats.get(row["slot_start"], 0) + row["people"]
+    if not seats:
+        return
+    _insert_slots(db, list(seats))
+    for slot, people in seats.items():
+        db.execute(update(SlotCapacity).where(SlotCapacity.slot_start == slot)
+                   .values(booked=SlotCapacity.booked + people))
+
+
+def book_slot(db, reservation: Reservation, seats_per_slot: int):
+    """
+    Insert `reservation` if its slot still has seats for the party.
+
+    The seats are taken with one conditional UPDATE of the slot's row, which
+    the database applies atomically, so concurrent bookings from any thread
+    or process can never take a slot past `seats_per_slot`. Returns
+    (reservation or None when it did not fit, seats booked in the slot now).
+    """
+    try:
+        with span("db_commit"), _write_lock(db):
+            _insert_slots(db, [reservation.slot_start])
+            booked = db.execute(
+                update(SlotCapacity)
+                .where(SlotCapacity.slot_start == reservation.slot_start,
+                       SlotCapacity.booked + reservation.people <= seats_per_slot)
+                .values(booked=SlotCapacity.booked + reservation.people)
+                .returning(SlotCapacity.booked)
+                .execution_options(synchronize_session=False)
+            ).scalar()
+            if booked is None:
+                db.rollback()
+                booked = db.execute(select(SlotCapacity.booked)
+                                    .where(SlotCapacity.slot_start == reservation.slot_start)).scalar()
+                return None, booked or 0
+            db.add(reservation)
+            db.commit()
+        return reservation, booked
+    except Exception:
+        db.rollback()
+        raise
+
+
+def slot_bookings(db, since: datetime) -> dict:
+    """Seats booked per slot from `since` on, for slots with any bookings"""
+    rows = db.execute(select(SlotCapacity.slot_start, SlotCapacity.booked)
+                      .where(SlotCapacity.slot_start >= since, SlotCapacity.booked > 0)).all()
+    return {slot: booked for slot, booked in rows}
+
+
+def rebuild_slot_capacity(db, slot_of) -> int:
+    """
+    Recount slot_capacity from the reservations table in one transaction.
+
+    Reservations made before slots were parsed get slot_start from their
+    time_slot text through `slot_of(text)`; those it returns None for
+    (unparseable) take no seats. Returns how many slots have bookings.
+    """
+    try:
+        with span("db_commit"), _write_lock(db):
+            # Writing first takes SQLite's write lock before anything is read
+            db.execute(delete(SlotCapacity))
+            legacy = db.execute(select(Reservation.id, Reservation.time_slot)
+                                .where(Reservation.slot_start.is_(None))).all()
+            parsed = [{"id": row_id, "slot_start": slot_of(text)} for row_id, text in legacy]
+            parsed = [row for row in parsed if row["slot_start"] is not None]
+            if parsed:
+                db.execute(update(Reservation), parsed)
+            counts = db.execute(
+                select(Reservation.slot_start, func.sum(Reservation.people))
+                .where(Reservation.slot_start.is_not(None), Reservation.status != "cancelled")
+                .group_by(Reservation.slot_start)
+            ).all()
+            if counts:
+                db.execute(insert(SlotCapacity), [{"slot_start": slot, "booked": seats} for slot, seats in counts])
+            db.commit()
+        return len(counts)
+    except Exception:
+        db.rollback()
+        raise
+
+
+# -----------------------------
+# Admin Order Feed
+# -----------------------------
+# Order changes pushed to connected dashboards (see /admin/orders/stream),
+# one channel per restaurant (tenant_id; None is the default store)
+order_events = EventBroadcaster()
+
+
+def order_to_dict(order: Order) -> dict:
+    return {
+        "id": order.id,
+        "order_id": order.order_id,
+        "customer_name": order.customer_name,
+        "phone_number": order.phone_number,
+        "item": order.item,
+        "quantity": order.quantity,
+        "status": order.status,
+        "created_at": order.created_at,
+        "updated_at": order.updated_at,
+    }
+
+
+def _encode(values: list) -> str:
+    raw = json.dumps(values).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def _decode(token: str) -> list:
+    return json.loads(base64.urlsafe_b64decode(token + "=" * (-len(token) % 4)))
+
+
+def encode_cursor(moment: datetime, order_id: int) -> str:
+    """Opaque position in an ordering on (timestamp, id)"""
+    return _encode([moment.isoformat(), order_id])
+
+
+def decode_cursor(token: str):
+    """(timestamp, id) from encode_cursor(); a bare ISO timestamp is also accepted"""
+    try:
+        return datetime.fromisoformat(token), 0
+    except ValueError:
+        pass
+    try:
+        moment, order_id = _decode(token)
+        return datetime.fromisoformat(moment), int(order_id)
+    except (ValueError, TypeError):
+        raise ValueError("Invalid cursor")
+
+
+def sync_token(order: Order) -> str:
+    """Token for /admin/orders?updated_since= that resumes right after this change"""
+    return _encode([order.change_seq, order.id])
+
+
+def decode_sync_token(token: str):
+    """
+    (change number, id) from sync_token(). Tokens issued before changes were
+    numbered, and bare ISO timestamps, give (timestamp, id) instead.
+    """
+    try:
+        change_seq, order_id = _decode(token)
+        if isinstance(change_seq, int):
+            return change_seq, int(order_id)
+    except (ValueError, TypeError):
+        pass
+    return decode_cursor(token)
+
+
+def list_orders(db, statuses=None, created_after=None, created_before=None, cursor=None, limit=100):
+    """
+    One page of orders, newest first, and the cursor of the next page (or None).
+
+    Keyset pagination on (created_at, id): each page is an index range scan
+    on the status/created_at indexes, however deep into the table it is.
+    """
+    query = db.query(Order)
+    if statuses:
+        query = query.filter(Order.status.in_(statuses))
+    if created_after is not None:
+        query = query.filter(Order.created_at >= created_after)
+    if created_before is not None:
+        query = query.filter(Order.created_at < created_before)
+    if cursor:
+        created_at, order_id = decode_cursor(cursor)
+        # The bare range condition lets the database seek on the created_at index
+        query = query.filter(
+            Order.created_at <= created_at,
+            or_(Order.created_at < created_at, Order.id < order_id),
+        )
+    orders = query.order_by(Order.created_at.desc(), Order.id.desc()).limit(limit + 1).all()
+    next_cursor = None
+    if len(orders) > limit:
+        orders = orders[:limit]
+        next_cursor = encode_cursor(orders[-1].created_at, orders[-1].id)
+    return orders, next_cursor
+
+
+def orders_changed_since(db, token: str, limit=500):
+    """
+    Orders created or changed after `token`, oldest change first.
+
+    Returns (orders, next token, has_more). Pass the token back to get the
+    following changes; when has_more is set, call again straight away.
+    """
+    change_seq, order_id = decode_sync_token(token)
+    if isinstance(change_seq, datetime):
+        # Resends rather than skips: every order changed at or after that time, and maybe a few before
+        first = db.query(func.min(Order.change_seq)).filter(Order.updated_at >= change_seq).scalar()
+        if first is None:
+            return [], latest_sync_token(db), False
+        change_seq, order_id = first - 1, 0
+    orders = (
+        db.query(Order)
+        .filter(
+            Order.change_seq >= change_seq,
+            or_(Order.change_seq > change_seq, Order.id > order_id),
+        )
+        .order_by(Order.change_seq, Order.id)
+        .limit(limit + 1)
+        .all()
+    )
+    has_more = len(orders) > limit
+    orders = orders[:limit]
+    return orders, (sync_token(orders[-1]) if orders else _encode([change_seq, order_id])), has_more
+
+
+def latest_sync_token(db) -> str:
+    """Token that skips every change made so far"""
+    latest = db.query(Order).order_by(Order.change_seq.desc(), Order.id.desc()).first()
+    return sync_token(latest) if latest is not None else _encode([0, 0])
+
+
+def set_order_status(db, order: Order, status: str) -> Order:
+    """
+    Change an order's status through the serialized commit path.
+
+    The database gives the change its number (Order.change_seq) as it is
+    written, which is what keeps the changes feed in commit order; the lock
+    only queues writers in-process.
+    """
+    order.status = status
+    with span("db_commit"), _write_lock(db):
+        db.commit()
+    return order
+
+
+def publish_order_change(change: str, order: Order, tenant_id=None):
+    order_events.publish({"type": change, "order": order_to_dict(order), "sync_token": sync_token(order)},
+                         channel=tenant_id)
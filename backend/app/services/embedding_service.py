@@ -0,0 +1,158 @@
+# backend/app/services/embedding_service.py
+import asyncio
+import itertools
+import queue
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+
+from langchain_core.embeddings import Embeddings
+
+_QUERY = 0
+_BULK = 1
+
+
+class BatchingEmbeddings(Embeddings):
+    """
+    Embeddings wrapper that micro-batches concurrent calls to the model.
+
+    Query embeddings from concurrent requests are collected for up to
+    `max_wait_ms` (or until `max_batch_size` are waiting) and run through the
+    model as one batch. Document embeddings for ingestion go through the same
+    dispatcher in `max_batch_size` slices at lower priority, so a large upload
+    never holds up live queries. Repeated query strings are answered from an
+    LRU cache without touching the model; document chunks are not cached
+    since ingestion already skips text that is indexed.
+    """
+
+    def __init__(self, base: Embeddings, max_batch_size: int = 32, max_wait_ms: float = 2.0, cache_size: int = 4096):
+        self.base = base
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.cache_size = cache_size
+
+        self._queue = queue.PriorityQueue()
+        self._sequence = itertools.count()
+        self._cache = OrderedDict()
+        self._cache_lock = threading.Lock()
+        self._thread = None
+        self._thread_lock = threading.Lock()
+
+        self.batches = 0
+        self.batched_items = 0
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+    # -----------------------------
+    # Embeddings interface
+    # -----------------------------
+    def embed_query(self, text: str) -> list:
+        cached = self._cache_get(text)
+        if cached is not None:
+            return cached
+        return self._submit(_QUERY, [text]).result()[0]
+
+    async def aembed_query(self, text: str) -> list:
+        cached = self._cache_get(text)
+        if cached is not None:
+            return cached
+        # Waits on the dispatcher without tying up a thread
+        return (await asyncio.wrap_future(self._submit(_QUERY, [text])))[0]
+
+    def embed_documents(self, texts: list) -> list:
+        futures = [
+            self._submit(_BULK, texts[start:start + self.max_batch_size])
+            for start in range(0, len(texts), self.max_batch_size)
+        ]
+        return [vector for future in futures for vector in future.result()]
+
+    def stats(self) -> dict:
+        return {
+            "batches": self.batches,
+            "batched_items": self.batched_items,
+            "avg_batch_size": self.batched_items / self.batches if self.batches else 0.0,
+            "cache_hits": self.cache_hits,
+            "cache_misses": self.cache_misses,
+            "cache_entries": len(self._cache),
+        }
+
+    # -----------------------------
+    # Dispatcher
+    # -----------------------------
+    def _submit(self, priority: int, texts: list) -> Future:
+        self._ensure_thread()
+        future = Future()
+        self._queue.put((priority, next(self._sequence), texts, future))
+        return future
+
+    def _ensure_thread(self):
+        if self._thread is None:
+            with self._thread_lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name="embedding-batcher", daemon=True)
+                    self._thread.start()
+
+    def _run(self):
+        while True:
+            priority, seq, texts, future = self._queue.get()
+            if priority == _BULK:
+                self._embed([(texts, future)], cache=False)
+                continue
+
+            # Collect more queries until the batch is full or the wait is over
+            batch = [(texts, future)]
+            deadline = time.monotonic() + self.max_wait
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if item[0] == _BULK:
+                    self._queue.put(item)  # leave bulk work for later
+                    break
+                batch.append((item[2], item[3]))
+            self._embed(batch)
+
+    def _embed(self, requests: list, cache: bool = True):
+        # Identical strings in one batch are embedded once
+        unique = list(dict.fromkeys(t for texts, _ in requests for t in texts))
+        try:
+            vectors = dict(zip(unique, self.base.embed_documents(unique)))
+        except Exception as e:
+            for _, future in requests:
+                future.set_exception(e)
+            return
+
+        self.batches += 1
+        self.batched_items += len(unique)
+        if cache:
+            for text, vector in vectors.items():
+                self._cache_put(text, vector)
+        for texts, future in requests:
+            future.set_result([vectors[t] for t in texts])
+
+    # -----------------------------
+    # Cache
+    # -----------------------------
+    def _cache_get(self, text: str):
+        with self._cache_lock:
+            vector = self._cache.get(text)
+            if vector is None:
+                self.cache_misses += 1
+                return None
+            self._cache.move_to_end(text)
+            self.cache_hits += 1
+            return vector
+
+    def _cache_put(self, text: str, vector: list):
+        if self.cache_size <= 0:
+            return
+        with self._cache_lock:
+            self._cache[text] = vector
+            self._cache.move_to_end(text)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
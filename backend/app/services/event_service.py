@@ -0,0 +1,63 @@
+# backend/app/services/event_service.py
+import asyncio
+import threading
+
+
+class EventBroadcaster:
+    """
+    Fans events out to the subscribers of a channel.
+
+    Subscribers join one channel (e.g. a restaurant) and only receive what
+    is published to it, so nothing is filtered after delivery and one
+    channel's traffic never fills another's queues. `publish()` may be
+    called from any thread (sync endpoints run on a thread pool); each
+    subscriber gets the event on its own event loop. A subscriber
+    that falls more than `max_queue` events behind has its backlog replaced
+    by a single {"type": "resync"} event, telling it to refetch instead of
+    holding unbounded memory.
+
+    Events only reach subscribers of the same process; with several workers,
+    clients should catch up through the changes feed when they reconnect.
+    """
+
+    def __init__(self, max_queue: int = 256):
+        self.max_queue = max_queue
+        self._channels = {}  # channel -> {queue: loop}
+        self._lock = threading.Lock()
+        self.published = 0
+
+    def subscribe(self, channel=None) -> asyncio.Queue:
+        queue = asyncio.Queue(maxsize=self.max_queue)
+        with self._lock:
+            self._channels.setdefault(channel, {})[queue] = asyncio.get_running_loop()
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue, channel=None):
+        with self._lock:
+            subscribers = self._channels.get(channel, {})
+            subscribers.pop(queue, None)
+            if not subscribers:
+                self._channels.pop(channel, None)
+
+    def publish(self, event: dict, channel=None):
+        with self._lock:
+            subscribers = list(self._channels.get(channel, {}).items())
+            self.published += 1
+        for queue, loop in subscribers:
+            try:
+                loop.call_soon_threadsafe(self._offer, queue, event)
+            except RuntimeError:
+                self.unsubscribe(queue, channel)  # its event loop has closed
+
+    def subscriber_count(self, channel=None) -> int:
+        with self._lock:
+            return len(self._channels.get(channel, {}))
+
+    @staticmethod
+    def _offer(queue: asyncio.Queue, event: dict):
+        if queue.full():
+            while not queue.empty():
+                queue.get_nowait()
+            queue.put_nowait({"type": "resync"})
+            return
+        queue.put_nowait(event)
@@ -0,0 +1,113 @@
+# backend/app/services/ingest_service.py
+import contextvars
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from ..core.logger import get_logger, log_event
+from ..core.tracing import span
+
+logger = get_logger("ingest")
+
+
+class IngestionJob:
+    """Progress record for one uploaded document"""
+
+    def __init__(self, file_path: str, filename: str, tenant_id=None):
+        self.job_id = uuid.uuid4().hex
+        self.tenant_id = tenant_id
+        self.file_path = file_path
+        self.filename = filename
+        self.status = "queued"  # queued, parsing, embedding, completed, failed
+        self.pages_parsed = 0
+        self.pages_total = 0  # 0 until known; formats without pages report text blocks parsed
+        self.chunks_total = 0
+        self.chunks_embedded = 0
+        self.result = None
+        self.error = None
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+
+    def pages_per_second(self) -> float:
+        if not self.started_at:
+            return 0.0
+        elapsed = (self.finished_at or time.time()) - self.started_at
+        return round(self.pages_parsed / elapsed, 1) if elapsed > 0 else 0.0
+
+    def to_dict(self) -> dict:
+        return {
+            "job_id": self.job_id,
+            "filename": self.filename,
+            "tenant_id": self.tenant_id,
+            "status": self.status,
+            "pages_parsed": self.pages_parsed,
+            "pages_total": self.pages_total,
+            "pages_per_second": self.pages_per_second(),
+            "chunks_total": self.chunks_total,
+            "chunks_embedded": self.chunks_embedded,
+            "result": self.result,
+            "error": self.error,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+        }
+
+
+class IngestionQueue:
+    """
+    Runs document ingestion on a small worker pool so uploads return at once.
+
+    `process(job)` does the actual work and reports progress by updating the
+    job's fields; its return value becomes `job.result`. Finished jobs are
+    kept for status queries, up to `max_finished_jobs`.
+    """
+
+    def __init__(self, process, workers: int, max_finished_jobs: int = 100):
+        self.process = process
+        self.max_finished_jobs = max_finished_jobs
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="ingest")
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+
+    def submit(self, file_path: str, filename: str, tenant_id=None) -> IngestionJob:
+        job = IngestionJob(file_path, filename, tenant_id)
+        with self._lock:
+            self._jobs[job.job_id] = job
+            self._prune()
+        # Runs under the upload's request ID, so its log lines can be traced back
+        self._executor.submit(contextvars.copy_context().run, self._run, job)
+        return job
+
+    def get(self, job_id: str):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def list(self) -> list:
+        with self._lock:
+            return list(self._jobs.values())
+
+    def _run(self, job: IngestionJob):
+        job.started_at = time.time()
+        try:
+            with span("ingest"):
+                job.result = self.process(job)
+            job.status = "completed"
+        except Exception as e:
+            job.status = "failed"
+            job.error = str(e)
+            logger.exception("Ingestion failed", extra={"fields": {"job_id": job.job_id, "document": job.filename}})
+        finally:
+            job.finished_at = time.time()
+        if job.status == "completed":
+            log_event(logger, "ingested", job_id=job.job_id, document=job.filename, chunks=job.chunks_total,
+                      pages=job.pages_parsed, pages_per_second=job.pages_per_second(),
+                      duration_ms=round((job.finished_at - job.started_at) * 1000, 1))
+
+    def _prune(self):
+        # Caller holds the lock; drop the oldest finished jobs beyond the limit
+        finished = [j for j in self._jobs.values() if j.status in ("completed", "failed")]
+        for job in finished[:max(0, len(finished) - self.max_finished_jobs)]:
+            del self._jobs[job.job_id]
@@ -0,0 +1,557 @@
+# backend/app/services/llm_service.py
+import asyncio
+import json
+import random
+import threading
+import time
+from collections import deque
+
+import httpx
+
+from ..core import metrics
+from ..core.logger import get_logger, log_event
+from ..core.tracing import span
+
+logger = get_logger("llm")
+
+# HTTP statuses worth another attempt: timeouts, rate limits, overloaded or failing upstreams
+RETRYABLE_STATUS = {408, 429, 500, 502, 503, 504}
+# A missing, bad or revoked API key: every call fails until someone fixes it
+AUTH_STATUS = {401, 403}
+# What google.generativeai raises while streaming an answer it blocked
+_GEMINI_BLOCKED = ("BlockedPromptException", "StopCandidateException")
+
+
+class LLMError(Exception):
+    """A failed LLM call; `retryable` failures are worth another attempt"""
+
+    def __init__(self, message: str, retryable: bool = True):
+        super().__init__(message)
+        self.retryable = retryable
+
+
+class EmptyAnswer(LLMError):
+    """The backend answered, but without any text (a safety block, no candidates)"""
+
+    def __init__(self, message: str = "LLM returned no text"):
+        super().__init__(message, retryable=False)
+
+
+class CircuitOpenError(LLMError):
+    def __init__(self):
+        super().__init__("LLM circuit breaker is open", retryable=False)
+
+
+class QueueTimeout(TimeoutError):
+    """The deadline passed while waiting for a free request slot; says nothing about the backend"""
+
+
+def status_code(exc: BaseException):
+    """The HTTP status behind a backend error, if any (Gemini errors carry theirs in `code`)"""
+    status = getattr(exc, "code", None)
+    if not isinstance(status, int):
+        status = getattr(getattr(exc, "response", None), "status_code", None)
+    return status
+
+
+def is_retryable(exc: BaseException) -> bool:
+    """Timeouts, connection failures and retryable HTTP statuses"""
+    if isinstance(exc, LLMError):
+        return exc.retryable
+    if isinstance(exc, (asyncio.TimeoutError, TimeoutError, ConnectionError, httpx.TransportError)):
+        return True
+    return status_code(exc) in RETRYABLE_STATUS
+
+
+# -----------------------------
+# Backends
+# -----------------------------
+# A backend turns a prompt into text: generate() blocks, agenerate() and
+# astream() are async; `timeout` is the most one call may take.
+class GeminiBackend:
+    """google.generativeai GenerativeModel, or anything shaped like it"""
+
+    name = "gemini"
+
+    def __init__(self, get_model):
+        # Resolved on every call, so the model can load lazily or be swapped out
+        self.get_model = get_model
+
+    def generate(self, prompt: str, timeout: float) -> str:
+        return self._text(self.get_model().generate_content(prompt, request_options={"timeout": timeout}))
+
+    async def agenerate(self, prompt: str, timeout: float) -> str:
+        response = await self.get_model().generate_content_async(prompt, request_options={"timeout": timeout})
+        return self._text(response)
+
+    async def astream(self, prompt: str, timeout: float):
+        response = await self.get_model().generate_content_async(prompt, stream=True,
+                                                                request_options={"timeout": timeout})
+        answered = False
+        try:
+            async for chunk in response:
+                try:
+                    text = chunk.text
+                except ValueError:
+                    continue  # e.g. the final chunk, carrying only the finish reason
+                if text:
+                    answered = True
+                    yield text
+        except Exception as e:
+            if type(e).__name__ in _GEMINI_BLOCKED:
+                raise EmptyAnswer(str(e)) from e
+            raise
+        if not answered:
+            raise EmptyAnswer()
+
+    @staticmethod
+    def _text(response) -> str:
+        try:
+            return response.text
+        except ValueError as e:  # the quick accessor raises when no candidate has a text part
+            raise EmptyAnswer(str(e)) from e
+
+
+class OpenAICompatibleBackend:
+    """
+    Any server with the OpenAI chat completions API, e.g. a local model
+    behind llama.cpp, vLLM or Ollama.
+    """
+
+    name = "openai"
+
+    def __init__(self, base_url: str, model: str, api_key: str = "", max_connections: int = 32):
+        self.url = base_url.rstrip("/") + "/chat/completions"
+        self.model = model
+        self.headers = {"Authorization": f"Bearer {api_key}"} if api_key else {}
+        self.limits = httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections)
+        self._client = None
+        self._client_loop = None
+        self._sync_client = None
+        self._lock = threading.Lock()
+
+    def _body(self, prompt: str, stream: bool) -> dict:
+        return {"model": self.model, "messages": [{"role": "user", "content": prompt}], "stream": stream}
+
+    def _aclient(self) -> httpx.AsyncClient:
+        # An async client belongs to the event loop that first used it
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._client_loop is not loop:
+            self._client = httpx.AsyncClient(headers=self.headers, limits=self.limits)
+            self._client_loop = loop
+        return self._client
+
+    def generate(self, prompt: str, timeout: float) -> str:
+        with self._lock:
+            if self._sync_client is None:
+                self._sync_client = httpx.Client(headers=self.headers, limits=self.limits)
+        response = self._sync_client.post(self.url, json=self._body(prompt, False), timeout=timeout)
+        response.raise_for_status()
+        return self._content(response.json())
+
+    async def agenerate(self, prompt: str, timeout: float) -> str:
+        response = await self._aclient().post(self.url, json=self._body(prompt, False), timeout=timeout)
+        response.raise_for_status()
+        return self._content(response.json())
+
+    async def astream(self, prompt: str, timeout: float):
+        async with self._aclient().stream("POST", self.url, json=self._body(prompt, True), timeout=timeout) as response:
+            response.raise_for_status()
+            async for line in response.aiter_lines():
+                if not line.startswith("data:"):
+                    continue
+                data = line[5:].strip()
+                if data == "[DONE]":
+                    break
+                text = json.loads(data)["choices"][0].get("delta", {}).get("content")
+                if text:
+                    yield text
+
+    @staticmethod
+    def _content(body: dict) -> str:
+        choices = body.get("choices") or [{}]
+        content = (choices[0].get("message") or {}).get("content")
+        if not content:  # refused, or filtered (finish_reason "content_filter")
+            raise EmptyAnswer()
+        return content
+
+
+# -----------------------------
+# Circuit Breaker
+# -----------------------------
+class CircuitBreaker:
+    """
+    Stops calls to a failing backend so requests fail fast instead of piling up.
+
+    Closed until `failure_threshold` failures in a row, then open for
+    `reset_seconds`; after that one probe call at a time is let through
+    (half-open), and its outcome closes or reopens the circuit.
+    """
+
+    CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+    def __init__(self, failure_threshold: int, reset_seconds: float, on_change=None):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.on_change = on_change
+        self.state = self.CLOSED
+        self.opened = 0
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probing = False
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN:
+                if time.monotonic() - self._opened_at < self.reset_seconds:
+                    return False
+                self._set(self.HALF_OPEN)
+            if self._probing:
+                return False
+            self._probing = True
+            return True
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._probing = False
+            if self.state != self.CLOSED:
+                self._set(self.CLOSED)
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            self._probing = False
+            if self.state == self.HALF_OPEN or (self.state == self.CLOSED and self._failures >= self.failure_threshold):
+                self._opened_at = time.monotonic()
+                self.opened += 1
+                self._set(self.OPEN)
+
+    def release(self):
+        """An allowed call never reached the backend; let another probe through"""
+        with self._lock:
+            self._probing = False
+
+    def _set(self, state: str):
+        # Caller holds the lock
+        self.state = state
+        if self.on_change:
+            self.on_change(state)
+
+
+# -----------------------------
+# Resilient Client
+# -----------------------------
+class ResilientLLM:
+    """
+    Deadlines, retries, hedging and a circuit breaker around an LLM backend.
+
+    Every call has an overall deadline of `timeout` seconds and each attempt
+    at most `attempt_timeout` (for streams: until the first token).
+    Retryable failures are retried up to `max_retries` times after a
+    full-jitter exponential backoff, as long as the deadline allows. With
+    `hedge_percentile`, an attempt still running after that percentile of
+    recent latencies gets a second, identical request and the first answer
+    wins; hedges only use idle capacity, never queue. Consecutive failures
+    open the circuit breaker, after which calls raise CircuitOpenError at
+    once. At most `max_concurrency` requests are in flight.
+    """
+
+    def __init__(self, backend, max_concurrency: int, timeout: float, attempt_timeout: float, max_retries: int,
+                 retry_base_ms: float, retry_max_ms: float, hedge_percentile: float = 0,
+                 hedge_min_samples: int = 20, breaker_failures: int = 5, breaker_reset_seconds: float = 30):
+        self.backend = backend
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+        self.attempt_timeout = attempt_timeout
+        self.max_retries = max_retries
+        self.retry_base = retry_base_ms / 1000
+        self.retry_max = retry_max_ms / 1000
+        self.hedge_percentile = hedge_percentile
+        self.hedge_min_samples = hedge_min_samples
+        self.breaker = CircuitBreaker(breaker_failures, breaker_reset_seconds, on_change=self._on_breaker_change)
+        self.latencies = deque(maxlen=500)  # seconds of recent successful attempts
+        self.counts = {"calls": 0, "attempts": 0, "retries": 0, "hedges": 0, "hedge_wins": 0, "rejected": 0}
+        self._semaphore = None
+        self._sync_semaphore = threading.BoundedSemaphore(max_concurrency)
+
+    # -----------------------------
+    # Public API
+    # -----------------------------
+    async def agenerate(self, prompt: str) -> str:
+        """The whole answer; raises asyncio.TimeoutError, CircuitOpenError or the last backend error"""
+        deadline = time.monotonic() + self.timeout
+
+        async def attempt():
+            async with self._slot(deadline):
+                started = time.monotonic()
+                limit = self._attempt_timeout(deadline)
+                text = await asyncio.wait_for(self.backend.agenerate(prompt, limit), timeout=limit)
+                self.latencies.append(time.monotonic() - started)
+                return text.strip()
+
+        return await self._with_retries(lambda: self._hedged(lambda: self._observed(attempt)), deadline)
+
+    async def astream(self, prompt: str):
+        """
+        Yield the answer as it is generated.
+
+        Retries and hedging apply until the first token; a failure after
+        that is raised to the caller, who has already used part of the answer.
+        """
+        deadline = time.monotonic() + self.timeout
+
+        async def attempt():
+            slot = self._slot(deadline)
+            await slot.__aenter__()
+            stream = self.backend.astream(prompt, max(0.0, deadline - time.monotonic()))
+            try:
+                started = time.monotonic()
+                first = await asyncio.wait_for(stream.__anext__(), timeout=self._attempt_timeout(deadline))
+                self.latencies.append(time.monotonic() - started)
+                return stream, first, slot
+            except BaseException:
+                await self._close(stream, slot)
+                raise
+
+        async def discard(result):
+            await self._close(result[0], result[2])
+
+        stream, first, slot = await self._with_retries(
+            lambda: self._hedged(lambda: self._observed(attempt), discard), deadline)
+        try:
+            yield first
+            while True:
+                try:
+                    token = await asyncio.wait_for(stream.__anext__(), timeout=max(0.0, deadline - time.monotonic()))
+                except StopAsyncIteration:
+                    break
+                yield token
+        except Exception as e:
+            if isinstance(e, TimeoutError) or is_retryable(e):
+                self.breaker.record_failure()
+            raise
+        finally:
+            await self._close(stream, slot)
+
+    def generate(self, prompt: str) -> str:
+        """
+        Blocking agenerate() for sync callers: deadlines, retries and the
+        breaker apply, hedging does not (it would need a second thread).
+        """
+        deadline = time.monotonic() + self.timeout
+        self.counts["calls"] += 1
+        if not self._sync_semaphore.acquire(timeout=self.timeout):
+            raise QueueTimeout()
+        try:
+            for attempt in range(self.max_retries + 1):
+                self._check_breaker()
+                self.counts["attempts"] += 1
+                started = time.monotonic()
+                try:
+                    text = self.backend.generate(prompt, self._attempt_timeout(deadline))
+                except Exception as e:
+                    self._count(e)
+                    pause = self._backoff(attempt, deadline) if self._failed(e) else None
+                    if pause is None:
+                        raise
+                    self.counts["retries"] += 1
+                    time.sleep(pause)
+                else:
+                    self._count(None)
+                    self.latencies.append(time.monotonic() - started)
+                    self.breaker.record_success()
+                    return text.strip()
+        finally:
+            self._sync_semaphore.release()
+
+    def hedge_delay(self):
+        """Seconds before a hedge is sent, or None while hedging is off or there is too little history"""
+        if self.hedge_percentile <= 0 or len(self.latencies) < self.hedge_min_samples:
+            return None
+        recent = sorted(self.latencies)
+        return recent[min(len(recent) - 1, int(len(recent) * self.hedge_percentile / 100))]
+
+    def stats(self) -> dict:
+        recent = sorted(self.latencies)
+        pick = lambda q: round(recent[min(len(recent) - 1, int(len(recent) * q))] * 1000, 1) if recent else None
+        delay = self.hedge_delay()
+        return {
+            "backend": self.backend.name,
+            "breaker": self.breaker.state,
+            "breaker_opened": self.breaker.opened,
+            **self.counts,
+            "latency_p50_ms": pick(0.5),
+            "latency_p95_ms": pick(0.95),
+            "hedge_delay_ms": round(delay * 1000, 1) if delay is not None else None,
+        }
+
+    # -----------------------------
+    # Internals
+    # -----------------------------
+    async def _with_retries(self, call, deadline: float):
+        self.counts["calls"] += 1
+        for attempt in range(self.max_retries + 1):
+            self._check_breaker()
+            try:
+                result = await call()
+            except Exception as e:
+                if not self._failed(e):
+                    raise
+                pause = self._backoff(attempt, deadline)
+                if pause is None:
+                    raise
+                self.counts["retries"] += 1
+                log_event(logger, "LLM retry", attempt=attempt + 1, error=type(e).__name__,
+                          pause_ms=round(pause * 1000))
+                await asyncio.sleep(pause)
+            else:
+                self.breaker.record_success()
+                return result
+
+    async def _observed(self, attempt):
+        """Run one attempt (hedges included) and count its outcome"""
+        self.counts["attempts"] += 1
+        error = None
+        try:
+            return await attempt()
+        except BaseException as e:
+            error = e
+            raise
+        finally:
+            self._count(error)
+
+    async def _hedged(self, attempt, discard=None):
+        delay = self.hedge_delay()
+        first = asyncio.ensure_future(attempt())
+        if delay is None:
+            return await first
+        done, _ = await asyncio.wait({first}, timeout=delay)
+        if done or self._get_semaphore().locked():
+            return await first
+
+        self.counts["hedges"] += 1
+        metrics.llm_hedges.inc(backend=self.backend.name)
+        second = asyncio.ensure_future(attempt())
+        pending = {first, second}
+        error = None
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                winners = [t for t in done if not t.cancelled() and t.exception() is None]
+                for task in done:
+                    if task not in winners:
+                        error = task.exception() if not task.cancelled() else asyncio.CancelledError()
+                if winners:
+                    if second in winners and first not in winners:
+                        self.counts["hedge_wins"] += 1
+                    for extra in winners[1:]:
+                        if discard:
+                            await discard(extra.result())
+                    return winners[0].result()
+            raise error
+        finally:
+            for task in pending:
+                task.cancel()
+            if pending:
+                results = await asyncio.gather(*pending, return_exceptions=True)
+                for result in results:
+                    if discard and not isinstance(result, BaseException):
+                        await discard(result)
+
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        if self._semaphore is None:
+            # Created lazily so it binds to the running event loop
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._semaphore
+
+    def _slot(self, deadline: float):
+        return _Slot(self._get_semaphore(), deadline)
+
+    @staticmethod
+    async def _close(stream, slot):
+        try:
+            await stream.aclose()
+        finally:
+            await slot.__aexit__(None, None, None)
+
+    def _attempt_timeout(self, deadline: float) -> float:
+        return max(0.0, min(self.attempt_timeout, deadline - time.monotonic()))
+
+    def _check_breaker(self):
+        if not self.breaker.allow():
+            self.counts["rejected"] += 1
+            metrics.llm_attempts.inc(backend=self.backend.name, outcome="rejected")
+            raise CircuitOpenError()
+
+    def _count(self, error):
+        if error is None:
+            outcome = "ok"
+        elif isinstance(error, asyncio.CancelledError):
+            outcome = "cancelled"  # the other request of a hedged pair won
+        elif isinstance(error, QueueTimeout):
+            outcome = "queue_timeout"
+        elif isinstance(error, TimeoutError):
+            outcome = "timeout"
+        else:
+            outcome = "error"
+        metrics.llm_attempts.inc(backend=self.backend.name, outcome=outcome)
+
+    def _failed(self, exc: BaseException) -> bool:
+        """Update the breaker after a failed call; True if it may be retried"""
+        if isinstance(exc, QueueTimeout):
+            # Our own queue was full, and the deadline is gone anyway
+            self.breaker.release()
+            return False
+        if isinstance(exc, EmptyAnswer):
+            # The backend is up and answered, just not with text
+            self.breaker.record_success()
+            return False
+        if isinstance(exc, TimeoutError) or is_retryable(exc):
+            self.breaker.record_failure()
+            return True
+        if status_code(exc) in AUTH_STATUS:
+            self.breaker.record_failure()
+            return False
+        # A bad request or a bug on our side says nothing about the backend's health
+        self.breaker.release()
+        return False
+
+    def _backoff(self, attempt: int, deadline: float):
+        """Full-jitter pause before the next attempt, or None when out of attempts or time"""
+        if attempt >= self.max_retries:
+            return None
+        pause = random.uniform(0, min(self.retry_max, self.retry_base * 2 ** attempt))
+        if time.monotonic() + pause >= deadline:
+            return None
+        return pause
+
+    def _on_breaker_change(self, state: str):
+        metrics.llm_circuit_open.set(1 if state == CircuitBreaker.OPEN else 0, backend=self.backend.name)
+        log_event(logger, "LLM circuit " + state.replace("_", "-"), backend=self.backend.name)
+
+
+class _Slot:
+    """One of the client's concurrent request slots, waited for no longer than the deadline"""
+
+    def __init__(self, semaphore: asyncio.Semaphore, deadline: float):
+        self.semaphore = semaphore
+        self.deadline = deadline
+        self.held = False
+
+    async def __aenter__(self):
+        with span("llm_wait"):
+            try:
+                await asyncio.wait_for(self.semaphore.acquire(), timeout=max(0.0, self.deadline - time.monotonic()))
+            except asyncio.TimeoutError:
+                raise QueueTimeout() from None
+        self.held = True
+        return self
+
+    async def __aexit__(self, *exc):
+        if self.held:
+            self.held = False
+            self.semaphore.release()
@@ -0,0 +1,273 @@
+# backend/app/services/nlp_service.py
+import re
+import threading
+from collections import Counter
+
+import numpy as np
+
+from ..core.tracing import run_in_executor
+from ..models.order import Order
+from ..models.reservation import Reservation
+
+OPEN_QUESTION = "open_question"
+
+# -----------------------------
+# Rules
+# -----------------------------
+# High-precision patterns, checked in order before the embedding classifier.
+# Each pattern must be specific enough that an open-ended question never
+# matches it (e.g. "peak hours" is a delivery question, not opening hours).
+_RULES = [
+    ("order_status", re.compile(
+        r"\b(status|track|tracking|where is|where's|ready|progress|update on)\b.*\b((my|our) order|order\s*(#|id|number|no\b|\d))"
+        r"|\b(my|our) order\b.*\b(status|ready|arriving|on (its|the) way|progress)\b"
+    )),
+    ("reservation_lookup", re.compile(
+        r"\bres\d+\b"
+        r"|\b(check|confirm|look ?up|find|status of) (my |our )?(reservation|booking)\b"
+        r"|\bis (my|our) (reservation|booking) confirmed\b"
+    )),
+    ("hours", re.compile(
+        r"\b(opening|closing|business|operating|working) (hours|times?)\b"
+        r"|\bwhat are your hours\b"
+        r"|\b(what time|when) (do|does|are) (you|the restaurant) (open|close)\b"
+        r"|\bare you (open|closed)\b"
+    )),
+    ("location", re.compile(
+        r"\bwhere (are you|is (the|your) (restaurant|shop|place|branch|outlet))\b"
+        r"|\b(your|the restaurant'?s?) (address|location)\b"
+        r"|\bwhere (are you|is it) located\b"
+        r"|\b(directions|how (do|can) i (get|reach)) (to )?(you|the restaurant|there)\b"
+    )),
+    ("contact", re.compile(
+        r"\b(your|the restaurant'?s?) (phone|phone number|contact number|email|email address)\b"
+        r"|\bhow (can|do) i (contact|call|email|reach) you\b"
+    )),
+]
+
+_ORDER_ID = re.compile(r"(?:#|\border\s*(?:id|number|no\.?)?\s*#?\s*)(\d+)\b")
+# RES20261018190833218-00LEE-000 (see utils/id_generator); speech may put spaces for the hyphens.
+# Reservations booked before that keep their RES20250101120000 (second-resolution) IDs.
+_RESERVATION_ID = re.compile(r"\b(res\d{17})[-\s]([0-9a-z]+)[-\s]([0-9a-z]{3})\b|\b(res\d{14})\b")
+
+# -----------------------------
+# Centroid Examples
+# -----------------------------
+# A few phrasings per intent; their mean embedding is the intent's centroid.
+# OPEN_QUESTION gets a centroid too, so a structured intent only wins when
+# the utterance is clearly closer to it than to a typical RAG question.
+INTENT_EXAMPLES = {
+    "location": [
+        "Where is your restaurant?",
+        "What is the address of the restaurant?",
+        "How do I find your place?",
+        "Which part of the city are you in?",
+    ],
+    "hours": [
+        "What are your opening hours?",
+        "When do you close tonight?",
+        "Are you open on Sunday?",
+        "What time does the restaurant open?",
+    ],
+    "contact": [
+        "What is your phone number?",
+        "How can I contact the restaurant?",
+        "What is your email address?",
+    ],
+    "order_status": [
+        "Where is my order?",
+        "Has my order been prepared yet?",
+        "What is the status of my order?",
+        "Track my food delivery",
+    ],
+    "reservation_lookup": [
+        "Can you check my reservation?",
+        "Is my table booking confirmed?",
+        "Look up my booking please",
+    ],
+    OPEN_QUESTION: [
+        "What pizzas do you have on the menu?",
+        "How much is a large pepperoni pizza?",
+        "Do you have vegetarian options?",
+        "What is your refund policy for a wrong order?",
+        "How long does delivery usually take?",
+        "Do your dishes contain nuts?",
+        "Can I pay by card on delivery?",
+        "My pizza arrived cold, what can you do?",
+    ],
+}
+
+
+class IntentRouter:
+    """
+    Fast intent classification in front of the RAG chain.
+
+    Utterances are matched first against regex rules, then against
+    nearest-centroid embeddings of INTENT_EXAMPLES. Structured intents
+    (location, hours, contact, order status, reservation lookup) are answered
+    by deterministic handlers from config and the Order/Reservation tables;
+    everything else is left to the LLM. Routing decisions are counted for
+    `stats()`.
+
+    `embedding_model` is a zero-argument callable returning the embedder, so
+    the router can be built before the model is loaded. `session_factory`
+    returns a SQLAlchemy session.
+    """
+
+    def __init__(self, embedding_model, session_factory, info: dict,
+                 similarity_threshold: float, margin: float):
+        self.embedding_model = embedding_model
+        self.session_factory = session_factory
+        self.info = info
+        self.similarity_threshold = similarity_threshold
+        self.margin = margin
+
+        self._centroids = None
+        self._centroid_lock = threading.Lock()
+        self._handlers = {
+            "location": self._answer_location,
+            "hours": self._answer_hours,
+            "contact": self._answer_contact,
+            "order_status": self._answer_order_status,
+            "reservation_lookup": self._answer_reservation,
+        }
+
+        self.by_intent = Counter()
+        self.by_method = Counter()
+
+    # -----------------------------
+    # Public API
+    # -----------------------------
+    def classify(self, text: str, query_vector=None):
+        """(intent, method) for an utterance; method is "rule", "centroid" or None"""
+        normalized = text.lower()
+        for intent, pattern in _RULES:
+            if pattern.search(normalized):
+                return intent, "rule"
+
+        if query_vector is None:
+            return OPEN_QUESTION, None
+        return self._nearest_centroid(query_vector)
+
+    def route(self, text: str, session_factory=None):
+        """
+        Deterministic answer for a structured request, or None to use the LLM.
+
+        `session_factory` overrides the router's own, e.g. for another tenant.
+        """
+        intent, method = self.classify(text)
+        if intent == OPEN_QUESTION:
+            intent, method = self.classify(text, self.embedding_model().embed_query(text))
+        return self._answer(text, intent, method, session_factory)
+
+    async def aroute(self, text: str, executor=None, session_factory=None):
+        """Async route(): the embedding waits on the batcher, DB lookups run on `executor`"""
+        intent, method = self.classify(text)
+        if intent == OPEN_QUESTION:
+            query_vector = await self.embedding_model().aembed_query(text)
+            intent, method = await run_in_executor(executor, self.classify, text, query_vector)
+        if intent in ("order_status", "reservation_lookup"):
+            return await run_in_executor(executor, self._answer, text, intent, method, session_factory)
+        return self._answer(text, intent, method)
+
+    def stats(self) -> dict:
+        routed = sum(n for intent, n in self.by_intent.items() if intent != OPEN_QUESTION)
+        total = sum(self.by_intent.values())
+        return {
+            "total": total,
+            "routed": routed,
+            "llm": self.by_intent[OPEN_QUESTION],
+            "routed_ratio": routed / total if total else 0.0,
+            "by_intent": dict(self.by_intent),
+            "by_method": dict(self.by_method),
+        }
+
+    # -----------------------------
+    # Classification
+    # -----------------------------
+    def _nearest_centroid(self, query_vector):
+        intents, centroids = self._get_centroids()
+        vector = np.asarray(query_vector, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        if norm == 0:
+            return OPEN_QUESTION, None
+        scores = centroids @ (vector / norm)
+
+        best = int(np.argmax(scores))
+        open_score = scores[intents.index(OPEN_QUESTION)]
+        if (intents[best] != OPEN_QUESTION and scores[best] >= self.similarity_threshold
+                and scores[best] - open_score >= self.margin):
+            return intents[best], "centroid"
+        return OPEN_QUESTION, None
+
+    def _get_centroids(self):
+        if self._centroids is None:
+            with self._centroid_lock:
+                if self._centroids is None:
+                    intents = list(INTENT_EXAMPLES)
+                    texts = [t for intent in intents for t in INTENT_EXAMPLES[intent]]
+                    vectors = np.asarray(self.embedding_model().embed_documents(texts), dtype=np.float32)
+                    vectors /= np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+
+                    centroids, start = [], 0
+                    for intent in intents:
+                        count = len(INTENT_EXAMPLES[intent])
+                        centroid = vectors[start:start + count].mean(axis=0)
+                        centroids.append(centroid / max(np.linalg.norm(centroid), 1e-12))
+                        start += count
+                    self._centroids = (intents, np.stack(centroids))
+        return self._centroids
+
+    # -----------------------------
+    # Handlers
+    # -----------------------------
+    def _answer(self, text: str, intent: str, method, session_factory=None):
+        self.by_intent[intent] += 1
+        if intent == OPEN_QUESTION:
+            return None
+        self.by_method[method] += 1
+        return self._handlers[intent](text, session_factory or self.session_factory)
+
+    def _answer_location(self, text: str, session_factory) -> str:
+        return f"{self.info['location']} Map: {self.info['map_link']}"
+
+    def _answer_hours(self, text: str, session_factory) -> str:
+        return f"We are open {self.info['hours']}."
+
+    def _answer_contact(self, text: str, session_factory) -> str:
+        return f"You can reach us by phone at {self.info['phone']} or by email at {self.info['email']}."
+
+    def _answer_order_status(self, text: str, session_factory) -> str:
+        match = _ORDER_ID.search(text.lower())
+        if not match:
+            return "I can check that for you. What is your order number?"
+
+        order_id = int(match.group(1))
+        db = session_factory()
+        try:
+            order = db.query(Order).filter(Order.id == order_id).first()
+        finally:
+            db.close()
+        if order is None:
+            return f"I couldn't find order #{order_id}. Please check the order number and try again."
+        return f"Order #{order.id} ({order.quantity} x {order.item}) is currently {order.status}."
+
+    def _answer_reservation(self, text: str, session_factory) -> str:
+        match = _RESERVATION_ID.search(text.lower())
+        if not match:
+            return "I can look that up for you. What is your reservation ID? It starts with RES."
+
+        reservation_id = "-".join(part for part in match.groups() if part).upper()
+        db = session_factory()
+        try:
+            reservation = db.query(Reservation).filter(Reservation.reservation_id == reservation_id).first()
+        finally:
+            db.close()
+        if reservation is None:
+            return f"I couldn't find reservation {reservation_id}. Please check the ID and try again."
+        # The booked slot is unambiguous; the text as given may be just "8 pm"
+        when = f"{reservation.slot_start:%Y-%m-%d %H:%M}" if reservation.slot_start else reservation.time_slot
+        return (
+            f"Reservation {reservation.reservation_id} for {reservation.people} "
+            f"{'person' if reservation.people == 1 else 'people'} at {when} is {reservation.status}."
+        )
@@ -0,0 +1,280 @@
+# backend/app/services/parsing_service.py
+import multiprocessing
+import os
+import re
+import threading
+import zipfile
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from xml.etree import ElementTree
+
+from langchain_core.documents import Document
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+SEPARATORS = ["\n\n", "\n", " ", ""]
+# File types DocumentParser.stream can read
+SUPPORTED_EXTENSIONS = (".pdf", ".txt", ".docx")
+
+_W = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+
+
+@lru_cache(maxsize=8)
+def _splitter(chunk_size: int, chunk_overlap: int):
+    return RecursiveCharacterTextSplitter(chunk_size=chunk_size, chunk_overlap=chunk_overlap, separators=SEPARATORS)
+
+
+def _split(text: str, metadata: dict, chunk_size: int, chunk_overlap: int) -> list:
+    return _splitter(chunk_size, chunk_overlap).split_documents([Document(page_content=text, metadata=metadata)])
+
+
+# -----------------------------
+# PDF
+# -----------------------------
+def count_pdf_pages(file_path: str) -> int:
+    with open(file_path, "rb") as f:
+        return len(_open_pdf(f)[0].pages)
+
+
+def _open_pdf(f):
+    import pypdf
+
+    # Given a path, PdfReader copies the whole file into memory; given an
+    # open file, it seeks to the objects it needs as pages are read
+    reader = pypdf.PdfReader(f)
+    # Both walk the whole page tree, so they are worked out once per document
+    return reader, reader.page_labels
+
+
+@lru_cache(maxsize=2)
+def _worker_pdf(file_path: str, mtime: float):
+    # A worker gets many page ranges of the same document; reopening it for
+    # each one would walk the page tree again every time. The file stays
+    # open until the entry is evicted and the reader garbage collected.
+    return _open_pdf(open(file_path, "rb"))
+
+
+def _extract_pages(reader, labels: list, file_path: str, start: int, end: int, chunk_size: int,
+                   chunk_overlap: int) -> list:
+    """
+    Extract and split pages [start, end) as picklable (text, metadata) pairs.
+
+    Text and metadata match PyPDFLoader's, so chunks hash the same whichever
+    path ingested them.
+    """
+    total = len(reader.pages)
+    chunks = []
+    for number in range(start, min(end, total)):
+        text = reader.pages[number].extract_text(extraction_mode="plain").strip()
+        metadata = {"source": file_path, "total_pages": total, "page": number, "page_label": labels[number]}
+        chunks.extend((c.page_content, c.metadata) for c in _split(text, metadata, chunk_size, chunk_overlap))
+    return chunks
+
+
+def _warm_worker(_):
+    import pypdf  # noqa: F401
+
+
+def _parse_pdf_pages(file_path: str, mtime: float, start: int, end: int, chunk_size: int,
+                     chunk_overlap: int) -> list:
+    """Worker process entry point; only the objects of pages [start, end) are read from the file"""
+    reader, labels = _worker_pdf(file_path, mtime)
+    return _extract_pages(reader, labels, file_path, start, end, chunk_size, chunk_overlap)
+
+
+# -----------------------------
+# DOCX and TXT
+# -----------------------------
+def _docx_parts(archive: zipfile.ZipFile) -> list:
+    # Same parts, in the same order, as docx2txt: headers, body, footers
+    names = archive.namelist()
+    headers = [n for n in names if re.match(r"word/header[0-9]*\.xml", n)]
+    footers = [n for n in names if re.match(r"word/footer[0-9]*\.xml", n)]
+    return headers + ["word/document.xml"] + footers
+
+
+def _docx_paragraphs(file_path: str):
+    """
+    Yield the text of a .docx one top-level paragraph or table at a time,
+    laid out as docx2txt does (tabs, line breaks, a blank line before every
+    paragraph).
+
+    The XML is read incrementally and finished elements are dropped from
+    the tree, so memory does not grow with the document.
+    """
+    with zipfile.ZipFile(file_path) as archive:
+        for name in _docx_parts(archive):
+            with archive.open(name) as part:
+                pieces = []
+                depth = 0
+                parent = None
+                # w:body in the document; the root element in headers and footers
+                parent_depth = 2 if name == "word/document.xml" else 1
+                for event, element in ElementTree.iterparse(part, events=("start", "end")):
+                    if event == "start":
+                        depth += 1
+                        if depth == parent_depth:
+                            parent = element
+                        if element.tag == _W + "p":
+                            pieces.append("\n\n")
+                        continue
+                    depth -= 1
+                    if element.tag == _W + "t":
+                        pieces.append(element.text or "")
+                    elif element.tag == _W + "tab":
+                        pieces.append("\t")
+                    elif element.tag in (_W + "br", _W + "cr"):
+                        pieces.append("\n")
+                    if parent is not None and depth == parent_depth:
+                        # A top-level paragraph or table is complete
+                        parent.clear()
+                        if pieces:
+                            yield "".join(pieces)
+                            pieces = []
+                if pieces:
+                    yield "".join(pieces)
+
+
+def _text_paragraphs(file_path: str, read_size: int = 64 * 1024):
+    with open(file_path, "r", encoding="utf-8", errors="replace") as f:
+        rest = ""
+        while True:
+            data = f.read(read_size)
+            if not data:
+                break
+            rest += data
+            cut = rest.rfind("\n\n")
+            if cut >= 0:
+                yield rest[:cut + 2]
+                rest = rest[cut + 2:]
+        if rest:
+            yield rest
+
+
+def _blocks(paragraphs, block_chars: int):
+    # Group paragraphs into blocks of about `block_chars`, cut on paragraph boundaries
+    block = []
+    size = 0
+    for paragraph in paragraphs:
+        block.append(paragraph)
+        size += len(paragraph)
+        if size >= block_chars:
+            yield "".join(block)
+            block = []
+            size = 0
+    if block:
+        yield "".join(block)
+
+
+# -----------------------------
+# Streaming Parser
+# -----------------------------
+class DocumentParser:
+    """
+    Turns a PDF, TXT or DOCX file into chunks a page range at a time.
+
+    stream() is a generator of chunk lists, so the caller can embed and
+    index the first pages while later ones are still being parsed, and
+    memory stays bounded by the work in flight rather than the document's
+    size.
+
+    PDF page ranges of `pages_per_task` pages are extracted and split in a
+    pool of `processes` worker processes, at most two ranges per worker
+    ahead of the consumer; results come back in page order. Documents of
+    a single range, or `processes=0`, are parsed in the calling thread.
+    TXT and DOCX files are read sequentially in blocks of about
+    `block_chars` characters cut on paragraph boundaries; splitting them
+    is cheap next to embedding, so they stay in process.
+    """
+
+    def __init__(self, processes: int, pages_per_task: int, chunk_size: int = 1000, chunk_overlap: int = 200,
+                 block_chars: int = 64 * 1024):
+        self.processes = processes
+        self.pages_per_task = max(1, pages_per_task)
+        self.chunk_size = chunk_size
+        self.chunk_overlap = chunk_overlap
+        self.block_chars = block_chars
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def count_pages(self, file_path: str) -> int:
+        """Pages in a PDF; 0 for formats without pages"""
+        return count_pdf_pages(file_path) if file_path.endswith(".pdf") else 0
+
+    def stream(self, file_path: str, on_pages=None):
+        """
+        Yield lists of chunks in document order.
+
+        `on_pages(parsed, total)` is called after each page range (PDF) or
+        block (TXT/DOCX); `total` is 0 when the page count is unknown.
+        """
+        if file_path.endswith(".pdf"):
+            yield from self._stream_pdf(file_path, on_pages)
+        elif file_path.endswith(".txt") or file_path.endswith(".docx"):
+            paragraphs = _text_paragraphs(file_path) if file_path.endswith(".txt") else _docx_paragraphs(file_path)
+            for parsed, block in enumerate(_blocks(paragraphs, self.block_chars), 1):
+                yield _split(block, {"source": file_path}, self.chunk_size, self.chunk_overlap)
+                if on_pages:
+                    on_pages(parsed, 0)
+        else:
+            raise ValueError("Unsupported file format. Please upload PDF, TXT, or DOCX files.")
+
+    def start(self):
+        """Start the worker processes now rather than on the first multi-range PDF"""
+        if self.processes > 0:
+            list(self._get_executor().map(_warm_worker, range(self.processes)))
+
+    def close(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(cancel_futures=True)
+
+    def _stream_pdf(self, file_path: str, on_pages):
+        total = count_pdf_pages(file_path)
+        ranges = [(start, min(start + self.pages_per_task, total)) for start in range(0, total, self.pages_per_task)]
+        args = (self.chunk_size, self.chunk_overlap)
+
+        if self.processes <= 0 or len(ranges) <= 1:
+            with open(file_path, "rb") as f:
+                reader, labels = _open_pdf(f)
+                for start, end in ranges:
+                    chunks = _extract_pages(reader, labels, file_path, start, end, *args)
+                    yield [Document(page_content=t, metadata=m) for t, m in chunks]
+                    if on_pages:
+                        on_pages(end, total)
+            return
+
+        executor = self._get_executor()
+        mtime = os.path.getmtime(file_path)
+        pending = deque()
+        ranges = iter(ranges)
+
+        def submit():
+            for start, end in ranges:
+                pending.append((end, executor.submit(_parse_pdf_pages, file_path, mtime, start, end, *args)))
+                return
+
+        try:
+            for _ in range(2 * self.processes):
+                submit()
+            while pending:
+                end, future = pending.popleft()
+                chunks = future.result()
+                # Keep the pool busy while the consumer embeds this range
+                submit()
+                yield [Document(page_content=t, metadata=m) for t, m in chunks]
+                if on_pages:
+                    on_pages(end, total)
+        finally:
+            for _, future in pending:
+                future.cancel()
+
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None:
+                # Forking a process that runs FAISS and server threads is unsafe; start clean workers
+                method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+                self._executor = ProcessPoolExecutor(max_workers=self.processes,
+                                                     mp_context=multiprocessing.get_context(method))
+            return self._executor
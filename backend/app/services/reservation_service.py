@@ -0,0 +1,290 @@
+# backend/app/services/reservation_service.py
+import threading
+import time
+from datetime import datetime, timedelta
+
+from .. import database
+from ..core import config, metrics
+from ..core.logger import get_logger, log_event
+from ..models.reservation import Reservation
+from ..utils.id_generator import new_reservation_id
+from . import db_service
+
+logger = get_logger("reservations")
+
+# Accepted besides ISO 8601 ("2025-01-01 20:00", "2025-01-01T20:00:00+05:00")
+_TIME_FORMATS = (
+    "%Y-%m-%d %I:%M %p", "%Y-%m-%d %I %p", "%Y-%m-%d %I:%M%p", "%Y-%m-%d %I%p",
+    "%d/%m/%Y %H:%M", "%d/%m/%Y %I:%M %p",
+    "%d %B %Y %H:%M", "%d %B %Y %I:%M %p", "%B %d %Y %H:%M", "%B %d %Y %I:%M %p",
+)
+# Times without a date, as speech recognition writes them ("8 p.m.", "8:30 pm", "20:00")
+_CLOCK_FORMATS = ("%I %p", "%I:%M %p", "%I%p", "%I:%M%p", "%H:%M")
+_DAY_WORDS = {"today": 0, "tonight": 0, "tomorrow": 1}
+
+
+class ReservationError(ValueError):
+    """A booking that can't be taken as asked: unreadable time, closed slot or party size"""
+
+
+class SlotFull(Exception):
+    """The slot has fewer free seats than the party; `alternatives` are the next slots that fit"""
+
+    def __init__(self, slot: datetime, free: int, alternatives: list):
+        super().__init__(f"Only {free} seats left at {slot:%Y-%m-%d %H:%M}")
+        self.slot = slot
+        self.free = free
+        self.alternatives = alternatives
+
+
+def _strptime(text: str, formats):
+    for fmt in formats:
+        try:
+            return datetime.strptime(text, fmt)
+        except ValueError:
+            continue
+    return None
+
+
+def parse_time_slot(text: str, now: datetime = None) -> datetime:
+    """
+    A reservation time as naive local time; raises ReservationError.
+
+    With `now`, a time of day without a date ("8 pm", "tomorrow at 8:30
+    p.m.") is taken as its next occurrence after `now`; without it such
+    times are rejected, since their day is unknown.
+    """
+    text = " ".join(str(text).replace(",", " ").split())
+    try:
+        moment = datetime.fromisoformat(text)
+    except ValueError:
+        moment = _strptime(text, _TIME_FORMATS)
+    if moment is None and now is not None:
+        moment = _next_occurrence(text, now)
+    if moment is None:
+        raise ReservationError(f"Unrecognized time {text!r}; use e.g. 2025-01-01 20:00")
+    if moment.tzinfo is not None:
+        moment = moment.astimezone().replace(tzinfo=None)
+    return moment
+
+
+def _next_occurrence(text: str, now: datetime):
+    words = text.lower().replace("a.m.", "am").replace("p.m.", "pm").replace("o'clock", "").split()
+    days = None
+    if words and words[0] in _DAY_WORDS:
+        days = _DAY_WORDS[words.pop(0)]
+    if words and words[0] == "at":
+        words.pop(0)
+    clock = _strptime(" ".join(words).rstrip("."), _CLOCK_FORMATS)
+    if clock is None:
+        return None
+    moment = datetime.combine(now.date() + timedelta(days=days or 0), clock.time())
+    if days is None and moment < now:
+        moment += timedelta(days=1)
+    return moment
+
+
+def _minutes(hh_mm: str) -> int:
+    hours, minutes = hh_mm.split(":")
+    return int(hours) * 60 + int(minutes)
+
+
+class ReservationBook:
+    """
+    Seats booked per time slot for one restaurant, held in memory.
+
+    Slots start every `slot_minutes` from `first_slot` to `last_slot` each
+    day and seat `seats_per_slot` guests. The map is rebuilt from the
+    reservations table on first use and reloaded every `refresh_seconds`;
+    availability is answered from it alone. Bookings are decided by the
+    database (see db_service.book_slot), so a map that is behind, e.g. on
+    another worker, can make an availability answer stale but can never
+    overbook a slot. `session_factory` None is the default database.
+    """
+
+    def __init__(self, session_factory=None, seats_per_slot: int = config.RESERVATION_SEATS_PER_SLOT,
+                 slot_minutes: int = config.RESERVATION_SLOT_MINUTES,
+                 first_slot: str = config.RESERVATION_FIRST_SLOT, last_slot: str = config.RESERVATION_LAST_SLOT,
+                 max_party: int = config.RESERVATION_MAX_PARTY, horizon_days: int = config.RESERVATION_HORIZON_DAYS,
+                 refresh_seconds: float = config.RESERVATION_REFRESH_SECONDS):
+        self.session_factory = session_factory
+        self.seats_per_slot = seats_per_slot
+        self.step = timedelta(minutes=slot_minutes)
+        self.max_party = min(max_party, seats_per_slot)
+        self.horizon = timedelta(days=horizon_days)
+        self.refresh_seconds = refresh_seconds
+        first = _minutes(first_slot)
+        # Offsets of the day's slots from midnight
+        self.offsets = [timedelta(minutes=m) for m in range(first, _minutes(last_slot) + 1, slot_minutes)]
+
+        self._booked = {}  # slot start -> seats booked
+        self._lock = threading.Lock()
+        self._load_lock = threading.Lock()
+        self._loaded_at = None
+        self.counts = {"booked": 0, "full": 0, "invalid": 0, "queries": 0, "reloads": 0}
+
+    # -----------------------------
+    # Slots
+    # -----------------------------
+    def slot_for(self, moment: datetime):
+        """Start of the slot `moment` falls in, or None outside the day's slots"""
+        midnight = moment.replace(hour=0, minute=0, second=0, microsecond=0)
+        since_first = moment - midnight - self.offsets[0]
+        if since_first < timedelta(0):
+            return None
+        slot = midnight + self.offsets[0] + self.step * (since_first // self.step)
+        return slot if slot - midnight <= self.offsets[-1] else None
+
+    def slot_of(self, text: str):
+        """The slot a dated time_slot text books, or None if it can't be read"""
+        try:
+            return self.slot_for(parse_time_slot(text))
+        except ReservationError:
+            return None
+
+    def free(self, slot: datetime) -> int:
+        with self._lock:
+            return max(0, self.seats_per_slot - self._booked.get(slot, 0))
+
+    def check(self, time_slot: str, people: int, now: datetime = None) -> datetime:
+        """The slot a booking request is for; raises ReservationError if it can't be taken"""
+        if not 1 <= people <= self.max_party:
+            raise ReservationError(f"Party size must be between 1 and {self.max_party}")
+        now = now or datetime.now()
+        moment = parse_time_slot(time_slot, now)
+        slot = self.slot_for(moment)
+        if slot is None:
+            first, last = (datetime.min + offset for offset in (self.offsets[0], self.offsets[-1]))
+            raise ReservationError(f"We take reservations from {first:%H:%M} to {last:%H:%M}")
+        if moment < now:
+            raise ReservationError("That time has already passed")
+        if slot > now + self.horizon:
+            raise ReservationError(f"We take reservations up to {self.horizon.days} days ahead")
+        return slot
+
+    # -----------------------------
+    # Availability
+    # -----------------------------
+    async def next_free(self, people: int, after: datetime = None, count: int = 3) -> list:
+        """The first `count` slots from `after` (default now) with seats for `people`: [(slot, free seats)]"""
+        await self._fresh()
+        self.counts["queries"] += 1
+        now = datetime.now()
+        if after is not None and after.tzinfo is not None:
+            after = after.astimezone().replace(tzinfo=None)
+        start = max(after or now, now)
+        found = []
+        with self._lock:
+            for slot in self._slots(start, now + self.horizon):
+                free = self.seats_per_slot - self._booked.get(slot, 0)
+                if free >= people:
+                    found.append((slot, free))
+                    if len(found) == count:
+                        break
+        return found
+
+    async def day(self, date) -> list:
+        """Every slot of `date` with its free seats: [(slot, free seats)]"""
+        await self._fresh()
+        self.counts["queries"] += 1
+        midnight = datetime(date.year, date.month, date.day)
+        with self._lock:
+            return [(midnight + offset, max(0, self.seats_per_slot - self._booked.get(midnight + offset, 0)))
+                    for offset in self.offsets]
+
+    def _slots(self, start: datetime, end: datetime):
+        """Slot starts from `start` (inclusive) to `end`, in order"""
+        midnight = start.replace(hour=0, minute=0, second=0, microsecond=0)
+        while midnight <= end:
+            for offset in self.offsets:
+                slot = midnight + offset
+                if start <= slot <= end:
+                    yield slot
+            midnight += timedelta(days=1)
+
+    # -----------------------------
+    # Booking
+    # -----------------------------
+    async def book(self, customer_name: str, time_slot: str, people: int) -> Reservation:
+        """
+        Book `people` seats in the slot of `time_slot`, atomically.
+
+        Raises ReservationError for a request that can't be taken and
+        SlotFull, with the next slots that fit, when the slot lacks seats.
+        """
+        try:
+            slot = self.check(time_slot, people)
+        except ReservationError:
+            self._count("invalid")
+            raise
+        await self._fresh()  # the first load also counts bookings made before slots were tracked
+        reservation = Reservation(reservation_id=new_reservation_id(), customer_name=customer_name,
+                                  time_slot=time_slot, slot_start=slot, people=people)
+        booked = await db_service.run(self._book, reservation)
+        if booked is None:
+            self._count("full")
+            free = self.free(slot)
+            alternatives = await self.next_free(people, after=slot + self.step)
+            log_event(logger, "Slot full", slot=slot.isoformat(), people=people, free=free)
+            raise SlotFull(slot, free, alternatives)
+        self._count("booked")
+        return reservation
+
+    async def import_rows(self, rows: list) -> list:
+        """Bulk-insert reservations (see db_service.bulk_create_reservations), counting their seats"""
+        rows = [{**row, "slot_start": self.slot_of(row["time_slot"])} for row in rows]
+        inserted = await db_service.bulk_create_reservations(rows, self.session_factory)
+        self._loaded_at = None  # reload before the next availability answer
+        return inserted
+
+    def _book(self, reservation: Reservation):
+        db = self._session()
+        try:
+            booked, seats = db_service.book_slot(db, reservation, self.seats_per_slot)
+        finally:
+            db.close()
+        # The database's count is the truth; this also corrects a map that was behind
+        with self._lock:
+            self._booked[reservation.slot_start] = seats
+        return booked
+
+    def _count(self, outcome: str):
+        self.counts[outcome] += 1
+        metrics.reservations.inc(outcome=outcome)
+
+    # -----------------------------
+    # Loading
+    # -----------------------------
+    def load(self):
+        """Rebuild slot counts from the reservations table (first call only) and read them into memory"""
+        with self._load_lock:
+            if self._loaded_at is not None and time.monotonic() - self._loaded_at < self.refresh_seconds:
+                return
+            start = time.perf_counter()
+            db = self._session()
+            try:
+                if self.counts["reloads"] == 0:
+                    slots = db_service.rebuild_slot_capacity(db, self.slot_of)
+                    log_event(logger, "Slot capacity rebuilt", slots=slots)
+                today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+                booked = db_service.slot_bookings(db, today)
+            finally:
+                db.close()
+            with self._lock:
+                self._booked = booked
+            self._loaded_at = time.monotonic()
+            self.counts["reloads"] += 1
+            log_event(logger, "Slot map loaded", slots=len(booked),
+                      duration_ms=round((time.perf_counter() - start) * 1000, 1))
+
+    async def _fresh(self):
+        if self._loaded_at is None or time.monotonic() - self._loaded_at >= self.refresh_seconds:
+            await db_service.run(self.load)
+
+    def _session(self):
+        return (self.session_factory or database.SessionLocal)()
+
+    def stats(self) -> dict:
+        with self._lock:
+            slots = len(self._booked)
+        return {"slots_with_bookings": slots, "seats_per_slot": self.seats_per_slot, **self.counts}
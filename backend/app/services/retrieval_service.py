@@ -0,0 +1,158 @@
+# backend/app/services/retrieval_service.py
+import math
+import re
+import threading
+from collections import Counter, defaultdict
+
+import numpy as np
+
+# Words, plus prices and quantities kept whole ("12.99", "$5")
+_TOKEN = re.compile(r"\d+(?:\.\d+)?|[a-z]+")
+_STOPWORDS = frozenset(
+    "a an and are as at be by can do does for from have how i in is it me my of on or our "
+    "the to what when where which with you your".split()
+)
+
+
+def tokenize(text: str) -> list:
+    return [t for t in _TOKEN.findall(text.lower()) if t not in _STOPWORDS]
+
+
+class BM25Index:
+    """
+    In-memory inverted index with Okapi BM25 scoring.
+
+    Kept in step with the FAISS store by IncrementalIndex, so exact dish names
+    and prices can be matched even when their embeddings blur together.
+    """
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self._postings = defaultdict(dict)  # term -> {doc_id: term frequency}
+        self._lengths = {}
+        self._total_length = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._lengths)
+
+    def add(self, doc_id: str, text: str):
+        terms = Counter(tokenize(text))
+        with self._lock:
+            if doc_id in self._lengths:
+                return
+            for term, tf in terms.items():
+                self._postings[term][doc_id] = tf
+            length = sum(terms.values())
+            self._lengths[doc_id] = length
+            self._total_length += length
+
+    def remove(self, doc_id: str, text: str):
+        with self._lock:
+            length = self._lengths.pop(doc_id, None)
+            if length is None:
+                return
+            self._total_length -= length
+            for term in set(tokenize(text)):
+                postings = self._postings.get(term)
+                if postings is not None:
+                    postings.pop(doc_id, None)
+                    if not postings:
+                        del self._postings[term]
+
+    def idf(self, term: str) -> float:
+        n = len(self._postings.get(term, ()))
+        return math.log(1 + (len(self._lengths) - n + 0.5) / (n + 0.5))
+
+    def search(self, query: str, k: int) -> list:
+        """Top `k` (doc_id, score) pairs for the query"""
+        with self._lock:
+            if not self._lengths:
+                return []
+            avg_length = self._total_length / len(self._lengths)
+            scores = defaultdict(float)
+            for term in set(tokenize(query)):
+                postings = self._postings.get(term)
+                if not postings:
+                    continue
+                idf = self.idf(term)
+                for doc_id, tf in postings.items():
+                    norm = self.k1 * (1 - self.b + self.b * self._lengths[doc_id] / avg_length)
+                    scores[doc_id] += idf * tf * (self.k1 + 1) / (tf + norm)
+        return sorted(scores.items(), key=lambda kv: kv[1], reverse=True)[:k]
+
+
+def vector_search(store, query_vector, k: int) -> list:
+    """Top `k` (doc_id, document) pairs from a langchain FAISS store"""
+    vector = np.array([query_vector], dtype=np.float32)
+    _, positions = store.index.search(vector, k)
+    hits = []
+    for position in positions[0]:
+        if position == -1:
+            continue
+        doc_id = store.index_to_docstore_id[int(position)]
+        doc = store.docstore.search(doc_id)
+        if not isinstance(doc, str):  # removed since this generation of a SharedIndex was published
+            hits.append((doc_id, doc))
+    return hits
+
+
+def reciprocal_rank_fusion(rankings: list, k: int = 60) -> dict:
+    """Fuse several ranked lists of ids into {id: score}"""
+    fused = defaultdict(float)
+    for ranking in rankings:
+        for rank, doc_id in enumerate(ranking):
+            fused[doc_id] += 1 / (k + rank + 1)
+    return fused
+
+
+def rerank(query: str, candidates: list, fused_scores: dict, idf, top_k: int) -> list:
+    """
+    Cheap lexical reranker over the fused candidates.
+
+    Adds to each candidate's fusion score the IDF-weighted share of query
+    terms it contains and a bonus for matching adjacent query word pairs, so
+    a chunk that mentions "pepperoni passion" outranks one that merely talks
+    about pizza. Returns the best `top_k` (doc_id, document) pairs.
+    """
+    terms = list(dict.fromkeys(tokenize(query)))
+    weights = {t: idf(t) for t in terms}
+    total_weight = sum(weights.values()) or 1.0
+    bigrams = set(zip(terms, terms[1:]))
+    top_fused = max(fused_scores.values(), default=1.0)
+
+    scored = []
+    for doc_id, doc in candidates:
+        doc_terms = tokenize(doc.page_content)
+        present = set(doc_terms)
+        coverage = sum(w for t, w in weights.items() if t in present) / total_weight
+        phrase = len(bigrams & set(zip(doc_terms, doc_terms[1:]))) / len(bigrams) if bigrams else 0.0
+        score = fused_scores.get(doc_id, 0.0) / top_fused + coverage + 0.5 * phrase
+        scored.append((score, doc_id, doc))
+
+    scored.sort(key=lambda s: s[0], reverse=True)
+    return [(doc_id, doc) for _, doc_id, doc in scored[:top_k]]
+
+
+def hybrid_search(index, query: str, query_vector, candidates: int, top_k: int) -> list:
+    """
+    Vector and BM25 retrieval fused by reciprocal rank, then reranked.
+
+    `index` is an IncrementalIndex or SharedIndex. Returns (doc_id, document)
+    pairs, best first.
+    """
+    store = index.vectorstore
+    vector_hits = vector_search(store, query_vector, candidates)
+    keyword_hits = index.keyword_search(query, candidates)
+
+    fused = reciprocal_rank_fusion([[doc_id for doc_id, _ in vector_hits], [doc_id for doc_id, _ in keyword_hits]])
+    docs = dict(vector_hits)
+    for doc_id, _ in keyword_hits:
+        if doc_id not in docs:
+            doc = store.docstore.search(doc_id)
+            if not isinstance(doc, str):  # removed since the keyword index was read
+                docs[doc_id] = doc
+
+    pool = sorted(docs.items(), key=lambda kv: fused.get(kv[0], 0.0), reverse=True)
+    return rerank(query, pool, fused, index.keyword_idf, top_k)
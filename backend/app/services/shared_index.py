@@ -0,0 +1,571 @@
+# backend/app/services/shared_index.py
+import json
+import math
+import os
+import re
+import shutil
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+import faiss
+import numpy as np
+from langchain_community.vectorstores import FAISS
+from langchain_community.vectorstores.utils import DistanceStrategy
+from langchain_core.documents import Document
+
+from .retrieval_service import tokenize
+from .vectorstore_service import IncrementalIndex, SegmentedStore, content_hash, merge_tiers
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+# Flat indexes can only be memory-mapped with the IFC flag (faiss >= 1.8)
+_MMAP_FLAGS = getattr(faiss, "IO_FLAG_MMAP_IFC", faiss.IO_FLAG_MMAP) | faiss.IO_FLAG_READ_ONLY
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS chunks (
+    seq INTEGER PRIMARY KEY, id TEXT NOT NULL UNIQUE, text TEXT NOT NULL, metadata TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS sources (source TEXT NOT NULL, chunk_id TEXT NOT NULL);
+CREATE INDEX IF NOT EXISTS ix_sources_source ON sources (source);
+CREATE INDEX IF NOT EXISTS ix_sources_chunk_id ON sources (chunk_id);
+CREATE TABLE IF NOT EXISTS segment_ids (
+    segment TEXT NOT NULL, position INTEGER NOT NULL, id TEXT NOT NULL, PRIMARY KEY (segment, position)
+);
+CREATE INDEX IF NOT EXISTS ix_segment_ids_id ON segment_ids (id);
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+-- Keyword index over the same rows, for hybrid retrieval
+CREATE VIRTUAL TABLE IF NOT EXISTS chunks_fts USING fts5(text, content='chunks', content_rowid='seq');
+CREATE VIRTUAL TABLE IF NOT EXISTS chunks_vocab USING fts5vocab(chunks_fts, 'row');
+CREATE TRIGGER IF NOT EXISTS chunks_fts_insert AFTER INSERT ON chunks BEGIN
+    INSERT INTO chunks_fts (rowid, text) VALUES (new.seq, new.text);
+END;
+CREATE TRIGGER IF NOT EXISTS chunks_fts_delete AFTER DELETE ON chunks BEGIN
+    INSERT INTO chunks_fts (chunks_fts, rowid, text) VALUES ('delete', old.seq, old.text);
+END;
+"""
+
+
+class SqliteDocstore:
+    """
+    Docstore of a SharedIndex, in the SQLite file every worker shares.
+
+    Chunks are looked up one row at a time by docstore id or by segment and
+    position, so nothing is unpickled up front and memory stays flat however
+    large the knowledge base grows. Each thread opens its own connection on
+    first use; the file is in WAL mode, so reads never wait for the writer.
+    """
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self._local = threading.local()
+
+    @property
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, check_same_thread=False)
+            conn.execute("PRAGMA query_only = ON")
+            conn.execute("PRAGMA busy_timeout = 5000")
+            self._local.conn = conn
+        return conn
+
+    def settings(self) -> dict:
+        """The `meta` rows: the published generation and the index's shape"""
+        try:
+            return dict(self._conn.execute("SELECT key, value FROM meta").fetchall())
+        except sqlite3.OperationalError:
+            return {}  # nothing published yet
+
+    def search(self, search: str):
+        row = self._conn.execute("SELECT text, metadata FROM chunks WHERE id = ?", (search,)).fetchone()
+        if row is None:
+            return f"ID {search} not found."
+        return Document(id=search, page_content=row[0], metadata=json.loads(row[1]))
+
+    def id_at(self, segment: str, position: int) -> str:
+        row = self._conn.execute(
+            "SELECT id FROM segment_ids WHERE segment = ? AND position = ?", (segment, position)
+        ).fetchone()
+        if row is None:
+            raise KeyError((segment, position))
+        return row[0]
+
+    def count(self) -> int:
+        return self._conn.execute("SELECT COUNT(*) FROM chunks").fetchone()[0]
+
+    def sources(self) -> dict:
+        rows = self._conn.execute("SELECT source, COUNT(*) FROM sources GROUP BY source").fetchall()
+        return dict(rows)
+
+    def keyword_search(self, query: str, k: int) -> list:
+        """Top `k` (doc_id, score) pairs by SQLite FTS5's BM25"""
+        # FTS5 splits "12.99" into "12" and "99", so match on word pieces
+        words = list(dict.fromkeys(re.findall(r"\w+", " ".join(tokenize(query)))))
+        if not words:
+            return []
+        match = " OR ".join(f'"{w}"' for w in words)
+        return self._conn.execute(
+            "SELECT c.id, -bm25(chunks_fts) FROM chunks_fts JOIN chunks c ON c.seq = chunks_fts.rowid "
+            "WHERE chunks_fts MATCH ? ORDER BY bm25(chunks_fts) LIMIT ?",
+            (match, k),
+        ).fetchall()
+
+    def keyword_idf(self, term: str) -> float:
+        row = self._conn.execute("SELECT doc FROM chunks_vocab WHERE term = ?", (term,)).fetchone()
+        n = row[0] if row else 0
+        total = self.count()
+        return math.log(1 + (total - n + 0.5) / (n + 0.5))
+
+
+class _SegmentIds:
+    """A published segment's chunk ids by position, resolved through SQLite"""
+
+    def __init__(self, docstore: SqliteDocstore, name: str):
+        self.docstore = docstore
+        self.name = name
+
+    def __getitem__(self, position: int) -> str:
+        return self.docstore.id_at(self.name, int(position))
+
+
+class _SharedSegment:
+    """A published segment as SegmentedStore sees it: a memory-mapped index and its ids"""
+
+    def __init__(self, name: str, index, docstore: SqliteDocstore):
+        self.name = name
+        self.index = index
+        self.ids = _SegmentIds(docstore, name)
+
+
+class _FileLock:
+    """Cross-process exclusive lock on a file"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = None
+
+    def __enter__(self):
+        self._file = open(self.path, "a+b")
+        if fcntl:
+            fcntl.flock(self._file.fileno(), fcntl.LOCK_EX)
+        else:
+            self._file.seek(0)
+            msvcrt.locking(self._file.fileno(), msvcrt.LK_LOCK, 1)
+        return self
+
+    def __exit__(self, *exc):
+        if fcntl:
+            fcntl.flock(self._file.fileno(), fcntl.LOCK_UN)
+        else:
+            self._file.seek(0)
+            msvcrt.locking(self._file.fileno(), msvcrt.LK_UNLCK, 1)
+        self._file.close()
+
+
+class SharedIndex:
+    """
+    Knowledge index shared read-only by every worker process.
+
+    Vectors live in immutable segments, `<path>/segments/<name>/index.faiss`,
+    that workers memory-map (so the OS page cache holds a single copy).
+    Chunks, sources and the ids of each segment's positions live in one
+    SQLite file, `<path>/docstore.sqlite`, queried row by row. A generation,
+    `<path>/generations/<n>.json`, lists the segments in use and the
+    positions deleted from each.
+
+    An ingest embeds only the chunks that are not indexed yet and publishes
+    them as one new segment, so its cost follows the size of the change,
+    not of the index; removed chunks are only marked deleted. Small
+    segments are merged as in IncrementalIndex. A publish writes the new
+    segment and generation files first, then switches the generation in
+    the same SQLite transaction that updates the chunk rows. Writers
+    serialize on a cross-process lock; workers notice a new generation with
+    one query and map just the segments they do not have yet.
+
+    Each check also touches the worker's generation file. Old generations,
+    and then the segments only they used, are deleted once no worker has
+    touched them for `grace_seconds`. A chunk removed while a worker still
+    searches an old generation is simply dropped from its results.
+
+    `load_writer()` is only used once, to seed an empty `path` from an
+    IncrementalIndex.
+    """
+
+    def __init__(self, path: str, embedding_model, load_writer, check_interval: float,
+                 grace_seconds: float = 300.0, on_change=None):
+        self.path = path
+        self.embedding_model = embedding_model
+        self.load_writer = load_writer
+        self.check_interval = check_interval
+        # A worker between checks has not touched its generation yet
+        self.grace_seconds = max(grace_seconds, 10 * check_interval)
+        self.on_change = on_change
+
+        self._generations_dir = os.path.join(path, "generations")
+        self._segments_dir = os.path.join(path, "segments")
+        self._db_path = os.path.join(path, "docstore.sqlite")
+        self._lock_path = os.path.join(path, ".write.lock")
+        self._lock = threading.Lock()
+
+        self.generation = None
+        self._store = None
+        self._segments = {}  # name -> memory-mapped index
+        self._last_check = 0.0
+
+        os.makedirs(self._generations_dir, exist_ok=True)
+        os.makedirs(self._segments_dir, exist_ok=True)
+        self._docstore = SqliteDocstore(self._db_path)
+        if "generation" not in self._docstore.settings():
+            with _FileLock(self._lock_path):
+                if "generation" not in self._docstore.settings():
+                    writer = self.load_writer()
+                    self._seed(writer.snapshot(), writer.manifest())
+        self._refresh(force=True)
+
+    # -----------------------------
+    # Reading
+    # -----------------------------
+    @property
+    def vectorstore(self):
+        self._refresh()
+        return self._store
+
+    def sources(self) -> dict:
+        self._refresh()
+        return self._docstore.sources()
+
+    def keyword_search(self, query: str, k: int) -> list:
+        self._refresh()
+        return self._docstore.keyword_search(query, k)
+
+    def keyword_idf(self, term: str) -> float:
+        return self._docstore.keyword_idf(term)
+
+    # -----------------------------
+    # Writing
+    # -----------------------------
+    def ingest(self, source: str, chunks, replace: bool = True, batch_size: int = 64, on_batch=None) -> dict:
+        """IncrementalIndex.ingest() against the shared files; publishes at most one generation"""
+        unique = {}
+        for chunk in chunks:
+            unique.setdefault(content_hash(chunk.page_content), chunk)
+
+        with _FileLock(self._lock_path), self._writing() as conn:
+            previous = self._source_ids(conn, source)
+            added = self._embed(conn, unique, batch_size, on_batch, {"embedded": 0, "total": 0})
+            source_ids = list(unique)
+            removed = []
+            if replace:
+                removed = self._unreferenced(conn, set(previous) - set(source_ids), source)
+            else:
+                source_ids = list(dict.fromkeys(previous + source_ids))
+            if added or removed or source_ids != previous:
+                self._publish(conn, added, removed, {source: source_ids})
+        self._refresh(force=True)
+        return {"added": len(added), "unchanged": len(unique) - len(added), "removed": len(removed)}
+
+    def ingest_stream(self, source: str, batches, batch_size: int = 64, commit_every: int = 1024,
+                      on_batch=None) -> dict:
+        """
+        IncrementalIndex.ingest_stream() against the shared files: each
+        commit group is published as its own segment, and chunks of the
+        previous version of `source` are removed once the stream ends.
+        """
+        with _FileLock(self._lock_path), self._writing() as conn:
+            previous = self._source_ids(conn, source)
+            order = {}  # hash -> None, in document order
+            group = {}
+            counts = {"added": 0, "embedded": 0, "total": 0}
+
+            def commit():
+                added = self._embed(conn, group, batch_size, on_batch, counts)
+                source_ids = list(dict.fromkeys(previous + list(order)))
+                if added:
+                    self._publish(conn, added, [], {source: source_ids})
+                    counts["added"] += len(added)
+                group.clear()
+
+            for batch in batches:
+                for chunk in batch:
+                    chunk_hash = content_hash(chunk.page_content)
+                    if chunk_hash not in order:
+                        order[chunk_hash] = None
+                        group[chunk_hash] = chunk
+                if len(group) >= commit_every:
+                    commit()
+            commit()
+
+            source_ids = list(order)
+            removed = self._unreferenced(conn, set(previous) - set(source_ids), source)
+            if removed or source_ids != self._source_ids(conn, source):
+                self._publish(conn, [], removed, {source: source_ids})
+        self._refresh(force=True)
+        return {"added": counts["added"], "unchanged": len(order) - counts["added"], "removed": len(removed)}
+
+    def remove_source(self, source: str) -> int:
+        """Remove every chunk that only `source` contributed; returns the number removed"""
+        with _FileLock(self._lock_path), self._writing() as conn:
+            if not conn.execute("SELECT 1 FROM sources WHERE source = ? LIMIT 1", (source,)).fetchone():
+                return 0
+            removed = self._unreferenced(conn, set(self._source_ids(conn, source)), source)
+            self._publish(conn, [], removed, {source: None})
+        self._refresh(force=True)
+        return len(removed)
+
+    # -----------------------------
+    # Internals
+    # -----------------------------
+    @contextmanager
+    def _writing(self):
+        conn = sqlite3.connect(self._db_path)
+        try:
+            conn.execute("PRAGMA journal_mode = WAL")
+            conn.execute("PRAGMA busy_timeout = 5000")
+            conn.executescript(_SCHEMA)
+            yield conn
+        finally:
+            conn.close()
+
+    def _seed(self, store, sources: dict):
+        """Publish generation 1 from an in-memory langchain FAISS store"""
+        # Caller holds the cross-process lock
+        with self._writing() as conn:
+            metric = store.index.metric_type
+            conn.executemany("INSERT OR REPLACE INTO meta VALUES (?, ?)", [
+                ("d", str(store.index.d)),
+                ("metric", str(metric)),
+                ("normalize_L2", "1" if store._normalize_L2 else "0"),
+            ])
+            vectors = store.index.reconstruct_n(0, store.index.ntotal) if store.index.ntotal else []
+            # Legacy chunks with uuid ids are keyed by their hash here, as dedup looks them up by hash
+            added, keys = {}, {}
+            for position, vector in enumerate(vectors):
+                doc_id = store.index_to_docstore_id[position]
+                doc = store.docstore.search(doc_id)
+                keys[doc_id] = content_hash(doc.page_content)
+                added.setdefault(keys[doc_id], (keys[doc_id], doc, vector))
+            sources = {source: list(dict.fromkeys(keys[i] for i in ids if i in keys)) for source, ids in sources.items()}
+            # Vectors are already normalized when they were added to `store`
+            self._publish(conn, list(added.values()), [], sources, normalized=True)
+
+    def _source_ids(self, conn, source: str) -> list:
+        rows = conn.execute("SELECT chunk_id FROM sources WHERE source = ? ORDER BY rowid", (source,))
+        return [row[0] for row in rows]
+
+    def _unreferenced(self, conn, ids: set, source: str) -> list:
+        still_used = set()
+        for chunk_ids in _batched(sorted(ids)):
+            rows = conn.execute(
+                f"SELECT DISTINCT chunk_id FROM sources WHERE source != ? AND chunk_id IN ({_marks(chunk_ids)})",
+                (source, *chunk_ids),
+            )
+            still_used.update(row[0] for row in rows)
+        return sorted(ids - still_used)
+
+    def _embed(self, conn, chunks: dict, batch_size: int, on_batch, counts: dict) -> list:
+        """(hash, chunk, vector) of the chunks in `chunks` (hash -> chunk) that are not indexed yet"""
+        indexed = set()
+        for hashes in _batched(list(chunks)):
+            rows = conn.execute(f"SELECT id FROM chunks WHERE id IN ({_marks(hashes)})", hashes)
+            indexed.update(row[0] for row in rows)
+        pending = [(h, c) for h, c in chunks.items() if h not in indexed]
+        counts["total"] += len(pending)
+
+        added = []
+        for start in range(0, len(pending), batch_size):
+            batch = pending[start:start + batch_size]
+            vectors = self.embedding_model.embed_documents([c.page_content for _, c in batch])
+            added.extend((h, c, v) for (h, c), v in zip(batch, vectors))
+            counts["embedded"] += len(batch)
+            if on_batch:
+                on_batch(counts["embedded"], counts["total"])
+        return added
+
+    def _publish(self, conn, added: list, removed: list, sources: dict, normalized: bool = False):
+        """
+        Publish a generation with `added` (id, chunk, vector) as a new segment
+        and `removed` ids deleted; `sources` maps each source whose chunk list
+        changed to its new ids, or None once removed.
+        """
+        # Caller holds the cross-process lock
+        settings = dict(conn.execute("SELECT key, value FROM meta").fetchall())
+        current = self._read_generation(settings["generation"])["segments"] if "generation" in settings else []
+        entries = [[segment["name"], segment["size"], set(segment["deleted"])] for segment in current]
+
+        numbers = {entry[0]: n for n, entry in enumerate(entries)}
+        for doc_ids in _batched(removed):
+            rows = conn.execute(
+                f"SELECT segment, position FROM segment_ids WHERE id IN ({_marks(doc_ids)})", doc_ids
+            )
+            for segment, position in rows:
+                if segment in numbers:
+                    entries[numbers[segment]][2].add(position)
+
+        if added:
+            vectors = np.array([v for _, _, v in added], dtype=np.float32)
+            if settings["normalize_L2"] == "1" and not normalized:
+                faiss.normalize_L2(vectors)
+            entries.append(self._write_segment(conn, settings, vectors, [h for h, _, _ in added]))
+        entries = merge_tiers(entries, live=lambda entry: entry[1] - len(entry[2]), total=lambda entry: entry[1],
+                              rebuild=lambda group: self._merge_segments(conn, settings, group),
+                              max_deleted_share=IncrementalIndex.MAX_DELETED_SHARE)
+
+        generation = str(max(self._generation_numbers(), default=0) + 1)
+        data = {"segments": [{"name": name, "size": size, "deleted": sorted(deleted)}
+                             for name, size, deleted in entries]}
+        tmp_path = os.path.join(self._generations_dir, f".{generation}.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self._generation_path(generation))
+
+        for doc_ids in _batched(removed):
+            conn.execute(f"DELETE FROM chunks WHERE id IN ({_marks(doc_ids)})", doc_ids)
+        conn.executemany(
+            "INSERT INTO chunks (id, text, metadata) VALUES (?, ?, ?)",
+            ((h, c.page_content, json.dumps(c.metadata)) for h, c, _ in added),
+        )
+        for source, ids in sources.items():
+            conn.execute("DELETE FROM sources WHERE source = ?", (source,))
+            if ids is not None:
+                conn.executemany("INSERT INTO sources VALUES (?, ?)", ((source, chunk_id) for chunk_id in ids))
+        # The one step that switches generations
+        conn.execute("INSERT OR REPLACE INTO meta VALUES ('generation', ?)", (generation,))
+        conn.commit()
+
+        self._collect_garbage(conn, generation)
+
+    def _write_segment(self, conn, settings: dict, vectors, ids: list) -> list:
+        """Write a segment holding `vectors`; returns its [name, size, deleted positions]"""
+        existing = [int(name) for name in os.listdir(self._segments_dir) if name.isdigit()]
+        name = f"{max(existing, default=0) + 1:06d}"
+        index = faiss.IndexFlat(int(settings["d"]), int(settings["metric"]))
+        if len(ids):
+            index.add(np.ascontiguousarray(vectors, dtype=np.float32))
+
+        tmp_dir = os.path.join(self._segments_dir, f".{name}.tmp")
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        os.makedirs(tmp_dir)
+        faiss.write_index(index, os.path.join(tmp_dir, "index.faiss"))
+        os.replace(tmp_dir, os.path.join(self._segments_dir, name))
+        conn.executemany("INSERT INTO segment_ids VALUES (?, ?, ?)", ((name, n, doc_id) for n, doc_id in enumerate(ids)))
+        return [name, len(ids), set()]
+
+    def _merge_segments(self, conn, settings: dict, entries: list) -> list:
+        """One new segment holding the live chunks of `entries`"""
+        vectors, ids = [], []
+        for name, size, deleted in entries:
+            keep = [n for n in range(size) if n not in deleted]
+            if not keep:
+                continue
+            index = faiss.read_index(os.path.join(self._segments_dir, name, "index.faiss"), _MMAP_FLAGS)
+            vectors.append(index.reconstruct_n(0, size)[keep])
+            positions = dict(conn.execute("SELECT position, id FROM segment_ids WHERE segment = ?", (name,)))
+            ids.extend(positions[n] for n in keep)
+        if not ids:
+            return [None, 0, set()]
+        return self._write_segment(conn, settings, np.vstack(vectors), ids)
+
+    def _collect_garbage(self, conn, current: str):
+        """Delete generations no worker has touched for `grace_seconds`, then segments no generation uses"""
+        # Caller holds the cross-process lock
+        now = time.time()
+        in_use = set()
+        for name in os.listdir(self._generations_dir):
+            path = os.path.join(self._generations_dir, name)
+            number = name[:-len(".json")] if name.endswith(".json") else name
+            if number == current or (number.isdigit() and now - os.path.getmtime(path) < self.grace_seconds):
+                if os.path.isfile(path):
+                    in_use.update(segment["name"] for segment in self._read_generation(number)["segments"])
+                continue
+            if os.path.isdir(path):  # directories of the previous, whole-index layout
+                shutil.rmtree(path, ignore_errors=True)
+            else:
+                os.remove(path)
+
+        for name in os.listdir(self._segments_dir):
+            if name not in in_use:
+                shutil.rmtree(os.path.join(self._segments_dir, name), ignore_errors=True)
+                conn.execute("DELETE FROM segment_ids WHERE segment = ?", (name,))
+        conn.commit()
+
+    def _generation_numbers(self) -> list:
+        names = (name.split(".")[0] for name in os.listdir(self._generations_dir))
+        return [int(name) for name in names if name.isdigit()]
+
+    def _generation_path(self, generation: str) -> str:
+        return os.path.join(self._generations_dir, f"{generation}.json")
+
+    def _read_generation(self, generation: str) -> dict:
+        with open(self._generation_path(generation), "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def _refresh(self, force: bool = False):
+        now = time.monotonic()
+        if not force and now - self._last_check < self.check_interval:
+            return
+
+        with self._lock:
+            self._last_check = now
+            settings = self._docstore.settings()
+            generation = settings["generation"]
+            try:
+                # Tells the writer this generation is still being read
+                os.utime(self._generation_path(generation))
+            except FileNotFoundError:
+                pass
+            if generation == self.generation:
+                return
+
+            segments, mapped = [], {}
+            for segment in self._read_generation(generation)["segments"]:
+                name = segment["name"]
+                index = self._segments.get(name)
+                if index is None:
+                    index = faiss.read_index(os.path.join(self._segments_dir, name, "index.faiss"), _MMAP_FLAGS)
+                mapped[name] = index
+                segments.append((_SharedSegment(name, index, self._docstore), frozenset(segment["deleted"])))
+
+            metric = int(settings["metric"])
+            normalize_L2 = settings["normalize_L2"] == "1"
+            view = SegmentedStore(
+                tuple(segments), self.embedding_model, normalize_L2, _distance_strategy(metric),
+                d=int(settings["d"]), metric=metric, docstore=self._docstore,
+            )
+            store = FAISS(
+                embedding_function=self.embedding_model,
+                index=view.index,
+                docstore=self._docstore,
+                index_to_docstore_id=view.index_to_docstore_id,
+                normalize_L2=normalize_L2,
+                distance_strategy=_distance_strategy(metric),
+            )
+
+            changed = self.generation is not None
+            self._store, self._segments, self.generation = store, mapped, generation
+
+        if changed and self.on_change:
+            self.on_change()
+
+
+def _distance_strategy(metric: int):
+    if metric == faiss.METRIC_INNER_PRODUCT:
+        return DistanceStrategy.MAX_INNER_PRODUCT
+    return DistanceStrategy.EUCLIDEAN_DISTANCE
+
+
+def _batched(items: list, size: int = 500):
+    # SQLite caps the number of bound parameters per statement
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def _marks(items: list) -> str:
+    return ", ".join("?" * len(items))
@@ -0,0 +1,188 @@
+# backend/app/services/stt_service.py
+import json
+import threading
+from typing import Optional
+
+import numpy as np
+
+from ..core import config
+from ..core.startup import timed
+from ..utils.audio_utils import (
+    StreamingResampler, VoiceActivityDetector, float32_to_pcm16, pcm16_to_float32,
+)
+
+
+# -----------------------------
+# Engine Interface
+# -----------------------------
+class STTStream:
+    """Decoder state for a single utterance"""
+
+    def accept(self, samples: np.ndarray) -> Optional[str]:
+        """Feed float32 samples at the engine's rate; returns the partial transcript so far"""
+        raise NotImplementedError
+
+    def finish(self) -> str:
+        """Final transcript of the utterance"""
+        raise NotImplementedError
+
+
+class STTEngine:
+    """A loaded speech recognition model; shared by all connections"""
+
+    sample_rate = 16000
+
+    def create_stream(self) -> STTStream:
+        raise NotImplementedError
+
+
+# -----------------------------
+# Vosk (offline, CPU)
+# -----------------------------
+class VoskEngine(STTEngine):
+    """Kaldi-based offline recognizer; small models run in real time on one CPU core"""
+
+    def __init__(self, model_path: str, sample_rate: int = 16000):
+        try:
+            import vosk
+        except ImportError:
+            raise RuntimeError("The vosk engine needs the vosk package: pip install vosk")
+        vosk.SetLogLevel(-1)
+        self._vosk = vosk
+        self.sample_rate = sample_rate
+        self.model = vosk.Model(model_path)
+
+    def create_stream(self) -> STTStream:
+        return _VoskStream(self._vosk.KaldiRecognizer(self.model, self.sample_rate))
+
+
+class _VoskStream(STTStream):
+    def __init__(self, recognizer):
+        self.recognizer = recognizer
+        self.segments = []
+
+    def accept(self, samples: np.ndarray) -> Optional[str]:
+        if self.recognizer.AcceptWaveform(float32_to_pcm16(samples)):
+            # Vosk closed a segment on its own (a pause shorter than our VAD's)
+            self._add(json.loads(self.recognizer.Result()).get("text", ""))
+            return " ".join(self.segments)
+        partial = json.loads(self.recognizer.PartialResult()).get("partial", "")
+        return " ".join(self.segments + ([partial] if partial else []))
+
+    def finish(self) -> str:
+        self._add(json.loads(self.recognizer.FinalResult()).get("text", ""))
+        return " ".join(self.segments)
+
+    def _add(self, text: str):
+        if text:
+            self.segments.append(text)
+
+
+# -----------------------------
+# Engine Registry
+# -----------------------------
+_engine_factories = {
+    "vosk": lambda: VoskEngine(config.STT_MODEL_PATH, config.STT_SAMPLE_RATE),
+}
+_engines = {}
+_engines_lock = threading.Lock()
+
+
+def register_engine(name: str, factory):
+    """Make an engine available by name; `factory()` is called once, on first use"""
+    with _engines_lock:
+        _engine_factories[name] = factory
+        _engines.pop(name, None)
+
+
+def get_engine(name: str) -> STTEngine:
+    if name not in _engines:
+        with _engines_lock:
+            if name not in _engines:
+                if name not in _engine_factories:
+                    raise ValueError(f"Unknown speech-to-text engine: {name}")
+                with timed(f"stt_{name}"):
+                    _engines[name] = _engine_factories[name]()
+    return _engines[name]
+
+
+# -----------------------------
+# Streaming Transcription
+# -----------------------------
+class StreamingTranscriber:
+    """
+    Turns a stream of PCM16 audio into partial and final transcripts.
+
+    Incoming audio is downmixed, resampled to the engine's rate and passed
+    through voice activity detection; only speech (plus a short pre-roll) is
+    sent to the engine, in `partial_interval_ms` slices. Each utterance ends
+    with a "final" event as soon as the VAD hears `silence_ms` of silence.
+    Nothing is buffered beyond the current slice.
+
+    `feed()` and `close()` return lists of event dicts: "speech_start",
+    "partial" and "final". Decoding is CPU-bound, so callers on the event loop
+    should run them in an executor.
+    """
+
+    def __init__(self, engine: STTEngine, input_rate: int, channels: int = 1,
+                 silence_ms: int = 300, partial_interval_ms: int = 200):
+        self.engine = engine
+        self.channels = channels
+        self.resampler = StreamingResampler(input_rate, engine.sample_rate)
+        self.vad = VoiceActivityDetector(engine.sample_rate, silence_ms=silence_ms)
+        self.utterances = 0
+
+        self._carry = b""
+        self._stream = None
+        self._slice = []
+        self._slice_length = 0
+        self._slice_size = engine.sample_rate * partial_interval_ms // 1000
+        self._last_partial = ""
+
+    def feed(self, data: bytes) -> list:
+        # Keep any trailing partial sample for the next call
+        data = self._carry + data
+        usable = len(data) // (2 * self.channels) * (2 * self.channels)
+        self._carry = data[usable:]
+        samples = self.resampler.process(pcm16_to_float32(data[:usable], self.channels))
+
+        events = []
+        for kind, frame in self.vad.feed(samples):
+            if kind == "start":
+                self._stream = self.engine.create_stream()
+                events.append({"type": "speech_start", "audio_ms": self.vad.position_ms})
+                self._buffer(frame, events)
+            elif kind == "speech":
+                self._buffer(frame, events)
+            elif kind == "end":
+                events.append(self._finish())
+        return events
+
+    def close(self) -> list:
+        """Finish the utterance in progress, if any"""
+        if self._stream is None:
+            return []
+        return [self._finish()]
+
+    def _buffer(self, frame: np.ndarray, events: list):
+        self._slice.append(frame)
+        self._slice_length += len(frame)
+        if self._slice_length >= self._slice_size:
+            partial = self._send_slice()
+            if partial and partial != self._last_partial:
+                self._last_partial = partial
+                events.append({"type": "partial", "text": partial})
+
+    def _send_slice(self):
+        samples = np.concatenate(self._slice)
+        self._slice, self._slice_length = [], 0
+        return self._stream.accept(samples)
+
+    def _finish(self) -> dict:
+        if self._slice:
+            self._send_slice()
+        text = self._stream.finish()
+        self._stream = None
+        self._last_partial = ""
+        self.utterances += 1
+        return {"type": "final", "text": text, "utterance": self.utterances - 1, "audio_ms": self.vad.position_ms}
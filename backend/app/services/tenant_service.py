@@ -0,0 +1,244 @@
+# backend/app/services/tenant_service.py
+import os
+import threading
+import time
+import weakref
+from collections import OrderedDict
+
+from ..core.logger import get_logger
+
+logger = get_logger("tenants")
+
+# Matches the cache_size pragma set on every SQLite connection
+SQLITE_CACHE_BYTES = 16000 * 1024
+
+
+class LRUPool:
+    """
+    Resources opened on first use and kept for reuse, at most `capacity` at once.
+
+    `opener(key)` opens a resource; concurrent requests for the same key wait
+    for a single open. When the pool is full the least recently used
+    resource is dropped and `closer(resource)` is called, outside the lock.
+    Anyone still holding an evicted resource can keep using it until done.
+    `sizer(resource)` estimates its memory for stats().
+    """
+
+    def __init__(self, opener, capacity: int, closer=None, sizer=None):
+        self.opener = opener
+        self.capacity = capacity
+        self.closer = closer
+        self.sizer = sizer
+
+        self._resources = OrderedDict()  # key -> resource, least recently used first
+        self._opening = {}               # key -> lock held while that key opens
+        self._lock = threading.Lock()
+        self._usage = {}                 # key -> counters, kept across evictions
+
+        self.hits = 0
+        self.loads = 0
+        self.evictions = 0
+
+    def get(self, key):
+        with self._lock:
+            resource = self._touch(key)
+            if resource is not None:
+                return resource
+            opening = self._opening.setdefault(key, threading.Lock())
+
+        with opening:
+            with self._lock:
+                resource = self._touch(key)
+                if resource is not None:
+                    return resource
+            start = time.perf_counter()
+            try:
+                resource = self.opener(key)
+            finally:
+                with self._lock:
+                    self._opening.pop(key, None)
+            load_ms = (time.perf_counter() - start) * 1000
+
+            with self._lock:
+                self._resources[key] = resource
+                self.loads += 1
+                usage = self._usage_for(key)
+                usage["loads"] += 1
+                usage["last_used"] = time.time()
+                usage["last_load_ms"] = round(load_ms, 1)
+                evicted = []
+                while len(self._resources) > self.capacity:
+                    old_key, old = self._resources.popitem(last=False)
+                    self.evictions += 1
+                    self._usage[old_key]["evictions"] += 1
+                    evicted.append(old)
+        for old in evicted:
+            self._close(old)
+        return resource
+
+    def peek(self, key):
+        """The resource if it is open, without opening it or changing its recency"""
+        with self._lock:
+            return self._resources.get(key)
+
+    def evict(self, key) -> bool:
+        with self._lock:
+            resource = self._resources.pop(key, None)
+        if resource is None:
+            return False
+        self._close(resource)
+        return True
+
+    def clear(self):
+        with self._lock:
+            resources = list(self._resources.values())
+            self._resources.clear()
+        for resource in resources:
+            self._close(resource)
+
+    def stats(self, keys=None) -> dict:
+        """Pool-wide counters, and per-key counters for `keys` (default every key)"""
+        with self._lock:
+            items = [(key, resource) for key, resource in self._resources.items() if keys is None or key in keys]
+            usage = {key: dict(counters, open=key in self._resources) for key, counters in self._usage.items()
+                     if keys is None or key in keys}
+            totals = {"capacity": self.capacity, "open": len(items), "hits": self.hits,
+                      "loads": self.loads, "evictions": self.evictions}
+        total_bytes = 0
+        for key, resource in items:
+            size = self._size(resource)
+            if size is not None:
+                usage[key]["bytes"] = size
+                total_bytes += size
+        return {**totals, "bytes": total_bytes, "by_key": usage}
+
+    def _touch(self, key):
+        # Caller holds the lock
+        resource = self._resources.get(key)
+        if resource is not None:
+            self._resources.move_to_end(key)
+            self.hits += 1
+            usage = self._usage_for(key)
+            usage["hits"] += 1
+            usage["last_used"] = time.time()
+        return resource
+
+    def _usage_for(self, key) -> dict:
+        usage = self._usage.get(key)
+        if usage is None:
+            usage = self._usage[key] = {"hits": 0, "loads": 0, "evictions": 0,
+                                        "last_load_ms": None, "last_used": time.time()}
+        return usage
+
+    def _size(self, resource):
+        if self.sizer is None:
+            return None
+        try:
+            return self.sizer(resource)
+        except Exception:
+            return None
+
+    def _close(self, resource):
+        if self.closer is None:
+            return
+        try:
+            self.closer(resource)
+        except Exception:
+            logger.exception("Error closing pooled resource")
+
+
+class Tenant:
+    """
+    One restaurant's data: its database sessions and its knowledge index.
+
+    `session_factory()` returns a new SQLAlchemy session and
+    `knowledge_index()` the index to retrieve from; both open the tenant's
+    stores lazily through the router's pools.
+    """
+
+    def __init__(self, tenant_id, session_factory, knowledge_index):
+        self.tenant_id = tenant_id
+        self.session_factory = session_factory
+        self.knowledge_index = knowledge_index
+
+
+class TenantRouter:
+    """
+    Maps tenant IDs to per-restaurant stores under `data_dir/<tenant_id>/`.
+
+    Each tenant has its own SQLite database and FAISS index. They are opened
+    on first use and held in separate LRU pools, so a process can serve many
+    restaurants while keeping only the recently active ones in memory.
+    `open_database(path)` returns (engine, sessionmaker) and
+    `open_index(path, tenant_id=)` a knowledge index. Tenant ID None is the
+    shared default store.
+
+    An index evicted from its pool while still in use, e.g. by an ingestion,
+    is handed out again on the next request instead of being reopened, so
+    there is never more than one writer per index directory.
+    """
+
+    def __init__(self, data_dir: str, open_database, open_index, default: Tenant,
+                 max_databases: int, max_indexes: int):
+        self.data_dir = data_dir
+        self.default = default
+        self._open_database = open_database
+        self._open_index = open_index
+        self.databases = LRUPool(self._database_for, max_databases,
+                                 closer=lambda db: db[0].dispose(), sizer=self._database_size)
+        self.indexes = LRUPool(self._index_for, max_indexes, sizer=self._index_size)
+        self._live_indexes = weakref.WeakValueDictionary()  # tenant ID -> index, while anyone holds it
+
+    def path_for(self, tenant_id: int) -> str:
+        return os.path.join(self.data_dir, str(int(tenant_id)))
+
+    def exists(self, tenant_id: int) -> bool:
+        return os.path.isdir(self.path_for(tenant_id))
+
+    def provision(self, tenant_id: int):
+        """Create the tenant's database (and directory) ahead of first use"""
+        self.databases.get(int(tenant_id))
+
+    def tenant(self, tenant_id) -> Tenant:
+        if tenant_id is None:
+            return self.default
+        tenant_id = int(tenant_id)
+        return Tenant(
+            tenant_id,
+            session_factory=lambda: self.databases.get(tenant_id)[1](),
+            knowledge_index=lambda: self.indexes.get(tenant_id),
+        )
+
+    def stats(self, tenant_ids=None) -> dict:
+        """Pool counters, with per-tenant details for `tenant_ids` (default every tenant)"""
+        keys = None if tenant_ids is None else set(tenant_ids)
+        return {"databases": self.databases.stats(keys), "indexes": self.indexes.stats(keys)}
+
+    def _database_for(self, tenant_id: int):
+        path = self.path_for(tenant_id)
+        os.makedirs(path, exist_ok=True)
+        return self._open_database(os.path.join(path, "restaurant.db"))
+
+    def _index_for(self, tenant_id: int):
+        # The pool never opens the same tenant twice at once, so this cannot race with itself
+        index = self._live_indexes.get(tenant_id)
+        if index is None:
+            path = self.path_for(tenant_id)
+            os.makedirs(path, exist_ok=True)
+            index = self._live_indexes[tenant_id] = self._open_index(os.path.join(path, "faiss_index"),
+                                                                    tenant_id=tenant_id)
+        return index
+
+    @staticmethod
+    def _database_size(db) -> int:
+        # Each open connection caches up to the whole file (capped by its cache_size)
+        engine = db[0]
+        connections = engine.pool.checkedin() + engine.pool.checkedout()
+        file_size = os.path.getsize(engine.url.database) if os.path.exists(engine.url.database) else 0
+        return connections * min(file_size, SQLITE_CACHE_BYTES)
+
+    @staticmethod
+    def _index_size(index) -> int:
+        # Flat float32 vectors; memory-mapped indexes are shared page cache
+        faiss_index = index.vectorstore.index
+        return faiss_index.ntotal * faiss_index.d * 4
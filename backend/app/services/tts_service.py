@@ -0,0 +1,282 @@
+# backend/app/services/tts_service.py
+import asyncio
+import hashlib
+import io
+import os
+import shutil
+import subprocess
+import threading
+import wave
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Optional
+
+from ..core import config
+from ..core.startup import timed
+from ..utils.response_utils import split_sentences
+
+
+def normalize_text(text: str) -> str:
+    """Collapse whitespace; the engine speaks exactly the normalized text"""
+    return " ".join(text.split())
+
+
+# -----------------------------
+# Engine Interface
+# -----------------------------
+class TTSEngine:
+    """Text-to-speech model; `synthesize` must be safe to call from several threads"""
+
+    name = "base"
+    sample_rate = 22050
+
+    def synthesize(self, text: str, voice: str) -> bytes:
+        """Mono 16-bit PCM at `sample_rate`"""
+        raise NotImplementedError
+
+
+# -----------------------------
+# eSpeak NG (offline, CPU)
+# -----------------------------
+class EspeakEngine(TTSEngine):
+    """
+    Formant synthesizer run as a subprocess per sentence.
+
+    Small and fast enough to synthesize a sentence in a few milliseconds on
+    one core; separate processes let sentences be synthesized in parallel.
+    """
+
+    name = "espeak"
+    sample_rate = 22050
+
+    def __init__(self, words_per_minute: int = 165):
+        self.binary = shutil.which("espeak-ng") or shutil.which("espeak")
+        if not self.binary:
+            raise RuntimeError("The espeak engine needs espeak-ng installed (apt install espeak-ng)")
+        self.words_per_minute = words_per_minute
+
+    def synthesize(self, text: str, voice: str) -> bytes:
+        # Text goes through stdin so nothing in it is parsed as an option
+        result = subprocess.run(
+            [self.binary, "--stdout", "-v", voice, "-s", str(self.words_per_minute)],
+            input=text.encode("utf-8"), capture_output=True, check=True, timeout=30,
+        )
+        with wave.open(io.BytesIO(result.stdout), "rb") as wav:
+            if wav.getframerate() != self.sample_rate or wav.getsampwidth() != 2:
+                raise RuntimeError(f"Unexpected espeak output format: {wav.getframerate()} Hz")
+            # Streamed output carries a placeholder length, so read to the end
+            return wav.readframes(wav.getnframes())
+
+
+# -----------------------------
+# Audio Cache
+# -----------------------------
+class AudioCache:
+    """
+    Content-addressed disk cache of synthesized sentences.
+
+    Entries are keyed on a hash of engine, sample rate, voice and normalized
+    text, and stored as raw PCM files. The total size is kept under
+    `max_bytes` by evicting the least recently used entries; recency survives
+    restarts through file modification times.
+    """
+
+    def __init__(self, directory: str, max_bytes: int):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()  # key -> size, least recently used first
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        os.makedirs(directory, exist_ok=True)
+        files = []
+        for name in os.listdir(directory):
+            if name.endswith(".pcm"):
+                stat = os.stat(os.path.join(directory, name))
+                files.append((stat.st_mtime, name[:-4], stat.st_size))
+        for _, key, size in sorted(files):
+            self._entries[key] = size
+            self._total_bytes += size
+
+    @staticmethod
+    def key(engine: TTSEngine, voice: str, text: str) -> str:
+        identity = f"{engine.name}|{engine.sample_rate}|{voice}|{normalize_text(text)}"
+        return hashlib.sha256(identity.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[bytes]:
+        path = self._path(key)
+        with self._lock:
+            if key not in self._entries:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+            os.utime(path)
+        except FileNotFoundError:
+            # Evicted between the lookup and the read
+            with self._lock:
+                self.misses += 1
+            return None
+        with self._lock:
+            self.hits += 1
+        return data
+
+    def put(self, key: str, data: bytes):
+        if len(data) > self.max_bytes:
+            return
+        path = self._path(key)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+        with self._lock:
+            self._total_bytes += len(data) - self._entries.pop(key, 0)
+            self._entries[key] = len(data)
+            while self._total_bytes > self.max_bytes:
+                old_key, size = self._entries.popitem(last=False)
+                self._total_bytes -= size
+                self.evictions += 1
+                try:
+                    os.remove(self._path(old_key))
+                except FileNotFoundError:
+                    pass
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "entries": len(self._entries),
+                "bytes": self._total_bytes,
+                "max_bytes": self.max_bytes,
+            }
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.pcm")
+
+
+# -----------------------------
+# Synthesis Service
+# -----------------------------
+class TTSService:
+    """
+    Sentence-level synthesis with caching and parallelism.
+
+    Text is split into sentences; each one is looked up in the audio cache
+    and, on a miss, synthesized on a pool of `workers` threads. Concurrent
+    requests for the same sentence share a single synthesis. `stream()`
+    yields audio in order as soon as each sentence is ready, so playback can
+    start after the first sentence while the rest are still being rendered.
+    """
+
+    def __init__(self, engine: TTSEngine, cache: AudioCache, workers: int, chunk_bytes: int = 8192):
+        self.engine = engine
+        self.cache = cache
+        self.chunk_bytes = chunk_bytes
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="tts")
+        self._inflight = {}
+        self._lock = threading.Lock()
+
+    @property
+    def sample_rate(self) -> int:
+        return self.engine.sample_rate
+
+    def submit(self, sentence: str, voice: str) -> Future:
+        """Future for the PCM audio of one sentence"""
+        key = AudioCache.key(self.engine, voice, sentence)
+        cached = self.cache.get(key)
+        if cached is not None:
+            future = Future()
+            future.set_result(cached)
+            return future
+
+        with self._lock:
+            future = self._inflight.get(key)
+            if future is not None:
+                return future
+            future = self._executor.submit(self._synthesize, key, normalize_text(sentence), voice)
+            self._inflight[key] = future
+        # Outside the lock: the callback runs at once if synthesis already finished
+        future.add_done_callback(lambda _: self._forget(key))
+        return future
+
+    def synthesize(self, text: str, voice: str) -> bytes:
+        futures = [self.submit(s, voice) for s in split_sentences(text)]
+        return b"".join(f.result() for f in futures)
+
+    def stream(self, text: str, voice: str):
+        futures = [self.submit(s, voice) for s in split_sentences(text)]
+        for future in futures:
+            yield from self._chunks(future.result())
+
+    async def astream(self, text: str, voice: str):
+        """stream() for async endpoints; waits on the synthesis pool without blocking the loop"""
+        futures = [self.submit(s, voice) for s in split_sentences(text)]
+        for future in futures:
+            # Shielded: other requests may be waiting on the same synthesis
+            data = await asyncio.shield(asyncio.wrap_future(future))
+            for chunk in self._chunks(data):
+                yield chunk
+
+    def stats(self) -> dict:
+        return {"engine": self.engine.name, "inflight": len(self._inflight), **self.cache.stats()}
+
+    def _synthesize(self, key: str, text: str, voice: str) -> bytes:
+        data = self.engine.synthesize(text, voice)
+        self.cache.put(key, data)
+        return data
+
+    def _forget(self, key: str):
+        with self._lock:
+            self._inflight.pop(key, None)
+
+    def _chunks(self, data: bytes):
+        for start in range(0, len(data), self.chunk_bytes):
+            yield data[start:start + self.chunk_bytes]
+
+
+# -----------------------------
+# Engine Registry
+# -----------------------------
+_engine_factories = {
+    "espeak": EspeakEngine,
+}
+_service = None
+_service_lock = threading.Lock()
+
+
+def register_engine(name: str, factory):
+    """Make an engine available by name for TTS_ENGINE"""
+    global _service
+    with _service_lock:
+        _engine_factories[name] = factory
+        _service = None
+
+
+def get_tts_service() -> TTSService:
+    global _service
+    if _service is None:
+        with _service_lock:
+            if _service is None:
+                if config.TTS_ENGINE not in _engine_factories:
+                    raise ValueError(f"Unknown text-to-speech engine: {config.TTS_ENGINE}")
+                with timed(f"tts_{config.TTS_ENGINE}"):
+                    _service = TTSService(
+                        _engine_factories[config.TTS_ENGINE](),
+                        AudioCache(config.TTS_CACHE_DIR, config.TTS_CACHE_MAX_BYTES),
+                        workers=config.TTS_WORKERS,
+                    )
+    return _service
+
+
+def tts_stats() -> dict:
+    """Cache counters, or an empty dict if the service has not been used yet"""
+    return _service.stats() if _service is not None else {}
@@ -0,0 +1,665 @@
+# backend/app/services/vectorstore_service.py
+import base64
+import bisect
+import hashlib
+import json
+import os
+import pickle
+import shutil
+import threading
+from collections.abc import Mapping
+
+import faiss
+import numpy as np
+from langchain_community.docstore.in_memory import InMemoryDocstore
+from langchain_community.vectorstores import FAISS
+from langchain_core.documents import Document
+
+from .retrieval_service import BM25Index
+
+SNAPSHOT_POINTER = "SNAPSHOT"
+SNAPSHOTS_DIR = "snapshots"
+
+
+def content_hash(text: str) -> str:
+    """Chunk identity: identical text always maps to the same docstore id"""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def source_name(path: str) -> str:
+    """Source key for a document: its file name, whichever OS wrote the path"""
+    return os.path.basename(path.replace("\\", "/"))
+
+
+def snapshot_dir(path: str) -> str:
+    """
+    Directory holding the current base snapshot of the index at `path`.
+
+    Compaction writes each snapshot to `<path>/snapshots/<n>/` and then
+    points `<path>/SNAPSHOT` at it; indexes never compacted keep theirs in
+    `path` itself.
+    """
+    pointer = os.path.join(path, SNAPSHOT_POINTER)
+    if not os.path.exists(pointer):
+        return path
+    with open(pointer, "r", encoding="utf-8") as f:
+        return os.path.join(path, SNAPSHOTS_DIR, f.read().strip())
+
+
+def _encode_vector(vector) -> str:
+    return base64.b64encode(np.asarray(vector, dtype=np.float32).tobytes()).decode("ascii")
+
+
+def _decode_vector(data: str) -> list:
+    return np.frombuffer(base64.b64decode(data), dtype=np.float32).tolist()
+
+
+# -----------------------------
+# Segments
+# -----------------------------
+class _Segment:
+    """An immutable slice of the index: a flat FAISS index and its chunks, by position"""
+
+    def __init__(self, index, ids: list, docs: dict):
+        self.index = index
+        self.ids = ids
+        self.docs = docs
+        self.positions = {doc_id: position for position, doc_id in enumerate(ids)}
+
+    @classmethod
+    def build(cls, d: int, metric: int, vectors, ids: list, docs: dict):
+        index = faiss.IndexFlat(d, metric)
+        if len(ids):
+            index.add(np.ascontiguousarray(vectors, dtype=np.float32))
+        return cls(index, ids, docs)
+
+    def vectors(self):
+        return self.index.reconstruct_n(0, self.index.ntotal)
+
+
+class SegmentedStore:
+    """
+    Read-only view of an IncrementalIndex's chunks.
+
+    Holds immutable segments, oldest first, each with the positions deleted
+    from it since it was built, and offers what retrieval uses of a
+    langchain FAISS store: `index.search()`, `index_to_docstore_id` (live
+    positions only) and `docstore.search()`. A search visits every segment
+    and merges the hits by distance, skipping deleted positions.
+    """
+
+    def __init__(self, segments: tuple, embedding_function, normalize_L2: bool, distance_strategy,
+                 d: int, metric: int, docstore=None):
+        self.segments = segments  # ((segment, frozenset of deleted positions), ...)
+        self.embedding_function = embedding_function
+        self._normalize_L2 = normalize_L2
+        self.distance_strategy = distance_strategy
+        self.d = d
+        self.metric = metric
+        self._sizes = [segment.index.ntotal for segment, _ in segments]
+        self._offsets = []
+        total = 0
+        for size in self._sizes:
+            self._offsets.append(total)
+            total += size
+        self.live = total - sum(len(deleted) for _, deleted in segments)
+        self.index = _SegmentedIndex(self)
+        # Segments whose chunks live elsewhere (see SharedIndex) bring their own docstore
+        self.docstore = docstore if docstore is not None else _SegmentedDocstore(self)
+        self.index_to_docstore_id = _SegmentedPositions(self)
+
+    def locate(self, position: int):
+        """(segment number, position within it) of a global position"""
+        number = bisect.bisect_right(self._offsets, position) - 1
+        if number < 0 or position - self._offsets[number] >= self._sizes[number]:
+            raise KeyError(position)
+        return number, position - self._offsets[number]
+
+    def to_faiss(self) -> FAISS:
+        """The live chunks as one ordinary langchain FAISS store, e.g. to save"""
+        vectors, ids, docs = _live(self.segments)
+        segment = _Segment.build(self.d, self.metric, vectors, ids, docs)
+        return FAISS(
+            embedding_function=self.embedding_function,
+            index=segment.index,
+            docstore=InMemoryDocstore(docs),
+            index_to_docstore_id=dict(enumerate(ids)),
+            normalize_L2=self._normalize_L2,
+            distance_strategy=self.distance_strategy,
+        )
+
+
+class _SegmentedIndex:
+    def __init__(self, store: SegmentedStore):
+        self.store = store
+        self.d = store.d
+        self.metric_type = store.metric
+
+    @property
+    def ntotal(self) -> int:
+        return self.store.live
+
+    def search(self, vectors, k: int):
+        vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+        larger_is_closer = self.metric_type == faiss.METRIC_INNER_PRODUCT
+        missing = -np.inf if larger_is_closer else np.inf
+        all_distances, all_positions = [], []
+        for (segment, deleted), offset in zip(self.store.segments, self.store._offsets):
+            if segment.index.ntotal == len(deleted):
+                continue
+            distances, positions = segment.index.search(vectors, min(segment.index.ntotal, k + len(deleted)))
+            dropped = positions == -1
+            if deleted:
+                dropped |= np.isin(positions, list(deleted))
+                distances = np.where(dropped, missing, distances)
+            all_distances.append(distances)
+            all_positions.append(np.where(dropped, -1, positions + offset) if offset or deleted else positions)
+
+        if len(all_distances) == 1 and all_distances[0].shape[1] == k:
+            return all_distances[0], all_positions[0]
+        distances = np.concatenate(all_distances + [np.full((len(vectors), k), missing, dtype=np.float32)], axis=1)
+        positions = np.concatenate(all_positions + [np.full((len(vectors), k), -1, dtype=np.int64)], axis=1)
+        order = np.argsort(-distances if larger_is_closer else distances, axis=1, kind="stable")[:, :k]
+        rows = np.arange(len(vectors))[:, None]
+        return distances[rows, order], positions[rows, order]
+
+
+class _SegmentedPositions(Mapping):
+    """index_to_docstore_id over live global positions"""
+
+    def __init__(self, store: SegmentedStore):
+        self.store = store
+
+    def __getitem__(self, position):
+        number, local = self.store.locate(int(position))
+        segment, deleted = self.store.segments[number]
+        if local in deleted:
+            raise KeyError(position)
+        return segment.ids[local]
+
+    def __len__(self):
+        return self.store.live
+
+    def __iter__(self):
+        for (segment, deleted), offset in zip(self.store.segments, self.store._offsets):
+            for local in range(segment.index.ntotal):
+                if local not in deleted:
+                    yield offset + local
+
+
+class _SegmentedDocstore:
+    def __init__(self, store: SegmentedStore):
+        self.store = store
+
+    def search(self, search: str):
+        # A chunk removed and later re-added is live only in the newer segment
+        for segment, deleted in reversed(self.store.segments):
+            local = segment.positions.get(search)
+            if local is not None and local not in deleted:
+                return segment.docs[search]
+        return f"ID {search} not found."
+
+
+def merge_tiers(entries: list, live, total, rebuild, max_deleted_share: float) -> list:
+    """
+    Merge trailing segments while the newest holds at least half as many
+    live chunks as the one before it, and rewrite segments that are mostly
+    deleted. This keeps the segment count logarithmic in the number of
+    chunks. `live(entry)` and `total(entry)` count an entry's chunks and
+    `rebuild(entries)` returns one entry holding their live chunks.
+    """
+    while len(entries) > 1 and live(entries[-2]) <= 2 * live(entries[-1]):
+        entries[-2:] = [rebuild(entries[-2:])]
+    for n, entry in enumerate(entries):
+        if total(entry) - live(entry) > max_deleted_share * total(entry):
+            entries[n] = rebuild([entry])
+    return [entry for entry in entries if total(entry)]
+
+
+def _live(segments) -> tuple:
+    """(vectors, ids, docs) of the live chunks of `segments`, in order"""
+    vectors, ids, docs = [], [], {}
+    for segment, deleted in segments:
+        keep = [local for local in range(segment.index.ntotal) if local not in deleted]
+        if not keep:
+            continue
+        vectors.append(segment.vectors()[keep] if len(keep) < segment.index.ntotal else segment.vectors())
+        for local in keep:
+            doc_id = segment.ids[local]
+            ids.append(doc_id)
+            docs[doc_id] = segment.docs[doc_id]
+    return (np.vstack(vectors) if vectors else np.zeros((0, 0), dtype=np.float32)), ids, docs
+
+
+class IncrementalIndex:
+    """
+    FAISS store with chunk-level dedup and append-only persistence.
+
+    Every chunk is identified by the hash of its text, so re-ingesting
+    content that is already indexed costs a hash lookup instead of an
+    embedding call. Changes are appended to a small change log instead of
+    rewriting index.faiss/index.pkl; once the log grows past
+    `compact_after_bytes` it is merged into a new base snapshot on a
+    background thread. A snapshot and the log entries made after it are
+    written to a new directory under `snapshots/`, then a single pointer
+    file is swapped to it, so a crash at any point leaves one complete
+    generation in use.
+
+    The index also remembers which chunks came from which source document,
+    so a document can be replaced (only the changed chunks are touched) or
+    removed entirely, and keeps a BM25 keyword index over the same chunks.
+
+    In memory, chunks live in immutable segments (see SegmentedStore). A
+    commit adds a segment holding just its new chunks and marks removed
+    chunks deleted, so its cost follows the size of the change rather than
+    of the index; small segments are merged once they match the size of
+    the one before them, which keeps the count logarithmic. Writers never
+    modify what queries are reading: each commit swaps in a new view with
+    a single assignment, so a query always sees either the old index or the
+    new one. Readers should grab `self.vectorstore` once per query.
+    """
+
+    LOG_NAME = "changes.log"
+    MANIFEST_NAME = "sources.json"
+    # Rewrite a segment once this share of its chunks has been deleted
+    MAX_DELETED_SHARE = 0.5
+
+    def __init__(self, path: str, embedding_model, vectorstore, compact_after_bytes: int,
+                 background_compaction: bool = True):
+        self.path = path
+        self.embedding_model = embedding_model
+        self.compact_after_bytes = compact_after_bytes
+        self.background_compaction = background_compaction
+
+        self._lock = threading.RLock()
+        self._compacting = False
+        self._dir = snapshot_dir(path)
+        self._log_path = os.path.join(self._dir, self.LOG_NAME)
+        self._manifest_path = os.path.join(self._dir, self.MANIFEST_NAME)
+
+        # hash <-> docstore id; legacy chunks keep their uuid ids
+        self._hash_to_id = {}
+        self._id_to_hash = {}
+        for doc_id in vectorstore.index_to_docstore_id.values():
+            self._track(doc_id, content_hash(vectorstore.docstore.search(doc_id).page_content))
+
+        self.bm25 = BM25Index()
+        self._sources = self._load_manifest(vectorstore)
+        # Nothing is serving queries yet, so the log is replayed into the loaded store in place
+        self._replay_log(vectorstore)
+        for doc_id in vectorstore.index_to_docstore_id.values():
+            self.bm25.add(doc_id, vectorstore.docstore.search(doc_id).page_content)
+
+        ids = [vectorstore.index_to_docstore_id[i] for i in range(vectorstore.index.ntotal)]
+        base = _Segment(vectorstore.index, ids, {doc_id: vectorstore.docstore.search(doc_id) for doc_id in ids})
+        self._view = dict(embedding_function=vectorstore.embedding_function, normalize_L2=vectorstore._normalize_L2,
+                          distance_strategy=vectorstore.distance_strategy, d=vectorstore.index.d,
+                          metric=vectorstore.index.metric_type)
+        self._locations = {doc_id: (base, local) for local, doc_id in enumerate(ids)}
+        self.vectorstore = SegmentedStore(((base, frozenset()),), **self._view)
+
+    # -----------------------------
+    # Public API
+    # -----------------------------
+    def ingest(self, source: str, chunks, replace: bool = True, batch_size: int = 64, on_batch=None) -> dict:
+        """
+        Add the chunks of `source`, skipping any whose text is already indexed.
+
+        With `replace`, chunks previously ingested from `source` that are not
+        part of the new version are removed. New chunks are embedded
+        `batch_size` at a time and `on_batch(embedded, total)` is called after
+        each batch.
+        """
+        unique = {}
+        for chunk in chunks:
+            unique.setdefault(content_hash(chunk.page_content), chunk)
+
+        with self._lock:
+            pending = {h: c for h, c in unique.items() if h not in self._hash_to_id}
+
+        # Embedding is the slow part, so it runs without holding the lock
+        texts = [c.page_content for c in pending.values()]
+        vectors = []
+        for start in range(0, len(texts), batch_size):
+            vectors.extend(self.embedding_model.embed_documents(texts[start:start + batch_size]))
+            if on_batch:
+                on_batch(len(vectors), len(texts))
+
+        return self._commit(source, unique, list(zip(pending.items(), vectors)), replace)
+
+    def ingest_stream(self, source: str, batches, batch_size: int = 64, commit_every: int = 1024,
+                      on_batch=None) -> dict:
+        """
+        ingest(source, chunks) for a document that arrives as an iterable of
+        chunk lists, e.g. page ranges from a streaming parser.
+
+        New chunks are embedded `batch_size` at a time as they arrive, so
+        embedding overlaps with parsing, and committed to the index every
+        `commit_every` chunks, so only one commit group is held in memory.
+        Once the stream ends, chunks of the previous version of `source` that
+        did not reappear are removed; until then queries may see both
+        versions. `on_batch(embedded, total)` counts over the whole stream,
+        `total` growing as chunks arrive.
+        """
+        with self._lock:
+            previous_ids = list(self._sources.get(source, []))
+
+        seen = set()
+        order = []  # hashes in document order
+        group = {}  # hash -> chunk since the last commit
+        to_embed = []  # (hash, chunk) of the group not embedded yet
+        embedded = []  # ((hash, chunk), vector) of the group
+        counts = {"added": 0, "embedded": 0, "total": 0}
+
+        def embed(limit: int):
+            while len(to_embed) >= limit and to_embed:
+                batch, to_embed[:] = to_embed[:batch_size], to_embed[batch_size:]
+                vectors = self.embedding_model.embed_documents([c.page_content for _, c in batch])
+                embedded.extend(zip(batch, vectors))
+                counts["embedded"] += len(batch)
+                if on_batch:
+                    on_batch(counts["embedded"], counts["total"])
+
+        def commit():
+            embed(1)
+            if group:
+                counts["added"] += self._commit(source, dict(group), list(embedded), replace=False)["added"]
+            group.clear()
+            embedded.clear()
+
+        for batch in batches:
+            for chunk in batch:
+                chunk_hash = content_hash(chunk.page_content)
+                if chunk_hash in seen:
+                    continue
+                seen.add(chunk_hash)
+                order.append(chunk_hash)
+                group[chunk_hash] = chunk
+                with self._lock:
+                    indexed = chunk_hash in self._hash_to_id
+                if not indexed:
+                    to_embed.append((chunk_hash, chunk))
+                    counts["total"] += 1
+            embed(batch_size)
+            if len(group) >= commit_every:
+                commit()
+        commit()
+
+        with self._lock:
+            source_ids = [self._hash_to_id[h] for h in order]
+            removed = self._unreferenced(set(previous_ids) - set(source_ids), source)
+            if removed or source_ids != self._sources.get(source, []):
+                self._sources[source] = source_ids
+                self._apply([], removed)
+                self._append_log({"op": "ingest", "source": source, "add": [], "remove": removed,
+                                  "source_ids": source_ids})
+
+        self._maybe_compact()
+        return {"added": counts["added"], "unchanged": len(order) - counts["added"], "removed": len(removed)}
+
+    def remove_source(self, source: str) -> int:
+        """Remove every chunk that only `source` contributed; returns the number removed"""
+        with self._lock:
+            if source not in self._sources:
+                return 0
+            removed = self._unreferenced(set(self._sources.pop(source)), source)
+            self._apply([], removed)
+            self._append_log({"op": "remove_source", "source": source, "remove": removed})
+
+        self._maybe_compact()
+        return len(removed)
+
+    def sources(self) -> dict:
+        with self._lock:
+            return {source: len(ids) for source, ids in self._sources.items()}
+
+    def keyword_search(self, query: str, k: int) -> list:
+        """Top `k` (doc_id, score) pairs by BM25"""
+        return self.bm25.search(query, k)
+
+    def keyword_idf(self, term: str) -> float:
+        return self.bm25.idf(term)
+
+    def manifest(self) -> dict:
+        """Chunk ids per source document"""
+        with self._lock:
+            return {source: list(ids) for source, ids in self._sources.items()}
+
+    def snapshot(self) -> FAISS:
+        """Every live chunk in one ordinary langchain FAISS store"""
+        return self.vectorstore.to_faiss()
+
+    def compact(self):
+        """Merge the change log into a new base snapshot"""
+        with self._lock:
+            # The view is immutable, so only the log position needs the lock
+            view = self.vectorstore
+            manifest = json.dumps(self._sources)
+            log_offset = os.path.getsize(self._log_path) if os.path.exists(self._log_path) else 0
+            previous = self._dir
+
+        store = view.to_faiss()
+        snapshots = os.path.join(self.path, SNAPSHOTS_DIR)
+        os.makedirs(snapshots, exist_ok=True)
+        existing = [int(name) for name in os.listdir(snapshots) if name.isdigit()]
+        generation = str(max(existing, default=0) + 1)
+        tmp_dir = os.path.join(snapshots, f".{generation}.tmp")
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        os.makedirs(tmp_dir)
+        self._write_file(os.path.join(tmp_dir, "index.faiss"), faiss.serialize_index(store.index).tobytes())
+        self._write_file(os.path.join(tmp_dir, "index.pkl"), pickle.dumps((store.docstore, store.index_to_docstore_id)))
+        self._write_file(os.path.join(tmp_dir, self.MANIFEST_NAME), manifest.encode("utf-8"))
+
+        with self._lock:
+            # Entries appended after the snapshot was taken move with it
+            remainder = b""
+            if os.path.exists(self._log_path):
+                with open(self._log_path, "rb") as f:
+                    f.seek(log_offset)
+                    remainder = f.read()
+            self._write_file(os.path.join(tmp_dir, self.LOG_NAME), remainder)
+            directory = os.path.join(snapshots, generation)
+            os.replace(tmp_dir, directory)
+            # The one step that switches generations
+            self._write_file(os.path.join(self.path, SNAPSHOT_POINTER + ".tmp"), generation.encode("utf-8"))
+            os.replace(os.path.join(self.path, SNAPSHOT_POINTER + ".tmp"), os.path.join(self.path, SNAPSHOT_POINTER))
+            self._dir = directory
+            self._log_path = os.path.join(directory, self.LOG_NAME)
+            self._manifest_path = os.path.join(directory, self.MANIFEST_NAME)
+
+        if previous == self.path:
+            for name in ("index.faiss", "index.pkl", self.MANIFEST_NAME, self.LOG_NAME):
+                try:
+                    os.remove(os.path.join(previous, name))
+                except FileNotFoundError:
+                    pass
+        else:
+            shutil.rmtree(previous, ignore_errors=True)
+
+    # -----------------------------
+    # Internals
+    # -----------------------------
+    def _commit(self, source: str, unique: dict, embedded: list, replace: bool) -> dict:
+        """
+        Apply one ingest: `unique` maps hash -> chunk for every chunk of the
+        change, `embedded` holds ((hash, chunk), vector) for those that were
+        not indexed yet.
+        """
+        with self._lock:
+            added = []
+            for (chunk_hash, chunk), vector in embedded:
+                # Another ingest may have added the same text meanwhile
+                if chunk_hash not in self._hash_to_id:
+                    added.append((chunk_hash, chunk, vector))
+
+            for chunk_hash, _, _ in added:
+                self._track(chunk_hash, chunk_hash)
+            source_ids = [self._hash_to_id[h] for h in unique]
+
+            previous_ids = self._sources.get(source, [])
+            removed = []
+            if replace:
+                removed = self._unreferenced(set(previous_ids) - set(source_ids), source)
+            else:
+                source_ids = list(dict.fromkeys(previous_ids + source_ids))
+            if not added and not removed and source_ids == previous_ids:
+                # Unchanged re-upload: nothing to write
+                return {"added": 0, "unchanged": len(unique), "removed": 0}
+            self._sources[source] = source_ids
+
+            self._apply(added, removed)
+            self._append_log({
+                "op": "ingest",
+                "source": source,
+                "add": [
+                    {"id": h, "text": c.page_content, "metadata": c.metadata, "vector": _encode_vector(v)}
+                    for h, c, v in added
+                ],
+                "remove": removed,
+                "source_ids": source_ids,
+            })
+
+        self._maybe_compact()
+        return {"added": len(added), "unchanged": len(unique) - len(added), "removed": len(removed)}
+
+    def _apply(self, added: list, removed: list):
+        """Swap in a view with `added` (hash, chunk, vector) as a new segment and `removed` ids deleted"""
+        # Caller holds the lock
+        if not added and not removed:
+            return
+        view = self.vectorstore
+        segments = [[segment, set(deleted)] for segment, deleted in view.segments]
+        numbers = {id(segment): n for n, (segment, _) in enumerate(segments)}
+        for doc_id in removed:
+            if doc_id not in self._locations:
+                continue
+            segment, local = self._locations.pop(doc_id)
+            segments[numbers[id(segment)]][1].add(local)
+            self.bm25.remove(doc_id, segment.docs[doc_id].page_content)
+            self._hash_to_id.pop(self._id_to_hash.pop(doc_id), None)
+
+        if added:
+            vectors = np.array([v for _, _, v in added], dtype=np.float32)
+            if view._normalize_L2:
+                faiss.normalize_L2(vectors)
+            ids = [h for h, _, _ in added]
+            docs = {h: Document(id=h, page_content=c.page_content, metadata=c.metadata) for h, c, _ in added}
+            segment = _Segment.build(view.d, view.metric, vectors, ids, docs)
+            segments.append([segment, set()])
+            self._locations.update((doc_id, (segment, local)) for local, doc_id in enumerate(ids))
+            for h, c, _ in added:
+                self.bm25.add(h, c.page_content)
+
+        self.vectorstore = SegmentedStore(tuple((s, frozenset(d)) for s, d in self._merged(segments)), **self._view)
+
+    def _merged(self, segments: list) -> list:
+        # Caller holds the lock
+        return merge_tiers(segments, live=lambda entry: entry[0].index.ntotal - len(entry[1]),
+                           total=lambda entry: entry[0].index.ntotal, rebuild=self._rebuild,
+                           max_deleted_share=self.MAX_DELETED_SHARE)
+
+    def _rebuild(self, entries: list) -> list:
+        # Caller holds the lock
+        view = self.vectorstore
+        vectors, ids, docs = _live([(segment, deleted) for segment, deleted in entries])
+        segment = _Segment.build(view.d, view.metric, vectors, ids, docs)
+        self._locations.update((doc_id, (segment, local)) for local, doc_id in enumerate(ids))
+        return [segment, set()]
+
+    def _track(self, doc_id: str, chunk_hash: str):
+        self._hash_to_id[chunk_hash] = doc_id
+        self._id_to_hash[doc_id] = chunk_hash
+
+    def _unreferenced(self, ids: set, source: str) -> list:
+        # Caller holds the lock
+        still_used = set()
+        for other, other_ids in self._sources.items():
+            if other != source:
+                still_used.update(other_ids)
+        return sorted(ids - still_used)
+
+    def _delete_loaded(self, store, ids: list):
+        # Only while loading, before the store is wrapped in segments
+        present = [i for i in ids if i in self._id_to_hash]
+        if not present:
+            return
+        store.delete(present)
+        for doc_id in present:
+            self._hash_to_id.pop(self._id_to_hash.pop(doc_id), None)
+
+    def _load_manifest(self, vectorstore) -> dict:
+        if os.path.exists(self._manifest_path):
+            with open(self._manifest_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+
+        # Indexes built before the manifest existed: group chunks by loader metadata
+        sources = {}
+        for doc_id in vectorstore.index_to_docstore_id.values():
+            source = vectorstore.docstore.search(doc_id).metadata.get("source")
+            if source:
+                sources.setdefault(source_name(source), []).append(doc_id)
+        return sources
+
+    def _replay_log(self, vectorstore):
+        if not os.path.exists(self._log_path):
+            return
+
+        with open(self._log_path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    break  # torn final write
+
+                new = [c for c in record.get("add", []) if c["id"] not in self._id_to_hash]
+                if new:
+                    vectorstore.add_embeddings(
+                        [(c["text"], _decode_vector(c["vector"])) for c in new],
+                        metadatas=[c["metadata"] for c in new],
+                        ids=[c["id"] for c in new],
+                    )
+                    for c in new:
+                        self._track(c["id"], c["id"])
+
+                self._delete_loaded(vectorstore, record.get("remove", []))
+                if record["op"] == "ingest":
+                    self._sources[record["source"]] = record["source_ids"]
+                elif record["op"] == "remove_source":
+                    self._sources.pop(record["source"], None)
+
+    def _append_log(self, record: dict):
+        # Caller holds the lock
+        with open(self._log_path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+    def _maybe_compact(self):
+        with self._lock:
+            if self._compacting or not os.path.exists(self._log_path):
+                return
+            if os.path.getsize(self._log_path) < self.compact_after_bytes:
+                return
+            self._compacting = True
+
+        if not self.background_compaction:
+            try:
+                self.compact()
+            finally:
+                self._compacting = False
+            return
+
+        def run():
+            try:
+                self.compact()
+            finally:
+                self._compacting = False
+
+        threading.Thread(target=run, name="faiss-compaction", daemon=True).start()
+
+    @staticmethod
+    def _write_file(path: str, data: bytes):
+        with open(path, "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
@@ -0,0 +1,186 @@
+# backend/app/services/voice_service.py
+import asyncio
+import time
+
+from ..core import metrics
+from ..utils.response_utils import SentenceSplitter
+
+
+def _same_text(a: str, b: str) -> bool:
+    return " ".join(a.lower().split()) == " ".join(b.lower().split())
+
+
+class VoiceSession:
+    """
+    One caller's conversation: audio in, transcripts, answer text and speech out.
+
+    The stages overlap instead of running back to back:
+
+    - Retrieval starts speculatively on partial transcripts, so by the time
+      the final transcript arrives its context is usually already fetched.
+    - Answer tokens go through a sentence splitter and each sentence is
+      handed to TTS as soon as it is complete; audio is sent in order while
+      later sentences are still being generated and synthesized.
+    - If the caller starts speaking while an answer is in flight (barge-in),
+      the turn is cancelled, stopping the LLM stream and any further audio.
+
+    Every turn ends with a "turn_end" event carrying per-stage timings in
+    milliseconds, measured from the moment the final transcript was ready.
+
+    `retrieve(text)` and `answer(text, retrieval)` are coroutines (retrieval
+    and the streamed answer); `send_json` and `send_bytes` deliver events
+    and audio to the caller. `tts` may be None for a text-only session.
+    """
+
+    def __init__(self, transcriber, tts, voice: str, retrieve, answer, send_json, send_bytes,
+                 stt_executor=None, min_speculation_words: int = 3):
+        self.transcriber = transcriber
+        self.tts = tts
+        self.voice = voice
+        self.retrieve = retrieve
+        self.answer = answer
+        self.send_json = send_json
+        self.send_bytes = send_bytes
+        self.stt_executor = stt_executor
+        self.min_speculation_words = min_speculation_words
+
+        self.turns = 0
+        self._turn = None
+        self._speculation = None  # (text, task)
+        self._pending_speculation = None
+
+    # -----------------------------
+    # Audio Input
+    # -----------------------------
+    async def feed(self, data: bytes):
+        loop = asyncio.get_running_loop()
+        start = time.perf_counter()
+        events = await loop.run_in_executor(self.stt_executor, self.transcriber.feed, data)
+        await self._handle(events, (time.perf_counter() - start) * 1000)
+
+    async def close(self):
+        """Flush the last utterance and let its turn finish"""
+        loop = asyncio.get_running_loop()
+        start = time.perf_counter()
+        events = await loop.run_in_executor(self.stt_executor, self.transcriber.close)
+        await self._handle(events, (time.perf_counter() - start) * 1000)
+        if self._turn is not None:
+            await asyncio.gather(self._turn, return_exceptions=True)
+
+    def cancel(self):
+        for task in (self._turn, self._speculation[1] if self._speculation else None):
+            if task is not None:
+                task.cancel()
+
+    async def _handle(self, events: list, stt_ms: float):
+        for event in events:
+            if event["type"] == "speech_start" and self._turn is not None and not self._turn.done():
+                self._turn.cancel()
+                await self.send_json({"type": "barge_in", "turn": self.turns - 1})
+            elif event["type"] == "partial":
+                self._speculate(event["text"])
+            elif event["type"] == "final":
+                await self.send_json(event)
+                if event["text"].strip():
+                    self._turn = asyncio.create_task(self._run_turn(event["text"], stt_ms))
+                continue
+            await self.send_json(event)
+
+    # -----------------------------
+    # Speculative Retrieval
+    # -----------------------------
+    def _speculate(self, text: str):
+        if len(text.split()) < self.min_speculation_words:
+            return
+        if self._speculation is not None and not self._speculation[1].done():
+            # One retrieval at a time; only the newest partial is worth running next
+            self._pending_speculation = text
+            return
+        task = asyncio.create_task(self.retrieve(text))
+        task.add_done_callback(self._speculation_done)
+        self._speculation = (text, task)
+
+    def _speculation_done(self, task):
+        text, self._pending_speculation = self._pending_speculation, None
+        if text is not None:
+            self._speculate(text)
+
+    async def _retrieval_for(self, text: str):
+        """Reuse the speculative retrieval if it was for this exact text"""
+        if self._speculation is not None and _same_text(self._speculation[0], text):
+            task = self._speculation[1]
+            if not task.cancelled():
+                try:
+                    return await asyncio.shield(task), True
+                except Exception:
+                    pass
+        return await self.retrieve(text), False
+
+    # -----------------------------
+    # Turn
+    # -----------------------------
+    async def _run_turn(self, text: str, stt_ms: float):
+        turn = self.turns
+        self.turns += 1
+        start = time.perf_counter()
+        timings = {"stt_ms": stt_ms}
+
+        def mark(name):
+            timings.setdefault(name, (time.perf_counter() - start) * 1000)
+
+        sentences = asyncio.Queue()
+        speaker = asyncio.create_task(self._speak(turn, sentences, mark))
+        try:
+            retrieval, prefetched = await self._retrieval_for(text)
+            mark("retrieval_ms")
+            timings["prefetched"] = prefetched
+
+            splitter = SentenceSplitter()
+            index = 0
+            async for token in self.answer(text, retrieval):
+                mark("first_token_ms")
+                await self.send_json({"type": "token", "turn": turn, "text": token})
+                for sentence in splitter.feed(token):
+                    mark("first_sentence_ms")
+                    await self._sentence(turn, index, sentence, sentences)
+                    index += 1
+            tail = splitter.flush()
+            if tail:
+                mark("first_sentence_ms")
+                await self._sentence(turn, index, tail, sentences)
+            mark("answer_ms")
+
+            await sentences.put(None)
+            await speaker
+            mark("total_ms")
+            for name, ms in timings.items():
+                if name.endswith("_ms"):
+                    metrics.voice_turn_stage.observe(ms / 1000, stage=name[:-3])
+            if self._turn is asyncio.current_task():
+                self._turn = None  # all audio sent; speaking now starts a new turn, not a barge-in
+            await self.send_json({"type": "turn_end", "turn": turn, "timings": timings})
+        except asyncio.CancelledError:
+            speaker.cancel()
+            raise
+        except Exception as e:
+            speaker.cancel()
+            await self.send_json({"type": "error", "turn": turn, "detail": str(e)})
+
+    async def _sentence(self, turn: int, index: int, sentence: str, sentences: asyncio.Queue):
+        await self.send_json({"type": "sentence", "turn": turn, "index": index, "text": sentence})
+        if self.tts is not None:
+            # Synthesis starts now, in parallel with generating the next sentence
+            await sentences.put((index, self.tts.submit(sentence, self.voice)))
+
+    async def _speak(self, turn: int, sentences: asyncio.Queue, mark):
+        """Send each sentence's audio in order as soon as it is synthesized"""
+        while True:
+            item = await sentences.get()
+            if item is None:
+                return
+            index, future = item
+            audio = await asyncio.shield(asyncio.wrap_future(future))
+            mark("first_audio_ms")
+            await self.send_json({"type": "audio", "turn": turn, "index": index,
+                                  "sample_rate": self.tts.sample_rate, "bytes": len(audio)})
+            await self.send_bytes(audio)
@@ -0,0 +1,159 @@
+# backend/app/utils/audio_utils.py
+import struct
+import wave
+from collections import deque
+
+import numpy as np
+
+
+def pcm16_to_float32(data: bytes, channels: int = 1) -> np.ndarray:
+    """Little-endian 16-bit PCM to float32 samples in [-1, 1], downmixed to mono"""
+    samples = np.frombuffer(data, dtype="<i2").astype(np.float32) / 32768.0
+    if channels > 1:
+        samples = samples[: len(samples) // channels * channels].reshape(-1, channels).mean(axis=1)
+    return samples
+
+
+def float32_to_pcm16(samples: np.ndarray) -> bytes:
+    return (np.clip(samples, -1.0, 1.0) * 32767).astype("<i2").tobytes()
+
+
+def wav_header(sample_rate: int, data_bytes: int = 0x7FFFF000) -> bytes:
+    """
+    44-byte header for mono 16-bit PCM WAV.
+
+    The default length is a placeholder for audio streamed before its size
+    is known; players read until the connection closes.
+    """
+    return b"".join([
+        b"RIFF", struct.pack("<I", 36 + data_bytes), b"WAVE",
+        b"fmt ", struct.pack("<IHHIIHH", 16, 1, 1, sample_rate, sample_rate * 2, 2, 16),
+        b"data", struct.pack("<I", data_bytes),
+    ])
+
+
+def read_wav_chunks(fileobj, chunk_ms: int = 20):
+    """
+    Stream a PCM16 WAV file as (sample_rate, channels, pcm bytes) chunks.
+
+    Reads `chunk_ms` of audio at a time, so the file is never held in memory.
+    """
+    with wave.open(fileobj, "rb") as wav:
+        if wav.getsampwidth() != 2:
+            raise ValueError("Only 16-bit PCM WAV audio is supported")
+        rate, channels = wav.getframerate(), wav.getnchannels()
+        frames_per_chunk = max(1, rate * chunk_ms // 1000)
+        while True:
+            data = wav.readframes(frames_per_chunk)
+            if not data:
+                break
+            yield rate, channels, data
+
+
+class StreamingResampler:
+    """
+    Linear-interpolation resampler for audio that arrives in pieces.
+
+    Carries the fractional read position and the last input sample across
+    calls, so chunk boundaries produce no clicks or drift and nothing is
+    buffered beyond a single sample.
+    """
+
+    def __init__(self, src_rate: int, dst_rate: int):
+        self.src_rate = src_rate
+        self.dst_rate = dst_rate
+        self.step = src_rate / dst_rate
+        self._pos = 0.0
+        self._tail = np.zeros(0, dtype=np.float32)
+
+    def process(self, samples: np.ndarray) -> np.ndarray:
+        if self.src_rate == self.dst_rate:
+            return samples
+        data = np.concatenate([self._tail, samples])
+        if len(data) < 2 or self._pos > len(data) - 1:
+            self._tail = data
+            return np.zeros(0, dtype=np.float32)
+
+        count = int((len(data) - 1 - self._pos) // self.step) + 1
+        positions = self._pos + np.arange(count) * self.step
+        out = np.interp(positions, np.arange(len(data)), data).astype(np.float32)
+
+        next_pos = self._pos + count * self.step
+        keep_from = min(int(next_pos), len(data))
+        self._tail = data[keep_from:]
+        self._pos = next_pos - keep_from
+        return out
+
+
+class VoiceActivityDetector:
+    """
+    Energy-based voice activity detection with an adaptive noise floor.
+
+    Audio is cut into `frame_ms` frames. A frame is voiced when its energy is
+    `ratio_db` above the tracked noise floor (and above `min_db`). Speech
+    starts after `start_ms` of consecutive voiced frames and ends after
+    `silence_ms` without one. The last `pre_roll_ms` of audio before speech
+    starts is kept so the first syllable is not clipped.
+
+    `feed()` returns (event, frame) pairs where event is "start" (with the
+    pre-roll frames), "speech", "end" or "silence".
+    """
+
+    def __init__(self, sample_rate: int, frame_ms: int = 30, silence_ms: int = 300, start_ms: int = 60,
+                 pre_roll_ms: int = 300, ratio_db: float = 9.0, min_db: float = -50.0):
+        self.sample_rate = sample_rate
+        self.frame_size = sample_rate * frame_ms // 1000
+        self.frame_ms = frame_ms
+        self.silence_frames = max(1, silence_ms // frame_ms)
+        self.start_frames = max(1, start_ms // frame_ms)
+        self.ratio_db = ratio_db
+        self.min_db = min_db
+
+        self.in_speech = False
+        self.noise_db = min_db
+        self.frames_seen = 0
+        self._pending = np.zeros(0, dtype=np.float32)
+        self._pre_roll = deque(maxlen=max(self.start_frames, pre_roll_ms // frame_ms))
+        self._voiced_run = 0
+        self._silent_run = 0
+
+    @property
+    def position_ms(self) -> int:
+        return self.frames_seen * self.frame_ms
+
+    def feed(self, samples: np.ndarray) -> list:
+        data = np.concatenate([self._pending, samples])
+        usable = len(data) // self.frame_size * self.frame_size
+        self._pending = data[usable:]
+
+        events = []
+        for start in range(0, usable, self.frame_size):
+            events.extend(self._frame(data[start:start + self.frame_size]))
+        return events
+
+    def _frame(self, frame: np.ndarray) -> list:
+        self.frames_seen += 1
+        energy_db = 10 * np.log10(float(np.mean(frame * frame)) + 1e-10)
+        voiced = energy_db > max(self.noise_db + self.ratio_db, self.min_db)
+
+        if not self.in_speech:
+            if not voiced:
+                # Track the noise floor only outside speech; rise slowly, fall fast
+                rate = 0.05 if energy_db > self.noise_db else 0.5
+                self.noise_db += rate * (energy_db - self.noise_db)
+            self._pre_roll.append(frame)
+            self._voiced_run = self._voiced_run + 1 if voiced else 0
+            if self._voiced_run >= self.start_frames:
+                self.in_speech = True
+                self._silent_run = 0
+                pre_roll = np.concatenate(list(self._pre_roll))
+                self._pre_roll.clear()
+                return [("start", pre_roll)]
+            return [("silence", frame)]
+
+        self._silent_run = 0 if voiced else self._silent_run + 1
+        if self._silent_run >= self.silence_frames:
+            self.in_speech = False
+            self._voiced_run = 0
+            return [("speech", frame), ("end", None)]
+        return [("speech", frame)]
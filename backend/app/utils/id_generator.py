@@ -1,7 +1,79 @@
-from datetime import datetime
+import os
+import threading
+import time
+from datetime import datetime, timezone
 
-def generate_order_id(db_id: int) -> str:
-    return f"ORD-{datetime.now().strftime('%Y%m%d')}-{db_id:04d}"
+from ..core import config
 
-def generate_reservation_id(db_id: int) -> str:
-    return f"RES-{datetime.now().strftime('%Y%m%d')}-{db_id:04d}"
+_ALPHABET = "0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ"
+
+
+def _base36(n: int, width: int) -> str:
+    digits = ""
+    while n:
+        n, r = divmod(n, 36)
+        digits = _ALPHABET[r] + digits
+    return digits.rjust(width, "0")[-width:]
+
+
+class IdGenerator:
+    """
+    Readable, sortable IDs that never collide, made without a database round trip.
+
+    An ID is the prefix, a UTC millisecond timestamp (YYYYMMDDHHMMSSmmm), a
+    worker tag and a per-worker sequence, all fixed width, e.g.
+    RES20261018181950693-00K2H-007. The worker tag is the process id (plus
+    an optional `node` for deployments spanning several hosts), so processes
+    running at the same time never share one. Within a process the
+    timestamp never goes backwards, even if the clock does, and the
+    sequence orders IDs made in the same millisecond; when it runs out the
+    timestamp moves on to the next millisecond. IDs from one process are
+    therefore strictly increasing, and IDs from all processes sort by time.
+
+    A forked child picks a new worker tag and starts its own sequence.
+    """
+
+    SEQUENCE_SIZE = 36 ** 3
+
+    def __init__(self, prefix: str, node: str = ""):
+        self.prefix = prefix
+        self.node = node
+        self._lock = threading.Lock()
+        self._reset()
+        if hasattr(os, "register_at_fork"):
+            os.register_at_fork(after_in_child=self._after_fork)
+
+    def _reset(self):
+        self._worker = f"{self.node}{_base36(os.getpid(), 5)}"
+        self._last_ms = 0
+        self._sequence = 0
+
+    def _after_fork(self):
+        # The parent's lock may have been held mid-call when it forked
+        self._lock = threading.Lock()
+        self._reset()
+
+    def next(self) -> str:
+        with self._lock:
+            now_ms = time.time_ns() // 1_000_000
+            if now_ms > self._last_ms:
+                self._last_ms, self._sequence = now_ms, 0
+            else:
+                self._sequence += 1
+                if self._sequence == self.SEQUENCE_SIZE:
+                    self._last_ms, self._sequence = self._last_ms + 1, 0
+            ms, sequence, worker = self._last_ms, self._sequence, self._worker
+        stamp = datetime.fromtimestamp(ms // 1000, timezone.utc).strftime("%Y%m%d%H%M%S")
+        return f"{self.prefix}{stamp}{ms % 1000:03d}-{worker}-{_base36(sequence, 3)}"
+
+
+_order_ids = IdGenerator("ORD", config.ID_NODE)
+_reservation_ids = IdGenerator("RES", config.ID_NODE)
+
+
+def new_order_id() -> str:
+    return _order_ids.next()
+
+
+def new_reservation_id() -> str:
+    return _reservation_ids.next()
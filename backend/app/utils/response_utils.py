@@ -0,0 +1,53 @@
+import json
+import re
+
+# A sentence ends at . ! or ? followed by whitespace, unless the period closes a
+# short abbreviation or initial ("Mr.", "J."). Prices like "$12.99" never match
+# because the period is not followed by whitespace.
+_SENTENCE_END = re.compile(r"(?<!\b[A-Z][a-z])(?<!\b[A-Z])[.!?]+[\"')\]]*\s+")
+
+
+def split_sentences(text: str) -> list:
+    """Split a complete block of text into sentences"""
+    splitter = SentenceSplitter()
+    sentences = splitter.feed(text)
+    tail = splitter.flush()
+    if tail:
+        sentences.append(tail)
+    return sentences
+
+
+class SentenceSplitter:
+    """
+    Incrementally splits streamed text into sentences.
+
+    Feed it tokens as they arrive and it returns every sentence that has been
+    completed so far, holding back the unfinished remainder.
+    """
+
+    def __init__(self):
+        self._buffer = ""
+
+    def feed(self, text: str) -> list:
+        self._buffer += text
+        sentences = []
+        start = 0
+        for match in _SENTENCE_END.finditer(self._buffer):
+            sentence = self._buffer[start:match.end()].strip()
+            if sentence:
+                sentences.append(sentence)
+            start = match.end()
+        self._buffer = self._buffer[start:]
+        return sentences
+
+    def flush(self) -> str:
+        """Return whatever is left once the stream has ended"""
+        tail = self._buffer.strip()
+        self._buffer = ""
+        return tail
+
+
+def sse_event(event: str, data: dict, event_id: str = None) -> str:
+    """Format a single Server-Sent Event; `event_id` becomes the client's Last-Event-ID"""
+    prefix = f"id: {event_id}\n" if event_id else ""
+    return f"{prefix}event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
@@ -0,0 +1,164 @@
+# backend/benchmarks/bench_auth.py
+"""
+Authentication overhead and login behaviour under load.
+
+1. Per-request cost of authentication: the same trivial endpoint with no
+   auth, with the original dependency (JWT decode and a user query on every
+   request, on the endpoint thread pool) and with the cached principal
+   lookup.
+2. A burst of concurrent logins: throughput, and the latency of other
+   (sync) admin requests made during the burst. The original /token ran
+   bcrypt on the shared endpoint thread pool; the new one uses a small
+   dedicated pool.
+
+Run from the repository root:
+    python -m backend.benchmarks.bench_auth --requests 2000 --logins 32
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+
+_tmp = tempfile.TemporaryDirectory()
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_tmp.name, 'auth.db')}"
+os.environ.setdefault("AUTH_LOGIN_ATTEMPTS", "1000000")
+
+import httpx
+from fastapi import Depends, HTTPException
+from fastapi.security import OAuth2PasswordRequestForm
+from jose import JWTError, jwt
+
+from backend.app import auth, database
+from backend.app.main import app
+from backend.app.models.user import User
+
+
+# -----------------------------
+# The original code paths
+# -----------------------------
+def legacy_current_user(token: str = Depends(auth.oauth2_scheme), db=Depends(auth.get_db)):
+    try:
+        username = jwt.decode(token, auth.SECRET_KEY, algorithms=[auth.ALGORITHM]).get("sub")
+    except JWTError:
+        raise HTTPException(status_code=401)
+    user = db.query(User).filter(User.username == username).first()
+    if user is None:
+        raise HTTPException(status_code=401)
+    return user
+
+
+def legacy_login(form_data: OAuth2PasswordRequestForm = Depends(), db=Depends(auth.get_db)):
+    user = db.query(User).filter(User.username == form_data.username).first()
+    if not user or not auth.verify_password(form_data.password, user.hashed_password):
+        raise HTTPException(status_code=400, detail="Invalid credentials")
+    return {"access_token": auth.create_access_token(data={"sub": user.username}), "token_type": "bearer"}
+
+
+@app.get("/bench/no-auth")
+def no_auth():
+    return {}
+
+
+@app.get("/bench/legacy-auth")
+def legacy_auth(user=Depends(legacy_current_user)):
+    return {}
+
+
+@app.get("/bench/cached-auth")
+def cached_auth(user=Depends(auth.get_current_user)):
+    return {}
+
+
+app.post("/bench/legacy-token")(legacy_login)
+
+
+# -----------------------------
+# Measurements
+# -----------------------------
+async def request_rate(client, path: str, headers: dict, requests: int, concurrency: int):
+    latencies = []
+
+    async def worker(n):
+        for _ in range(n):
+            start = time.perf_counter()
+            response = await client.get(path, headers=headers)
+            response.raise_for_status()
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker(requests // concurrency) for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    return len(latencies) / elapsed, statistics.median(latencies) * 1000
+
+
+async def login_burst(client, path: str, logins: int, users: int, headers: dict):
+    statuses, other = [], []
+    done = False
+
+    async def login(i):
+        response = await client.post(path, data={"username": f"bench{i % users}", "password": "secret"})
+        statuses.append(response.status_code)
+
+    async def other_requests():
+        while not done:
+            start = time.perf_counter()
+            await client.get("/bench/legacy-auth", headers=headers)
+            other.append(time.perf_counter() - start)
+            await asyncio.sleep(0.01)
+
+    watcher = asyncio.create_task(other_requests())
+    start = time.perf_counter()
+    await asyncio.gather(*(login(i) for i in range(logins)))
+    elapsed = time.perf_counter() - start
+    done = True
+    await watcher
+    other.sort()
+    return {
+        "ok": statuses.count(200),
+        "rejected": len(statuses) - statuses.count(200),
+        "logins_per_sec": statuses.count(200) / elapsed,
+        "other_p50_ms": other[len(other) // 2] * 1000 if other else float("nan"),
+        "other_max_ms": other[-1] * 1000 if other else float("nan"),
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--logins", type=int, default=32)
+    parser.add_argument("--users", type=int, default=8)
+    args = parser.parse_args()
+
+    database.init_db()
+    hashed = auth.get_password_hash("secret")
+    db = database.SessionLocal()
+    db.add_all(User(username=f"bench{i}", email=f"bench{i}@example.com", hashed_password=hashed,
+                    restaurant_name="Bench") for i in range(args.users))
+    db.commit()
+    db.close()
+    headers = {"Authorization": f"Bearer {auth.create_access_token({'sub': 'bench0'})}"}
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=300) as client:
+        print(f"{'endpoint':<22}{'req/s':>8}{'p50 ms':>9}")
+        for name, path in [("no auth", "/bench/no-auth"), ("original auth", "/bench/legacy-auth"),
+                           ("cached auth", "/bench/cached-auth")]:
+            rate, p50 = await request_rate(client, path, headers, args.requests, args.concurrency)
+            print(f"{name:<22}{rate:>8.0f}{p50:>9.2f}")
+
+        print(f"\n{args.logins} concurrent logins, other admin requests polled meanwhile")
+        print(f"{'login':<22}{'ok':>5}{'503':>5}{'logins/s':>10}{'other p50':>11}{'other max':>11}")
+        for name, path in [("original /token", "/bench/legacy-token"), ("offloaded /token", "/token")]:
+            r = await login_burst(client, path, args.logins, args.users, headers)
+            print(f"{name:<22}{r['ok']:>5}{r['rejected']:>5}{r['logins_per_sec']:>10.1f}"
+                  f"{r['other_p50_ms']:>11.1f}{r['other_max_ms']:>11.1f}")
+
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(main())
+    finally:
+        _tmp.cleanup()
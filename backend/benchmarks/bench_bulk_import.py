@@ -0,0 +1,84 @@
+# backend/benchmarks/bench_bulk_import.py
+"""
+Rows per second importing orders and reservations: one request per row
+through /order and /reservation (with some concurrency, as a replay script
+would use) against /orders/bulk and /reservations/bulk at a few batch sizes.
+
+Requests go through the real app and its validation; the database is a
+fresh SQLite file in a temporary directory.
+
+Run from the repository root:
+    python -m backend.benchmarks.bench_bulk_import --rows 5000
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+_tmp = tempfile.TemporaryDirectory()
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_tmp.name, 'import.db')}"
+
+import httpx
+
+from backend.app import database
+from backend.app.auth import get_current_user
+from backend.app.main import app
+
+
+def order_row(i: int) -> dict:
+    return {"customer_name": f"Caller {i}", "phone_number": "0300", "item": "Pepperoni Passion", "quantity": 1 + i % 3}
+
+
+def reservation_row(i: int) -> dict:
+    return {"customer_name": f"Caller {i}", "time_slot": f"{18 + i % 4}:00", "people": 2 + i % 4}
+
+
+async def single(client, kind: str, rows: int, concurrency: int):
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def send(i):
+        async with semaphore:
+            if kind == "orders":
+                response = await client.post("/order", json=order_row(i))
+            else:
+                response = await client.post("/reservation", params=reservation_row(i))
+            response.raise_for_status()
+
+    await asyncio.gather(*(send(i) for i in range(rows)))
+
+
+async def bulk(client, kind: str, rows: int, batch: int):
+    make = order_row if kind == "orders" else reservation_row
+    for start in range(0, rows, batch):
+        response = await client.post(f"/{kind}/bulk", json={"rows": [make(i) for i in range(start, min(rows, start + batch))]})
+        response.raise_for_status()
+        assert response.json()["failed"] == 0
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=16, help="parallel requests for the single-row endpoints")
+    args = parser.parse_args()
+
+    database.init_db()
+    app.dependency_overrides[get_current_user] = lambda: None
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=120) as client:
+        print(f"{'kind':<14}{'mode':<18}{'rows/s':>10}{'seconds':>9}")
+        for kind in ("orders", "reservations"):
+            modes = [("single-row", lambda: single(client, kind, args.rows, args.concurrency))]
+            modes += [(f"bulk x{b}", lambda b=b: bulk(client, kind, args.rows, b)) for b in (100, 1000)]
+            for name, run in modes:
+                start = time.perf_counter()
+                await run()
+                elapsed = time.perf_counter() - start
+                print(f"{kind:<14}{name:<18}{args.rows / elapsed:>10.0f}{elapsed:>9.2f}")
+
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(main())
+    finally:
+        _tmp.cleanup()
@@ -0,0 +1,157 @@
+# backend/benchmarks/bench_db_writes.py
+"""
+Concurrent write latency for orders and reservations: the original setup
+(default SQLite settings, sync session per request with commit + refresh)
+against the tuned database layer (WAL, busy timeout, pooled connections, no
+refresh), and the async session path when aiosqlite is installed.
+
+Each client alternates create_order and create_reservation while a few
+readers poll the orders table like the admin dashboard does. Every mode
+runs against a fresh database file.
+
+Run from the repository root:
+    python -m backend.benchmarks.bench_db_writes --clients 32 --writes 50
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from backend.app import database
+from backend.app.core import config
+from backend.app.models.order import Order
+from backend.app.models.reservation import Reservation
+from backend.app.services import db_service
+
+# FastAPI runs sync endpoints on a 40-thread pool
+_endpoint_threads = ThreadPoolExecutor(max_workers=40)
+
+
+def legacy_session_factory(url: str):
+    engine = create_engine(url, connect_args={"check_same_thread": False})
+    database.Base.metadata.create_all(bind=engine, tables=[Order.__table__, Reservation.__table__])
+    return sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+
+def legacy_write(session_factory, i: int):
+    # What the /order and /reservation endpoints used to do
+    db = session_factory()
+    try:
+        if i % 2:
+            row = Order(customer_name="Bench", phone_number="0300", item="Pepperoni Passion", quantity=1)
+        else:
+            row = Reservation(reservation_id=db_service.new_reservation_id(), customer_name="Bench",
+                              time_slot="20:00", people=2)
+        db.add(row)
+        db.commit()
+        db.refresh(row)
+    finally:
+        db.close()
+
+
+def read_orders(session_factory):
+    db = session_factory()
+    try:
+        return len(db.query(Order).all())
+    finally:
+        db.close()
+
+
+async def hammer(write, read, clients: int, writes: int, readers: int) -> dict:
+    latencies, errors = [], []
+    done = False
+
+    async def client(c: int):
+        for i in range(writes):
+            start = time.perf_counter()
+            try:
+                await write(c * writes + i)
+                latencies.append(time.perf_counter() - start)
+            except Exception as e:
+                errors.append(type(e).__name__)
+
+    async def reader():
+        while not done:
+            try:
+                await read()
+            except Exception as e:
+                errors.append(type(e).__name__)
+            await asyncio.sleep(0.05)
+
+    reader_tasks = [asyncio.create_task(reader()) for _ in range(readers)]
+    start = time.perf_counter()
+    await asyncio.gather(*(client(c) for c in range(clients)))
+    elapsed = time.perf_counter() - start
+    done = True
+    await asyncio.gather(*reader_tasks)
+
+    latencies.sort()
+    n = len(latencies)
+    return {
+        "writes": n,
+        "errors": len(errors),
+        "writes_per_sec": n / elapsed,
+        "p50_ms": latencies[n // 2] * 1000 if n else float("nan"),
+        "p99_ms": latencies[min(n - 1, int(n * 0.99))] * 1000 if n else float("nan"),
+    }
+
+
+async def run_mode(mode: str, directory: str, args) -> dict:
+    url = f"sqlite:///{os.path.join(directory, mode + '.db')}"
+    loop = asyncio.get_running_loop()
+
+    if mode == "legacy":
+        factory = legacy_session_factory(url)
+
+        async def write(i):
+            await loop.run_in_executor(_endpoint_threads, legacy_write, factory, i)
+    else:
+        engine = database.create_db_engine(url)
+        database.Base.metadata.create_all(bind=engine, tables=[Order.__table__, Reservation.__table__])
+        factory = sessionmaker(autocommit=False, autoflush=False, expire_on_commit=False, bind=engine)
+        database.SessionLocal = factory
+        database.SQLALCHEMY_DATABASE_URL = url
+        database._async_sessionmaker = None
+        config.DATABASE_ASYNC = mode == "tuned-async"
+
+        async def write(i):
+            if i % 2:
+                await db_service.create_order("Bench", "0300", "Pepperoni Passion", 1)
+            else:
+                await db_service.create_reservation("Bench", "20:00", 2)
+
+    async def read():
+        await loop.run_in_executor(_endpoint_threads, read_orders, factory)
+
+    return await hammer(write, read, args.clients, args.writes, args.readers)
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clients", type=int, default=32, help="concurrent writers")
+    parser.add_argument("--writes", type=int, default=50, help="writes per client")
+    parser.add_argument("--readers", type=int, default=2, help="concurrent dashboard pollers")
+    args = parser.parse_args()
+
+    modes = ["legacy", "tuned"]
+    try:
+        import aiosqlite  # noqa: F401
+        modes.append("tuned-async")
+    except ImportError:
+        print("aiosqlite not installed; skipping the async session mode")
+
+    with tempfile.TemporaryDirectory() as directory:
+        print(f"{'mode':>12} {'writes':>7} {'errors':>7} {'writes/s':>9} {'p50 ms':>8} {'p99 ms':>8}")
+        for mode in modes:
+            r = await run_mode(mode, directory, args)
+            print(f"{mode:>12} {r['writes']:>7} {r['errors']:>7} {r['writes_per_sec']:>9.0f} "
+                  f"{r['p50_ms']:>8.1f} {r['p99_ms']:>8.1f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
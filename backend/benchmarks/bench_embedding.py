@@ -0,0 +1,71 @@
+# backend/benchmarks/bench_embedding.py
+"""
+Per-query latency and throughput of query embedding under concurrency:
+calling the model directly (the old path) versus the micro-batching
+BatchingEmbeddings service.
+
+By default a simulated model with MiniLM-like CPU cost is used so the run is
+offline and repeatable; pass --model minilm to use the real
+sentence-transformers/all-MiniLM-L6-v2.
+
+Run from the repository root:
+    python -m backend.benchmarks.bench_embedding --levels 1,4,16,64
+"""
+import argparse
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from backend.app.services.embedding_service import BatchingEmbeddings
+from .fakes import SimulatedEmbeddings
+
+
+def run(embed_query, concurrency: int, queries_per_worker: int, tag: str):
+    latencies = []
+
+    def worker(worker_id: int):
+        for i in range(queries_per_worker):
+            start = time.perf_counter()
+            embed_query(f"{tag} what does the {worker_id} pizza number {i} cost")
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(worker, range(concurrency)))
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        "throughput_qps": len(latencies) / elapsed,
+        "p50_ms": latencies[len(latencies) // 2] * 1000,
+        "p99_ms": latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", choices=["simulated", "minilm"], default="simulated")
+    parser.add_argument("--levels", default="1,4,16,64", help="comma-separated concurrency levels")
+    parser.add_argument("--queries", type=int, default=20, help="queries per concurrent worker")
+    parser.add_argument("--max-batch-size", type=int, default=32)
+    parser.add_argument("--max-wait-ms", type=float, default=2.0)
+    args = parser.parse_args()
+
+    if args.model == "minilm":
+        from langchain_community.embeddings import HuggingFaceEmbeddings
+        base = HuggingFaceEmbeddings(model_name="sentence-transformers/all-MiniLM-L6-v2")
+    else:
+        base = SimulatedEmbeddings()
+    batching = BatchingEmbeddings(base, max_batch_size=args.max_batch_size, max_wait_ms=args.max_wait_ms, cache_size=0)
+
+    print(f"{'concurrency':>11} {'path':>8} {'q/s':>9} {'p50 ms':>8} {'p99 ms':>8}")
+    for level in [int(x) for x in args.levels.split(",")]:
+        for name, embed_query in (("direct", base.embed_query), ("batched", batching.embed_query)):
+            result = run(embed_query, level, args.queries, f"{name}-{level}")
+            print(f"{level:>11} {name:>8} {result['throughput_qps']:>9.1f} {result['p50_ms']:>8.1f} {result['p99_ms']:>8.1f}")
+
+    stats = batching.stats()
+    print(f"batched path: {stats['batches']} model calls, average batch size {stats['avg_batch_size']:.1f}")
+
+
+if __name__ == "__main__":
+    main()
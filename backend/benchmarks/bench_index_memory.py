@@ -0,0 +1,109 @@
+# backend/benchmarks/bench_index_memory.py
+"""
+Per-worker memory of the in-memory FAISS index versus the shared,
+memory-mapped generations used with FAISS_MMAP=1.
+
+Builds synthetic knowledge bases of increasing size in a temp directory,
+then starts a fresh process per mode that loads the index and runs a few
+searches, and reports its RSS and PSS (PSS splits shared pages between the
+processes mapping them, so it is what grows per extra worker).
+
+Run from the repository root (Linux):
+    python -m backend.benchmarks.bench_index_memory --sizes 1000,10000,50000
+"""
+import argparse
+import subprocess
+import sys
+import tempfile
+
+import numpy as np
+from langchain_community.docstore.in_memory import InMemoryDocstore
+from langchain_community.embeddings import FakeEmbeddings
+from langchain_community.vectorstores import FAISS
+from langchain_core.documents import Document
+
+import faiss
+
+DIM = 384
+
+_WORKER = r"""
+import sys
+import numpy as np
+from langchain_community.embeddings import FakeEmbeddings
+from langchain_community.vectorstores import FAISS
+from backend.app.services.shared_index import SharedIndex
+
+mode, path = sys.argv[1], sys.argv[2]
+embed = FakeEmbeddings(size=384)
+if mode == "memory":
+    store = FAISS.load_local(path, embed, allow_dangerous_deserialization=True)
+else:
+    store = SharedIndex(path, embed, load_writer=None, check_interval=60).vectorstore
+
+rng = np.random.default_rng(1)
+for _ in range(20):
+    store.similarity_search_by_vector(rng.random(384, dtype=np.float32).tolist(), k=3)
+
+def kb(field):
+    try:
+        with open("/proc/self/smaps_rollup") as f:
+            for line in f:
+                if line.startswith(field + ":"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return -1
+
+print(kb("Rss"), kb("Pss"))
+"""
+
+
+def build_index(path: str, size: int):
+    rng = np.random.default_rng(0)
+    index = faiss.IndexFlatL2(DIM)
+    index.add(rng.random((size, DIM), dtype=np.float32))
+    ids = [f"chunk-{i}" for i in range(size)]
+    docstore = InMemoryDocstore({
+        doc_id: Document(id=doc_id, page_content=f"Synthetic menu chunk {i}. " * 40, metadata={"source": "synthetic.txt"})
+        for i, doc_id in enumerate(ids)
+    })
+    store = FAISS(embedding_function=FakeEmbeddings(size=DIM), index=index, docstore=docstore,
+                  index_to_docstore_id=dict(enumerate(ids)))
+    store.save_local(path)
+
+    from backend.app.services.shared_index import SharedIndex
+
+    class Writer:
+        vectorstore = store
+
+        def snapshot(self):
+            return store
+
+        def manifest(self):
+            return {"synthetic.txt": ids}
+
+    SharedIndex(path, store.embedding_function, load_writer=Writer, check_interval=60)
+
+
+def measure(mode: str, path: str):
+    output = subprocess.run([sys.executable, "-c", _WORKER, mode, path], capture_output=True, text=True, check=True)
+    rss_kb, pss_kb = (int(x) for x in output.stdout.split()[-2:])
+    return rss_kb / 1024, pss_kb / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="1000,10000,50000", help="comma-separated chunk counts")
+    args = parser.parse_args()
+
+    print(f"{'chunks':>8} {'memory RSS MB':>14} {'memory PSS MB':>14} {'mmap RSS MB':>12} {'mmap PSS MB':>12}")
+    for size in [int(x) for x in args.sizes.split(",")]:
+        with tempfile.TemporaryDirectory() as path:
+            build_index(path, size)
+            memory = measure("memory", path)
+            mmap = measure("mmap", path)
+            print(f"{size:>8} {memory[0]:>14.1f} {memory[1]:>14.1f} {mmap[0]:>12.1f} {mmap[1]:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
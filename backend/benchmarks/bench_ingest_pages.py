@@ -0,0 +1,130 @@
+# backend/benchmarks/bench_ingest_pages.py
+"""
+Ingestion throughput (pages per second) and peak memory for long documents:
+the loader path (whole document loaded, split, then embedded in one go)
+against the streaming path (page ranges parsed in worker processes and
+embedded and indexed as they arrive).
+
+Writes synthetic policy manuals of each --pages size as PDF and DOCX, then
+ingests each in a fresh process per path, with the simulated embedder (a
+small model's cost profile). Memory is the growth of the ingesting
+process's peak RSS over its RSS before ingestion, split into what the
+index keeps afterwards and the working memory of the pipeline; parser
+worker processes are reported separately. The index grows with the
+document either way, but streaming working memory should stay flat,
+while the loader path's grows with every page.
+
+Run from the repository root (Linux):
+    python -m backend.benchmarks.bench_ingest_pages --pages 50,200,800 --processes 4
+"""
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+from .synthetic import synthetic_manual, write_docx, write_pdf
+
+
+def _rss_mb() -> float:
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2 ** 20
+
+
+def _peak_rss_mb(pid: int) -> float:
+    with open(f"/proc/{pid}/status") as f:
+        for line in f:
+            if line.startswith("VmHWM:"):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+
+def child(path: str, mode: str, processes: int, pages_per_task: int, embed_ms: float):
+    """Ingest one document in this process and print its stats as JSON"""
+    from backend.app import langchain
+    from backend.app.services.parsing_service import DocumentParser
+    from .fakes import SimulatedEmbeddings
+    from .suite import new_index
+
+    embeddings = SimulatedEmbeddings(call_overhead_ms=embed_ms, per_item_ms=embed_ms / 16)
+    index = new_index(os.path.join(os.path.dirname(path), f"index-{mode}-{os.getpid()}"), embeddings)
+    parser = DocumentParser(processes=processes, pages_per_task=pages_per_task)
+    pages = parser.count_pages(path)
+    # The app keeps its parser pool between uploads; starting it is reported on its own
+    start = time.perf_counter()
+    if mode == "stream" and pages:
+        parser.start()
+    pool_start = time.perf_counter() - start
+    baseline = _rss_mb()
+
+    start = time.perf_counter()
+    if mode == "loader":
+        chunks = langchain.load_document(path)
+        result = index.ingest(os.path.basename(path), chunks, batch_size=32)
+    else:
+        result = index.ingest_stream(os.path.basename(path), parser.stream(path), batch_size=32)
+    elapsed = time.perf_counter() - start
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    # Workers are forked from a forkserver, so they are not our children for getrusage
+    pids = list(parser._executor._processes) if parser._executor else []
+    workers = max([_peak_rss_mb(pid) for pid in pids], default=0.0)
+    parser.close()
+    print(json.dumps({"pages": pages, "chunks": result["added"], "seconds": elapsed, "pool_start": pool_start,
+                      "pages_per_second": pages / elapsed if pages else 0.0,
+                      "peak_mb": peak - baseline, "retained_mb": _rss_mb() - baseline, "worker_peak_mb": workers}))
+
+
+def run(path: str, mode: str, args) -> dict:
+    out = subprocess.run(
+        [sys.executable, "-m", "backend.benchmarks.bench_ingest_pages", "--child", path, "--mode", mode,
+         "--processes", str(args.processes), "--pages-per-task", str(args.pages_per_task),
+         "--embed-ms", str(args.embed_ms)],
+        check=True, capture_output=True, text=True,
+    )
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", default="50,200,800", help="comma-separated document sizes")
+    parser.add_argument("--processes", type=int, default=min(4, os.cpu_count() or 1))
+    parser.add_argument("--pages-per-task", type=int, default=8)
+    parser.add_argument("--embed-ms", type=float, default=8.0, help="simulated cost of one embedding call")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    parser.add_argument("--mode", default="stream", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(args.child, args.mode, args.processes, args.pages_per_task, args.embed_ms)
+        return
+
+    print(f"{os.cpu_count()} CPUs, {args.processes} parser processes, {args.pages_per_task} pages per task")
+    print(f"{'document':<16}{'path':<8}{'pages/s':>9}{'seconds':>9}{'chunks':>8}{'peak MB':>9}{'index MB':>10}"
+          f"{'working MB':>12}{'worker MB':>11}")
+    pool_starts = []
+    with tempfile.TemporaryDirectory(prefix="bench-ingest-") as tmp:
+        for pages in [int(p) for p in args.pages.split(",")]:
+            manual = synthetic_manual(pages, seed=pages)
+            pdf = os.path.join(tmp, f"manual_{pages}.pdf")
+            docx = os.path.join(tmp, f"manual_{pages}.docx")
+            write_pdf(pdf, manual)
+            write_docx(docx, [" ".join(lines) for lines in manual])
+            for path in (pdf, docx):
+                for mode in ("loader", "stream"):
+                    r = run(path, mode, args)
+                    rate = f"{r['pages_per_second']:>9.1f}" if r["pages"] else f"{'-':>9}"
+                    print(f"{os.path.basename(path):<16}{mode:<8}{rate}{r['seconds']:>9.2f}{r['chunks']:>8}"
+                          f"{r['peak_mb']:>9.1f}{r['retained_mb']:>10.1f}{r['peak_mb'] - r['retained_mb']:>12.1f}"
+                          f"{r['worker_peak_mb']:>11.1f}")
+                    if r["pool_start"] > 0.01:
+                        pool_starts.append(r["pool_start"])
+    if pool_starts:
+        print(f"starting the parser pool took {1000 * sum(pool_starts) / len(pool_starts):.0f} ms (once per server)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+# backend/benchmarks/bench_llm_resilience.py
+"""
+The LLM client under injected faults: a bare deadline (how calls worked
+before), deadline plus jittered retries, and retries plus hedging and the
+circuit breaker, against the local fake LLM server.
+
+Scenarios:
+    healthy    no faults
+    slow_tail  5% of requests take --slow-latency seconds
+    flaky      20% of requests fail with 503
+    outage     every request fails for the first 3 s, then the provider recovers
+    hang       every request hangs past the deadline
+
+Each client gets --requests calls arriving at --rate per second. Reports
+the share answered by the LLM (the rest get the extractive fallback), the
+p50/p99 time until the caller has an answer either way, and how many
+provider requests each call cost (retries and hedges included).
+
+Run from the repository root:
+    python -m backend.benchmarks.bench_llm_resilience --requests 200 --rate 25
+"""
+import argparse
+import asyncio
+import os
+import time
+
+import httpx
+
+os.environ.setdefault("LOG_LEVEL", "WARNING")  # one retry line per failed attempt otherwise
+
+from backend.app.services.llm_service import OpenAICompatibleBackend, ResilientLLM
+from .fake_llm_server import Faults, create_app, serve
+
+SCENARIOS = {
+    "healthy": [(0, {})],
+    "slow_tail": [(0, {"slow_rate": 0.05})],
+    "flaky": [(0, {"error_rate": 0.2})],
+    "outage": [(0, {"error_rate": 1.0}), (3.0, {"error_rate": 0.0})],
+    "hang": [(0, {"slow_rate": 1.0})],
+}
+
+
+def clients(args) -> dict:
+    common = dict(max_concurrency=args.max_concurrency, timeout=args.timeout, retry_base_ms=100, retry_max_ms=1000,
+                  breaker_reset_seconds=args.breaker_reset)
+    return {
+        "deadline": dict(common, attempt_timeout=args.timeout, max_retries=0, breaker_failures=10 ** 9),
+        "retries": dict(common, attempt_timeout=args.attempt_timeout, max_retries=2, breaker_failures=10 ** 9),
+        "full": dict(common, attempt_timeout=args.attempt_timeout, max_retries=2, hedge_percentile=95,
+                     breaker_failures=5),
+    }
+
+
+async def run(base_url: str, client: ResilientLLM, phases: list, requests: int, rate: float) -> dict:
+    latencies = []
+    ok = 0
+
+    async def schedule():
+        async with httpx.AsyncClient() as http:
+            for at, update in phases:
+                await asyncio.sleep(max(0.0, start + at - time.monotonic()))
+                await http.post(base_url.replace("/v1", "/faults"), json=update)
+
+    async def call():
+        nonlocal ok
+        began = time.perf_counter()
+        try:
+            await client.agenerate("What are your opening hours?")
+            ok += 1
+        except Exception:
+            pass  # the app would answer from the top chunk here
+        latencies.append(time.perf_counter() - began)
+
+    # Open loop: arrivals keep coming at `rate` however slow the answers get, as users do
+    start = time.monotonic()
+    async with httpx.AsyncClient() as http:
+        await http.post(base_url.replace("/v1", "/faults"), json=phases[0][1])
+    scheduler = asyncio.ensure_future(schedule())
+    calls = []
+    for i in range(requests):
+        await asyncio.sleep(max(0.0, start + i / rate - time.monotonic()))
+        calls.append(asyncio.ensure_future(call()))
+    await asyncio.gather(*calls)
+    scheduler.cancel()
+    async with httpx.AsyncClient() as http:
+        server = (await http.get(base_url.replace("/v1", "/stats"))).json()
+
+    latencies.sort()
+    pick = lambda q: latencies[min(len(latencies) - 1, int(len(latencies) * q))] * 1000
+    return {"ok": ok / requests, "p50_ms": pick(0.5), "p99_ms": pick(0.99),
+            "provider_per_call": server["requests"] / requests, "opened": client.breaker.opened}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--rate", type=float, default=25.0, help="arrivals per second")
+    parser.add_argument("--max-concurrency", type=int, default=16, help="the client's in-flight limit")
+    parser.add_argument("--latency", type=float, default=0.2, help="median provider latency, seconds")
+    parser.add_argument("--slow-latency", type=float, default=3.0)
+    parser.add_argument("--timeout", type=float, default=2.0, help="overall deadline per call")
+    parser.add_argument("--attempt-timeout", type=float, default=1.0)
+    parser.add_argument("--breaker-reset", type=float, default=1.0)
+    parser.add_argument("--only", help="comma-separated scenarios")
+    args = parser.parse_args()
+
+    names = args.only.split(",") if args.only else list(SCENARIOS)
+    print(f"{'scenario':<11}{'client':<10}{'LLM ok':>8}{'p50 ms':>9}{'p99 ms':>9}{'calls/req':>11}{'opened':>8}")
+    for name in names:
+        for label, settings in clients(args).items():
+            faults = Faults(latency=args.latency, slow_latency=args.slow_latency)
+            with serve(create_app(faults)) as base_url:
+                client = ResilientLLM(OpenAICompatibleBackend(base_url, "fake", max_connections=2 * args.max_concurrency),
+                                      **settings)
+                r = asyncio.run(run(base_url, client, SCENARIOS[name], args.requests, args.rate))
+            print(f"{name:<11}{label:<10}{r['ok']:>8.0%}{r['p50_ms']:>9.0f}{r['p99_ms']:>9.0f}"
+                  f"{r['provider_per_call']:>11.2f}{r['opened']:>8}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+# backend/benchmarks/bench_observability.py
+"""
+Overhead of request tracing: the observability middleware per request, and
+span() per stage, with and without the sampling profiler running.
+
+Requests go to /healthz through the ASGI app in process, so the numbers
+are the framework's own cost plus tracing, with no network or real work.
+
+Run from the repository root:
+    python -m backend.benchmarks.bench_observability --requests 3000
+"""
+import argparse
+import asyncio
+import logging
+import time
+
+import httpx
+from fastapi import FastAPI
+
+from backend.app.core import metrics
+from backend.app.core.tracing import ObservabilityMiddleware, SamplingProfiler, span
+
+
+def make_app(middleware: bool, profiler=None) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/healthz")
+    def liveness():
+        with span("bench"):
+            return {"status": "ok"}
+
+    if middleware:
+        app.add_middleware(ObservabilityMiddleware, profiler=profiler)
+    return app
+
+
+async def per_request_us(app: FastAPI, requests: int) -> float:
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+        for _ in range(50):
+            await client.get("/healthz")
+        start = time.perf_counter()
+        for _ in range(requests):
+            await client.get("/healthz")
+        return (time.perf_counter() - start) / requests * 1e6
+
+
+def span_us(calls: int) -> float:
+    start = time.perf_counter()
+    for _ in range(calls):
+        with span("bench"):
+            pass
+    return (time.perf_counter() - start) / calls * 1e6
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=3000)
+    parser.add_argument("--profile-interval-ms", type=float, default=10)
+    args = parser.parse_args()
+
+    # Request log lines are not part of what is measured here
+    logging.getLogger("app").setLevel(logging.WARNING)
+
+    print(f"span():                {span_us(100000):8.2f} us per stage")
+    for name, app in [
+        ("no middleware", make_app(False)),
+        ("middleware", make_app(True)),
+        ("middleware + profiler", make_app(True, SamplingProfiler(args.profile_interval_ms))),
+    ]:
+        print(f"{name:<22} {await per_request_us(app, args.requests):8.1f} us per request")
+    print(f"\n/metrics rendered in {len(metrics.render())} bytes")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
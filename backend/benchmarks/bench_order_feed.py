@@ -0,0 +1,101 @@
+# backend/benchmarks/bench_order_feed.py
+"""
+Admin dashboard poll cost on a large orders table: the original full
+listing (every order, every poll) against a keyset-paginated page, a
+status-filtered page, a page deep into the history and an incremental
+poll with a sync token.
+
+Run from the repository root:
+    python -m backend.benchmarks.bench_order_feed --orders 200000
+"""
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from backend.app import database
+from backend.app.models.order import Order
+from backend.app.services import db_service
+
+STATUSES = ["delivered"] * 90 + ["ready"] * 3 + ["preparing"] * 3 + ["pending"] * 3 + ["canceled"]
+
+
+def seed(engine, count: int, seed: int = 7):
+    rng = random.Random(seed)
+    start = datetime.utcnow() - timedelta(days=365)
+    rows = []
+    for i in range(count):
+        created = start + timedelta(seconds=i * 365 * 86400 / count)
+        rows.append({
+            "customer_name": f"Customer {i}", "phone_number": "0300", "item": "Pepperoni Passion",
+            "quantity": 1, "status": rng.choice(STATUSES), "created_at": created, "updated_at": created,
+        })
+    with engine.begin() as conn:
+        conn.execute(Order.__table__.insert(), rows)
+
+
+def timed(fn, repeat: int):
+    samples = []
+    for _ in range(repeat):
+        db = database.SessionLocal()
+        try:
+            start = time.perf_counter()
+            rows = fn(db)
+            samples.append((time.perf_counter() - start) * 1000)
+        finally:
+            db.close()
+    return statistics.median(samples), rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--orders", type=int, default=200000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = database.create_db_engine(f"sqlite:///{os.path.join(tmp, 'feed.db')}")
+        database.engine = engine
+        database.SessionLocal.configure(bind=engine)
+        database.Base.metadata.create_all(bind=engine, tables=[Order.__table__])
+        print(f"Seeding {args.orders} orders...")
+        seed(engine, args.orders)
+
+        def legacy(db):
+            return [db_service.order_to_dict(o) for o in db.query(Order).all()]
+
+        def first_page(db):
+            return [db_service.order_to_dict(o) for o in db_service.list_orders(db)[0]]
+
+        def active_page(db):
+            orders, _ = db_service.list_orders(db, statuses=["pending", "preparing", "ready"])
+            return [db_service.order_to_dict(o) for o in orders]
+
+        db = database.SessionLocal()
+        cursor = None
+        for _ in range(50):
+            _, cursor = db_service.list_orders(db, cursor=cursor)
+        # A dashboard that polled a moment ago: the last 20 changes are new
+        recent = db.query(Order).order_by(Order.change_seq.desc(), Order.id.desc()).offset(20).first()
+        token = db_service.sync_token(recent)
+        db.close()
+
+        def deep_page(db):
+            return [db_service.order_to_dict(o) for o in db_service.list_orders(db, cursor=cursor)[0]]
+
+        def changes(db):
+            return [db_service.order_to_dict(o) for o in db_service.orders_changed_since(db, token)[0]]
+
+        print(f"\n{'poll':<32}{'median ms':>10}{'orders':>9}")
+        for name, fn in [("full listing (before)", legacy), ("first page", first_page),
+                         ("active orders page", active_page), ("page 51 (keyset cursor)", deep_page),
+                         ("changes since sync token", changes)]:
+            ms, rows = timed(fn, args.repeat)
+            print(f"{name:<32}{ms:>10.1f}{len(rows):>9}")
+
+
+if __name__ == "__main__":
+    main()
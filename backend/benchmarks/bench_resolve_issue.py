@@ -0,0 +1,68 @@
+# backend/benchmarks/bench_resolve_issue.py
+"""
+Throughput of /resolve-issue at increasing concurrency, with a fake LLM of
+fixed latency standing in for Gemini.
+
+Run from the repository root:
+    python -m backend.benchmarks.bench_resolve_issue --latency 0.5
+"""
+import argparse
+import asyncio
+import os
+import time
+
+# Every request uses a distinct question, but disable the cache anyway so
+# near-duplicate phrasings cannot short-circuit the LLM.
+os.environ.setdefault("ANSWER_CACHE_MAX_ENTRIES", "0")
+
+import httpx
+
+from backend.app import langchain
+from backend.app.main import app
+from .fakes import FakeGeminiModel
+
+
+async def run_level(client, concurrency: int, requests_per_worker: int):
+    latencies = []
+
+    async def worker(worker_id: int):
+        for i in range(requests_per_worker):
+            start = time.perf_counter()
+            response = await client.post("/resolve-issue", json={"text": f"Question {worker_id}-{i} about delivery"})
+            response.raise_for_status()
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker(w) for w in range(concurrency)))
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        "concurrency": concurrency,
+        "requests": len(latencies),
+        "throughput_rps": len(latencies) / elapsed,
+        "p50_ms": latencies[len(latencies) // 2] * 1000,
+        "p99_ms": latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1000,
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--latency", type=float, default=0.5, help="fake LLM latency in seconds")
+    parser.add_argument("--levels", default="1,2,4,8,16", help="comma-separated concurrency levels")
+    parser.add_argument("--requests", type=int, default=4, help="requests per concurrent worker")
+    args = parser.parse_args()
+
+    langchain.gemini_model = FakeGeminiModel(latency=args.latency)
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        print(f"{'concurrency':>11} {'requests':>8} {'req/s':>8} {'p50 ms':>8} {'p99 ms':>8}")
+        for level in [int(x) for x in args.levels.split(",")]:
+            result = await run_level(client, level, args.requests)
+            print(f"{result['concurrency']:>11} {result['requests']:>8} {result['throughput_rps']:>8.2f} "
+                  f"{result['p50_ms']:>8.0f} {result['p99_ms']:>8.0f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
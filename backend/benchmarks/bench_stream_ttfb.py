@@ -0,0 +1,85 @@
+# backend/benchmarks/bench_stream_ttfb.py
+"""
+Time-to-first-token and time-to-first-sentence of the SSE endpoints compared
+with the full response time of /resolve-issue, using a fake streaming model.
+
+The app is served by a real uvicorn server on a local port because the ASGI
+test transport buffers whole responses.
+
+Run from the repository root:
+    python -m backend.benchmarks.bench_stream_ttfb --latency 0.3 --token-interval 0.05
+"""
+import argparse
+import os
+import socket
+import threading
+import time
+
+os.environ.setdefault("ANSWER_CACHE_MAX_ENTRIES", "0")
+
+import httpx
+import uvicorn
+
+from backend.app import langchain
+from backend.app.main import app
+from .fakes import FakeGeminiModel
+
+
+def start_server():
+    """Start uvicorn on a free port in a background thread and return its base URL"""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.01)
+    return f"http://127.0.0.1:{port}", server
+
+
+def measure_stream(client, path: str, payload: dict):
+    start = time.perf_counter()
+    first_token = first_sentence = None
+    event = None
+    with client.stream("POST", path, json=payload) as response:
+        for line in response.iter_lines():
+            if line.startswith("event: "):
+                event = line[len("event: "):]
+            elif line.startswith("data: "):
+                now = time.perf_counter() - start
+                if event == "token" and first_token is None:
+                    first_token = now
+                elif event == "sentence" and first_sentence is None:
+                    first_sentence = now
+    return first_token, first_sentence, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--latency", type=float, default=0.3, help="fake time to first token in seconds")
+    parser.add_argument("--token-interval", type=float, default=0.05, help="fake delay between tokens in seconds")
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    langchain.gemini_model = FakeGeminiModel(latency=args.latency, token_interval=args.token_interval)
+    base_url, server = start_server()
+
+    with httpx.Client(base_url=base_url, timeout=None) as client:
+        print(f"{'run':>3} {'blocking ms':>12} {'first token ms':>15} {'first sentence ms':>18} {'stream total ms':>16}")
+        for run in range(args.runs):
+            question = f"How long does delivery take? ({run})"
+
+            start = time.perf_counter()
+            client.post("/resolve-issue", json={"text": question}).raise_for_status()
+            blocking = time.perf_counter() - start
+
+            first_token, first_sentence, total = measure_stream(client, "/resolve-issue/stream", {"text": question})
+            print(f"{run:>3} {blocking * 1000:>12.0f} {first_token * 1000:>15.0f} "
+                  f"{first_sentence * 1000:>18.0f} {total * 1000:>16.0f}")
+
+    server.should_exit = True
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+# backend/benchmarks/bench_stt_latency.py
+"""
+End-of-speech to final-transcript latency of the /api/v1/voice/ws/stt
+WebSocket.
+
+Each WAV fixture (16-bit PCM, any rate, mono or stereo) is streamed to a
+real uvicorn server in real time, `--chunk-ms` at a time, the way a
+microphone would send it. For every "final" event the script finds when the
+speaker actually stopped (the VAD reports the audio position at which it
+closed the utterance, STT_VAD_SILENCE_MS after the last speech) and
+measures the wall time from sending that audio to receiving the transcript.
+
+Run from the repository root:
+    python -m backend.benchmarks.bench_stt_latency path/to/*.wav
+    python -m backend.benchmarks.bench_stt_latency --generate /tmp/stt-fixtures
+    python -m backend.benchmarks.bench_stt_latency /tmp/stt-fixtures/*.wav --engine vosk
+
+--generate writes synthetic fixtures (voiced bursts separated by pauses, at
+16 and 48 kHz) that exercise the VAD and resampler; use recordings with the
+vosk engine for transcripts that mean anything.
+"""
+import argparse
+import asyncio
+import json
+import os
+import time
+import wave
+
+import numpy as np
+import websockets
+
+from backend.app.core import config
+from backend.app.services.stt_service import register_engine
+from backend.app.utils.audio_utils import float32_to_pcm16, read_wav_chunks
+from .bench_stream_ttfb import start_server
+from .fakes import FakeSTTEngine
+
+
+def synthetic_speech(rate: int, bursts=(1.2, 0.8, 1.6), pause: float = 0.6, seed: int = 0) -> np.ndarray:
+    """Voiced bursts of the given lengths in seconds, separated by `pause` seconds of room noise"""
+    rng = np.random.default_rng(seed)
+    segments = []
+    for burst_seconds in bursts:
+        segments.append(0.003 * rng.standard_normal(int(pause * rate)))
+        t = np.arange(int(burst_seconds * rate)) / rate
+        # Harmonics of a 140 Hz voice with syllable-rate amplitude modulation
+        voice = sum(np.sin(2 * np.pi * 140 * h * t) / h for h in range(1, 6))
+        envelope = 0.5 + 0.5 * np.sin(2 * np.pi * 4 * t) ** 2
+        segments.append(0.2 * voice * envelope + 0.003 * rng.standard_normal(len(t)))
+    segments.append(0.003 * rng.standard_normal(int(0.8 * rate)))
+    return np.concatenate(segments).astype(np.float32)
+
+
+def generate_fixtures(directory: str) -> list:
+    """Write synthetic speech-like WAV files; returns their paths"""
+    os.makedirs(directory, exist_ok=True)
+    paths = []
+    for rate, channels in ((16000, 1), (48000, 2)):
+        samples = synthetic_speech(rate)
+
+        path = os.path.join(directory, f"synthetic_{rate // 1000}k_{channels}ch.wav")
+        with wave.open(path, "wb") as wav:
+            wav.setnchannels(channels)
+            wav.setsampwidth(2)
+            wav.setframerate(rate)
+            wav.writeframes(float32_to_pcm16(np.repeat(samples, channels)))
+        paths.append(path)
+    return paths
+
+
+async def stream_fixture(ws_url: str, path: str, chunk_ms: int) -> list:
+    chunks = list(read_wav_chunks(path, chunk_ms))
+    rate, channels = chunks[0][0], chunks[0][1]
+    sent_at = []  # (audio ms at end of chunk, wall time sent)
+    finals = []
+
+    async with websockets.connect(f"{ws_url}?sample_rate={rate}&channels={channels}") as ws:
+        async def receive():
+            async for message in ws:
+                event = json.loads(message)
+                if event["type"] == "final":
+                    finals.append((event, time.perf_counter()))
+                elif event["type"] == "error":
+                    raise RuntimeError(event["detail"])
+
+        receiver = asyncio.create_task(receive())
+        start = time.perf_counter()
+        audio_ms = 0.0
+        for _, _, data in chunks:
+            # Pace the upload like a live microphone
+            await asyncio.sleep(max(0.0, start + audio_ms / 1000 - time.perf_counter()))
+            await ws.send(data)
+            audio_ms += len(data) / (2 * channels) / rate * 1000
+            sent_at.append((audio_ms, time.perf_counter()))
+        await ws.send(json.dumps({"type": "end"}))
+        await receiver
+
+    results = []
+    for event, received in finals:
+        speech_end_ms = event["audio_ms"] - config.STT_VAD_SILENCE_MS
+        sent = next((t for ms, t in sent_at if ms >= speech_end_ms), sent_at[-1][1])
+        results.append({"speech_end_ms": speech_end_ms, "latency_ms": (received - sent) * 1000, "text": event["text"]})
+    return results
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("fixtures", nargs="*", help="WAV files to stream")
+    parser.add_argument("--generate", metavar="DIR", help="write synthetic fixtures to DIR and use them")
+    parser.add_argument("--engine", default="fake", help="'fake' or a registered engine such as 'vosk'")
+    parser.add_argument("--chunk-ms", type=int, default=20)
+    args = parser.parse_args()
+
+    fixtures = list(args.fixtures)
+    if args.generate:
+        fixtures += generate_fixtures(args.generate)
+    if not fixtures:
+        parser.error("give WAV fixtures or --generate DIR")
+
+    if args.engine == "fake":
+        register_engine("fake", FakeSTTEngine)
+    config.STT_ENGINE = args.engine
+
+    base_url, server = start_server()
+    ws_url = base_url.replace("http://", "ws://") + "/api/v1/voice/ws/stt"
+
+    latencies = []
+    print(f"{'fixture':>28} {'utt':>3} {'speech end ms':>13} {'latency ms':>10}  text")
+    for path in fixtures:
+        for i, r in enumerate(await stream_fixture(ws_url, path, args.chunk_ms)):
+            latencies.append(r["latency_ms"])
+            print(f"{os.path.basename(path)[-28:]:>28} {i:>3} {r['speech_end_ms']:>13.0f} "
+                  f"{r['latency_ms']:>10.0f}  {r['text'][:40]}")
+
+    latencies.sort()
+    if latencies:
+        print(f"\nend of speech -> final: p50 {latencies[len(latencies) // 2]:.0f} ms, "
+              f"max {latencies[-1]:.0f} ms (VAD silence window {config.STT_VAD_SILENCE_MS} ms)")
+    server.should_exit = True
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,127 @@
+# backend/benchmarks/bench_tenants.py
+"""
+Serving many restaurants from one process: per-tenant databases and FAISS
+indexes opened on demand and held in LRU pools, against keeping every
+tenant open.
+
+Creates --tenants restaurants, each with its own orders database and a
+knowledge index of --chunks chunks. Then replays a skewed workload (a few
+busy restaurants, a long tail of quiet ones): each request looks up a
+tenant, runs a hybrid search on its index and counts its pending orders.
+Reports latency for requests that found the tenant open versus ones that
+had to load it, pool hit rates and evictions, and the estimated memory
+held by the pools.
+
+Run from the repository root:
+    python -m backend.benchmarks.bench_tenants --tenants 200 --requests 5000
+"""
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+
+from langchain_core.documents import Document
+
+from backend.app import database, langchain
+from backend.app.models.order import Order
+from backend.app.services.embedding_service import BatchingEmbeddings
+from backend.app.services.retrieval_service import hybrid_search
+from backend.app.services.tenant_service import TenantRouter
+from .fakes import HashingEmbeddings
+
+DISHES = ["pizza", "pasta", "salad", "burger", "curry", "sushi", "tacos", "ramen", "steak", "soup"]
+
+
+def populate(router: TenantRouter, tenants: int, chunks: int):
+    rng = random.Random(3)
+    for tenant_id in range(1, tenants + 1):
+        tenant = router.tenant(tenant_id)
+        docs = [Document(page_content=f"Restaurant {tenant_id} serves {rng.choice(DISHES)} number {i} "
+                                      f"for {rng.randint(5, 40)} dollars.")
+                for i in range(chunks)]
+        tenant.knowledge_index().ingest("menu.txt", docs)
+        db = tenant.session_factory()
+        db.add_all(Order(order_id=f"T{tenant_id}-{i}", customer_name="Bench", phone_number="0300",
+                         item=rng.choice(DISHES)) for i in range(20))
+        db.commit()
+        db.close()
+    router.databases.clear()
+    router.indexes.clear()
+
+
+def workload(tenants: int, requests: int, seed: int = 11) -> list:
+    # Zipf-like: tenant k is picked with weight 1/k
+    rng = random.Random(seed)
+    weights = [1 / k for k in range(1, tenants + 1)]
+    return rng.choices(range(1, tenants + 1), weights=weights, k=requests)
+
+
+def serve(router: TenantRouter, tenant_ids: list, embeddings) -> dict:
+    warm, cold = [], []
+    for tenant_id in tenant_ids:
+        was_open = router.indexes.peek(tenant_id) is not None and router.databases.peek(tenant_id) is not None
+        query = f"how much is the {DISHES[tenant_id % len(DISHES)]}"
+        start = time.perf_counter()
+        tenant = router.tenant(tenant_id)
+        hybrid_search(tenant.knowledge_index(), query, embeddings.embed_query(query), candidates=10, top_k=2)
+        db = tenant.session_factory()
+        try:
+            db.query(Order).filter(Order.status == "pending").count()
+        finally:
+            db.close()
+        (warm if was_open else cold).append((time.perf_counter() - start) * 1000)
+    return {"warm": warm, "cold": cold}
+
+
+def percentile(values: list, q: float) -> float:
+    if not values:
+        return float("nan")
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * q))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tenants", type=int, default=200)
+    parser.add_argument("--chunks", type=int, default=200, help="knowledge chunks per tenant")
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--max-indexes", type=int, default=16)
+    parser.add_argument("--max-databases", type=int, default=32)
+    args = parser.parse_args()
+
+    embeddings = HashingEmbeddings()
+    langchain.embedding_model = BatchingEmbeddings(embeddings)
+
+    with tempfile.TemporaryDirectory() as data_dir:
+        def make_router(max_databases, max_indexes):
+            return TenantRouter(data_dir, database.open_tenant_database, langchain.open_knowledge_index,
+                                default=langchain.default_tenant,
+                                max_databases=max_databases, max_indexes=max_indexes)
+
+        print(f"Creating {args.tenants} tenants with {args.chunks} chunks each...")
+        populate(make_router(4, 4), args.tenants, args.chunks)
+        tenant_ids = workload(args.tenants, args.requests)
+
+        print(f"\n{'pools':<22}{'warm p50':>9}{'cold p50':>9}{'cold p99':>9}{'cold %':>8}"
+              f"{'idx loads':>10}{'evictions':>10}{'open':>6}{'pool MB':>9}")
+        for name, max_databases, max_indexes in [
+            (f"LRU {args.max_databases} db / {args.max_indexes} idx", args.max_databases, args.max_indexes),
+            ("everything open", args.tenants, args.tenants),
+        ]:
+            router = make_router(max_databases, max_indexes)
+            result = serve(router, tenant_ids, embeddings)
+            stats = router.stats()
+            pool_bytes = stats["databases"]["bytes"] + stats["indexes"]["bytes"]
+            cold_share = len(result["cold"]) / len(tenant_ids) * 100
+            print(f"{name:<22}{statistics.median(result['warm']):>9.2f}{percentile(result['cold'], 0.5):>9.2f}"
+                  f"{percentile(result['cold'], 0.99):>9.2f}{cold_share:>7.1f}%{stats['indexes']['loads']:>10}"
+                  f"{stats['indexes']['evictions'] + stats['databases']['evictions']:>10}"
+                  f"{stats['indexes']['open']:>6}{pool_bytes / 1e6:>9.1f}")
+            router.databases.clear()
+            router.indexes.clear()
+
+
+if __name__ == "__main__":
+    main()
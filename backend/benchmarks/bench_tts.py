@@ -0,0 +1,57 @@
+# backend/benchmarks/bench_tts.py
+"""
+Time to first audio and total synthesis time for a multi-sentence answer:
+synthesizing the whole answer in one call, streaming sentences synthesized
+in parallel, and streaming again from the phrase cache.
+
+Run from the repository root:
+    python -m backend.benchmarks.bench_tts                  # fake engine
+    python -m backend.benchmarks.bench_tts --engine espeak  # needs espeak-ng
+"""
+import argparse
+import tempfile
+import time
+
+from backend.app.services.tts_service import AudioCache, EspeakEngine, TTSService
+from .fakes import DEFAULT_ANSWER, FakeTTSEngine
+
+ANSWER = DEFAULT_ANSWER + " Is there anything else I can help you with today?"
+
+
+def timed_stream(service: TTSService, text: str, voice: str):
+    start = time.perf_counter()
+    first = None
+    for _ in service.stream(text, voice):
+        if first is None:
+            first = time.perf_counter() - start
+    return first, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--engine", choices=["fake", "espeak"], default="fake")
+    parser.add_argument("--voice", default="en-us")
+    parser.add_argument("--workers", type=int, default=4)
+    args = parser.parse_args()
+
+    engine = FakeTTSEngine() if args.engine == "fake" else EspeakEngine()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # Whole answer in one engine call: nothing plays until all of it is done
+        start = time.perf_counter()
+        engine.synthesize(ANSWER, args.voice)
+        single = time.perf_counter() - start
+
+        service = TTSService(engine, AudioCache(tmp, 64 * 1024 * 1024), workers=args.workers)
+        cold_first, cold_total = timed_stream(service, ANSWER, args.voice)
+        warm_first, warm_total = timed_stream(service, ANSWER, args.voice)
+
+        print(f"{'mode':>22} {'first audio ms':>15} {'total ms':>9}")
+        print(f"{'single call':>22} {single * 1000:>15.1f} {single * 1000:>9.1f}")
+        print(f"{'parallel sentences':>22} {cold_first * 1000:>15.1f} {cold_total * 1000:>9.1f}")
+        print(f"{'cached sentences':>22} {warm_first * 1000:>15.1f} {warm_total * 1000:>9.1f}")
+        print(f"cache: {service.cache.stats()}")
+
+
+if __name__ == "__main__":
+    main()
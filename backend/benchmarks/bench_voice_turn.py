@@ -0,0 +1,123 @@
+# backend/benchmarks/bench_voice_turn.py
+"""
+Per-stage timings of the pipelined voice session (/api/v1/voice/ws/session)
+against running the same stages one after another.
+
+Synthetic speech is streamed in real time to a uvicorn server with fake
+STT, LLM and TTS engines. For each turn the server reports, from the moment
+the final transcript is ready: retrieval (and whether the speculative
+retrieval on partial transcripts was reused), first LLM token, first
+complete sentence, first audio sent, and the whole turn. The sequential
+baseline is the old flow of the frontend: a full answer, then synthesis of
+the whole answer.
+
+Run from the repository root:
+    python -m backend.benchmarks.bench_voice_turn --latency 0.3 --token-interval 0.03
+    python -m backend.benchmarks.bench_voice_turn --pause 0.8   # pauses short enough to barge in
+"""
+import argparse
+import asyncio
+import json
+import os
+import tempfile
+import time
+
+os.environ.setdefault("ANSWER_CACHE_MAX_ENTRIES", "0")
+
+import websockets
+
+from backend.app import langchain
+from backend.app.core import config
+from backend.app.services import stt_service, tts_service
+from backend.app.services.embedding_service import BatchingEmbeddings
+from backend.app.services.tts_service import AudioCache, TTSService
+from backend.app.utils.audio_utils import float32_to_pcm16
+from .bench_stream_ttfb import start_server
+from .bench_stt_latency import synthetic_speech
+from .fakes import FakeGeminiModel, FakeSTTEngine, FakeTTSEngine, SimulatedEmbeddings
+
+STAGES = ["retrieval_ms", "first_token_ms", "first_sentence_ms", "first_audio_ms", "total_ms"]
+
+
+async def run_session(ws_url: str, pcm: bytes, rate: int, chunk_ms: int):
+    turns, finals, barge_ins = [], [], 0
+    chunk_bytes = rate * chunk_ms // 1000 * 2
+
+    async with websockets.connect(f"{ws_url}?sample_rate={rate}", max_size=None) as ws:
+        async def receive():
+            nonlocal barge_ins
+            async for message in ws:
+                if isinstance(message, bytes):
+                    continue
+                event = json.loads(message)
+                if event["type"] == "turn_end":
+                    turns.append(event["timings"])
+                elif event["type"] == "final":
+                    finals.append(event["text"])
+                elif event["type"] == "barge_in":
+                    barge_ins += 1
+                elif event["type"] == "error":
+                    raise RuntimeError(event["detail"])
+
+        receiver = asyncio.create_task(receive())
+        start = time.perf_counter()
+        for i, offset in enumerate(range(0, len(pcm), chunk_bytes)):
+            await asyncio.sleep(max(0.0, start + i * chunk_ms / 1000 - time.perf_counter()))
+            await ws.send(pcm[offset:offset + chunk_bytes])
+        await ws.send(json.dumps({"type": "end"}))
+        await receiver
+    return turns, finals, barge_ins
+
+
+async def sequential_baseline(texts: list, voice: str) -> list:
+    """Old flow: the whole answer first, then the whole answer's audio"""
+    with tempfile.TemporaryDirectory() as tmp:
+        tts = TTSService(FakeTTSEngine(), AudioCache(tmp, 64 * 1024 * 1024), workers=1)
+        results = []
+        for text in texts:
+            start = time.perf_counter()
+            answer = await langchain.aresolve_issue_with_guidelines(text)
+            answered = time.perf_counter() - start
+            await asyncio.get_running_loop().run_in_executor(None, tts.engine.synthesize, answer, voice)
+            results.append({"answer_ms": answered * 1000, "first_audio_ms": (time.perf_counter() - start) * 1000})
+        return results
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--latency", type=float, default=0.3, help="fake LLM time to first token in seconds")
+    parser.add_argument("--token-interval", type=float, default=0.03, help="fake delay between tokens in seconds")
+    parser.add_argument("--pause", type=float, default=4.0, help="silence between utterances in seconds")
+    parser.add_argument("--chunk-ms", type=int, default=20)
+    args = parser.parse_args()
+
+    langchain.embedding_model = BatchingEmbeddings(SimulatedEmbeddings())
+    langchain.gemini_model = FakeGeminiModel(latency=args.latency, token_interval=args.token_interval)
+    stt_service.register_engine("fake", FakeSTTEngine)
+    tts_service.register_engine("fake", FakeTTSEngine)
+    config.STT_ENGINE = config.TTS_ENGINE = "fake"
+    config.TTS_CACHE_DIR = tempfile.mkdtemp(prefix="tts-bench-")
+
+    rate = 16000
+    pcm = float32_to_pcm16(synthetic_speech(rate, bursts=(1.2, 1.6, 2.0), pause=args.pause))
+    base_url, server = start_server()
+    ws_url = base_url.replace("http://", "ws://") + "/api/v1/voice/ws/session"
+
+    turns, finals, barge_ins = await run_session(ws_url, pcm, rate, args.chunk_ms)
+    print(f"{'turn':>4} {'prefetched':>10} " + " ".join(f"{s[:-3]:>14}" for s in STAGES))
+    for i, t in enumerate(turns):
+        print(f"{i:>4} {str(t.get('prefetched')):>10} " + " ".join(f"{t.get(s, float('nan')):>14.0f}" for s in STAGES))
+    if barge_ins:
+        print(f"{barge_ins} turn(s) cut short by barge-in")
+
+    baseline = await sequential_baseline(finals, config.TTS_VOICE)
+    if baseline and turns:
+        def avg(rows, key):
+            return sum(r[key] for r in rows) / len(rows)
+        print(f"\nfirst audio after the final transcript: pipelined {avg(turns, 'first_audio_ms'):.0f} ms, "
+              f"sequential {avg(baseline, 'first_audio_ms'):.0f} ms")
+    server.should_exit = True
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,118 @@
+# backend/benchmarks/eval_context.py
+"""
+Prompt size and answer latency with the context budgeter, against sending
+every retrieved chunk whole.
+
+Builds the same index as eval_retrieval and runs the questions in
+data/retrieval_eval.json through aqa_chain, with a fake LLM whose time to
+first token grows with prompt length (--prefill-ms-per-1k). For each
+setting reports context and prompt tokens, whether the expected answer
+text survived in the context, time spent assembling it, and end-to-end
+latency.
+
+Run from the repository root:
+    python -m backend.benchmarks.eval_context --top-k 3 --budgets 0,150,300
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import tempfile
+import time
+
+# Every question must reach the LLM
+os.environ.setdefault("ANSWER_CACHE_MAX_ENTRIES", "0")
+
+from backend.app import langchain
+from backend.app.core import config
+from backend.app.services.context_service import ContextBudgeter, HeuristicTokenizer
+from backend.app.services.embedding_service import BatchingEmbeddings
+from .eval_retrieval import EVAL_PATH, build_index
+from .fakes import FakeGeminiModel, HashingEmbeddings
+
+
+class WholeChunks:
+    """The old prompt context: every retrieved chunk, joined as is"""
+
+    def build(self, query: str, docs) -> str:
+        return "\n\n".join(d.page_content for d in docs)
+
+
+class Recording:
+    """Wraps a context builder, keeping each context and the time spent building it"""
+
+    def __init__(self, builder):
+        self.builder = builder
+        self.contexts = []
+        self.build_ms = []
+
+    def build(self, query: str, docs) -> str:
+        start = time.perf_counter()
+        context = self.builder.build(query, docs)
+        self.build_ms.append((time.perf_counter() - start) * 1000)
+        self.contexts.append(context)
+        return context
+
+
+async def run(name: str, builder, questions: list, args) -> dict:
+    tokenizer = HeuristicTokenizer()
+    recorder = Recording(builder)
+    langchain.context_budgeter = recorder
+    model = langchain.gemini_model = FakeGeminiModel(latency=args.latency,
+                                                     prefill_ms_per_1k_tokens=args.prefill_ms_per_1k)
+    latencies = []
+    for item in questions:
+        start = time.perf_counter()
+        await langchain.aqa_chain(item["question"])
+        latencies.append((time.perf_counter() - start) * 1000)
+
+    n = len(questions)
+    context_tokens = [tokenizer.count(c) for c in recorder.contexts]
+    kept = sum(item["answer"].lower() in c.lower() for item, c in zip(questions, recorder.contexts))
+    return {
+        "setting": name,
+        "context_tokens": statistics.mean(context_tokens),
+        "prompt_tokens": model.prompt_tokens / n,
+        "answers_kept": f"{kept}/{n}",
+        "build_ms": statistics.mean(recorder.build_ms),
+        "p50_ms": statistics.median(latencies),
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--documents", default="uploaded_documents")
+    parser.add_argument("--guidelines", default="backend/guidelines.txt")
+    parser.add_argument("--top-k", type=int, default=3, help="chunks retrieved per question")
+    parser.add_argument("--budgets", default="0,150,300", help="comma-separated token budgets to compare")
+    parser.add_argument("--latency", type=float, default=0.3, help="fake LLM latency before prefill, seconds")
+    parser.add_argument("--prefill-ms-per-1k", type=float, default=150.0,
+                        help="extra time to first token per 1000 prompt tokens")
+    args = parser.parse_args()
+
+    with open(EVAL_PATH, "r", encoding="utf-8") as f:
+        questions = json.load(f)
+    config.RETRIEVAL_TOP_K = args.top_k
+    embeddings = HashingEmbeddings()
+    langchain.embedding_model = BatchingEmbeddings(embeddings)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        langchain.knowledge_index = build_index(tmp, embeddings, args.documents, args.guidelines)
+        settings = [("whole chunks", WholeChunks())]
+        for budget in (int(b) for b in args.budgets.split(",")):
+            name = f"budget {budget}" if budget else "dedup only"
+            settings.append((name, ContextBudgeter(budget)))
+
+        print(f"\n{len(questions)} questions, top {args.top_k} chunks, "
+              f"{args.prefill_ms_per_1k:.0f} ms prefill per 1k prompt tokens\n")
+        print(f"{'setting':<14}{'ctx tokens':>11}{'prompt tokens':>14}{'answers kept':>13}"
+              f"{'build ms':>9}{'p50 ms':>8}")
+        for name, builder in settings:
+            r = await run(name, builder, questions, args)
+            print(f"{r['setting']:<14}{r['context_tokens']:>11.0f}{r['prompt_tokens']:>14.0f}"
+                  f"{r['answers_kept']:>13}{r['build_ms']:>9.2f}{r['p50_ms']:>8.1f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,108 @@
+# backend/benchmarks/eval_intents.py
+"""
+Offline eval of the intent router on labelled utterances.
+
+Reports per-utterance accuracy, how many open-ended questions were wrongly
+answered by a deterministic handler (the costly mistake), the share of
+traffic kept away from the LLM, and average latency for routed answers
+versus the RAG + LLM path (fake LLM of fixed latency).
+
+Run from the repository root:
+    python -m backend.benchmarks.eval_intents                # offline hashing embedder
+    python -m backend.benchmarks.eval_intents --model minilm
+"""
+import argparse
+import asyncio
+import json
+import os
+import tempfile
+import time
+
+os.environ.setdefault("ANSWER_CACHE_MAX_ENTRIES", "0")
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from backend.app import langchain
+from backend.app.database import Base
+from backend.app.models.order import Order
+from backend.app.models.reservation import Reservation
+from backend.app.services.embedding_service import BatchingEmbeddings
+from backend.app.services.nlp_service import OPEN_QUESTION
+from .fakes import FakeGeminiModel, HashingEmbeddings
+
+EVAL_PATH = os.path.join(os.path.dirname(__file__), "data", "intent_eval.json")
+
+
+def sample_database(path: str):
+    engine = create_engine(f"sqlite:///{path}", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine, tables=[Order.__table__, Reservation.__table__])
+    session_factory = sessionmaker(bind=engine)
+    db = session_factory()
+    db.add_all([
+        Order(customer_name="Ali", phone_number="0300", item="Pepperoni Passion", quantity=2, status="preparing"),
+        Order(customer_name="Sara", phone_number="0301", item="Veggie Delight", quantity=1, status="ready"),
+        Reservation(reservation_id="RES20250101120000", customer_name="Omar", time_slot="2025-01-01 20:00", people=4),
+        Reservation(reservation_id="RES20250101183045120-00K2H-007", customer_name="Lina",
+                    time_slot="2025-01-01 19:30", people=2),
+    ])
+    db.commit()
+    db.close()
+    return session_factory
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", choices=["hashing", "minilm"], default="hashing")
+    parser.add_argument("--latency", type=float, default=0.5, help="fake LLM latency in seconds")
+    args = parser.parse_args()
+
+    if args.model == "minilm":
+        from langchain_community.embeddings import HuggingFaceEmbeddings
+        base = HuggingFaceEmbeddings(model_name="sentence-transformers/all-MiniLM-L6-v2")
+    else:
+        base = HashingEmbeddings()
+    langchain.embedding_model = BatchingEmbeddings(base)
+    langchain.gemini_model = FakeGeminiModel(latency=args.latency)
+
+    with open(EVAL_PATH, "r", encoding="utf-8") as f:
+        utterances = json.load(f)
+
+    router = langchain.intent_router
+    with tempfile.TemporaryDirectory() as tmp:
+        router.session_factory = sample_database(os.path.join(tmp, "eval.db"))
+        langchain.get_knowledge_index()
+
+        correct, false_routes, mistakes = 0, 0, []
+        routed_latency, llm_latency = [], []
+        for item in utterances:
+            expected = item["intent"]
+            predicted, _ = router.classify(item["text"], langchain.embedding_model.embed_query(item["text"]))
+            if predicted == expected:
+                correct += 1
+            else:
+                mistakes.append((item["text"], expected, predicted))
+                if expected == OPEN_QUESTION:
+                    false_routes += 1
+
+            start = time.perf_counter()
+            await langchain.aresolve_issue_with_guidelines(item["text"])
+            elapsed = time.perf_counter() - start
+            (llm_latency if predicted == OPEN_QUESTION else routed_latency).append(elapsed)
+
+    n = len(utterances)
+    open_questions = sum(1 for item in utterances if item["intent"] == OPEN_QUESTION)
+    print(f"accuracy           {correct / n:.2f} ({correct}/{n})")
+    print(f"false routes       {false_routes}/{open_questions} open questions answered without the LLM")
+    print(f"routed share       {len(routed_latency) / n:.2f}")
+    if routed_latency:
+        print(f"routed avg ms      {sum(routed_latency) / len(routed_latency) * 1000:.2f}")
+    if llm_latency:
+        print(f"RAG + LLM avg ms   {sum(llm_latency) / len(llm_latency) * 1000:.2f}")
+    print(f"router stats       {router.stats()}")
+    for text, expected, predicted in mistakes:
+        print(f"  miss: {text!r} expected {expected}, got {predicted}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,114 @@
+# backend/benchmarks/eval_retrieval.py
+"""
+Offline retrieval eval: plain vector search (the old k=3 retriever) versus
+hybrid BM25 + vector retrieval with reranking.
+
+Builds a fresh index in a temp directory from backend/guidelines.txt and
+every file in uploaded_documents/, then runs the questions in
+data/retrieval_eval.json. A question counts as answered when a retrieved
+chunk contains its expected answer text. Reports hit rate, MRR, context
+size sent to the LLM and retrieval latency.
+
+Run from the repository root:
+    python -m backend.benchmarks.eval_retrieval               # offline hashing embedder
+    python -m backend.benchmarks.eval_retrieval --model minilm
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+
+import faiss
+from langchain_community.docstore.in_memory import InMemoryDocstore
+from langchain_community.vectorstores import FAISS
+from langchain_core.documents import Document
+
+from backend.app import langchain
+from backend.app.services.retrieval_service import hybrid_search, vector_search
+from backend.app.services.vectorstore_service import IncrementalIndex
+from .fakes import HashingEmbeddings
+
+EVAL_PATH = os.path.join(os.path.dirname(__file__), "data", "retrieval_eval.json")
+
+
+def build_index(path: str, embeddings, documents_dir: str, guidelines_path: str) -> IncrementalIndex:
+    dim = len(embeddings.embed_query("dimension probe"))
+    store = FAISS(embedding_function=embeddings, index=faiss.IndexFlatL2(dim),
+                  docstore=InMemoryDocstore(), index_to_docstore_id={})
+    index = IncrementalIndex(path, embeddings, store, compact_after_bytes=1 << 40)
+
+    with open(guidelines_path, "r", encoding="utf-8") as f:
+        guidelines = Document(page_content=f.read(), metadata={"source": "guidelines.txt"})
+    index.ingest("guidelines.txt", langchain.text_splitter.split_documents([guidelines]))
+
+    for filename in sorted(os.listdir(documents_dir)):
+        index.ingest(filename, langchain.load_document(os.path.join(documents_dir, filename)))
+    return index
+
+
+def evaluate(name: str, retrieve, questions: list) -> dict:
+    hits, reciprocal_ranks, context_chars, latencies = 0, 0.0, 0, []
+    for item in questions:
+        start = time.perf_counter()
+        docs = retrieve(item["question"])
+        latencies.append(time.perf_counter() - start)
+
+        context_chars += sum(len(d.page_content) for d in docs)
+        for rank, doc in enumerate(docs, start=1):
+            if item["answer"].lower() in doc.page_content.lower():
+                hits += 1
+                reciprocal_ranks += 1 / rank
+                break
+
+    n = len(questions)
+    latencies.sort()
+    return {
+        "config": name,
+        "hit_rate": hits / n,
+        "mrr": reciprocal_ranks / n,
+        "avg_context_chars": context_chars / n,
+        "p50_ms": latencies[n // 2] * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", choices=["hashing", "minilm"], default="hashing")
+    parser.add_argument("--documents", default="uploaded_documents")
+    parser.add_argument("--guidelines", default="backend/guidelines.txt")
+    parser.add_argument("--candidates", type=int, default=10)
+    args = parser.parse_args()
+
+    if args.model == "minilm":
+        from langchain_community.embeddings import HuggingFaceEmbeddings
+        embeddings = HuggingFaceEmbeddings(model_name="sentence-transformers/all-MiniLM-L6-v2")
+    else:
+        embeddings = HashingEmbeddings()
+
+    with open(EVAL_PATH, "r", encoding="utf-8") as f:
+        questions = json.load(f)
+
+    with tempfile.TemporaryDirectory() as path:
+        index = build_index(path, embeddings, args.documents, args.guidelines)
+        print(f"indexed {len(index.vectorstore.index_to_docstore_id)} chunks, {len(questions)} questions")
+
+        def vector_only(k):
+            return lambda q: [doc for _, doc in vector_search(index.vectorstore, embeddings.embed_query(q), k)]
+
+        def hybrid(k):
+            return lambda q: [doc for _, doc in hybrid_search(index, q, embeddings.embed_query(q), args.candidates, k)]
+
+        results = [
+            evaluate("vector k=3", vector_only(3), questions),
+            evaluate("hybrid top-2", hybrid(2), questions),
+            evaluate("hybrid top-3", hybrid(3), questions),
+        ]
+
+    print(f"{'config':>14} {'hit rate':>9} {'MRR':>6} {'ctx chars':>10} {'p50 ms':>8}")
+    for r in results:
+        print(f"{r['config']:>14} {r['hit_rate']:>9.2f} {r['mrr']:>6.2f} {r['avg_context_chars']:>10.0f} {r['p50_ms']:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+# backend/benchmarks/fake_llm_server.py
+"""
+A local LLM server that speaks the OpenAI chat completions API (plain and
+streamed) and injects latency and errors on demand, for exercising the
+app's LLM client without a provider.
+
+Latency is lognormal around --latency; a --slow-rate share of requests
+takes --slow-latency instead, and an --error-rate share fails with
+--error-status. Faults can be changed while it runs:
+    curl -X POST localhost:8081/faults -d '{"error_rate": 1.0}'
+
+Run from the repository root, then point the app at it:
+    python -m backend.benchmarks.fake_llm_server --port 8081 --latency 0.3 --error-rate 0.1
+    LLM_BACKEND=openai LLM_BASE_URL=http://localhost:8081/v1 uvicorn backend.app.main:app
+"""
+import argparse
+import asyncio
+import json
+import random
+import socket
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+from .fakes import DEFAULT_ANSWER
+
+
+@dataclass
+class Faults:
+    latency: float = 0.3  # median seconds to the first token
+    sigma: float = 0.25  # lognormal spread around the median
+    slow_rate: float = 0.0
+    slow_latency: float = 5.0
+    error_rate: float = 0.0
+    error_status: int = 503
+    token_interval: float = 0.0
+    answer: str = DEFAULT_ANSWER
+
+
+def create_app(faults: Faults = None, seed: int = 0) -> FastAPI:
+    app = FastAPI()
+    app.state.faults = faults or Faults()
+    app.state.stats = {"requests": 0, "errors": 0, "slow": 0, "completed": 0}
+    rng = random.Random(seed)
+
+    def plan():
+        # Decided up front, so a request's fate does not depend on how it is read
+        f = app.state.faults
+        app.state.stats["requests"] += 1
+        if rng.random() < f.error_rate:
+            app.state.stats["errors"] += 1
+            return f, None
+        if rng.random() < f.slow_rate:
+            app.state.stats["slow"] += 1
+            return f, f.slow_latency
+        return f, f.latency * rng.lognormvariate(0, f.sigma) if f.sigma else f.latency
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        f, latency = plan()
+        if latency is None:
+            await asyncio.sleep(f.latency / 10)
+            return JSONResponse(status_code=f.error_status, content={"error": {"message": "injected failure"}})
+
+        words = f.answer.split(" ")
+        tokens = [w + " " for w in words[:-1]] + words[-1:]
+        if not body.get("stream"):
+            await asyncio.sleep(latency + (len(tokens) - 1) * f.token_interval)
+            app.state.stats["completed"] += 1
+            return {"choices": [{"index": 0, "message": {"role": "assistant", "content": f.answer},
+                                 "finish_reason": "stop"}]}
+
+        async def events():
+            await asyncio.sleep(latency)
+            for i, token in enumerate(tokens):
+                if i:
+                    await asyncio.sleep(f.token_interval)
+                yield f"data: {json.dumps({'choices': [{'index': 0, 'delta': {'content': token}}]})}\n\n"
+            app.state.stats["completed"] += 1
+            yield "data: [DONE]\n\n"
+
+        return StreamingResponse(events(), media_type="text/event-stream")
+
+    @app.post("/faults")
+    async def set_faults(request: Request):
+        app.state.faults = Faults(**{**asdict(app.state.faults), **await request.json()})
+        return asdict(app.state.faults)
+
+    @app.get("/stats")
+    def stats():
+        return app.state.stats
+
+    return app
+
+
+@contextmanager
+def serve(app: FastAPI):
+    """Run `app` with uvicorn on a free local port; yields the OpenAI-style base URL"""
+    import uvicorn
+
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.01)
+    try:
+        yield f"http://127.0.0.1:{port}/v1"
+    finally:
+        server.should_exit = True
+        thread.join(timeout=10)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=8081)
+    parser.add_argument("--latency", type=float, default=0.3)
+    parser.add_argument("--slow-rate", type=float, default=0.0)
+    parser.add_argument("--slow-latency", type=float, default=5.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--error-status", type=int, default=503)
+    parser.add_argument("--token-interval", type=float, default=0.0)
+    args = parser.parse_args()
+
+    import uvicorn
+
+    faults = Faults(latency=args.latency, slow_rate=args.slow_rate, slow_latency=args.slow_latency,
+                    error_rate=args.error_rate, error_status=args.error_status, token_interval=args.token_interval)
+    uvicorn.run(create_app(faults), host="0.0.0.0", port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,202 @@
+# backend/benchmarks/fakes.py
+"""Local stand-ins for external services used by the benchmarks."""
+import asyncio
+import hashlib
+import re
+import threading
+import time
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+from backend.app.services.context_service import HeuristicTokenizer
+
+DEFAULT_ANSWER = (
+    "Our standard delivery time is 30 to 45 minutes depending on your location. "
+    "During peak hours it may take up to 60 minutes. "
+    "If your delivery runs later than that, we automatically apply a 10% discount."
+)
+
+
+class FakeResponse:
+    def __init__(self, text: str):
+        self.text = text
+
+
+class FakeStreamResponse:
+    """Async iterator of response chunks, like genai's streamed response"""
+
+    def __init__(self, tokens, first_token_latency: float, token_interval: float):
+        self.tokens = tokens
+        self.first_token_latency = first_token_latency
+        self.token_interval = token_interval
+
+    async def __aiter__(self):
+        await asyncio.sleep(self.first_token_latency)
+        for i, token in enumerate(self.tokens):
+            if i:
+                await asyncio.sleep(self.token_interval)
+            yield FakeResponse(token)
+
+
+class FakeGeminiModel:
+    """
+    Mimics genai.GenerativeModel.
+
+    `latency` is the time to the first token; every further token arrives
+    `token_interval` seconds later, so a non-streamed answer takes
+    latency + (tokens - 1) * token_interval. With `prefill_ms_per_1k_tokens`
+    the first token also waits for the prompt to be read, in proportion to
+    its length.
+    """
+
+    def __init__(self, latency: float = 0.5, token_interval: float = 0.0, answer: str = DEFAULT_ANSWER,
+                 prefill_ms_per_1k_tokens: float = 0.0):
+        self.latency = latency
+        self.token_interval = token_interval
+        self.answer = answer
+        self.prefill_ms_per_1k_tokens = prefill_ms_per_1k_tokens
+        self.calls = 0
+        self.prompt_tokens = 0
+
+    def _prefill(self, prompt) -> float:
+        tokens = HeuristicTokenizer().count(str(prompt))
+        self.prompt_tokens += tokens
+        return tokens * self.prefill_ms_per_1k_tokens / 1e6
+
+    def _tokens(self):
+        words = self.answer.split(" ")
+        return [w + " " for w in words[:-1]] + words[-1:]
+
+    def _total_latency(self):
+        return self.latency + (len(self._tokens()) - 1) * self.token_interval
+
+    def generate_content(self, prompt, stream=False, **kwargs):
+        self.calls += 1
+        time.sleep(self._prefill(prompt) + self._total_latency())
+        return FakeResponse(self.answer)
+
+    async def generate_content_async(self, prompt, stream=False, **kwargs):
+        self.calls += 1
+        prefill = self._prefill(prompt)
+        if stream:
+            return FakeStreamResponse(self._tokens(), prefill + self.latency, self.token_interval)
+        await asyncio.sleep(prefill + self._total_latency())
+        return FakeResponse(self.answer)
+
+
+class HashingEmbeddings(Embeddings):
+    """
+    Deterministic, dependency-free stand-in for MiniLM.
+
+    Words and word pairs are hashed into a fixed number of buckets, so texts
+    that share vocabulary get similar vectors. Good enough for offline
+    retrieval benchmarks; costs no model load.
+    """
+
+    def __init__(self, dim: int = 384):
+        self.dim = dim
+
+    def _vector(self, text: str) -> list:
+        words = re.findall(r"\w+", text.lower())
+        vector = np.zeros(self.dim, dtype=np.float32)
+        for feature in words + [f"{a} {b}" for a, b in zip(words, words[1:])]:
+            digest = hashlib.md5(feature.encode("utf-8")).digest()
+            bucket = int.from_bytes(digest[:4], "little") % self.dim
+            vector[bucket] += 1.0 if digest[4] & 1 else -1.0
+        norm = np.linalg.norm(vector)
+        return (vector / norm if norm else vector).tolist()
+
+    def embed_documents(self, texts: list) -> list:
+        return [self._vector(t) for t in texts]
+
+    def embed_query(self, text: str) -> list:
+        return self._vector(text)
+
+
+class SimulatedEmbeddings(HashingEmbeddings):
+    """
+    HashingEmbeddings with the cost profile of a small transformer on CPU.
+
+    Each call costs `call_overhead_ms` plus `per_item_ms` per text, and calls
+    are serialized like a model saturating the CPU.
+    """
+
+    def __init__(self, dim: int = 384, call_overhead_ms: float = 8.0, per_item_ms: float = 0.5):
+        super().__init__(dim)
+        self.call_overhead = call_overhead_ms / 1000
+        self.per_item = per_item_ms / 1000
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def embed_documents(self, texts: list) -> list:
+        with self._lock:
+            self.calls += 1
+            time.sleep(self.call_overhead + self.per_item * len(texts))
+        return super().embed_documents(texts)
+
+    def embed_query(self, text: str) -> list:
+        return self.embed_documents([text])[0]
+
+
+class FakeSTTStream:
+    def __init__(self, engine):
+        self.engine = engine
+        self.samples = 0
+
+    def accept(self, samples) -> str:
+        # Only audible samples produce words, so trailing silence leaves the text unchanged
+        if np.sqrt(np.mean(np.square(samples))) > 0.01:
+            self.samples += len(samples)
+        time.sleep(len(samples) / self.engine.sample_rate * self.engine.real_time_factor)
+        return self._text()
+
+    def finish(self) -> str:
+        time.sleep(self.engine.finish_ms / 1000)
+        return self._text()
+
+    def _text(self) -> str:
+        # Roughly three words per second of speech
+        words = int(self.samples / self.engine.sample_rate * 3)
+        return " ".join(f"word{i}" for i in range(words))
+
+
+class FakeSTTEngine:
+    """
+    Stands in for an offline recognizer such as Vosk.
+
+    Decoding costs `real_time_factor` seconds per second of audio, and
+    closing an utterance costs a further `finish_ms`. The transcript is
+    placeholder words in proportion to the speech heard.
+    """
+
+    sample_rate = 16000
+
+    def __init__(self, real_time_factor: float = 0.1, finish_ms: float = 30.0):
+        self.real_time_factor = real_time_factor
+        self.finish_ms = finish_ms
+
+    def create_stream(self):
+        return FakeSTTStream(self)
+
+
+class FakeTTSEngine:
+    """
+    Stands in for an offline synthesizer.
+
+    Costs `ms_per_char` of wall time per character (in parallel across
+    threads, like one process per sentence) and returns silence of a
+    plausible length: about 70 ms of audio per character.
+    """
+
+    name = "fake"
+    sample_rate = 22050
+
+    def __init__(self, ms_per_char: float = 1.0):
+        self.ms_per_char = ms_per_char
+        self.calls = 0
+
+    def synthesize(self, text: str, voice: str) -> bytes:
+        self.calls += 1
+        time.sleep(len(text) * self.ms_per_char / 1000)
+        return bytes(int(len(text) * 0.07 * self.sample_rate) * 2)
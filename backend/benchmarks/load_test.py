@@ -0,0 +1,154 @@
+# backend/benchmarks/load_test.py
+"""
+Concurrent HTTP load against a running server: a weighted mix of customer
+and admin endpoints, with per-endpoint throughput, latency and errors.
+Reservations book random future slots within opening hours; a 409 for a
+full slot is a correct answer and is counted as "full", not as an error.
+
+Without --url the app is started in process on a local port, with the fake
+Gemini model, the hashing embedder, a synthetic knowledge base and a
+throwaway database, so the run is offline and repeatable.
+
+Run from the repository root:
+    python -m backend.benchmarks.load_test --concurrency 16 --duration 10
+    python -m backend.benchmarks.load_test --url http://localhost:8000 --concurrency 32
+"""
+import argparse
+import asyncio
+import random
+import time
+from datetime import datetime, timedelta
+
+import httpx
+
+from .synthetic import synthetic_menu, synthetic_questions
+
+# name -> (weight, method, path); request bodies come from _request()
+SCENARIOS = {
+    "order": (4, "POST", "/order"),
+    "reservation": (2, "POST", "/reservation"),
+    "menu_inquiry": (2, "POST", "/menu-inquiry"),
+    "resolve_issue": (1, "POST", "/resolve-issue"),
+    "admin_orders": (1, "GET", "/admin/orders"),
+}
+
+
+def _time_slot(rng: random.Random) -> str:
+    """A dated slot within opening hours, on one of the days inside the booking horizon"""
+    # Imported here: the config reads DATABASE_URL once, and offline_app points it at a scratch database first
+    from backend.app.core import config
+    day = datetime.now().date() + timedelta(days=rng.randint(1, config.RESERVATION_HORIZON_DAYS - 1))
+    first, last = ((int(h) * 60 + int(m)) for h, m in (t.split(":") for t in (config.RESERVATION_FIRST_SLOT,
+                                                                             config.RESERVATION_LAST_SLOT)))
+    minutes = rng.randrange(first, last + 1, config.RESERVATION_SLOT_MINUTES)
+    return f"{day} {minutes // 60:02d}:{minutes % 60:02d}"
+
+
+def _request(name: str, rng: random.Random, menu: list, questions: list) -> dict:
+    if name == "order":
+        return {"json": {"customer_name": f"Load {rng.randint(1, 10 ** 6)}", "phone_number": "0300",
+                         "item": rng.choice(menu)[0], "quantity": rng.randint(1, 3)}}
+    if name == "reservation":
+        return {"params": {"customer_name": f"Load {rng.randint(1, 10 ** 6)}",
+                           "time_slot": _time_slot(rng), "people": rng.randint(1, 8)}}
+    if name == "menu_inquiry":
+        return {"json": {"question": rng.choice(questions)}}
+    if name == "resolve_issue":
+        return {"json": {"text": rng.choice(questions)}}
+    return {"params": {"limit": 50}}
+
+
+async def admin_token(client: httpx.AsyncClient, username: str = "loadtest", password: str = "loadtest-pass") -> str:
+    """Register (if needed) and log in a staff account for the admin endpoints"""
+    await client.post("/register", json={"username": username, "email": f"{username}@example.com",
+                                         "password": password, "restaurant_name": "Load Test"})
+    response = await client.post("/token", data={"username": username, "password": password})
+    response.raise_for_status()
+    return response.json()["access_token"]
+
+
+def _summary(latencies: list, errors: int, full: int, elapsed: float) -> dict:
+    latencies = sorted(latencies)
+    n = len(latencies)
+    pick = lambda q: latencies[min(n - 1, int(n * q))] * 1000 if n else float("nan")
+    return {"requests": n, "errors": errors, "full": full, "rps": n / elapsed if elapsed else 0.0,
+            "p50_ms": pick(0.5), "p95_ms": pick(0.95), "p99_ms": pick(0.99)}
+
+
+async def run_load(base_url: str, concurrency: int, duration: float, scenarios: dict = None, seed: int = 0) -> dict:
+    """
+    `concurrency` clients each send requests back to back for `duration`
+    seconds, picking endpoints by weight. Returns stats per scenario and
+    "total". A 409 (slot full) counts as "full" and as a request; other
+    non-2xx responses and exceptions count as errors.
+    """
+    scenarios = scenarios or SCENARIOS
+    _, menu = synthetic_menu(seed=seed)
+    questions = synthetic_questions(200, seed=seed)
+    names = list(scenarios)
+    weights = [scenarios[n][0] for n in names]
+    latencies = {n: [] for n in names}
+    errors = {n: 0 for n in names}
+    full = {n: 0 for n in names}
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, timeout=60, limits=limits) as client:
+        headers = {"Authorization": f"Bearer {await admin_token(client)}"} if "admin_orders" in scenarios else {}
+        deadline = time.perf_counter() + duration
+
+        async def worker(worker_id: int):
+            rng = random.Random(seed * 1000 + worker_id)
+            while time.perf_counter() < deadline:
+                name = rng.choices(names, weights)[0]
+                _, method, path = scenarios[name]
+                start = time.perf_counter()
+                try:
+                    response = await client.request(method, path, headers=headers,
+                                                    **_request(name, rng, menu, questions))
+                    ok = response.is_success or response.status_code == 409
+                    if response.status_code == 409:
+                        full[name] += 1
+                except httpx.HTTPError:
+                    ok = False
+                if ok:
+                    latencies[name].append(time.perf_counter() - start)
+                else:
+                    errors[name] += 1
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker(w) for w in range(concurrency)))
+        elapsed = time.perf_counter() - start
+
+    results = {n: _summary(latencies[n], errors[n], full[n], elapsed) for n in names}
+    results["total"] = _summary([x for n in names for x in latencies[n]], sum(errors.values()),
+                                sum(full.values()), elapsed)
+    return results
+
+
+def print_results(results: dict):
+    print(f"{'endpoint':<15}{'requests':>9}{'errors':>7}{'full':>6}{'req/s':>8}{'p50 ms':>8}{'p95 ms':>8}"
+          f"{'p99 ms':>8}")
+    for name, r in results.items():
+        print(f"{name:<15}{r['requests']:>9}{r['errors']:>7}{r['full']:>6}{r['rps']:>8.1f}"
+              f"{r['p50_ms']:>8.1f}{r['p95_ms']:>8.1f}{r['p99_ms']:>8.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", help="server to load; default starts the app in process")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=10)
+    parser.add_argument("--llm-latency", type=float, default=0.2, help="fake Gemini time to first token, seconds")
+    args = parser.parse_args()
+
+    if args.url:
+        print_results(asyncio.run(run_load(args.url, args.concurrency, args.duration)))
+        return
+
+    from .suite import offline_app
+    with offline_app(llm_latency=args.llm_latency) as base_url:
+        print_results(asyncio.run(run_load(base_url, args.concurrency, args.duration)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+# backend/benchmarks/startup_profile.py
+"""
+Cold-start profile of the backend.
+
+Measures `import backend.app.main` in a fresh interpreter with
+`python -X importtime`, broken down per subsystem (third-party package or
+app module), and optionally the time warm_up() spends loading the embedder,
+FAISS index and LLM client.
+
+Run from the repository root:
+    python -m backend.benchmarks.startup_profile --warm-up --json startup.json
+
+In CI, pass --max-import-ms to fail when importing the app gets slower than
+the budget.
+"""
+import argparse
+import json
+import re
+import subprocess
+import sys
+import time
+from collections import defaultdict
+
+_IMPORT_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+
+def subsystem(module: str) -> str:
+    """Group a module under its top-level package, or its app subpackage for our code"""
+    parts = module.split(".")
+    if parts[:2] == ["backend", "app"]:
+        return ".".join(parts[:3])
+    return parts[0]
+
+
+def profile_imports(target: str) -> dict:
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {target}"],
+        capture_output=True, text=True,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"importing {target} failed:\n{result.stderr[-2000:]}")
+
+    per_subsystem = defaultdict(float)
+    total_us = 0
+    for line in result.stderr.splitlines():
+        match = _IMPORT_LINE.match(line)
+        if not match:
+            continue
+        self_us, cumulative_us, indent, module = int(match[1]), int(match[2]), match[3], match[4]
+        # Self time summed per subsystem, so nested imports are attributed to
+        # the package that actually spent the time
+        per_subsystem[subsystem(module)] += self_us / 1000
+        if len(indent) == 1:
+            total_us += cumulative_us
+
+    top = dict(sorted(per_subsystem.items(), key=lambda kv: kv[1], reverse=True))
+    return {"total_ms": round(total_us / 1000, 1), "subsystems_ms": {k: round(v, 1) for k, v in top.items()}}
+
+
+def profile_warm_up() -> dict:
+    from backend.app import langchain
+    from backend.app.core import startup
+
+    start = time.perf_counter()
+    langchain.warm_up()
+    return {"total_ms": round((time.perf_counter() - start) * 1000, 1),
+            "components_ms": {k: round(v * 1000, 1) for k, v in startup.timings.items()}}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--target", default="backend.app.main", help="module to import")
+    parser.add_argument("--top", type=int, default=15, help="subsystems to print")
+    parser.add_argument("--warm-up", action="store_true", help="also time loading the models and index")
+    parser.add_argument("--json", help="write the profile to this file")
+    parser.add_argument("--max-import-ms", type=float, help="exit non-zero if the import takes longer")
+    args = parser.parse_args()
+
+    profile = {"import": profile_imports(args.target)}
+    print(f"import {args.target}: {profile['import']['total_ms']:.1f} ms")
+    for name, ms in list(profile["import"]["subsystems_ms"].items())[:args.top]:
+        print(f"  {ms:>9.1f} ms  {name}")
+
+    if args.warm_up:
+        profile["warm_up"] = profile_warm_up()
+        print(f"warm_up: {profile['warm_up']['total_ms']:.1f} ms")
+        for name, ms in profile["warm_up"]["components_ms"].items():
+            print(f"  {ms:>9.1f} ms  {name}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(profile, f, indent=2)
+
+    if args.max_import_ms is not None and profile["import"]["total_ms"] > args.max_import_ms:
+        print(f"❌ import took {profile['import']['total_ms']:.1f} ms, budget is {args.max_import_ms:.1f} ms")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
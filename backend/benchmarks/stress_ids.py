@@ -0,0 +1,89 @@
+# backend/benchmarks/stress_ids.py
+"""
+Stress test for the reservation/order ID generator.
+
+Many worker processes (forked, and started fresh with spawn), each with
+several threads, generate IDs as fast as they can at the same time. The
+parent also keeps generating after forking. Checks that every ID is unique,
+that each thread's IDs are strictly increasing, and that all IDs have the
+same length, so sorting them as strings sorts them by time.
+
+Run from the repository root:
+    python -m backend.benchmarks.stress_ids --processes 8 --threads 4 --ids 20000
+"""
+import argparse
+import multiprocessing
+import sys
+import threading
+import time
+
+from backend.app.utils.id_generator import new_reservation_id
+
+
+def generate(count: int, threads: int) -> list:
+    """IDs from `threads` threads of this process, one list per thread"""
+    results = [None] * threads
+    barrier = threading.Barrier(threads)
+
+    def work(t):
+        barrier.wait()
+        results[t] = [new_reservation_id() for _ in range(count)]
+
+    workers = [threading.Thread(target=work, args=(t,)) for t in range(threads)]
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join()
+    return results
+
+
+def run(method: str, processes: int, threads: int, count: int):
+    # Warm the parent's generator so forked children inherit a used state
+    parent_ids = [[new_reservation_id() for _ in range(1000)]]
+    context = multiprocessing.get_context(method)
+    start = time.perf_counter()
+    with context.Pool(processes) as pool:
+        pending = pool.starmap_async(generate, [(count, threads)] * processes)
+        parent_ids += generate(count, threads)
+        per_thread = [ids for result in pending.get() for ids in result] + parent_ids
+    elapsed = time.perf_counter() - start
+    return per_thread, elapsed
+
+
+def check(per_thread: list) -> list:
+    problems = []
+    everything = [i for ids in per_thread for i in ids]
+    duplicates = len(everything) - len(set(everything))
+    if duplicates:
+        problems.append(f"{duplicates} duplicate IDs")
+    if len({len(i) for i in everything}) != 1:
+        problems.append(f"mixed ID lengths: {sorted({len(i) for i in everything})}")
+    for ids in per_thread:
+        if any(a >= b for a, b in zip(ids, ids[1:])):
+            problems.append("IDs not strictly increasing within a thread")
+            break
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--processes", type=int, default=8)
+    parser.add_argument("--threads", type=int, default=4)
+    parser.add_argument("--ids", type=int, default=20000, help="IDs per thread")
+    args = parser.parse_args()
+
+    methods = [m for m in ("fork", "spawn") if m in multiprocessing.get_all_start_methods()]
+    failed = False
+    for method in methods:
+        per_thread, elapsed = run(method, args.processes, args.threads, args.ids)
+        total = sum(len(ids) for ids in per_thread)
+        problems = check(per_thread)
+        failed = failed or bool(problems)
+        status = "OK" if not problems else "FAIL: " + "; ".join(problems)
+        print(f"{method:>5}: {total} IDs from {args.processes + 1} processes in {elapsed:.2f}s "
+              f"({total / elapsed:,.0f}/s) - {status}")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,214 @@
+# backend/benchmarks/stress_reservations.py
+"""
+Stress test for reservation capacity under concurrent booking.
+
+Several worker processes (each its own engine and connection pool, like
+uvicorn workers sharing one database) book random parties into a few
+slots at once, with far more demand than seats. Two engines are compared,
+each on a fresh database:
+
+    check-then-insert  read the slot's booked seats, insert if the party fits
+                       (how a booking check is usually first written)
+    atomic             ReservationBook.book(): a conditional UPDATE of the
+                       slot's capacity row decides, in the same transaction
+                       as the insert
+
+Checks that no slot holds more guests than it seats, that the capacity
+counters match the reservations table, and that every accepted booking was
+stored. Also times "next free slot for N people" answered from the
+in-memory slot map against the same answer computed with a SQL query.
+
+Run from the repository root (exits 1 if the atomic engine overbooks):
+    python -m backend.benchmarks.stress_reservations --processes 8 --attempts 300 --seats 40
+"""
+import argparse
+import asyncio
+import multiprocessing
+import os
+import random
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+MODES = ("check-then-insert", "atomic")
+
+
+def _slots(count: int) -> list:
+    """`count` evening slots tomorrow, as time_slot texts"""
+    day = (datetime.now() + timedelta(days=1)).date()
+    return [f"{day} {19 + i // 2}:{30 * (i % 2):02d}" for i in range(count)]
+
+
+def init_db():
+    from backend.app import database
+    database.init_db()
+
+
+def worker(mode: str, slots: list, seats: int, attempts: int, concurrency: int, seed: int) -> dict:
+    """Make `attempts` bookings from this process, `concurrency` at a time"""
+    from sqlalchemy import func, select
+
+    from backend.app import database
+    from backend.app.models.reservation import Reservation
+    from backend.app.services import db_service
+    from backend.app.services.reservation_service import ReservationBook, SlotFull
+
+    book = ReservationBook(seats_per_slot=seats, max_party=seats)
+    rng = random.Random(seed)
+
+    def booked_seats(slot: datetime) -> int:
+        db = database.SessionLocal()
+        try:
+            return db.execute(select(func.coalesce(func.sum(Reservation.people), 0))
+                              .where(Reservation.slot_start == slot)).scalar()
+        finally:
+            db.close()
+
+    async def check_then_insert(name: str, text: str, people: int) -> bool:
+        slot = book.check(text, people)
+        if await db_service.run(booked_seats, slot) + people > seats:
+            return False
+        await db_service.save(Reservation(reservation_id=db_service.new_reservation_id(), customer_name=name,
+                                          time_slot=text, slot_start=slot, people=people))
+        return True
+
+    async def atomic(name: str, text: str, people: int) -> bool:
+        try:
+            await book.book(name, text, people)
+            return True
+        except SlotFull:
+            return False
+
+    async def run() -> dict:
+        attempt = check_then_insert if mode == "check-then-insert" else atomic
+        semaphore = asyncio.Semaphore(concurrency)
+        accepted = {"bookings": 0, "people": 0, "errors": 0}
+
+        async def one(i: int):
+            text, people = rng.choice(slots), rng.randint(1, 6)
+            async with semaphore:
+                try:
+                    if await attempt(f"stress-{seed}-{i}", text, people):
+                        accepted["bookings"] += 1
+                        accepted["people"] += people
+                except Exception:
+                    accepted["errors"] += 1
+
+        await asyncio.gather(*(one(i) for i in range(attempts)))
+        return accepted
+
+    return asyncio.run(run())
+
+
+def availability_timings(people: int, repeats: int) -> dict:
+    """Median microseconds for the next free slot, from the slot map and from SQL"""
+    from sqlalchemy import func, select
+
+    from backend.app import database
+    from backend.app.models.reservation import Reservation
+    from backend.app.services.reservation_service import ReservationBook
+
+    book = ReservationBook(refresh_seconds=3600)
+    asyncio.run(book.next_free(people))  # first load, not timed
+
+    def from_sql():
+        db = database.SessionLocal()
+        try:
+            now = datetime.now()
+            booked = dict(db.execute(
+                select(Reservation.slot_start, func.sum(Reservation.people))
+                .where(Reservation.slot_start >= now, Reservation.status != "cancelled")
+                .group_by(Reservation.slot_start)
+            ).all())
+        finally:
+            db.close()
+        return next((slot for slot in book._slots(now, now + book.horizon)
+                     if book.seats_per_slot - booked.get(slot, 0) >= people), None)
+
+    async def from_map():
+        return await book.next_free(people, count=1)
+
+    def median_us(fn) -> float:
+        samples = []
+        for _ in range(repeats):
+            start = time.perf_counter()
+            fn()
+            samples.append((time.perf_counter() - start) * 1e6)
+        return statistics.median(samples)
+
+    loop = asyncio.new_event_loop()
+    try:
+        memory = median_us(lambda: loop.run_until_complete(from_map()))
+    finally:
+        loop.close()
+    return {"memory_us": memory, "sql_us": median_us(from_sql)}
+
+
+def check(path: str, seats: int, accepted: list) -> list:
+    problems = []
+    con = sqlite3.connect(path)
+    try:
+        stored = dict(con.execute("SELECT slot_start, SUM(people) FROM reservations GROUP BY slot_start").fetchall())
+        counters = dict(con.execute("SELECT slot_start, booked FROM slot_capacity").fetchall())
+        rows = con.execute("SELECT COUNT(*) FROM reservations").fetchone()[0]
+    finally:
+        con.close()
+    over = {slot: people for slot, people in stored.items() if people > seats}
+    if over:
+        problems.append(f"{len(over)} overbooked slots (up to {max(over.values())} guests for {seats} seats)")
+    if counters and any(counters.get(slot, 0) != people for slot, people in stored.items()):
+        problems.append("capacity counters differ from the reservations table")
+    if rows != sum(a["bookings"] for a in accepted):
+        problems.append(f"{rows} reservations stored for {sum(a['bookings'] for a in accepted)} accepted")
+    errors = sum(a["errors"] for a in accepted)
+    if errors:
+        problems.append(f"{errors} bookings failed with errors")
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--processes", type=int, default=8)
+    parser.add_argument("--attempts", type=int, default=300, help="bookings per process")
+    parser.add_argument("--concurrency", type=int, default=16, help="bookings in flight per process")
+    parser.add_argument("--slots", type=int, default=4)
+    parser.add_argument("--seats", type=int, default=40, help="seats per slot")
+    parser.add_argument("--repeats", type=int, default=200, help="availability queries timed")
+    args = parser.parse_args()
+
+    slots = _slots(args.slots)
+    demand = args.processes * args.attempts * 3.5
+    print(f"{args.processes} processes x {args.attempts} bookings, {args.slots} slots of {args.seats} seats "
+          f"(~{demand:.0f} guests asking for {args.slots * args.seats} seats)")
+    context = multiprocessing.get_context("spawn")
+    failed = False
+    with tempfile.TemporaryDirectory(prefix="stress-reservations-") as tmp:
+        for mode in MODES:
+            path = os.path.join(tmp, f"{mode}.db")
+            # Spawned workers read it when they first import the app
+            os.environ["DATABASE_URL"] = f"sqlite:///{path}"
+            os.environ.setdefault("LOG_LEVEL", "WARNING")
+            with context.Pool(args.processes) as pool:
+                pool.apply(init_db)
+                start = time.perf_counter()
+                accepted = pool.starmap(worker, [(mode, slots, args.seats, args.attempts, args.concurrency, seed)
+                                                 for seed in range(args.processes)])
+                elapsed = time.perf_counter() - start
+                timings = pool.apply(availability_timings, (2, args.repeats)) if mode == "atomic" else None
+            problems = check(path, args.seats, accepted)
+            if mode == "atomic":
+                failed = failed or bool(problems)
+            total = args.processes * args.attempts
+            status = "OK" if not problems else "FAIL: " + "; ".join(problems)
+            print(f"{mode:>17}: {total} attempts in {elapsed:.2f}s ({total / elapsed:,.0f}/s), "
+                  f"{sum(a['bookings'] for a in accepted)} booked for {sum(a['people'] for a in accepted)} guests"
+                  f" - {status}")
+    print(f"next free slot: {timings['memory_us']:.0f} us from the slot map, {timings['sql_us']:.0f} us with SQL")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,350 @@
+# backend/benchmarks/suite.py
+"""
+Offline benchmark suite with JSON baselines.
+
+Microbenchmarks (chunking, embedding, search, document ingestion, ORM
+writes) and an HTTP load test of the customer and admin endpoints, all on
+synthetic documents with the fake Gemini model and the hashing embedder,
+against a throwaway database. No network or model downloads are needed,
+and runs are repeatable: inputs are seeded and timings are the median of
+several repeats.
+
+Save a baseline, then compare later runs against it; a comparison exits
+with status 1 when any metric is worse than the baseline by more than
+--tolerance. Baselines are only meaningful on the machine that made them.
+
+Run from the repository root:
+    python -m backend.benchmarks.suite --save baseline.json
+    python -m backend.benchmarks.suite --compare baseline.json --tolerance 0.25
+    python -m backend.benchmarks.suite --only search,orm --quick
+"""
+import argparse
+import asyncio
+import atexit
+import json
+import os
+import platform
+import shutil
+import socket
+import statistics
+import subprocess
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+# Everything the app writes goes to a scratch directory, never the real database
+_WORKDIR = tempfile.mkdtemp(prefix="bench-suite-")
+atexit.register(shutil.rmtree, _WORKDIR, ignore_errors=True)
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_WORKDIR, 'bench.db')}"
+os.environ["TENANT_DATA_DIR"] = os.path.join(_WORKDIR, "tenants")
+os.environ["TTS_CACHE_DIR"] = os.path.join(_WORKDIR, "tts_cache")
+os.environ.setdefault("ANSWER_CACHE_MAX_ENTRIES", "0")
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+os.environ.setdefault("AUTH_LOGIN_ATTEMPTS", "1000")
+
+import faiss
+from langchain_community.docstore.in_memory import InMemoryDocstore
+from langchain_community.vectorstores import FAISS
+from langchain_core.documents import Document
+
+from backend.app import database, langchain
+from backend.app.services import db_service
+from backend.app.services.embedding_service import BatchingEmbeddings
+from backend.app.services.retrieval_service import hybrid_search, vector_search
+from backend.app.services.vectorstore_service import IncrementalIndex
+from .fakes import FakeGeminiModel, HashingEmbeddings, SimulatedEmbeddings
+from .load_test import run_load
+from .synthetic import synthetic_menu, synthetic_policy, synthetic_questions, write_corpus
+
+HIGHER, LOWER = "higher", "lower"
+BENCHMARKS = {}
+
+
+def benchmark(name: str):
+    """Register fn(args) -> {metric: (value, HIGHER or LOWER is better)}"""
+    def register(fn):
+        BENCHMARKS[name] = fn
+        return fn
+    return register
+
+
+def median_seconds(fn, repeats: int) -> float:
+    fn()  # warm-up
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return statistics.median(times)
+
+
+def percentile_ms(values: list, q: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * q))] * 1000
+
+
+def new_index(path: str, embeddings) -> IncrementalIndex:
+    os.makedirs(path, exist_ok=True)
+    dim = len(embeddings.embed_query("dimension probe"))
+    store = FAISS(embedding_function=embeddings, index=faiss.IndexFlatL2(dim),
+                  docstore=InMemoryDocstore(), index_to_docstore_id={})
+    return IncrementalIndex(path, embeddings, store, compact_after_bytes=1 << 40)
+
+
+def corpus_documents(count: int) -> list:
+    docs = []
+    for i in range(count):
+        text = synthetic_policy(seed=i) if i % 2 else synthetic_menu(seed=i)[0]
+        docs.append(Document(page_content=text, metadata={"source": f"doc_{i}.txt"}))
+    return docs
+
+
+# -----------------------------
+# Microbenchmarks
+# -----------------------------
+@benchmark("chunking")
+def bench_chunking(args) -> dict:
+    docs = corpus_documents(args.documents)
+    total_bytes = sum(len(d.page_content.encode("utf-8")) for d in docs)
+    chunks = len(langchain.text_splitter.split_documents(docs))
+    seconds = median_seconds(lambda: langchain.text_splitter.split_documents(docs), args.repeats)
+    return {"chunks_per_s": (chunks / seconds, HIGHER), "mb_per_s": (total_bytes / seconds / 1e6, HIGHER)}
+
+
+@benchmark("embedding")
+def bench_embedding(args) -> dict:
+    chunks = [d.page_content for d in langchain.text_splitter.split_documents(corpus_documents(args.documents))]
+    service = BatchingEmbeddings(HashingEmbeddings())
+    documents_seconds = median_seconds(lambda: service.embed_documents(chunks), args.repeats)
+
+    # Concurrent queries against a model with a per-call cost: measures how well they are batched
+    simulated = BatchingEmbeddings(SimulatedEmbeddings(), cache_size=0)
+    questions = synthetic_questions(args.queries)
+
+    async def burst():
+        await asyncio.gather(*(simulated.aembed_query(q) for q in questions))
+
+    queries_seconds = median_seconds(lambda: asyncio.run(burst()), args.repeats)
+    return {"documents_per_s": (len(chunks) / documents_seconds, HIGHER),
+            "concurrent_queries_per_s": (len(questions) / queries_seconds, HIGHER)}
+
+
+@benchmark("search")
+def bench_search(args) -> dict:
+    embeddings = HashingEmbeddings()
+    index = new_index(os.path.join(_WORKDIR, "search_index"), embeddings)
+    for doc in corpus_documents(args.documents * 4):
+        index.ingest(doc.metadata["source"], langchain.text_splitter.split_documents([doc]))
+    questions = [(q, embeddings.embed_query(q)) for q in synthetic_questions(args.queries)]
+
+    def timed(fn) -> list:
+        """Per-query latency, the median over `repeats` passes"""
+        passes = []
+        for _ in range(args.repeats + 1):
+            latencies = []
+            for q, v in questions:
+                start = time.perf_counter()
+                fn(q, v)
+                latencies.append(time.perf_counter() - start)
+            passes.append(latencies)
+        return [statistics.median(per_query) for per_query in zip(*passes[1:])]
+
+    # Tens of microseconds each, too short to time one by one
+    vector_seconds = median_seconds(lambda: [vector_search(index.vectorstore, v, 10) for _, v in questions],
+                                    args.repeats)
+    hybrid = timed(lambda q, v: hybrid_search(index, q, v, candidates=10, top_k=2))
+    return {"vector_ms": (vector_seconds / len(questions) * 1000, LOWER),
+            "hybrid_p50_ms": (percentile_ms(hybrid, 0.5), LOWER),
+            "hybrid_p99_ms": (percentile_ms(hybrid, 0.99), LOWER)}
+
+
+@benchmark("ingest")
+def bench_ingest(args) -> dict:
+    paths = write_corpus(os.path.join(_WORKDIR, "corpus"), documents=args.documents)
+    embeddings = HashingEmbeddings()
+    langchain.embedding_model = BatchingEmbeddings(embeddings)
+    runs, reingest = [], []
+    for repeat in range(args.repeats):
+        langchain.knowledge_index = new_index(os.path.join(_WORKDIR, f"ingest_index_{repeat}"), embeddings)
+        start = time.perf_counter()
+        for path in paths:
+            langchain.add_document_to_vectorstore(path)
+        runs.append(time.perf_counter() - start)
+        # Unchanged re-uploads only hash chunks; nothing is embedded again
+        start = time.perf_counter()
+        for path in paths:
+            langchain.add_document_to_vectorstore(path)
+        reingest.append(time.perf_counter() - start)
+    return {"ms_per_document": (statistics.median(runs) / len(paths) * 1000, LOWER),
+            "reingest_ms_per_document": (statistics.median(reingest) / len(paths) * 1000, LOWER)}
+
+
+@benchmark("orm")
+def bench_orm(args) -> dict:
+    database.init_db()
+    _, menu = synthetic_menu()
+    rows = [{"customer_name": f"Bench {i}", "phone_number": "0300", "item": menu[i % len(menu)][0], "quantity": 1}
+            for i in range(args.rows)]
+
+    async def singles():
+        for row in rows[:args.rows // 10]:
+            await db_service.create_order(**row)
+
+    async def bulk():
+        await db_service.bulk_create_orders(rows)
+
+    single_seconds = median_seconds(lambda: asyncio.run(singles()), args.repeats)
+    bulk_seconds = median_seconds(lambda: asyncio.run(bulk()), args.repeats)
+
+    db = database.SessionLocal()
+    try:
+        page_seconds = median_seconds(lambda: db_service.list_orders(db, statuses=["pending"], limit=100),
+                                      args.repeats * 5)
+    finally:
+        db.close()
+    return {"single_orders_per_s": (args.rows // 10 / single_seconds, HIGHER),
+            "bulk_rows_per_s": (len(rows) / bulk_seconds, HIGHER),
+            "admin_page_ms": (page_seconds * 1000, LOWER)}
+
+
+# -----------------------------
+# HTTP Load
+# -----------------------------
+@contextmanager
+def offline_app(llm_latency: float = 0.2, token_interval: float = 0.0):
+    """
+    Serve the app with uvicorn on a free local port, with fakes in place of
+    Gemini and the embedder and a synthetic knowledge base; yields the base URL.
+    """
+    import uvicorn
+    from backend.app.main import app
+
+    embeddings = HashingEmbeddings()
+    langchain.embedding_model = BatchingEmbeddings(embeddings)
+    langchain.gemini_model = FakeGeminiModel(latency=llm_latency, token_interval=token_interval)
+    index = new_index(os.path.join(_WORKDIR, "app_index"), embeddings)
+    for doc in corpus_documents(10):
+        index.ingest(doc.metadata["source"], langchain.text_splitter.split_documents([doc]))
+    langchain.knowledge_index = index
+
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.01)
+    try:
+        yield f"http://127.0.0.1:{port}"
+    finally:
+        server.should_exit = True
+        thread.join(timeout=10)
+
+
+@benchmark("load")
+def bench_load(args) -> dict:
+    # A fast fake LLM, so the numbers show the app's own overhead rather than the wait
+    with offline_app(llm_latency=args.llm_latency) as base_url:
+        results = asyncio.run(run_load(base_url, args.concurrency, args.duration))
+    metrics = {"total_rps": (results["total"]["rps"], HIGHER), "errors": (float(results["total"]["errors"]), LOWER)}
+    for name, r in results.items():
+        if name != "total" and r["requests"]:
+            metrics[f"{name}_p50_ms"] = (r["p50_ms"], LOWER)
+            metrics[f"{name}_p99_ms"] = (r["p99_ms"], LOWER)
+    return metrics
+
+
+# -----------------------------
+# Baselines
+# -----------------------------
+def _git_revision() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+
+
+def run_suite(args) -> dict:
+    names = args.only.split(",") if args.only else list(BENCHMARKS)
+    metrics = {}
+    for name in names:
+        start = time.perf_counter()
+        for metric, (value, better) in BENCHMARKS[name](args).items():
+            metrics[f"{name}.{metric}"] = {"value": round(value, 4), "better": better}
+        print(f"✅ {name} ({time.perf_counter() - start:.1f}s)")
+    return {
+        "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "git": _git_revision(),
+        "machine": {"python": platform.python_version(), "platform": platform.platform(),
+                    "cpus": os.cpu_count()},
+        "settings": {k: v for k, v in vars(args).items() if k not in ("save", "compare", "only", "tolerance")},
+        "metrics": metrics,
+    }
+
+
+def compare(baseline: dict, current: dict, tolerance: float) -> list:
+    """Print a comparison table; returns the names of regressed metrics"""
+    if baseline.get("machine") != current["machine"]:
+        print("⚠️ Baseline was recorded on a different machine or Python; expect differences")
+    if baseline.get("settings") != current["settings"]:
+        print("⚠️ Baseline was recorded with different settings")
+
+    regressions = []
+    print(f"\n{'metric':<38}{'baseline':>12}{'current':>12}{'change':>9}")
+    for name, entry in current["metrics"].items():
+        base = baseline["metrics"].get(name)
+        if base is None:
+            print(f"{name:<38}{'-':>12}{entry['value']:>12.2f}{'new':>9}")
+            continue
+        old, new = base["value"], entry["value"]
+        change = (new - old) / old if old else (0.0 if new == old else float("inf"))
+        worse = -change if entry["better"] == HIGHER else change
+        regressed = worse > tolerance
+        if regressed:
+            regressions.append(name)
+        flag = "  ❌" if regressed else ""
+        print(f"{name:<38}{old:>12.2f}{new:>12.2f}{change * 100:>8.0f}%{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--only", help=f"comma-separated subset of: {','.join(BENCHMARKS)}")
+    parser.add_argument("--save", help="write results to this JSON baseline")
+    parser.add_argument("--compare", help="baseline JSON to compare with; exit 1 on regressions")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed relative slowdown (0.25 = 25%%)")
+    parser.add_argument("--quick", action="store_true", help="smaller inputs and a shorter load test")
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--documents", type=int, default=20, help="synthetic documents per benchmark")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--rows", type=int, default=2000, help="orders for the ORM benchmark")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=10, help="load test seconds")
+    parser.add_argument("--llm-latency", type=float, default=0.05, help="fake Gemini latency in the load test")
+    args = parser.parse_args()
+    if args.quick:
+        args.repeats, args.documents, args.queries, args.rows, args.duration = 3, 6, 50, 500, 3
+
+    results = run_suite(args)
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"💾 Baseline written to {args.save}")
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(baseline, results, args.tolerance)
+        if regressions:
+            print(f"\n❌ {len(regressions)} regression(s) beyond {args.tolerance:.0%}: {', '.join(regressions)}")
+            raise SystemExit(1)
+        print(f"\n✅ No regressions beyond {args.tolerance:.0%}")
+    elif not args.save:
+        print(json.dumps(results["metrics"], indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,163 @@
+# backend/benchmarks/synthetic.py
+"""
+Deterministic synthetic restaurant documents for the benchmarks.
+
+Menus and policy documents are generated from a seed, so every run (and
+every machine) works on the same text, and sizes can be scaled beyond the
+one real menu in uploaded_documents/. Long documents can also be written
+as PDF or DOCX files, without any PDF or Word library.
+"""
+import os
+import random
+import textwrap
+import zipfile
+from xml.sax.saxutils import escape
+
+CATEGORIES = ["PIZZAS", "PASTA", "BURGERS", "SALADS", "SANDWICHES", "SIDES", "DESSERTS", "BEVERAGES", "DEALS"]
+ADJECTIVES = ["Classic", "Spicy", "Smoky", "Garden", "Royal", "Crispy", "Golden", "Rustic", "Double", "Supreme",
+              "Creamy", "Fiery", "Tuscan", "Harvest", "Midnight", "Coastal"]
+DISHES = ["Margherita", "Pepperoni", "Alfredo", "Carbonara", "Lasagna", "Burger", "Caesar", "Club", "Wings",
+          "Garlic Bread", "Tiramisu", "Brownie", "Lemonade", "Milkshake", "Calzone", "Risotto", "Panini", "Nachos"]
+INGREDIENTS = ["mozzarella", "basil", "tomato sauce", "pepperoni", "mushrooms", "onions", "olives", "bacon",
+               "grilled chicken", "parmesan", "spinach", "jalapenos", "cheddar", "garlic butter", "pesto",
+               "roasted peppers", "ricotta", "BBQ sauce", "pineapple", "ham"]
+TOPICS = ["Delivery", "Refunds", "Allergies", "Reservations", "Payments", "Loyalty Program", "Catering",
+          "Opening Hours", "Promotions", "Order Changes", "Complaints", "Parking", "Gift Cards", "Large Groups"]
+SENTENCES = [
+    "Customers can {verb} {topic} by calling the restaurant or through the app.",
+    "Staff should always confirm {topic} details with the customer before closing the conversation.",
+    "During peak hours {topic} requests may take up to {n} minutes longer than usual.",
+    "A manager must approve any {topic} exception above {n} dollars.",
+    "{Topic} questions are answered politely and the customer is offered further help.",
+    "Orders above {n} dollars qualify for priority handling of {topic}.",
+    "If the customer is unhappy with {topic}, offer a {n}% discount on the next order.",
+]
+VERBS = ["arrange", "request", "change", "ask about", "cancel", "update"]
+
+
+def synthetic_menu(items: int = 60, seed: int = 0):
+    """Menu text in the layout of the real menu, and its (name, price) items"""
+    rng = random.Random(seed)
+    lines = [f"Restaurant {seed} MENU & PRICES", ""]
+    menu = []
+    per_category = max(1, items // len(CATEGORIES))
+    for category in CATEGORIES:
+        lines += ["=" * 43, category, "=" * 43, ""]
+        for _ in range(per_category):
+            if len(menu) == items:
+                break
+            name = f"{rng.choice(ADJECTIVES)} {rng.choice(DISHES)}"
+            price = f"{rng.randint(4, 30)}.{rng.choice(['49', '99'])}"
+            menu.append((name, price))
+            lines.append(f"• {name}  ${price}")
+            lines.append("  " + ", ".join(rng.sample(INGREDIENTS, 3)).capitalize())
+            lines.append("")
+    return "\n".join(lines), menu
+
+
+def synthetic_policy(sections: int = 20, seed: int = 0) -> str:
+    """Guidelines document: titled sections of short policy sentences"""
+    rng = random.Random(seed)
+    parts = [f"Restaurant {seed} – Guidelines, Policies, and FAQs", ""]
+    for i in range(sections):
+        topic = TOPICS[i % len(TOPICS)]
+        parts.append(f"{i + 1}. {topic}")
+        sentences = [rng.choice(SENTENCES).format(verb=rng.choice(VERBS), topic=topic.lower(), Topic=topic,
+                                                  n=rng.randint(5, 60))
+                     for _ in range(rng.randint(4, 9))]
+        parts.append(" ".join(sentences))
+        parts.append("")
+    return "\n".join(parts)
+
+
+def write_corpus(directory: str, documents: int = 10, seed: int = 0) -> list:
+    """Write alternating menu and policy .txt files; returns their paths"""
+    os.makedirs(directory, exist_ok=True)
+    paths = []
+    for i in range(documents):
+        if i % 2:
+            text = synthetic_policy(sections=20, seed=seed + i)
+            path = os.path.join(directory, f"policy_{i}.txt")
+        else:
+            text, _ = synthetic_menu(items=60, seed=seed + i)
+            path = os.path.join(directory, f"menu_{i}.txt")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(text)
+        paths.append(path)
+    return paths
+
+
+def synthetic_questions(count: int, seed: int = 0) -> list:
+    """Menu and policy questions phrased like customers ask them"""
+    rng = random.Random(seed)
+    _, menu = synthetic_menu(items=60, seed=seed)
+    questions = []
+    for i in range(count):
+        if i % 2:
+            questions.append(f"How much is the {rng.choice(menu)[0]}?")
+        else:
+            questions.append(f"What is your policy on {rng.choice(TOPICS).lower()}?")
+    return questions
+
+
+def synthetic_manual(pages: int, seed: int = 0) -> list:
+    """A long policy manual: a list of pages, each a list of ~45 lines of text"""
+    rng = random.Random(seed)
+    lines = []
+    for section in range(pages):
+        text = synthetic_policy(sections=3, seed=seed * 100003 + section)
+        for paragraph in text.split("\n"):
+            lines.extend(textwrap.wrap(paragraph, 90) or [""])
+        lines.append(f"Reference {rng.randint(1000, 9999)}")
+    lines = [line.replace("\u2013", "-") for line in lines]
+    return [lines[i * 45:(i + 1) * 45] for i in range(pages)]
+
+
+def write_pdf(path: str, pages: list):
+    """Write `pages` (lists of ASCII lines) as a minimal PDF, one text page each"""
+    objects = ["<< /Type /Catalog /Pages 2 0 R >>", None,
+               "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    kids = []
+    for lines in pages:
+        shown = " T* ".join("(" + l.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)") + ") Tj"
+                            for l in lines)
+        stream = f"BT /F1 10 Tf 14 TL 50 780 Td {shown} ET"
+        objects.append(f"<< /Length {len(stream)} >>\nstream\n{stream}\nendstream")
+        objects.append(f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 842] /Contents {len(objects)} 0 R "
+                       f"/Resources << /Font << /F1 3 0 R >> >> >>")
+        kids.append(f"{len(objects)} 0 R")
+    objects[1] = f"<< /Type /Pages /Kids [{' '.join(kids)}] /Count {len(kids)} >>"
+
+    with open(path, "wb") as f:
+        f.write(b"%PDF-1.4\n")
+        offsets = []
+        for number, body in enumerate(objects, 1):
+            offsets.append(f.tell())
+            f.write(f"{number} 0 obj\n{body}\nendobj\n".encode("latin-1"))
+        xref = f.tell()
+        f.write(f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode("latin-1"))
+        for offset in offsets:
+            f.write(f"{offset:010d} 00000 n \n".encode("latin-1"))
+        f.write(f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode("latin-1"))
+
+
+def write_docx(path: str, paragraphs: list):
+    """Write `paragraphs` as a minimal .docx (just enough for Word and docx2txt)"""
+    body = "".join(f'<w:p><w:r><w:t xml:space="preserve">{escape(p)}</w:t></w:r></w:p>' for p in paragraphs)
+    document = ('<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+                '<w:document xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main">'
+                f"<w:body>{body}</w:body></w:document>")
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr("[Content_Types].xml",
+                         '<?xml version="1.0" encoding="UTF-8"?>'
+                         '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+                         '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+                         '<Default Extension="xml" ContentType="application/xml"/>'
+                         '<Override PartName="/word/document.xml" ContentType="application/'
+                         'vnd.openxmlformats-officedocument.wordprocessingml.document.main+xml"/></Types>')
+        archive.writestr("_rels/.rels",
+                         '<?xml version="1.0" encoding="UTF-8"?>'
+                         '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+                         '<Relationship Id="rId1" Target="word/document.xml" Type="http://schemas.openxmlformats.org/'
+                         'officeDocument/2006/relationships/officeDocument"/></Relationships>')
+        archive.writestr("word/document.xml", document)
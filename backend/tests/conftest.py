@@ -0,0 +1,34 @@
+# backend/tests/conftest.py
+import os
+import shutil
+import tempfile
+
+# The app reads its settings at import, so every store points at a scratch
+# directory before any test imports it
+_WORKDIR = tempfile.mkdtemp(prefix="tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_WORKDIR, 'test.db')}"
+os.environ["TENANT_DATA_DIR"] = os.path.join(_WORKDIR, "tenants")
+os.environ["TTS_CACHE_DIR"] = os.path.join(_WORKDIR, "tts_cache")
+os.environ["LOG_LEVEL"] = "WARNING"
+
+import pytest
+
+
+def pytest_sessionfinish(session, exitstatus):
+    shutil.rmtree(_WORKDIR, ignore_errors=True)
+
+
+@pytest.fixture(scope="session")
+def app():
+    from backend.app import database
+    from backend.app.main import app
+
+    database.init_db()
+    return app
+
+
+@pytest.fixture
+def client(app):
+    from fastapi.testclient import TestClient
+
+    return TestClient(app)
@@ -0,0 +1,225 @@
+# backend/tests/test_api.py
+import asyncio
+import json
+import time
+from datetime import datetime, timedelta
+
+
+def _staff_headers(client) -> dict:
+    # Registering again is refused, which is fine: the account already exists
+    client.post("/register", json={"username": "staff", "email": "staff@example.com", "password": "staff-pass",
+                                   "restaurant_name": "Test"})
+    token = client.post("/token", data={"username": "staff", "password": "staff-pass"}).json()["access_token"]
+    return {"Authorization": f"Bearer {token}"}
+
+
+def test_reservation_accepts_spoken_time(client):
+    # What the voice assistant sends: the transcribed time, no date
+    response = client.post("/reservation", params={"customer_name": "Sara", "time_slot": "8:30 p.m.", "people": 2})
+    assert response.status_code == 200, response.text
+    slot = datetime.fromisoformat(response.json()["slot"])
+    assert (slot.hour, slot.minute) == (20, 30)
+    assert datetime.now() < slot <= datetime.now() + timedelta(days=1)
+
+
+def test_reservation_rejects_unreadable_time(client):
+    response = client.post("/reservation", params={"customer_name": "Sara", "time_slot": "soonish", "people": 2})
+    assert response.status_code == 422
+
+
+def test_full_slot_offers_alternatives(client):
+    day = (datetime.now() + timedelta(days=3)).date()
+    params = {"customer_name": "Party", "time_slot": f"{day} 19:00", "people": 12}
+    while (response := client.post("/reservation", params=params)).status_code == 200:
+        pass
+    assert response.status_code == 409
+    alternatives = response.json()["detail"]["alternatives"]
+    assert alternatives and all(slot["free"] >= 12 for slot in alternatives)
+    assert datetime.fromisoformat(alternatives[0]["time"]) > datetime.fromisoformat(f"{day}T19:00")
+
+
+def test_admin_endpoints_require_a_token(client):
+    # Naming a restaurant is not enough to act on its orders or documents
+    headers = {"X-Restaurant-ID": "1"}
+    for method, path in [("GET", "/admin/ingest-jobs"), ("GET", "/admin/ingest-jobs/abc"),
+                         ("PATCH", "/admin/orders/1"), ("POST", "/admin/upload-document"),
+                         ("GET", "/admin/documents"), ("DELETE", "/admin/documents/menu.pdf"),
+                         ("GET", "/admin/tenant-stats")]:
+        assert client.request(method, path, headers=headers).status_code == 401, path
+
+
+def test_tenant_stats_show_only_the_callers_restaurant(client):
+    from backend.app.langchain import tenant_router
+
+    tenant_router.provision(999)  # another restaurant's open database
+    stats = client.get("/admin/tenant-stats", headers=_staff_headers(client)).json()
+    assert stats["databases"]["by_key"] == {} and stats["indexes"]["by_key"] == {}
+    assert 999 in tenant_router.stats()["databases"]["by_key"]
+
+
+def test_reservation_id_round_trip(client):
+    from backend.app import database
+    from backend.app.services.nlp_service import IntentRouter
+
+    response = client.post("/reservation", params={"customer_name": "Omar", "time_slot": "tomorrow at 7 pm",
+                                                   "people": 3})
+    reservation_id = response.json()["reservation_id"]
+    assert reservation_id.startswith("RES")
+
+    router = IntentRouter(lambda: None, database.SessionLocal, {}, similarity_threshold=0.5, margin=0.05)
+    for said in (f"Can you check reservation {reservation_id}?", f"status of {reservation_id.replace('-', ' ')}"):
+        answer = router.route(said)
+        assert reservation_id in answer and "3 people" in answer and "19:00" in answer, answer
+
+
+def test_legacy_reservation_id_is_found(client):
+    from backend.app import database
+    from backend.app.models.reservation import Reservation
+    from backend.app.services.nlp_service import IntentRouter
+
+    db = database.SessionLocal()
+    db.add(Reservation(reservation_id="RES20250101120000", customer_name="Omar", time_slot="2025-01-01 20:00",
+                       people=4))
+    db.commit()
+    db.close()
+
+    router = IntentRouter(lambda: None, database.SessionLocal, {}, similarity_threshold=0.5, margin=0.05)
+    answer = router.route("Can you check reservation RES20250101120000?")
+    assert "RES20250101120000" in answer and "4 people" in answer, answer
+
+
+def test_status_change_shows_in_changes_feed(client):
+    headers = _staff_headers(client)
+    order = {"customer_name": "Ali", "phone_number": "0300", "item": "Tea"}
+    order_id = client.post("/order", json=order).json()["order_id"]
+    since = client.get("/admin/orders", headers=headers).json()["sync_token"]
+
+    assert client.patch(f"/admin/orders/{order_id}", json={"status": "preparing"}, headers=headers).status_code == 200
+    changes = client.get("/admin/orders", params={"updated_since": since}, headers=headers).json()
+    assert [(o["id"], o["status"]) for o in changes["orders"]] == [(order_id, "preparing")]
+
+
+def test_changes_feed_follows_commit_order_not_clocks(client):
+    from sqlalchemy import update
+
+    from backend.app import database
+    from backend.app.models.order import Order
+
+    headers = _staff_headers(client)
+    order = {"customer_name": "Zara", "phone_number": "0300", "item": "Tea"}
+    order_id = client.post("/order", json=order).json()["order_id"]
+    since = client.get("/admin/orders", headers=headers).json()["sync_token"]
+
+    # Another worker, with its own engine and none of this process's locks, whose clock is behind
+    other = database.create_db_engine(database.SQLALCHEMY_DATABASE_URL)
+    with other.begin() as conn:
+        conn.execute(update(Order).where(Order.id == order_id).values(status="ready", updated_at=datetime(2000, 1, 1)))
+    other.dispose()
+
+    changes = client.get("/admin/orders", params={"updated_since": since}, headers=headers).json()
+    assert [(o["id"], o["status"]) for o in changes["orders"]] == [(order_id, "ready")]
+    again = client.get("/admin/orders", params={"updated_since": changes["sync_token"]}, headers=headers).json()
+    assert again["orders"] == []
+
+
+def test_stt_stream_rejects_bad_sample_rate(client):
+    import pytest
+    from starlette.websockets import WebSocketDisconnect
+
+    for rate in (0, -16000, 10 ** 9):
+        with pytest.raises(WebSocketDisconnect):
+            with client.websocket_connect(f"/api/v1/voice/ws/stt?sample_rate={rate}") as ws:
+                ws.receive_json()
+
+
+def test_upload_with_shared_mmap_index(client, tmp_path, monkeypatch):
+    from backend.app import langchain, main
+    from backend.app.core import config
+    from backend.benchmarks.fakes import HashingEmbeddings
+
+    monkeypatch.setattr(config, "FAISS_MMAP", True)
+    monkeypatch.setattr(main, "UPLOAD_DIR", str(tmp_path / "uploads"))
+    monkeypatch.setattr(langchain, "DB_PATH", str(tmp_path / "index"))
+    monkeypatch.setattr(langchain, "DOC_PATH", None)
+    monkeypatch.setattr(langchain, "embedding_model", HashingEmbeddings())
+    monkeypatch.setattr(langchain, "knowledge_index", None)
+    (tmp_path / "uploads").mkdir()
+    headers = _staff_headers(client)
+
+    text = "Our kitchen closes at 11 pm. Delivery is free above 2000 rupees."
+    response = client.post("/admin/upload-document", files={"file": ("hours.txt", text.encode())}, headers=headers)
+    assert response.status_code == 202, response.text
+    status_url = response.json()["status_url"]
+    deadline = time.monotonic() + 30
+    while (job := client.get(status_url, headers=headers).json())["status"] not in ("completed", "failed"):
+        assert time.monotonic() < deadline, job
+        time.sleep(0.05)
+    assert job["status"] == "completed", job["error"]
+    assert client.get("/admin/documents", headers=headers).json()["documents"]["hours.txt"] == 1
+
+
+def test_upload_rejects_unsupported_format_before_saving(client, tmp_path, monkeypatch):
+    from backend.app import main
+
+    monkeypatch.setattr(main, "UPLOAD_DIR", str(tmp_path))
+    response = client.post("/admin/upload-document", files={"file": ("menu.xlsx", b"not a document")},
+                           headers=_staff_headers(client))
+    assert response.status_code == 400
+    assert list(tmp_path.iterdir()) == []
+
+
+def _sse_events(body: str) -> list:
+    events = []
+    for block in body.strip().split("\n\n"):
+        fields = dict(line.split(": ", 1) for line in block.splitlines())
+        events.append((fields["event"], json.loads(fields["data"])))
+    return events
+
+
+def test_streamed_answer_arrives_as_tokens_then_sentences(client, monkeypatch):
+    from backend.app import main
+
+    async def answer(question, retrieval=None, tenant=None):
+        for token in ("We open ", "at 10 am. Kitchen ", "closes at 11."):
+            yield token
+
+    monkeypatch.setattr(main, "astream_resolve_issue_with_guidelines", answer)
+    response = client.post("/resolve-issue/stream", json={"text": "When do you open?"})
+    assert response.headers["content-type"].startswith("text/event-stream")
+    assert _sse_events(response.text) == [
+        ("token", {"text": "We open "}),
+        ("token", {"text": "at 10 am. Kitchen "}),
+        ("sentence", {"index": 0, "text": "We open at 10 am."}),
+        ("token", {"text": "closes at 11."}),
+        ("sentence", {"index": 1, "text": "Kitchen closes at 11."}),
+        ("done", {"response": "We open at 10 am. Kitchen closes at 11."}),
+    ]
+
+
+def test_stream_falls_back_and_caches_complete_answers(monkeypatch):
+    from langchain_core.documents import Document
+
+    from backend.app import langchain
+    from backend.app.services.cache_service import AnswerCache
+
+    class LLM:
+        tokens = ["Open ", "at 10."]
+
+        async def astream(self, prompt: str):
+            if not self.tokens:
+                raise ConnectionError("backend down")
+            for token in self.tokens:
+                yield token
+
+    retrieval = (None, [Document(page_content="We are open from 10 am to 11 pm.")], ("hours",))
+    monkeypatch.setattr(langchain, "answer_cache", AnswerCache(max_entries=8, ttl_seconds=60, similarity_threshold=0.9))
+    monkeypatch.setattr(langchain, "get_llm_client", lambda: LLM())
+
+    async def collect(question: str, vector=(1.0, 0.0)) -> list:
+        return [token async for token in langchain.astream_qa_chain(question, (list(vector), *retrieval[1:]))]
+
+    assert asyncio.run(collect("When do you open?")) == ["Open ", "at 10."]
+    LLM.tokens = []
+    assert asyncio.run(collect("When do you open?")) == ["Open at 10."]  # cached, in one piece
+    fallback = asyncio.run(collect("Is there parking?", vector=(0.0, 1.0)))
+    assert len(fallback) == 1 and fallback[0].startswith(langchain.FALLBACK_PREFIX)
@@ -0,0 +1,741 @@
+# backend/tests/test_services.py
+import asyncio
+import hashlib
+import time
+
+import pytest
+from langchain_core.embeddings import Embeddings
+
+from backend.app.services.cache_service import AnswerCache
+from backend.app.services.event_service import EventBroadcaster
+from backend.app.services.llm_service import (
+    CircuitBreaker, CircuitOpenError, EmptyAnswer, GeminiBackend, LLMError, ResilientLLM,
+)
+
+
+class ScriptedBackend:
+    """Answers agenerate() calls in turn from `script`: a delay in seconds, or an exception to raise"""
+
+    name = "scripted"
+
+    def __init__(self, *script):
+        self.script = list(script)
+        self.calls = 0
+
+    async def agenerate(self, prompt: str, timeout: float) -> str:
+        step = self.script[min(self.calls, len(self.script) - 1)]
+        self.calls += 1
+        if isinstance(step, Exception):
+            raise step
+        await asyncio.sleep(step)
+        return f"answer {self.calls}"
+
+
+def _client(backend, **settings) -> ResilientLLM:
+    options = dict(max_concurrency=4, timeout=5, attempt_timeout=2, max_retries=2, retry_base_ms=1, retry_max_ms=5)
+    return ResilientLLM(backend, **{**options, **settings})
+
+
+def test_events_reach_only_their_channel_and_overflow_resyncs():
+    async def scenario():
+        events = EventBroadcaster(max_queue=2)
+        mine, other = events.subscribe(7), events.subscribe(8)
+        for n in range(3):
+            events.publish({"type": "status", "n": n}, channel=7)
+        await asyncio.sleep(0)  # deliveries run on the loop
+        assert other.empty()
+        # The backlog overflowed: one resync replaces it, for this channel too
+        assert mine.get_nowait() == {"type": "resync"} and mine.empty()
+        events.unsubscribe(mine, 7)
+        assert events.subscriber_count(7) == 0 and events.subscriber_count(8) == 1
+
+    asyncio.run(scenario())
+
+
+def test_breaker_opens_probes_once_and_closes():
+    breaker = CircuitBreaker(failure_threshold=2, reset_seconds=0.05)
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.CLOSED and breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN and not breaker.allow()
+
+    time.sleep(0.06)
+    assert breaker.allow() and breaker.state == CircuitBreaker.HALF_OPEN
+    assert not breaker.allow()  # one probe at a time
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN and breaker.opened == 2
+
+    time.sleep(0.06)
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED and breaker.allow()
+
+
+def test_retries_retryable_failures_only():
+    backend = ScriptedBackend(LLMError("busy"), LLMError("busy"), 0)
+    client = _client(backend)
+    assert asyncio.run(client.agenerate("hi")) == "answer 3"
+    assert client.counts["retries"] == 2 and client.breaker.state == CircuitBreaker.CLOSED
+
+    backend = ScriptedBackend(LLMError("bad request", retryable=False))
+    client = _client(backend)
+    with pytest.raises(LLMError):
+        asyncio.run(client.agenerate("hi"))
+    assert backend.calls == 1 and client.counts["retries"] == 0
+
+
+def test_open_breaker_fails_fast():
+    backend = ScriptedBackend(LLMError("down"))
+    client = _client(backend, max_retries=0, breaker_failures=2, breaker_reset_seconds=60)
+    for _ in range(2):
+        with pytest.raises(LLMError):
+            asyncio.run(client.agenerate("hi"))
+    with pytest.raises(CircuitOpenError):
+        asyncio.run(client.agenerate("hi"))
+    assert backend.calls == 2 and client.counts["rejected"] == 1
+
+
+def test_only_empty_answers_count_as_backend_success():
+    class Unauthorized(Exception):
+        code = 401
+
+    backend = ScriptedBackend(Unauthorized("bad API key"))
+    client = _client(backend, breaker_failures=2, breaker_reset_seconds=60)
+    for _ in range(2):
+        with pytest.raises(Unauthorized):
+            asyncio.run(client.agenerate("hi"))
+    assert backend.calls == 2 and client.breaker.state == CircuitBreaker.OPEN
+
+    client.breaker._opened_at -= 60
+    client.backend = ScriptedBackend(KeyError("choices"))
+    with pytest.raises(KeyError):
+        asyncio.run(client.agenerate("hi"))  # our bug: the probe is released, the circuit stays half-open
+    assert client.breaker.state == CircuitBreaker.HALF_OPEN and client.breaker.allow()
+    client.breaker.release()
+
+    client.backend = ScriptedBackend(EmptyAnswer("blocked for safety"))
+    with pytest.raises(EmptyAnswer):
+        asyncio.run(client.agenerate("hi"))
+    assert client.breaker.state == CircuitBreaker.CLOSED
+
+
+def test_gemini_stream_skips_chunks_without_text():
+    class Chunk:
+        def __init__(self, text):
+            self._text = text
+
+        @property
+        def text(self):
+            if self._text is None:
+                raise ValueError("no parts")
+            return self._text
+
+    class Model:
+        def __init__(self, *texts):
+            self.texts = texts
+
+        async def generate_content_async(self, prompt, stream, request_options):
+            async def chunks():
+                for text in self.texts:
+                    yield Chunk(text)
+            return chunks()
+
+    async def collect(model):
+        return [text async for text in GeminiBackend(lambda: model).astream("hi", 1)]
+
+    assert asyncio.run(collect(Model("Open ", None, "until 10"))) == ["Open ", "until 10"]
+    with pytest.raises(EmptyAnswer):
+        asyncio.run(collect(Model(None)))
+
+
+def test_slow_attempt_is_hedged():
+    backend = ScriptedBackend(1.0, 0)
+    client = _client(backend, hedge_percentile=50, hedge_min_samples=1)
+    client.latencies.extend([0.01] * 10)
+    started = time.monotonic()
+    assert asyncio.run(client.agenerate("hi")) == "answer 2"
+    assert time.monotonic() - started < 0.5
+    assert client.counts["hedges"] == 1 and client.counts["hedge_wins"] == 1
+
+
+def test_concurrent_workers_never_overbook(tmp_path, monkeypatch):
+    import multiprocessing
+
+    from backend.benchmarks import stress_reservations
+
+    # Spawned workers are separate processes with their own engines, like uvicorn workers
+    path = str(tmp_path / "stress.db")
+    monkeypatch.setenv("DATABASE_URL", f"sqlite:///{path}")
+    slots = stress_reservations._slots(2)
+    with multiprocessing.get_context("spawn").Pool(4) as pool:
+        pool.apply(stress_reservations.init_db)
+        accepted = pool.starmap(stress_reservations.worker,
+                                [("atomic", slots, 20, 40, 8, seed) for seed in range(4)])
+    # Demand (~560 guests) far exceeds the 40 seats; no slot may end up over 20
+    assert stress_reservations.check(path, 20, accepted) == []
+
+
+@pytest.mark.parametrize("method", ["fork", "spawn"])
+def test_ids_unique_across_processes(method):
+    import multiprocessing
+
+    from backend.benchmarks import stress_ids
+
+    if method not in multiprocessing.get_all_start_methods():
+        pytest.skip(f"{method} is not available here")
+    # The parent generates before and while its children do, so a forked child starts from a used generator
+    per_thread, _ = stress_ids.run(method, processes=4, threads=3, count=2000)
+    assert len(per_thread) == 5 * 3 + 1  # and the IDs the parent made before starting them
+    assert stress_ids.check(per_thread) == []
+
+
+def test_answer_cache_is_partitioned_by_restaurant():
+    cache = AnswerCache(max_entries=10, ttl_seconds=60, similarity_threshold=0.9)
+    vector = [1.0, 0.0]
+    cache.put("Do you deliver?", ("a",), vector, "Yes, within 5 km", scope=1)
+    cache.put("Do you deliver?", ("a",), vector, "Pickup only", scope=2)
+    assert cache.get("do you deliver", ("a",), vector, scope=1) == "Yes, within 5 km"
+    assert cache.get("Do you do delivery?", ("a",), vector, scope=2) == "Pickup only"  # semantic layer
+    assert cache.get("Do you deliver?", ("a",), vector) is None
+
+    cache.invalidate(1)
+    assert cache.get("Do you deliver?", ("a",), vector, scope=1) is None
+    assert cache.get("Do you deliver?", ("a",), vector, scope=2) == "Pickup only"
+
+
+def test_qa_chain_reuses_answers_for_the_same_context(monkeypatch):
+    from langchain_core.documents import Document
+
+    from backend.app import langchain
+
+    class LLM:
+        calls = 0
+
+        def generate(self, prompt: str) -> str:
+            LLM.calls += 1
+            return "We open at 10 am."
+
+    hours = Document(page_content="We are open from 10 am to 11 pm.")
+    retrieved = {"chunks": ("hours",)}
+    monkeypatch.setattr(langchain, "answer_cache", AnswerCache(max_entries=8, ttl_seconds=60, similarity_threshold=0.9))
+    monkeypatch.setattr(langchain, "get_llm_client", lambda: LLM())
+    monkeypatch.setattr(langchain, "_retrieve", lambda query, tenant=None: ([1.0, 0.0], [hours], retrieved["chunks"]))
+
+    assert langchain.qa_chain("What time do you open?") == "We open at 10 am."
+    assert langchain.qa_chain("what time do you OPEN") == "We open at 10 am."  # exact layer, normalized
+    assert langchain.qa_chain("When are you opening?") == "We open at 10 am."  # semantic layer
+    assert LLM.calls == 1
+
+    retrieved["chunks"] = ("hours-updated",)  # other context: the old answer no longer applies
+    langchain.qa_chain("What time do you open?")
+    assert LLM.calls == 2
+    stats = langchain.answer_cache.stats()
+    assert (stats["exact_hits"], stats["semantic_hits"], stats["misses"]) == (1, 1, 2)
+
+
+def test_answer_cache_evicts_least_recent_and_expires():
+    cache = AnswerCache(max_entries=2, ttl_seconds=60, similarity_threshold=0.9)
+    for n in range(2):
+        cache.put(f"question {n}", ("a",), None, f"answer {n}")
+    assert cache.get("question 0", ("a",), None) == "answer 0"  # now the most recent
+    cache.put("question 2", ("a",), None, "answer 2")
+    assert cache.get("question 1", ("a",), None) is None
+    assert cache.get("question 0", ("a",), None) == "answer 0"
+
+    cache = AnswerCache(max_entries=2, ttl_seconds=0.01, similarity_threshold=0.9)
+    cache.put("question", ("a",), [1.0, 0.0], "answer")
+    time.sleep(0.02)
+    assert cache.get("question", ("a",), [1.0, 0.0]) is None
+
+
+def test_intent_router_answers_structured_requests_without_the_llm(tmp_path):
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+
+    from backend.app.database import Base
+    from backend.app.models.order import Order
+    from backend.app.services.nlp_service import OPEN_QUESTION, IntentRouter
+
+    class KeywordEmbeddings(Embeddings):
+        """One dimension per word of interest, so phrasings sharing it land close together"""
+
+        words = ["find", "place", "city", "menu", "pizza", "delivery", "card"]
+
+        def embed_documents(self, texts: list) -> list:
+            return [[float(word in text.lower()) for word in self.words] for text in texts]
+
+        def embed_query(self, text: str) -> list:
+            return self.embed_documents([text])[0]
+
+    engine = create_engine(f"sqlite:///{tmp_path / 'orders.db'}")
+    Base.metadata.create_all(bind=engine, tables=[Order.__table__])
+    session_factory = sessionmaker(bind=engine)
+    db = session_factory()
+    db.add(Order(customer_name="Ali", phone_number="0300", item="Pepperoni Passion", quantity=2, status="preparing"))
+    db.commit()
+    db.close()
+
+    info = {"location": "Gulgasht Colony, Multan.", "map_link": "https://maps.example/x", "hours": "10 am to 11 pm",
+            "phone": "0300-1234567", "email": "hello@example.com"}
+    router = IntentRouter(KeywordEmbeddings, session_factory, info, similarity_threshold=0.5, margin=0.05)
+
+    assert router.route("What are your opening hours?") == "We are open 10 am to 11 pm."
+    assert "Pepperoni Passion" in router.route("What's the status of order #1?")
+    assert "couldn't find order #9" in router.route("Track order number 9")
+    assert router.classify("How would I find your place in the city?", KeywordEmbeddings().embed_query(
+        "How would I find your place in the city?")) == ("location", "centroid")
+    assert router.route("Which pizza on the menu is spiciest?") is None  # left to the LLM
+    stats = router.stats()
+    assert (stats["total"], stats["routed"], stats["llm"]) == (4, 3, 1)
+    assert stats["by_intent"][OPEN_QUESTION] == 1 and stats["by_method"] == {"rule": 3}
+
+
+class HashEmbeddings(Embeddings):
+    """Deterministic 16-dimensional vectors derived from the text"""
+
+    def embed_documents(self, texts: list) -> list:
+        return [[b / 255 for b in hashlib.sha256(text.encode()).digest()[:16]] for text in texts]
+
+    def embed_query(self, text: str) -> list:
+        return self.embed_documents([text])[0]
+
+
+class RecordingEmbeddings(HashEmbeddings):
+    """HashEmbeddings that records the texts of every model call"""
+
+    def __init__(self, fail: bool = False):
+        self.calls = []
+        self.fail = fail
+
+    def embed_documents(self, texts: list) -> list:
+        self.calls.append(list(texts))
+        if self.fail:
+            raise RuntimeError("model unavailable")
+        return super().embed_documents(texts)
+
+
+def test_concurrent_queries_share_one_model_call():
+    from backend.app.services.embedding_service import BatchingEmbeddings
+
+    base = RecordingEmbeddings()
+    batcher = BatchingEmbeddings(base, max_batch_size=32, max_wait_ms=50)
+
+    async def ask(texts):
+        return await asyncio.gather(*(batcher.aembed_query(text) for text in texts))
+
+    texts = [f"question {n}" for n in range(6)] + ["question 0"]
+    vectors = asyncio.run(ask(texts))
+    assert vectors == [HashEmbeddings().embed_query(text) for text in texts]
+    assert len(base.calls) == 1 and sorted(base.calls[0]) == sorted(set(texts))  # duplicates embedded once
+
+    assert batcher.embed_query("question 3") == vectors[3]  # cached
+    assert len(base.calls) == 1
+
+    documents = [f"chunk {n}" for n in range(70)]
+    assert batcher.embed_documents(documents) == HashEmbeddings().embed_documents(documents)
+    assert [len(call) for call in base.calls[1:]] == [32, 32, 6]
+
+
+def test_batched_model_failure_reaches_every_caller():
+    from backend.app.services.embedding_service import BatchingEmbeddings
+
+    batcher = BatchingEmbeddings(RecordingEmbeddings(fail=True), max_wait_ms=50)
+
+    async def ask():
+        return await asyncio.gather(*(batcher.aembed_query(f"q{n}") for n in range(3)), return_exceptions=True)
+
+    results = asyncio.run(ask())
+    assert all(isinstance(result, RuntimeError) for result in results)
+
+
+def test_bm25_matches_names_and_prices_and_forgets_removed_chunks():
+    from backend.app.services.retrieval_service import BM25Index
+
+    index = BM25Index()
+    index.add("pepperoni", "Pepperoni Passion pizza, large, $12.99")
+    index.add("veggie", "Veggie Delight pizza with peppers, $10.50")
+    index.add("hours", "We are open from 10 am to 11 pm every day")
+    assert index.search("how much is the pepperoni passion", 3)[0][0] == "pepperoni"
+    assert [doc_id for doc_id, _ in index.search("12.99", 3)] == ["pepperoni"]
+
+    index.remove("pepperoni", "Pepperoni Passion pizza, large, $12.99")
+    assert index.search("pepperoni", 3) == [] and len(index) == 2
+
+
+def test_rank_fusion_rewards_agreement():
+    from backend.app.services.retrieval_service import reciprocal_rank_fusion
+
+    fused = reciprocal_rank_fusion([["a", "b", "c"], ["c", "d"]], k=60)
+    assert max(fused, key=fused.get) == "c"  # third and first beats first alone
+    assert fused["a"] == pytest.approx(1 / 61) and fused["c"] == pytest.approx(1 / 63 + 1 / 61)
+
+
+def test_hybrid_search_finds_exact_dish_the_embedding_misses(tmp_path):
+    import faiss
+    from langchain_community.docstore.in_memory import InMemoryDocstore
+    from langchain_community.vectorstores import FAISS
+    from langchain_core.documents import Document
+
+    from backend.app.services.retrieval_service import hybrid_search
+    from backend.app.services.vectorstore_service import IncrementalIndex
+
+    embeddings = HashEmbeddings()  # vectors carry no meaning, so only keywords can find the dish
+    store = FAISS(embeddings, faiss.IndexFlatL2(16), InMemoryDocstore({}), {})
+    index = IncrementalIndex(str(tmp_path), embeddings, store, compact_after_bytes=1 << 30)
+    menu = [f"Special number {n}: chef's soup of the day with bread" for n in range(30)]
+    menu.append("Pepperoni Passion pizza, large, $12.99")
+    index.ingest("menu.txt", [Document(page_content=text) for text in menu])
+
+    query = "Pepperoni Passion price"
+    hits = hybrid_search(index, query, embeddings.embed_query(query), candidates=5, top_k=3)
+    assert hits[0][1].page_content == "Pepperoni Passion pizza, large, $12.99"
+    assert len(hits) == 3
+
+
+def test_index_commits_segments_and_compacts_to_one_snapshot(tmp_path):
+    import faiss
+    from langchain_community.docstore.in_memory import InMemoryDocstore
+    from langchain_community.vectorstores import FAISS
+    from langchain_core.documents import Document
+
+    from backend.app.services.retrieval_service import vector_search
+    from backend.app.services.vectorstore_service import IncrementalIndex, snapshot_dir
+
+    embeddings = HashEmbeddings()
+    path = str(tmp_path / "index")
+    FAISS(embeddings, faiss.IndexFlatL2(16), InMemoryDocstore({}), {}).save_local(path)
+
+    def load():
+        store = FAISS.load_local(snapshot_dir(path), embeddings, allow_dangerous_deserialization=True)
+        return IncrementalIndex(path, embeddings, store, compact_after_bytes=1 << 30, background_compaction=False)
+
+    def chunks(source: str, count: int) -> list:
+        return [Document(page_content=f"{source} chunk {n}") for n in range(count)]
+
+    index = load()
+    for n in range(6):
+        index.ingest(f"doc{n}.txt", chunks(f"doc{n}", 5))
+    index.ingest("doc1.txt", chunks("doc1", 3))  # replaces: two chunks removed
+    index.remove_source("doc2.txt")
+    index.ingest("doc2.txt", chunks("doc2", 5))  # removed chunks come back
+    assert len(index.vectorstore.segments) < 6  # small commits were merged
+
+    query = embeddings.embed_query("doc2 chunk 4")
+    expected = vector_search(index.snapshot(), query, 8)
+    assert [doc_id for doc_id, _ in vector_search(index.vectorstore, query, 8)] == [doc_id for doc_id, _ in expected]
+    assert len(index.vectorstore.index_to_docstore_id) == 28
+
+    index.compact()
+    assert snapshot_dir(path) != path
+    index.ingest("doc6.txt", chunks("doc6", 2))  # logged in the new generation
+    index.compact()
+    reloaded = load()
+    assert reloaded.sources() == index.sources()
+    assert [doc_id for doc_id, _ in vector_search(reloaded.vectorstore, query, 8)] == \
+        [doc_id for doc_id, _ in vector_search(index.vectorstore, query, 8)]
+    assert len(reloaded.vectorstore.index_to_docstore_id) == 30
+
+
+def test_index_in_use_survives_eviction(tmp_path):
+    import gc
+
+    from backend.app.services.tenant_service import TenantRouter
+
+    class Index:
+        pass
+
+    opened = []
+
+    def open_index(path, tenant_id=None):
+        opened.append(tenant_id)
+        return Index()
+
+    router = TenantRouter(str(tmp_path), open_database=None, open_index=open_index, default=None,
+                          max_databases=1, max_indexes=1)
+    ingesting = router.tenant(1).knowledge_index()
+    router.tenant(2).knowledge_index()  # evicts tenant 1's index while it is still held
+    assert router.tenant(1).knowledge_index() is ingesting  # not a second writer on the same directory
+    assert opened == [1, 2]
+
+    del ingesting
+    router.indexes.evict(1)
+    gc.collect()
+    router.tenant(1).knowledge_index()  # nobody holds it any more, so it is opened afresh
+    assert opened == [1, 2, 1]
+
+
+def test_shared_index_publishes_segments_and_keeps_generations_in_use(tmp_path):
+    import os
+
+    import faiss
+    from langchain_community.docstore.in_memory import InMemoryDocstore
+    from langchain_community.vectorstores import FAISS
+    from langchain_core.documents import Document
+
+    from backend.app.services.retrieval_service import vector_search
+    from backend.app.services.shared_index import SharedIndex
+
+    embeddings = HashEmbeddings()
+    path = str(tmp_path / "shared")
+
+    class Writer:
+        def snapshot(self):
+            return FAISS(embeddings, faiss.IndexFlatL2(16), InMemoryDocstore({}), {})
+
+        def manifest(self):
+            return {}
+
+    def chunks(source: str, count: int) -> list:
+        return [Document(page_content=f"{source} chunk {n}") for n in range(count)]
+
+    writer = SharedIndex(path, embeddings, load_writer=Writer, check_interval=0, grace_seconds=60)
+    worker = SharedIndex(path, embeddings, load_writer=None, check_interval=3600, grace_seconds=0)
+    for n in range(6):
+        writer.ingest(f"doc{n}.txt", chunks(f"doc{n}", 5))
+    segments = set(os.listdir(os.path.join(path, "segments")))
+    writer.ingest("doc1.txt", chunks("doc1", 3))  # replaces: two chunks removed, nothing rewritten
+    assert segments <= set(os.listdir(os.path.join(path, "segments")))
+
+    # The worker has not checked since it opened generation 1 a long time ago
+    stale = os.path.join(path, "generations", f"{worker.generation}.json")
+    os.utime(stale, (0, 0))
+    writer.remove_source("doc2.txt")
+    assert not os.path.exists(stale)
+
+    # A worker that checked recently keeps its generation and segments alive
+    worker._refresh(force=True)
+    in_use = worker.vectorstore
+    held = os.path.join(path, "generations", f"{worker.generation}.json")
+    writer.ingest("doc2.txt", chunks("doc2", 5))
+    writer.ingest("doc6.txt", chunks("doc6", 5))
+    assert os.path.exists(held)
+    query = embeddings.embed_query("doc3 chunk 1")
+    assert vector_search(in_use, query, 1)[0][1].page_content == "doc3 chunk 1"
+
+    worker._refresh(force=True)
+    assert worker.sources() == {f"doc{n}.txt": 3 if n == 1 else 5 for n in range(7)}
+    assert len(worker.vectorstore.index_to_docstore_id) == 33
+    hits = vector_search(worker.vectorstore, embeddings.embed_query("doc2 chunk 4"), 3)
+    assert hits[0][1].page_content == "doc2 chunk 4"
+    assert worker.keyword_search("doc6 chunk", 1)[0][0] in {doc_id for doc_id, _ in vector_search(
+        worker.vectorstore, embeddings.embed_query("doc6 chunk 0"), 33)}
+
+
+def test_audio_cache_evicts_least_recently_used(tmp_path):
+    import os
+
+    from backend.app.services.tts_service import AudioCache
+
+    cache = AudioCache(str(tmp_path), max_bytes=30)
+    for key in ("a", "b", "c"):
+        cache.put(key, key.encode() * 10)
+    assert cache.get("a") == b"a" * 10  # a is now the most recent
+    cache.put("d", b"d" * 10)
+    assert cache.get("b") is None and cache.evictions == 1
+    assert not os.path.exists(tmp_path / "b.pcm")
+
+    reopened = AudioCache(str(tmp_path), max_bytes=30)  # survives a restart
+    assert reopened.stats()["entries"] == 3 and reopened.get("d") == b"d" * 10
+
+
+def test_tts_synthesizes_each_sentence_once(tmp_path):
+    import threading
+
+    from backend.app.services.tts_service import AudioCache, TTSEngine, TTSService
+
+    class Engine(TTSEngine):
+        name = "fake"
+
+        def __init__(self):
+            self.spoken = []
+            self.release = threading.Event()
+
+        def synthesize(self, text: str, voice: str) -> bytes:
+            self.release.wait(5)
+            self.spoken.append(text)
+            return text.encode()
+
+    engine = Engine()
+    service = TTSService(engine, AudioCache(str(tmp_path), max_bytes=1 << 20), workers=4, chunk_bytes=4)
+    first = service.submit("We open at ten.", "en")
+    assert service.submit("We  open at ten.", "en") is first  # in flight: shared, not synthesized again
+    engine.release.set()
+    assert first.result() == b"We open at ten."
+
+    audio = b"".join(service.stream("We open at ten. See you soon!", "en"))
+    assert audio == b"We open at ten.See you soon!"  # in order, the first sentence from the cache
+    assert engine.spoken == ["We open at ten.", "See you soon!"]
+    assert service.stats()["hits"] == 1
+
+
+class ScriptedTranscriber:
+    """Returns the next list of STT events from `script` for every feed()"""
+
+    def __init__(self, *script):
+        self.script = list(script)
+
+    def feed(self, data: bytes) -> list:
+        return self.script.pop(0) if self.script else []
+
+    def close(self) -> list:
+        return []
+
+
+class InstantTTS:
+    """Synthesizes each sentence as its own bytes, immediately"""
+
+    sample_rate = 16000
+
+    def submit(self, sentence: str, voice: str):
+        from concurrent.futures import Future
+
+        future = Future()
+        future.set_result(sentence.encode())
+        return future
+
+
+def _voice_session(transcriber, retrieve, answer):
+    from backend.app.services.voice_service import VoiceSession
+
+    sent, audio = [], []
+
+    async def send_json(event):
+        sent.append(event)
+
+    async def send_bytes(data):
+        audio.append(data)
+
+    session = VoiceSession(transcriber, InstantTTS(), "en", retrieve, answer, send_json, send_bytes)
+    return session, sent, audio
+
+
+def test_voice_turn_reuses_speculative_retrieval_and_speaks_in_order():
+    retrieved = []
+
+    async def retrieve(text):
+        retrieved.append(text)
+        return "context"
+
+    async def answer(text, retrieval):
+        assert retrieval == "context"
+        for token in ("We open ", "at ten. See ", "you soon!"):
+            yield token
+
+    async def scenario():
+        transcriber = ScriptedTranscriber(
+            [{"type": "partial", "text": "when do you open"}],
+            [{"type": "final", "text": "when do you  open"}],
+        )
+        session, sent, audio = _voice_session(transcriber, retrieve, answer)
+        await session.feed(b"\0" * 320)
+        await asyncio.sleep(0)  # the speculative retrieval runs
+        await session.feed(b"\0" * 320)
+        await session.close()
+        return sent, audio
+
+    sent, audio = asyncio.run(scenario())
+    assert retrieved == ["when do you open"]  # the final transcript reused the partial's retrieval
+    assert audio == [b"We open at ten.", b"See you soon!"]
+    assert [e["text"] for e in sent if e["type"] == "sentence"] == ["We open at ten.", "See you soon!"]
+    turn_end = sent[-1]
+    assert turn_end["type"] == "turn_end" and turn_end["timings"]["prefetched"] is True
+    assert {"retrieval_ms", "first_token_ms", "first_audio_ms", "total_ms"} <= set(turn_end["timings"])
+
+
+def test_barge_in_cancels_the_answer_in_flight():
+    state = {"closed": False}
+
+    async def retrieve(text):
+        return "context"
+
+    async def answer(text, retrieval):
+        try:
+            yield "Our specials today are. "
+            await asyncio.sleep(60)  # a slow LLM, still generating
+            yield "never sent"
+        finally:
+            state["closed"] = True
+
+    async def scenario():
+        transcriber = ScriptedTranscriber(
+            [{"type": "final", "text": "What are the specials?"}],
+            [{"type": "speech_start"}],
+        )
+        session, sent, audio = _voice_session(transcriber, retrieve, answer)
+        await session.feed(b"\0" * 320)
+        for _ in range(20):  # let the turn speak its first sentence
+            await asyncio.sleep(0)
+        await session.feed(b"\0" * 320)
+        await asyncio.sleep(0)
+        return sent, audio
+
+    sent, audio = asyncio.run(scenario())
+    types = [e["type"] for e in sent]
+    assert "barge_in" in types and "turn_end" not in types
+    assert audio == [b"Our specials today are."]
+    assert all(e.get("text") != "never sent" for e in sent)
+    assert state["closed"]  # the LLM stream was stopped
+
+
+def test_context_budgeter_drops_overlap_and_keeps_relevant_sentences():
+    from langchain_core.documents import Document
+
+    from backend.app.services.context_service import ContextBudgeter, HeuristicTokenizer
+
+    menu = Document(page_content=(
+        "Our pizzas are baked in a stone oven.\n"
+        "Pepperoni Passion costs $12.99 for a large.\n"
+        "Veggie Delight costs $10.50 for a large."
+    ))
+    # The text splitter repeated the chunk boundary, cutting the copy short
+    overlap = Document(page_content="Veggie Delight costs $10.50\nDelivery is free over $25.\nWe close at 11 pm.")
+
+    unlimited = ContextBudgeter(0).build("How much is the pepperoni passion?", [menu, overlap])
+    assert unlimited.count("Veggie Delight") == 1 and "Delivery is free" in unlimited
+
+    budgeter = ContextBudgeter(budget_tokens=20)
+    context = budgeter.build("How much is the pepperoni passion?", [menu, overlap])
+    assert "Pepperoni Passion costs $12.99" in context
+    assert "We close at 11 pm" not in context
+    assert HeuristicTokenizer().count(context) <= 20
+    stats = budgeter.stats()
+    assert stats["calls"] == 1 and stats["context_tokens_out"] < stats["context_tokens_in"]
+
+
+def test_benchmark_fakes_and_baseline_comparison(monkeypatch, capsys):
+    import os
+
+    # The suite points the app at a scratch directory on import; keep that out of the other tests
+    monkeypatch.setattr(os, "environ", dict(os.environ))
+    from backend.benchmarks import suite
+    from backend.benchmarks.fakes import FakeGeminiModel, HashingEmbeddings
+    from backend.benchmarks.synthetic import synthetic_menu, synthetic_questions
+
+    assert synthetic_questions(6, seed=3) == synthetic_questions(6, seed=3)
+    assert synthetic_menu(seed=3) == synthetic_menu(seed=3) != synthetic_menu(seed=4)
+
+    model = FakeGeminiModel(latency=0)
+
+    async def stream():
+        return [text async for text in GeminiBackend(lambda: model).astream("prompt", 1)]
+
+    assert "".join(asyncio.run(stream())) == model.answer and model.calls == 1
+
+    embeddings = HashingEmbeddings(dim=64)
+    menu, other, query = embeddings.embed_documents(
+        ["Pepperoni Passion pizza $12.99", "Refund policy for late delivery", "pepperoni passion pizza price"])
+    assert sum(a * b for a, b in zip(query, menu)) > sum(a * b for a, b in zip(query, other))
+
+    machine = {"python": "3"}
+    baseline = {"machine": machine, "settings": {}, "metrics": {
+        "search_qps": {"value": 1000.0, "better": suite.HIGHER},
+        "ingest_ms": {"value": 100.0, "better": suite.LOWER},
+    }}
+    current = {"machine": machine, "settings": {}, "metrics": {
+        "search_qps": {"value": 700.0, "better": suite.HIGHER},   # 30% fewer queries: regressed
+        "ingest_ms": {"value": 80.0, "better": suite.LOWER},      # faster
+        "orm_rows_per_s": {"value": 5.0, "better": suite.HIGHER},  # new metric, nothing to compare
+    }}
+    assert suite.compare(baseline, current, tolerance=0.25) == ["search_qps"]
+    assert suite.compare(baseline, current, tolerance=0.35) == []
+    capsys.readouterr()
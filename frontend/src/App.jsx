@@ -62,6 +62,14 @@ export default function App() {
     }
   };
 
+  // "2026-10-19T20:30:00" -> "8:30 PM on Mon, Oct 19", for speaking a reservation slot
+  const formatSlot = (iso) => {
+    const date = new Date(iso);
+    const time = date.toLocaleTimeString([], { hour: "numeric", minute: "2-digit" });
+    const day = date.toLocaleDateString([], { weekday: "short", month: "short", day: "numeric" });
+    return `${time} on ${day}`;
+  };
+
   const normalizeInput = (text) => {
     text = text.toLowerCase().trim();
     const map = {
@@ -412,7 +420,7 @@ export default function App() {
             });
             
             const reservationNumber = response.data.reservation_id;
-            const summary = `Reservation confirmed for ${info.name}, ${info.people} people at ${info.time}. Reservation number: #${reservationNumber}.`;
+            const summary = `Reservation confirmed for ${info.name}, ${info.people} people at ${formatSlot(response.data.slot)}. Your reservation ID is ${reservationNumber}.`;
             addMessage("assistant", summary);
             await speak(summary);
             
@@ -439,7 +447,14 @@ export default function App() {
             );
           } catch (err) {
             console.error("Reservation error:", err.response?.data || err.message);
-            const errorMsg = "Failed to create reservation. Please try again.";
+            const detail = err.response?.data?.detail;
+            let errorMsg = "Failed to create reservation. Please try again.";
+            if (err.response?.status === 409 && detail?.alternatives?.length) {
+              const times = detail.alternatives.map((slot) => formatSlot(slot.time)).join(", ");
+              errorMsg = `Sorry, that time is fully booked. We have tables at ${times}. Please try again with one of those.`;
+            } else if (err.response?.status === 422 && typeof detail === "string") {
+              errorMsg = `${detail}. Please try again.`;
+            }
             addMessage("assistant", errorMsg);
             await speak(errorMsg);
             setStatus("idle");